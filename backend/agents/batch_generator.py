@@ -0,0 +1,181 @@
+import os
+import io
+import glob
+import json
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from agents.project_generator import ProjectGenerator
+from agents.progress import ConsoleReporter
+from agents.storage import LocalStorage, workspace_for
+
+PLAN_FILENAME = 'project_plan.json'
+LOG_TAIL_LINES = 20  # Lines of generator output kept in the report for failed projects
+
+def find_plan_folders(targets):
+    """
+    Resolve command line targets to folders containing a project plan
+    
+    A target may be a plan folder, a project_plan.json file, a glob pattern or a
+    workspace root whose subfolders, or shard subfolders, hold plans.
+    
+    Args:
+        targets (list): Paths and glob patterns
+    
+    Returns:
+        tuple: (plan folders in the order given without duplicates, targets that matched no plan)
+    """
+    folders = []
+    seen = set()
+    unmatched = []
+    for target in targets:
+        matches = sorted(glob.glob(target)) if glob.has_magic(target) else [target]
+        found = []
+        for match in matches:
+            if os.path.basename(match) == PLAN_FILENAME and os.path.isfile(match):
+                found.append(os.path.dirname(match) or '.')
+            elif os.path.isfile(os.path.join(match, PLAN_FILENAME)):
+                found.append(match)
+            elif os.path.isdir(match):
+                # A workspace root: every project with a plan, flat or in its shard
+                storage = LocalStorage(match)
+                found.extend(storage.project_dir(project_id) for project_id in storage.list_projects())
+        if not found:
+            unmatched.append(target)
+        for folder in found:
+            key = os.path.realpath(folder)
+            if key not in seen:
+                seen.add(key)
+                folders.append(folder)
+    return folders, unmatched
+
+def _generate_one(plan_folder, use_existing_folder, force, workers, validate, dedup=None, stream=None):
+    """
+    Generate one project in a worker process, capturing its console output
+    
+    Returns:
+        dict: Report entry for the project
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    entry = {'project': os.path.basename(os.path.normpath(plan_folder)), 'path': plan_folder}
+    try:
+        with contextlib.redirect_stdout(output):
+            # Per-file lines are left out; only messages and summaries are kept for the report
+            generator = ProjectGenerator(workspace_for(plan_folder), ConsoleReporter(per_file=False), console=False, dedup=dedup)
+            ok = generator.generate_project_from_plan(plan_folder, use_existing_folder, force, workers, validate, stream)
+        entry['success'] = ok
+        if generator.manifest is not None:
+            entry['written'] = len(generator.manifest.written)
+            entry['unchanged'] = len(generator.manifest.unchanged)
+            entry['hand_edited'] = len(generator.manifest.hand_edited)
+        if generator.validation is not None:
+            entry['validation'] = generator.validation['summary']
+        if generator.errors:
+            entry['file_errors'] = dict(generator.errors)
+        if not ok:
+            failures = [line for line in output.getvalue().splitlines() if line.startswith('❌')]
+            entry['error'] = failures[0].lstrip('❌ ') if failures else 'Generation failed'
+    except Exception as e:
+        entry['success'] = False
+        entry['error'] = f"{type(e).__name__}: {str(e)}"
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    if not entry['success']:
+        entry['log_tail'] = output.getvalue().splitlines()[-LOG_TAIL_LINES:]
+    return entry
+
+def generate_batch(plan_folders, use_existing_folder=False, force=False, workers=1, validate=True,
+                   processes=None, report_path=None, dedup=None, stream=None):
+    """
+    Generate many projects across a process pool, continuing past failures
+    
+    Args:
+        plan_folders (list): Folders containing a project_plan.json file
+        use_existing_folder (bool): If True, use each plan folder as its project root
+        force (bool): If True, rewrite every file instead of only the ones whose inputs changed
+        workers (int): Threads rendering and writing files within each project
+        validate (bool): If True, check the generated Python files of each project
+        processes (int): Size of the process pool (default: CPU count); 1 runs in this process
+        report_path (str): Where to write the JSON summary report, if anywhere
+        dedup (str): If set, share identical files through each workspace's blob store
+        stream (bool): If True, read every plan incrementally; None decides by each plan's size
+    
+    Returns:
+        dict: Summary report with an entry per project
+    """
+    processes = max(1, min(processes or os.cpu_count() or 1, len(plan_folders) or 1))
+    total = len(plan_folders)
+    print(f"🏗️ Generating {total} project(s) with {processes} process(es)")
+    
+    start = time.perf_counter()
+    entries = []
+    
+    def progress(entry):
+        entries.append(entry)
+        status = '✅' if entry['success'] else '❌'
+        detail = f" - {entry['error']}" if not entry['success'] else ''
+        print(f"{status} [{len(entries)}/{total}] {entry['project']} ({entry['seconds']:.2f}s){detail}", flush=True)
+    
+    if processes == 1:
+        for plan_folder in plan_folders:
+            progress(_generate_one(plan_folder, use_existing_folder, force, workers, validate, dedup, stream))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {
+                pool.submit(_generate_one, plan_folder, use_existing_folder, force, workers, validate, dedup, stream): plan_folder
+                for plan_folder in plan_folders
+            }
+            for future in as_completed(futures):
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    # The worker process died (killed, out of memory, ...)
+                    plan_folder = futures[future]
+                    entry = {'project': os.path.basename(os.path.normpath(plan_folder)), 'path': plan_folder,
+                             'success': False, 'seconds': 0.0, 'error': f"{type(e).__name__}: {str(e)}"}
+                progress(entry)
+    
+    # Report projects in the order they were given, not the order they finished
+    order = {plan_folder: i for i, plan_folder in enumerate(plan_folders)}
+    entries.sort(key=lambda entry: order.get(entry['path'], total))
+    failed = [entry for entry in entries if not entry['success']]
+    report = {
+        'summary': {
+            'projects': total,
+            'succeeded': total - len(failed),
+            'failed': len(failed),
+            'processes': processes,
+            'seconds': round(time.perf_counter() - start, 3),
+            'project_seconds': round(sum(entry['seconds'] for entry in entries), 3),
+        },
+        'failures': [entry['project'] for entry in failed],
+        'projects': entries,
+    }
+    
+    print_batch_summary(report)
+    if report_path:
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=4)
+            print(f"💾 Batch report saved to: {report_path}")
+        except Exception as e:
+            print(f"⚠️ Error saving batch report: {str(e)}")
+    return report
+
+def print_batch_summary(report):
+    """
+    Print the totals of a batch run and the slowest and failed projects
+    """
+    summary = report['summary']
+    print(f"📊 Batch summary: {summary['succeeded']} succeeded, {summary['failed']} failed "
+          f"in {summary['seconds']:.2f}s ({summary['project_seconds']:.2f}s of project time)")
+    if len(report['projects']) > 1:
+        print("⏱️ Slowest projects:")
+        for entry in sorted(report['projects'], key=lambda entry: entry['seconds'], reverse=True)[:5]:
+            print(f"   {entry['project']}: {entry['seconds']:.2f}s")
+    if report['failures']:
+        print("❌ Failed projects:")
+        for entry in report['projects']:
+            if not entry['success']:
+                print(f"   {entry['project']}: {entry['error']}")
@@ -0,0 +1,332 @@
+import os
+import stat
+import hashlib
+import tempfile
+import threading
+
+from agents.file_writer import write_text
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+BLOB_DIRNAME = '.aisa_blobs'
+DEDUP_MODES = ('auto', 'reflink', 'hardlink')
+FICLONE = 0x40049409  # ioctl that clones a file's extents (btrfs, XFS, bcachefs)
+READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+# The blob of empty content: every structure file starts out empty, so it is left behind by each run
+EMPTY_DIGEST = hashlib.sha256(b'').hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed store of generated file contents shared by every project in a workspace.
+    
+    Each distinct content is written once under Workspace/.aisa_blobs, named by its
+    SHA-256 digest, and project files are materialized from it:
+    
+    - reflink: the file is a copy-on-write clone of the blob, an ordinary
+      writable file that shares its disk blocks until it is edited
+    - hardlink: the file is another name for the blob's inode. Blobs are
+      read-only so an editor cannot change every project at once; detach()
+      gives a file a private, writable copy before it is edited by hand
+    - copy: 'auto' on a filesystem without reflinks; files are written as
+      plain copies, since hardlinked files could not be edited in place
+    
+    Files are always replaced, never written through, so regenerating a linked
+    file never touches the blob. If the filesystem refuses the link (another
+    device, too many links), the file is written as a plain copy.
+    """
+    
+    def __init__(self, workspace_path, mode='auto'):
+        """
+        Initialize the store
+        
+        Args:
+            workspace_path (str): Workspace directory the store lives in
+            mode (str): 'reflink', 'hardlink', or 'auto' for reflinks where the filesystem supports them
+                        and plain copies elsewhere
+        """
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{mode}', expected one of: {', '.join(DEDUP_MODES)}")
+        self.root = os.path.join(workspace_path, BLOB_DIRNAME)
+        os.makedirs(self.root, exist_ok=True)
+        if mode == 'auto':
+            mode = 'reflink' if _reflink_supported(self.root) else 'copy'
+        self.mode = mode
+        self.fallbacks = 0  # Files written as plain copies because linking failed
+        self._lock = threading.Lock()
+    
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+    
+    def put(self, data):
+        """
+        Add content to the store unless it is already there
+        
+        Args:
+            data (bytes): File content
+        
+        Returns:
+            str: Path of the blob holding the content
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        try:
+            if os.stat(path).st_size == len(data):
+                return path
+            corrupt = True  # Edited in place through a link; later files get a fresh blob
+        except FileNotFoundError:
+            corrupt = False
+        
+        shard = os.path.dirname(path)
+        os.makedirs(shard, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=shard, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, READ_ONLY)
+            if corrupt:
+                os.replace(tmp_path, path)
+                return path
+            try:
+                # Linking instead of renaming keeps the blob a concurrent writer already stored
+                os.link(tmp_path, path)
+            except FileExistsError:
+                pass
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+    
+    def write_text(self, file_path, content):
+        """
+        Materialize a file with the given text from the store
+        
+        Args:
+            file_path (str): Path to the file
+            content (str): Text to write
+        """
+        if self.mode == 'copy':
+            write_text(file_path, content)
+            return
+        blob = self.put(content.encode('utf-8'))
+        tmp_path = f"{file_path}.aisa-tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            if self.mode == 'reflink':
+                _reflink(blob, tmp_path)
+            else:
+                os.link(blob, tmp_path)
+            os.replace(tmp_path, file_path)
+        except OSError:
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+            with self._lock:
+                self.fallbacks += 1
+            write_text(file_path, content)
+    
+    @staticmethod
+    def detach(file_path):
+        """
+        Replace a hardlinked project file with a private, writable copy of its content
+        
+        Hardlinked files share the blob's read-only inode; this is the copy-on-write
+        step to take before editing one in place. A file left read-only by a blob
+        that has since been pruned is made writable.
+        
+        Args:
+            file_path (str): Path to the file
+        
+        Returns:
+            bool: True if the file was linked or read-only and has been detached
+        """
+        st = os.stat(file_path)
+        if st.st_nlink < 2:
+            if st.st_mode & stat.S_IWUSR:
+                return False
+            os.chmod(file_path, stat.S_IMODE(st.st_mode) | stat.S_IWUSR)
+            return True
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        tmp_path = f"{file_path}.aisa-tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)
+        return True
+    
+    def _blobs(self):
+        for shard in sorted(os.listdir(self.root)):
+            shard_path = os.path.join(self.root, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_path):
+                continue
+            for name in sorted(os.listdir(shard_path)):
+                if not name.startswith('.') and shard + name != EMPTY_DIGEST:
+                    yield shard + name, os.path.join(shard_path, name)
+    
+    def stats(self, verify=False):
+        """
+        Measure how much the store saves across the workspace
+        
+        Logical bytes are what the project files would take as plain copies;
+        physical bytes count every inode once, blobs included. Files cloned by
+        reflink have inodes of their own, so their shared blocks are only
+        visible to the filesystem and are not counted as saved here. The blob
+        of empty content is left out: it holds no data, and counting it would
+        report an inode lost whenever no empty file links to it.
+        
+        Args:
+            verify (bool): If True, re-hash every blob to find ones edited in place
+        
+        Returns:
+            dict: Counts and byte totals
+        """
+        workspace_path = os.path.dirname(self.root)
+        blob_inodes = {}
+        stats = {
+            'mode': self.mode, 'blobs': 0, 'blob_bytes': 0, 'unreferenced_blobs': 0, 'corrupt_blobs': [],
+            'files': 0, 'linked_files': 0, 'logical_bytes': 0, 'physical_bytes': 0, 'inodes': 0,
+        }
+        for digest, path in self._blobs():
+            st = os.stat(path)
+            blob_inodes[(st.st_dev, st.st_ino)] = st.st_size
+            stats['blobs'] += 1
+            stats['blob_bytes'] += st.st_size
+            if st.st_nlink == 1:
+                stats['unreferenced_blobs'] += 1
+            if verify:
+                with open(path, 'rb') as f:
+                    if hashlib.sha256(f.read()).hexdigest() != digest:
+                        stats['corrupt_blobs'].append(digest)
+        
+        seen = set(blob_inodes)
+        linked = set(blob_inodes)
+        try:
+            st = os.stat(self.blob_path(EMPTY_DIGEST))
+            linked.add((st.st_dev, st.st_ino))
+        except FileNotFoundError:
+            pass
+        stats['physical_bytes'] = stats['blob_bytes']
+        for root, dirs, files in os.walk(workspace_path):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                try:
+                    st = os.lstat(os.path.join(root, name))
+                except OSError:
+                    continue
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                key = (st.st_dev, st.st_ino)
+                stats['files'] += 1
+                stats['logical_bytes'] += st.st_size
+                if key in linked:
+                    stats['linked_files'] += 1
+                if key not in seen:
+                    seen.add(key)
+                    stats['physical_bytes'] += st.st_size
+        stats['inodes'] = len(seen)
+        stats['saved_bytes'] = stats['logical_bytes'] - stats['physical_bytes']
+        stats['saved_inodes'] = stats['files'] - stats['inodes']
+        stats['dedup_ratio'] = round(stats['logical_bytes'] / stats['physical_bytes'], 2) if stats['physical_bytes'] else 1.0
+        return stats
+
+
+def _reflink(src_path, dst_path):
+    if fcntl is None:
+        raise OSError("Reflinks are not supported on this platform")
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _reflink_supported(directory):
+    # Probe once by cloning a scratch file inside the store
+    fd, src_path = tempfile.mkstemp(dir=directory, prefix='.probe-')
+    dst_path = src_path + '-clone'
+    try:
+        os.write(fd, b'probe')
+        os.close(fd)
+        _reflink(src_path, dst_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        for path in (src_path, dst_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def prune_blobs(workspace_path):
+    """
+    Delete blob store entries that no project file links to any more
+    
+    A blob with a single link is referenced by nothing but the store. Files
+    cloned by reflink do not depend on their blob, so removing it is safe in
+    every mode; a generator racing with the prune falls back to a plain copy.
+    
+    Args:
+        workspace_path (str): Workspace directory the store lives in
+    
+    Returns:
+        int: Number of blobs removed
+    """
+    removed = 0
+    blob_root = os.path.join(workspace_path, BLOB_DIRNAME)
+    if not os.path.isdir(blob_root):
+        return removed
+    for shard in os.listdir(blob_root):
+        shard_path = os.path.join(blob_root, shard)
+        if len(shard) != 2 or not os.path.isdir(shard_path):
+            continue
+        for name in os.listdir(shard_path):
+            blob_path = os.path.join(shard_path, name)
+            try:
+                if not name.startswith('.') and os.stat(blob_path).st_nlink == 1:
+                    os.remove(blob_path)
+                    removed += 1
+            except OSError:
+                continue
+    return removed
+
+
+def detach_files(paths):
+    """
+    Detach project files from the blob store so they can be edited in place
+    
+    Args:
+        paths (list): Files, or folders whose files are all detached
+    
+    Returns:
+        int: Number of files detached
+    """
+    detached = 0
+    for path in paths:
+        if os.path.isdir(path):
+            file_paths = []
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                file_paths.extend(os.path.join(root, name) for name in files)
+        else:
+            file_paths = [path]
+        for file_path in file_paths:
+            if os.path.isfile(file_path) and not os.path.islink(file_path) and BlobStore.detach(file_path):
+                detached += 1
+    return detached
+
+
+def print_dedup_report(stats):
+    """
+    Print the statistics returned by BlobStore.stats()
+    
+    Args:
+        stats (dict): Store statistics
+    """
+    mb = 1024 * 1024
+    print(f"🗄️ Blob store ({stats['mode']}): {stats['blobs']} blobs, {stats['blob_bytes'] / mb:.2f} MB, "
+          f"{stats['unreferenced_blobs']} unreferenced")
+    print(f"📊 {stats['files']} files, {stats['linked_files']} linked to a blob: "
+          f"{stats['logical_bytes'] / mb:.2f} MB logical, {stats['physical_bytes'] / mb:.2f} MB physical "
+          f"(ratio {stats['dedup_ratio']}x, {stats['saved_bytes'] / mb:.2f} MB and {stats['saved_inodes']} inodes saved)")
+    if stats['corrupt_blobs']:
+        print(f"⚠️ {len(stats['corrupt_blobs'])} blob(s) no longer match their digest (edited in place through a link):")
+        for digest in stats['corrupt_blobs']:
+            print(f"   {digest}")
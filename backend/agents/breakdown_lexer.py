@@ -0,0 +1,330 @@
+import os
+import keyword
+from agents.structure_parser import EXTENSIONLESS_FILES
+
+# Field labels used by the planner, mapped to the record key they fill.
+# Labels are compared case-insensitively after stripping bullets and whitespace.
+FIELD_LABELS = {
+    'purpose': 'purpose',
+    'primary purpose': 'purpose',
+    'main purpose': 'purpose',
+    'key functions': 'key_funcs',
+    'key classes': 'key_funcs',
+    'key classes/functions': 'key_funcs',
+    'key functions/classes': 'key_funcs',
+    'key classes and functions': 'key_funcs',
+    'key components': 'key_funcs',
+    'dependencies': 'deps',
+    'imports': 'deps',
+    'dependencies/imports': 'deps',
+    'interactions': 'interactions',
+    'interacts with': 'interactions',
+}
+
+# Prefixes that explicitly introduce a file section, e.g. "File: src/main.py"
+HEADER_PREFIXES = ('file:', 'filename:', 'file path:', 'path:')
+
+BULLET_CHARS = '*-•+'
+PATH_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-./\\')
+
+# "... in the src directory", "... under utils/ folder"
+HINT_WORDS = frozenset(('in', 'within', 'under', 'inside', 'the'))
+HINT_NOUNS = frozenset(('directory', 'folder', 'dir'))
+
+def _strip_decorations(text):
+    # Markdown emphasis and code spans around paths: **src/main.py**, `src/main.py`, _src/main.py_
+    text = text.strip().strip('*`"\'').strip()
+    # Underscores are emphasis only when they wrap the text, so __init__.py keeps its name
+    while len(text) > 1 and text[0] == text[-1] == '_' and not text[2:-2].isidentifier():
+        text = text[1:-1].strip()
+    return text
+
+def _looks_like_path(text):
+    """
+    Check whether a token looks like a file or directory path
+    
+    Args:
+        text (str): Candidate token, already stripped
+    
+    Returns:
+        bool: True if the token could name a file in the project
+    """
+    if not text or not PATH_CHARS.issuperset(text):
+        return False
+    name = text.replace('\\', '/').rstrip('/').rsplit('/', 1)[-1]
+    if not any(c.isalpha() for c in name):
+        return False
+    if '/' in text or '\\' in text:
+        return True
+    # Bare file names need an extension or must be special files like __init__.py
+    return ('.' in name.strip('.')) or (name.startswith('__') and name.endswith('__'))
+
+def match_header(line):
+    """
+    Extract the file path from a line that starts a file section
+    
+    Recognized forms include "src/main.py", "src/main.py:", "File: src/main.py",
+    "### src/main.py", "1. `src/main.py`" and "**src/main.py**:".
+    
+    Args:
+        line (str): A line of the file breakdown, already stripped
+    
+    Returns:
+        str: The raw file path, or None if the line is not a section header
+    """
+    text = line
+    lowered = text.lower()
+    for prefix in HEADER_PREFIXES:
+        if lowered.startswith(prefix):
+            candidate = _strip_decorations(text[len(prefix):]).rstrip(':').strip()
+            candidate = _strip_decorations(candidate)
+            return candidate if _looks_like_path(candidate) else None
+    
+    # Bullet lines hold field values ("- src/utils.py"), never headers
+    if text[0] in BULLET_CHARS and not text.startswith('**'):
+        return None
+    
+    # Markdown headings and numbered lists
+    text = text.lstrip('#').strip()
+    digits = 0
+    while digits < len(text) and text[digits].isdigit():
+        digits += 1
+    if digits and digits < len(text) and text[digits] in '.)':
+        text = text[digits + 1:].strip()
+    
+    candidate = _strip_decorations(text)
+    if candidate.endswith(':'):
+        candidate = _strip_decorations(candidate[:-1])
+    # Paths never contain spaces, so anything else is prose
+    if ' ' in candidate:
+        return None
+    return candidate if _looks_like_path(candidate) else None
+
+def _match_field(line):
+    """
+    Split a "Label: value" line into the record key and the value
+    
+    Args:
+        line (str): A line of the file breakdown, already stripped
+    
+    Returns:
+        tuple: (record key, value) or (None, None) if the line is not a known field
+    """
+    text = line.lstrip(BULLET_CHARS).strip()
+    label, sep, value = text.partition(':')
+    if not sep:
+        return None, None
+    key = FIELD_LABELS.get(_strip_decorations(label).lower())
+    if key is None:
+        return None, None
+    return key, _strip_decorations(value)
+
+def _find_dir_hint(line):
+    """
+    Find a directory hint such as "in the utils directory" in a line
+    
+    Args:
+        line (str): A line of the file breakdown
+    
+    Returns:
+        str: The hinted directory, or None
+    """
+    words = line.split()
+    for i in range(len(words) - 2):
+        if words[i].lower() in HINT_WORDS and words[i + 2].lower().rstrip('.,;:)') in HINT_NOUNS:
+            directory = words[i + 1]
+            if PATH_CHARS.issuperset(directory) and directory.lower() not in HINT_WORDS:
+                return directory
+    return None
+
+def _new_record(raw_path, line):
+    return {
+        'raw_path': raw_path,
+        'lines': [line],
+        'purpose': None,
+        'key_funcs': None,
+        'deps': None,
+        'interactions': None,
+        'dir_hint': None,
+    }
+
+def _finish_record(record):
+    record['section'] = '\n'.join(record.pop('lines')).strip()
+    record['purpose'] = record['purpose'] or "No purpose specified"
+    record['key_funcs'] = record['key_funcs'] or "None"
+    record['deps'] = record['deps'] or "None"
+    record['interactions'] = record['interactions'] or "None"
+    return record
+
+def iter_file_records(lines):
+    """
+    Tokenize a file breakdown into one structured record per file in a single pass
+    
+    Every line is inspected exactly once, so the cost is linear in the size of the
+    breakdown and independent of how it is formatted. Lines may come from any
+    iterable, which lets callers stream very large breakdowns.
+    
+    Args:
+        lines (iterable): Lines of the file breakdown
+    
+    Yields:
+        dict: Records with 'raw_path', 'section', 'purpose', 'key_funcs', 'deps',
+              'interactions' and 'dir_hint' keys
+    """
+    record = None
+    list_key = None  # Field whose value continues on the following bullet lines
+    needs_hint = False
+    
+    for line in lines:
+        line = line.rstrip('\r\n')
+        stripped = line.strip()
+        if not stripped:
+            if record is not None:
+                record['lines'].append('')
+            continue
+        
+        raw_path = match_header(stripped)
+        if raw_path is not None:
+            if record is not None:
+                yield _finish_record(record)
+            record = _new_record(raw_path, line)
+            list_key = None
+            needs_hint = '/' not in raw_path and '\\' not in raw_path
+            continue
+        
+        # Text before the first file section is preamble
+        if record is None:
+            continue
+        record['lines'].append(line)
+        
+        key, value = _match_field(stripped)
+        if key is not None:
+            list_key = None
+            if value:
+                if record[key] is None:
+                    record[key] = value
+            elif record[key] is None:
+                list_key = key
+        elif list_key is not None and stripped[0] in BULLET_CHARS:
+            item = _strip_decorations(stripped.lstrip(BULLET_CHARS))
+            record[list_key] = f"{record[list_key]}, {item}" if record[list_key] else item
+        else:
+            list_key = None
+        
+        # Directory hints only matter for bare file names without a folder
+        if record['dir_hint'] is None and needs_hint and ('dir' in stripped or 'folder' in stripped):
+            record['dir_hint'] = _find_dir_hint(stripped)
+    
+    if record is not None:
+        yield _finish_record(record)
+
+def parse_file_breakdown(file_breakdown):
+    """
+    Parse a file breakdown string into structured file records
+    
+    Args:
+        file_breakdown (str): The file breakdown text from the project plan
+    
+    Returns:
+        list: File records in breakdown order, see iter_file_records
+    """
+    return list(iter_file_records(file_breakdown.splitlines()))
+
+def split_key_items(key_funcs):
+    """
+    Split a key functions value into the classes and functions it names
+    
+    Commas inside parentheses do not split items, so "TypingTest class (start_test,
+    process_input)" names one class with two methods and "draw(x, y)" keeps its
+    parameters. Items that are prose rather than identifiers are left out.
+    
+    Args:
+        key_funcs (str): The record's key_funcs value
+    
+    Returns:
+        list: (name, params, methods) tuples in order; params is the text between the
+              parentheses of "name(params)", methods the names listed after "Name class"
+    """
+    pieces = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(key_funcs):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth = max(0, depth - 1)
+        elif char == ',' and depth == 0:
+            pieces.append(key_funcs[start:i])
+            start = i + 1
+    pieces.append(key_funcs[start:])
+    
+    items = []
+    for piece in pieces:
+        piece = _strip_decorations(piece.strip().rstrip('.;'))
+        if not piece or piece.lower() == 'none':
+            continue
+        head, paren, rest = piece.partition('(')
+        # An unclosed parenthesis runs to the end of the item
+        inside = rest.rsplit(')', 1)[0].strip() if paren else ''
+        words = head.split()
+        methods = []
+        # "NumberGuesser class (generate_number, check_guess)" lists the class's methods;
+        # "generate_text function (returns a string)" describes the function
+        if len(words) == 2 and words[1].lower() in ('class', 'function'):
+            name, params = words[0], ''
+            if words[1].lower() == 'class':
+                for method in inside.split(','):
+                    method = _strip_decorations(method.split('(')[0])
+                    if method.isidentifier() and not keyword.iskeyword(method) and method not in methods:
+                        methods.append(method)
+        else:
+            name, params = head.strip(), inside
+        if name.isidentifier() and not keyword.iskeyword(name):
+            items.append((name, params, methods))
+    return items
+
+def strip_root_dir(path, root_dir_name):
+    """
+    Remove a leading project root directory from a path
+    
+    Args:
+        path (str): Path as written in the plan
+        root_dir_name (str): Name of the project root directory
+    
+    Returns:
+        str: Path relative to the project root
+    """
+    if root_dir_name and (path.startswith(f"{root_dir_name}/") or path.startswith(f"{root_dir_name}\\")):
+        return path[len(root_dir_name)+1:]
+    return path
+
+def resolve_record_path(record, root_dir_name):
+    """
+    Work out the project-relative path of the file a record describes
+    
+    Args:
+        record (dict): A record from iter_file_records
+        root_dir_name (str): Name of the project root directory in the plan
+    
+    Returns:
+        tuple: (normalized path or None, reason the record was skipped or None)
+    """
+    # Windows separators are read as folders, as in the project structure
+    file_path = (record['raw_path'] or '').strip().replace('\\', '/')
+    if not file_path:
+        return None, "no file path"
+    
+    # Skip if file path is actually a directory or doesn't look like a file
+    if file_path.endswith('/'):
+        return None, "directory"
+    file_name = os.path.basename(file_path)
+    if '.' not in file_name and file_name not in EXTENSIONLESS_FILES and not (file_name.startswith('__') and file_name.endswith('__')):
+        return None, "not a file"
+    
+    file_path = strip_root_dir(file_path, root_dir_name)
+    
+    # Bare file names may be placed by a hint like "in the utils directory"
+    if '/' not in file_path and record['dir_hint']:
+        file_path = os.path.join(strip_root_dir(record['dir_hint'].replace('\\', '/'), root_dir_name), file_path)
+    
+    return os.path.normpath(file_path), None
@@ -0,0 +1,229 @@
+import os
+import time
+import threading
+
+DEADLINE_HEADER = 'X-Request-Deadline'
+DEFAULT_DEADLINE_SECONDS = 120.0
+
+# Streamed generations report progress as they go and stop when their client disconnects,
+# so they get a longer budget than a request waiting for a single response
+DEFAULT_STREAM_DEADLINE_SECONDS = 900.0
+
+# Header values above this are absolute Unix timestamps rather than budgets in seconds
+_ABSOLUTE_THRESHOLD = 1e9
+
+# Disconnect probes are system calls; per-file checks reuse the last answer for this long
+PROBE_INTERVAL_SECONDS = 0.25
+
+
+def stream_deadline_seconds():
+    """
+    Default and maximum deadline of a streamed generation
+    
+    Returns:
+        float: AISA_GENERATE_DEADLINE_SECONDS, or DEFAULT_STREAM_DEADLINE_SECONDS if unset
+    """
+    return float(os.environ.get('AISA_GENERATE_DEADLINE_SECONDS') or DEFAULT_STREAM_DEADLINE_SECONDS)
+
+
+class Cancelled(BaseException):
+    """
+    Raised when work stops because its deadline passed or its client went away
+    
+    Like asyncio.CancelledError it is not an Exception, so the broad error
+    handlers of the planning and generation steps let it through.
+    """
+    
+    def __init__(self, reason, stage=None):
+        """
+        Initialize the error
+        
+        Args:
+            reason (str): 'deadline' or 'disconnected'
+            stage (str): What was running when the cancellation was noticed
+        """
+        self.reason = reason
+        self.stage = stage
+        what = 'deadline exceeded' if reason == 'deadline' else 'client disconnected'
+        super().__init__(f"{what} during {stage}" if stage else what)
+
+
+class Deadline:
+    """
+    Time budget of a request, shared by everything that works on its behalf.
+    
+    A deadline expires at a fixed monotonic time and can also be cancelled
+    explicitly or by an optional probe that reports whether the client is still
+    connected. Long-running steps call check() between units of work and
+    size their own timeouts with remaining(), so an abandoned request stops
+    consuming model quota and worker time.
+    """
+    
+    def __init__(self, seconds=None, probe=None):
+        """
+        Initialize the deadline
+        
+        Args:
+            seconds (float): Budget from now; None never expires
+            probe (callable): Returns True once the client has disconnected
+        """
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self.probe = probe
+        self.reason = None
+        self._cancelled = threading.Event()
+        self._probed_at = 0.0
+    
+    @classmethod
+    def from_header(cls, value, default_seconds=None, probe=None):
+        """
+        Build a deadline from an X-Request-Deadline header value
+        
+        The header carries either the client's remaining budget in seconds or an
+        absolute Unix timestamp. A server default bounds what the client asks for.
+        
+        Args:
+            value (str): Header value, or None if the header is absent
+            default_seconds (float): Budget when there is no valid header; also the maximum.
+                                     Defaults to AISA_REQUEST_DEADLINE_SECONDS or DEFAULT_DEADLINE_SECONDS
+            probe (callable): Returns True once the client has disconnected
+        
+        Returns:
+            Deadline: The deadline
+        """
+        if default_seconds is None:
+            default_seconds = float(os.environ.get('AISA_REQUEST_DEADLINE_SECONDS') or DEFAULT_DEADLINE_SECONDS)
+        seconds = default_seconds
+        try:
+            requested = float(value)
+        except (TypeError, ValueError):
+            requested = None
+        if requested is not None:
+            if requested > _ABSOLUTE_THRESHOLD:
+                requested -= time.time()
+            seconds = max(0.0, min(requested, default_seconds))
+        return cls(seconds, probe)
+    
+    def remaining(self):
+        """
+        Seconds left before the deadline
+        
+        Returns:
+            float: Remaining time, never negative; None if the deadline never expires
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def cancel(self, reason='disconnected'):
+        """
+        Cancel the work explicitly; the first reason given is kept
+        
+        Args:
+            reason (str): 'deadline' or 'disconnected'
+        """
+        if self.reason is None:
+            self.reason = reason
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self):
+        """
+        Whether the deadline passed or the work was cancelled
+        
+        Returns:
+            bool: True once the work should stop
+        """
+        if self._cancelled.is_set():
+            return True
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            self.cancel('deadline')
+            return True
+        if self.probe is not None:
+            now = time.monotonic()
+            if now - self._probed_at >= PROBE_INTERVAL_SECONDS:
+                self._probed_at = now
+                if self.probe():
+                    self.cancel('disconnected')
+                    return True
+        return False
+    
+    def check(self, stage=None):
+        """
+        Stop the current work if it was cancelled
+        
+        Args:
+            stage (str): What is running, for the error message
+        
+        Raises:
+            Cancelled: If the deadline passed or the client disconnected
+        """
+        if self.cancelled:
+            raise Cancelled(self.reason, stage)
+    
+    def run(self, func, stage=None):
+        """
+        Call a blocking function on a helper thread and give up on it once cancelled
+        
+        The abandoned call keeps its thread until it returns, so it should be given
+        remaining() as its own timeout; its result is discarded.
+        
+        Args:
+            func (callable): Function without arguments
+            stage (str): What is running, for the error message
+        
+        Returns:
+            The value returned by func
+        
+        Raises:
+            Cancelled: If the deadline passed or the client disconnected first
+        """
+        self.check(stage)
+        outcome = {}
+        finished = threading.Event()
+        
+        def call():
+            try:
+                outcome['value'] = func()
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                finished.set()
+        
+        threading.Thread(target=call, daemon=True, name=f"deadline-{stage or 'call'}").start()
+        while not finished.wait(PROBE_INTERVAL_SECONDS):
+            self.check(stage)
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['value']
+
+
+class CancellationCounter:
+    """
+    Counts of work cancelled per endpoint and reason, for the metrics endpoint
+    """
+    
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+    
+    def record(self, endpoint, reason):
+        """
+        Count one cancellation
+        
+        Args:
+            endpoint (str): Endpoint whose work was cancelled
+            reason (str): 'deadline' or 'disconnected'
+        """
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, {'deadline': 0, 'disconnected': 0})
+            counts[reason] = counts.get(reason, 0) + 1
+    
+    def snapshot(self):
+        """
+        Current counts
+        
+        Returns:
+            dict: Endpoint -> reason -> count
+        """
+        with self._lock:
+            return {endpoint: dict(counts) for endpoint, counts in self._counts.items()}
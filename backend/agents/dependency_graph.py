@@ -0,0 +1,318 @@
+import os
+import re
+import ast
+
+# Words of an interactions clause after which referenced files depend on this one: "Used by main.py"
+_BY_WORD = re.compile(r'\bby\b', re.IGNORECASE)
+_CLAUSE_END = re.compile(r'[;\n]|\.\s')
+_TOKEN = re.compile(r'[A-Za-z_][\w./\\-]*')
+
+def module_name(file_path):
+    """
+    Dotted module name of a project-relative Python file path
+    
+    Args:
+        file_path (str): Project-relative path, e.g. 'core/typing_test.py'
+    
+    Returns:
+        str: 'core.typing_test'; a package's __init__.py gives the package name
+    """
+    parts = os.path.splitext(file_path.replace('\\', '/'))[0].split('/')
+    if parts[-1] == '__init__' and len(parts) > 1:
+        parts.pop()
+    return '.'.join(parts)
+
+def module_interface(source):
+    """
+    List the public top-level classes and functions a Python module defines
+    
+    Args:
+        source (str): Module source code
+    
+    Returns:
+        list: Names in definition order; empty if the source does not parse
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    return [node.name for node in tree.body
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith('_')]
+
+def _aliases(file_path):
+    # Every way the plan may refer to a file: paths, dotted module names and their suffixes
+    path = file_path.replace('\\', '/')
+    parts = path.split('/')
+    aliases = {'/'.join(parts[i:]) for i in range(len(parts))}
+    if path.endswith('.py'):
+        dotted = module_name(path).split('.')
+        for i in range(len(dotted)):
+            suffix = '.'.join(dotted[i:])
+            aliases.update((suffix, f"{suffix}.py"))
+    return aliases
+
+def _alias_key(alias):
+    # Last name of an alias, shared by all aliases of a file: 'pkg/mod.py' and 'pkg.mod' -> 'mod'
+    if alias.endswith('.py'):
+        alias = alias[:-3]
+    return alias.rsplit('/', 1)[-1].rsplit('.', 1)[-1]
+
+
+class _Resolver:
+    # Maps a reference to the only file it can mean; aliases are only built for files sharing its last name
+    
+    def __init__(self, nodes):
+        self.by_key = {}
+        for node in nodes:
+            parts = node.replace('\\', '/').split('/')
+            key = _alias_key(parts[-1])
+            self.by_key.setdefault(key, []).append(node)
+            if key == '__init__' and len(parts) > 1 and node.endswith('.py'):
+                # A package is also known by its directory name
+                self.by_key.setdefault(parts[-2], []).append(node)
+        self.aliases = {}
+        self.resolved = {}
+    
+    def get(self, alias):
+        if alias not in self.resolved:
+            matches = []
+            for node in self.by_key.get(_alias_key(alias), ()):
+                if node not in self.aliases:
+                    self.aliases[node] = _aliases(node)
+                if alias in self.aliases[node]:
+                    matches.append(node)
+            # Names shared by several files (main.py, utils) cannot be resolved
+            self.resolved[alias] = matches[0] if len(matches) == 1 else None
+        return self.resolved[alias]
+
+
+def _resolve_deps(deps, resolve):
+    # (import name, file) for every project module in a Dependencies field
+    resolved = []
+    if deps.lower() == 'none':
+        return resolved
+    for dep in deps.split(','):
+        words = dep.split()
+        if not words:
+            continue
+        name = words[1] if words[0] in ('import', 'from') and len(words) > 1 else words[0]
+        # "pkg.module.Class" imports from pkg.module: try the longest known prefix
+        parts = name.strip('`*"\'').split('.')
+        for end in range(len(parts), 0, -1):
+            target = resolve.get('.'.join(parts[:end]))
+            if target is not None:
+                resolved.append(('.'.join(parts[:end]), target))
+                break
+    return resolved
+
+def _resolve_interactions(interactions, resolve):
+    # (file, True if it uses this one) for every file an Interactions field refers to
+    resolved = []
+    if interactions.lower() == 'none':
+        return resolved
+    for clause in _CLAUSE_END.split(interactions):
+        by = _BY_WORD.search(clause)
+        for match in _TOKEN.finditer(clause):
+            token = match.group().rstrip('.-/\\')
+            # Plain words ("game", "data") are prose more often than module names
+            if not any(c in token for c in '._/\\'):
+                continue
+            target = resolve.get(token.replace('\\', '/'))
+            if target is not None:
+                resolved.append((target, by is not None and match.start() > by.start()))
+    return resolved
+
+
+class DependencyGraph:
+    """
+    Dependencies between the files of a breakdown, scheduled in waves.
+    
+    An edge from a file to another means it must be generated after it. Edges
+    come from the Dependencies field (imports of project modules) and from
+    file references in the Interactions field, where "Used by main.py" points
+    the other way. Files in a dependency cycle are merged into one unit and
+    generated together. waves() groups the units into layers whose members
+    only depend on earlier layers, so each layer can be generated in parallel.
+    """
+    
+    def __init__(self, file_paths):
+        """
+        Initialize a graph without edges
+        
+        Args:
+            file_paths (iterable): Project-relative paths of the files, in breakdown order
+        """
+        self.nodes = list(file_paths)
+        self.dependencies = {node: set() for node in self.nodes}  # File -> files it depends on
+        self.imports = {node: {} for node in self.nodes}  # File -> {name in its Dependencies field: project module}
+        self._components = None
+        self._waves = None
+        self._levels = None
+    
+    @classmethod
+    def from_records(cls, records_by_path):
+        """
+        Build the graph of a breakdown
+        
+        Args:
+            records_by_path (dict): Project-relative path -> record with 'deps' and 'interactions' keys
+        
+        Returns:
+            DependencyGraph: The graph
+        """
+        graph = cls(records_by_path)
+        resolve = _Resolver(graph.nodes)
+        
+        # Planners repeat the same field values ("Used by main.py") across many files
+        deps_cache = {}
+        interactions_cache = {}
+        for node, record in records_by_path.items():
+            deps = record.get('deps') or ''
+            if deps not in deps_cache:
+                deps_cache[deps] = _resolve_deps(deps, resolve)
+            for name, target in deps_cache[deps]:
+                graph.add_edge(node, target)
+                if target != node and target.endswith('.py'):
+                    graph.imports[node][name] = target
+            
+            interactions = record.get('interactions') or ''
+            if interactions not in interactions_cache:
+                interactions_cache[interactions] = _resolve_interactions(interactions, resolve)
+            for target, used_by in interactions_cache[interactions]:
+                if used_by:
+                    graph.add_edge(target, node)
+                else:
+                    graph.add_edge(node, target)
+        return graph
+    
+    def add_edge(self, node, dependency):
+        if node != dependency:
+            self.dependencies[node].add(dependency)
+            self._components = self._waves = self._levels = None
+    
+    def edge_count(self):
+        return sum(len(deps) for deps in self.dependencies.values())
+    
+    def cycles(self):
+        """
+        Find the groups of files that depend on each other in a cycle
+        
+        Returns:
+            list: Sorted lists of files, one per cycle
+        """
+        return [component for component in self.components() if len(component) > 1]
+    
+    def components(self):
+        """
+        Strongly connected components, each listed after the components it depends on
+        
+        Returns:
+            list: Sorted lists of files; a file outside any cycle is a component of its own
+        """
+        if self._components is None:
+            self._components = self._tarjan()
+        return self._components
+    
+    def _tarjan(self):
+        # Tarjan's strongly connected components, iteratively to handle long chains
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+        for root in self.nodes:
+            if root in index:
+                continue
+            work = [(root, iter(sorted(self.dependencies[root])))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(self.dependencies[child]))))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+        return components
+    
+    def levels(self):
+        """
+        Wave index of every file: one more than the deepest of its dependencies
+        
+        Returns:
+            dict: File -> wave index, starting at 0
+        """
+        if self._levels is None:
+            # Tarjan emits components dependencies first, so one pass in that order suffices
+            levels = {}
+            for component in self.components():
+                members = set(component)
+                level = 0
+                for member in component:
+                    for dependency in self.dependencies[member]:
+                        if dependency not in members:
+                            level = max(level, levels[dependency] + 1)
+                for member in component:
+                    levels[member] = level
+            self._levels = levels
+        return self._levels
+    
+    def waves(self):
+        """
+        Group the files into waves that can each be generated in parallel
+        
+        Returns:
+            list: Lists of files in breakdown order; every file only depends on files of earlier waves or of its own cycle
+        """
+        if self._waves is None:
+            levels = self.levels()
+            waves = {}
+            for node in self.nodes:
+                waves.setdefault(levels[node], []).append(node)
+            self._waves = [waves[level] for level in sorted(waves)]
+        return self._waves
+    
+    def critical_path(self):
+        """
+        Longest chain of dependencies, which bounds the generation time however many workers there are
+        
+        Returns:
+            list: Files from the first to be generated to the last
+        """
+        levels = self.levels()
+        if not levels:
+            return []
+        node = max(self.nodes, key=lambda node: (levels[node], node))
+        path = [node]
+        while levels[node] > 0:
+            node = max((dependency for dependency in self.dependencies[node] if levels[dependency] == levels[node] - 1),
+                       default=None)
+            if node is None:
+                break
+            path.append(node)
+        return path[::-1]
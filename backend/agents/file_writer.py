@@ -0,0 +1,103 @@
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+class FileWriter:
+    """
+    Runs filesystem work for the generator either inline or on a thread pool.
+    
+    Results always come back in submission order and every failure is captured
+    per item instead of aborting the batch, so serial and parallel runs produce
+    the same files, the same messages and the same manifest.
+    """
+    
+    def __init__(self, workers=1):
+        """
+        Initialize the writer
+        
+        Args:
+            workers (int): Number of threads; 1 runs everything inline on the calling thread
+        """
+        self.workers = max(1, int(workers or 1))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='aisa-writer') if self.workers > 1 else None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+    
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def map(self, func, items):
+        """
+        Call func on every item, in parallel when the writer has more than one worker
+        
+        Args:
+            func (callable): Function taking one item
+            items (iterable): Items to process
+        
+        Returns:
+            list: (item, result, error) tuples in the order of items; error is None on success
+        """
+        items = list(items)
+        
+        def call(item):
+            try:
+                return item, func(item), None
+            except Exception as e:
+                return item, None, e
+        
+        if self._executor is None or len(items) < 2:
+            return [call(item) for item in items]
+        return list(self._executor.map(call, items))
+    
+    def make_dirs(self, root_path, dir_paths):
+        """
+        Create directories level by level, parents before children
+        
+        Directories on the same level do not depend on each other and are created
+        concurrently; each level waits for the one above it.
+        
+        Args:
+            root_path (str): Directory the paths are relative to
+            dir_paths (iterable): Relative directory paths
+        
+        Returns:
+            list: (relative path, error) for every directory that could not be created
+        """
+        levels = {}
+        for dir_path in set(dir_paths):
+            if dir_path and dir_path != '.':
+                levels.setdefault(dir_path.count(os.sep), []).append(dir_path)
+        
+        errors = []
+        for depth in sorted(levels):
+            results = self.map(lambda dir_path: os.makedirs(os.path.join(root_path, dir_path), exist_ok=True), sorted(levels[depth]))
+            errors.extend((dir_path, error) for dir_path, _, error in results if error is not None)
+        return errors
+
+def write_text(file_path, content):
+    """
+    Write text to a file as UTF-8
+    
+    A file sharing its inode with a blob store entry is unlinked first, so the
+    new content never reaches the blob or the other projects linked to it. So
+    is a read-only file left behind by a blob store that has since been pruned.
+    
+    Args:
+        file_path (str): Path to the file
+        content (str): Text to write
+    """
+    try:
+        st = os.stat(file_path)
+        if st.st_nlink > 1 or not st.st_mode & stat.S_IWUSR:
+            os.remove(file_path)
+    except FileNotFoundError:
+        pass
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(content)
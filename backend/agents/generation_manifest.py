@@ -0,0 +1,171 @@
+import os
+import json
+import hashlib
+
+MANIFEST_FILENAME = '.aisa_manifest.json'
+
+
+def hash_text(text):
+    """
+    Hash a piece of text for manifest comparisons
+    
+    Args:
+        text (str): Text to hash
+    
+    Returns:
+        str: Hex SHA-256 digest of the UTF-8 encoded text
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_file(file_path):
+    """
+    Hash the current content of a file on disk
+    
+    Args:
+        file_path (str): Path to the file
+    
+    Returns:
+        str: Hex SHA-256 digest of the file content, or None if it cannot be read
+    """
+    try:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+class GenerationManifest:
+    """
+    Record of what the generator wrote into a project, used for incremental regeneration.
+    
+    Each entry maps a project-relative output path to the hash of the breakdown
+    section it was rendered from, the generator version that rendered it and the
+    hash of the content that was written.
+    """
+    
+    def __init__(self, project_root_path, generator_version):
+        """
+        Initialize the manifest for a project
+        
+        Args:
+            project_root_path (str): Path to the project root directory
+            generator_version (str): Version of the generator rendering this run
+        """
+        self.project_root_path = project_root_path
+        self.generator_version = generator_version
+        self.manifest_path = os.path.join(project_root_path, MANIFEST_FILENAME)
+        self.entries = {}
+        self.written = []
+        self.unchanged = []
+        self.hand_edited = []
+    
+    def load(self):
+        """
+        Load the manifest from disk if one exists
+        """
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data.get('files', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable manifest {self.manifest_path}: {str(e)}")
+            self.entries = {}
+    
+    def save(self):
+        """
+        Write the manifest to disk
+        """
+        data = {
+            'generator_version': self.generator_version,
+            'files': dict(sorted(self.entries.items()))
+        }
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4)
+    
+    @staticmethod
+    def _key(file_path):
+        # Keys are stored with forward slashes so manifests are portable across OSes
+        return file_path.replace(os.sep, '/')
+    
+    def is_up_to_date(self, file_path, source_hash):
+        """
+        Check whether a file was already rendered from the same inputs and is untouched on disk
+        
+        Args:
+            file_path (str): Project-relative path of the output file
+            source_hash (str): Hash of the breakdown section the file is rendered from
+        
+        Returns:
+            bool: True if the file can be left as it is
+        """
+        entry = self.entries.get(self._key(file_path))
+        if not entry:
+            return False
+        if entry.get('source_hash') != source_hash or entry.get('generator_version') != self.generator_version:
+            return False
+        full_path = os.path.join(self.project_root_path, file_path)
+        return hash_file(full_path) == entry.get('content_hash')
+    
+    def is_hand_edited(self, file_path):
+        """
+        Check whether a previously generated file has been modified since it was written
+        
+        Args:
+            file_path (str): Project-relative path of the output file
+        
+        Returns:
+            bool: True if the file on disk no longer matches what the generator wrote
+        """
+        entry = self.entries.get(self._key(file_path))
+        full_path = os.path.join(self.project_root_path, file_path)
+        if not entry or not os.path.exists(full_path):
+            return False
+        return hash_file(full_path) != entry.get('content_hash')
+    
+    def is_unedited(self, file_path):
+        """
+        Check whether a file is exactly what the generator last wrote to it
+        
+        Unlike is_hand_edited(), a file the manifest has no entry for, such as one
+        generated before manifests were kept, is not known to be unedited.
+        
+        Args:
+            file_path (str): Project-relative path of the output file
+        
+        Returns:
+            bool: True if the file has an entry and its content still matches it
+        """
+        entry = self.entries.get(self._key(file_path))
+        if not entry:
+            return False
+        return hash_file(os.path.join(self.project_root_path, file_path)) == entry.get('content_hash')
+    
+    def record(self, file_path, source_hash, content):
+        """
+        Record a file that was just written
+        
+        Args:
+            file_path (str): Project-relative path of the output file
+            source_hash (str): Hash of the breakdown section the file was rendered from
+            content (str): Content that was written
+        """
+        self.entries[self._key(file_path)] = {
+            'source_hash': source_hash,
+            'generator_version': self.generator_version,
+            'content_hash': hash_text(content)
+        }
+    
+    def forget(self, file_path):
+        """
+        Drop a file from the manifest, e.g. after it was removed
+        
+        Args:
+            file_path (str): Project-relative path of the output file
+        """
+        self.entries.pop(self._key(file_path), None)
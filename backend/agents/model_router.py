@@ -0,0 +1,157 @@
+import os
+import threading
+from collections import deque
+
+from agents.token_budget import estimate_planned_files
+
+# Routes in escalation order: a plan the fast model gets wrong is asked of the strong one
+ROUTES = ('fast', 'strong')
+DEFAULT_MODELS = {'fast': 'gemini-2.0-flash-lite', 'strong': 'gemini-2.0-flash-exp'}
+
+# Projects estimated at up to this many files are tried on the fast model first
+DEFAULT_FAST_MAX_FILES = 8
+
+# Projects are grouped by estimated files in buckets this wide for the outcome history
+BUCKET_WIDTH = 2
+# Recent fast-route outcomes kept per bucket, and how many are needed before they sway the choice
+HISTORY_SIZE = 50
+MIN_HISTORY = 5
+# Below this share of valid plans in a bucket, its projects go straight to the strong model...
+MIN_FAST_SUCCESS_RATE = 0.6
+# ...except one in this many, so the history notices when the fast model gets better at them
+EXPLORE_EVERY = 10
+
+# Weight of the latest call in the moving average of route latencies
+LATENCY_SMOOTHING = 0.2
+
+
+class ModelRouter:
+    """
+    Picks the model a plan request is sent to.
+    
+    A cheap local estimate of the project's size (see
+    token_budget.estimate_planned_files) sends small projects to a fast model
+    and large ones to a strong model. Plans the fast model gets wrong are
+    escalated to the strong model by the caller, and every outcome is recorded
+    per size bucket: sizes the fast model keeps failing at skip it, so they do
+    not pay for a failed attempt first.
+    """
+    
+    def __init__(self, models=None, fast_max_files=DEFAULT_FAST_MAX_FILES):
+        """
+        Initialize the router
+        
+        Args:
+            models (dict): Route -> model name; defaults to DEFAULT_MODELS
+            fast_max_files (int): Largest estimated project tried on the fast model; 0 always uses the strong one
+        """
+        self.models = dict(DEFAULT_MODELS, **(models or {}))
+        self.fast_max_files = fast_max_files
+        self._history = {}  # Bucket -> deque of fast-route outcomes
+        self._skipped = {}  # Bucket -> requests sent past the fast route because of its history
+        self._routes = {route: {'calls': 0, 'valid': 0, 'invalid': 0, 'errors': 0, 'escalated': 0,
+                                'seconds_total': 0.0, 'average_seconds': None} for route in ROUTES}
+        self._decisions = {'small': 0, 'complex': 0, 'history': 0, 'explore': 0}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls):
+        """
+        Read the models from AISA_FAST_MODEL and AISA_STRONG_MODEL and the size limit of the
+        fast route from AISA_ROUTE_FAST_MAX_FILES
+        
+        Returns:
+            ModelRouter: The configured router
+        """
+        models = {route: os.environ.get(f"AISA_{route.upper()}_MODEL", '').strip() or DEFAULT_MODELS[route]
+                  for route in ROUTES}
+        fast_max_files = os.environ.get('AISA_ROUTE_FAST_MAX_FILES', '').strip()
+        return cls(models, int(fast_max_files) if fast_max_files else DEFAULT_FAST_MAX_FILES)
+    
+    @property
+    def enabled(self):
+        """
+        Whether any request can go to the fast model
+        """
+        return self.fast_max_files > 0 and self.models['fast'] != self.models['strong']
+    
+    def choose(self, user_prompt):
+        """
+        Pick the routes to try for a plan request
+        
+        Args:
+            user_prompt (str): Natural language description of the project
+        
+        Returns:
+            dict: 'routes' (routes to try in order), 'bucket', 'estimated_files' and 'reason'
+                  ('small', 'complex', 'history', 'explore' or 'disabled')
+        """
+        estimated_files = estimate_planned_files(user_prompt)
+        bucket = estimated_files // BUCKET_WIDTH * BUCKET_WIDTH
+        decision = {'routes': ['strong'], 'bucket': bucket, 'estimated_files': estimated_files}
+        if not self.enabled:
+            decision['reason'] = 'disabled'
+            return decision
+        if estimated_files > self.fast_max_files:
+            reason = 'complex'
+        else:
+            with self._lock:
+                history = self._history.get(bucket, ())
+                failing = len(history) >= MIN_HISTORY and sum(history) / len(history) < MIN_FAST_SUCCESS_RATE
+                if failing:
+                    self._skipped[bucket] = self._skipped.get(bucket, 0) + 1
+                    reason = 'explore' if self._skipped[bucket] % EXPLORE_EVERY == 0 else 'history'
+                else:
+                    reason = 'small'
+            if reason != 'history':
+                decision['routes'] = ['fast', 'strong']
+        decision['reason'] = reason
+        with self._lock:
+            self._decisions[reason] = self._decisions.get(reason, 0) + 1
+        return decision
+    
+    def record(self, route, bucket, outcome, seconds, escalated=False):
+        """
+        Record the outcome of one model call
+        
+        Args:
+            route (str): Route the call went to
+            bucket (int): Size bucket of the request, from choose()
+            outcome (str): 'valid', 'invalid' (the plan failed validation) or 'error' (the call failed)
+            seconds (float): Duration of the call
+            escalated (bool): Whether the request was then sent to the next route
+        """
+        with self._lock:
+            stats = self._routes[route]
+            stats['calls'] += 1
+            stats[outcome if outcome in ('valid', 'invalid') else 'errors'] += 1
+            stats['escalated'] += int(bool(escalated))
+            stats['seconds_total'] += seconds
+            previous = stats['average_seconds']
+            stats['average_seconds'] = seconds if previous is None else previous + LATENCY_SMOOTHING * (seconds - previous)
+            if route == 'fast':
+                self._history.setdefault(bucket, deque(maxlen=HISTORY_SIZE)).append(outcome == 'valid')
+    
+    def snapshot(self):
+        """
+        Current routing statistics
+        
+        Returns:
+            dict: Models, per-route counts and latencies, decision reasons and the fast route's success rate per bucket
+        """
+        with self._lock:
+            routes = {}
+            for route, stats in self._routes.items():
+                entry = dict(stats, model=self.models[route])
+                entry['seconds_total'] = round(stats['seconds_total'], 3)
+                if stats['average_seconds'] is not None:
+                    entry['average_seconds'] = round(stats['average_seconds'], 3)
+                routes[route] = entry
+            return {
+                'enabled': self.enabled,
+                'fast_max_files': self.fast_max_files,
+                'routes': routes,
+                'decisions': dict(self._decisions),
+                'fast_success_rate': {str(bucket): round(sum(history) / len(history), 3)
+                                      for bucket, history in sorted(self._history.items()) if history},
+            }
@@ -0,0 +1,310 @@
+import os
+import json
+import gzip
+import time
+import hashlib
+import tempfile
+import threading
+from types import SimpleNamespace
+
+# 'live' calls the model, 'record' calls it and keeps every answer in a cassette, 'replay' answers from the cassette
+MODEL_TRANSPORTS = ('live', 'record', 'replay')
+
+# Bump whenever cassette entries change shape so old cassettes are refused instead of misread
+CASSETTE_VERSION = 1
+
+# Cassette used when AISA_CASSETTE is not set
+DEFAULT_CASSETTE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                     'cassettes', 'model_calls.json.gz')
+
+
+class CassetteMiss(LookupError):
+    """
+    Raised when a replayed request was never recorded
+    """
+
+
+def request_key(model_name, prompt, generation_config=None):
+    """
+    Hash identifying a model request in a cassette
+    
+    max_output_tokens is left out, since budgets follow the token ledger's
+    calibration and differ between runs; entries record their own budget.
+    
+    Args:
+        model_name (str): Name of the model called
+        prompt (str): The prompt
+        generation_config (dict): Generation settings of the call
+    
+    Returns:
+        str: Hex SHA-256 of the request
+    """
+    config = {key: value for key, value in (generation_config or {}).items() if key != 'max_output_tokens'}
+    payload = json.dumps({'model': model_name, 'prompt': prompt, 'config': config}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _finish_reason(response):
+    try:
+        reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return None
+    return getattr(reason, 'name', None) or str(reason)
+
+
+class Cassette:
+    """
+    Recorded model answers, keyed by request_key()
+    
+    Stored as one JSON document, gzipped if the path ends in .gz; prompts share
+    their template, so they compress to little. Each key maps to the answers
+    recorded for it with the output budget they were given, so a replay picks
+    the one recorded under the same budget when there is one.
+    """
+    
+    def __init__(self, path):
+        """
+        Open a cassette, loading its entries if the file exists
+        
+        Args:
+            path (str): Path to the cassette file
+        
+        Raises:
+            ValueError: If the file is not a cassette of this version
+        """
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get('version') != CASSETTE_VERSION:
+                raise ValueError(f"{path} is not a version {CASSETTE_VERSION} cassette; record it again")
+            self._entries = data.get('entries', {})
+    
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+    
+    def iter_entries(self):
+        """
+        Iterate over the recorded answers
+        
+        Yields:
+            tuple: (request key, entry)
+        """
+        with self._lock:
+            items = [(key, entry) for key, entries in self._entries.items() for entry in entries]
+        yield from items
+    
+    def find(self, key, max_output_tokens=None):
+        """
+        Look up the answer to a request
+        
+        Args:
+            key (str): request_key() of the request
+            max_output_tokens (int): Output budget of the request
+        
+        Returns:
+            dict: The entry recorded under the same budget, else the latest answer that was not cut at
+                  its budget and fits this one; None if there is none
+        """
+        with self._lock:
+            entries = self._entries.get(key, [])
+            for entry in reversed(entries):
+                if entry.get('max_output_tokens') == max_output_tokens:
+                    return entry
+            for entry in reversed(entries):
+                fits = max_output_tokens is None or (entry.get('output_tokens') or 0) <= max_output_tokens
+                if entry.get('finish_reason') != 'MAX_TOKENS' and fits:
+                    return entry
+            return None
+    
+    def add(self, key, entry):
+        """
+        Record an answer, replacing one recorded for the same request and budget
+        
+        Args:
+            key (str): request_key() of the request
+            entry (dict): 'model', 'prompt', 'max_output_tokens', 'text', 'finish_reason',
+                          'prompt_tokens', 'output_tokens' and 'latency' (seconds)
+        """
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            entries[:] = [other for other in entries if other.get('max_output_tokens') != entry.get('max_output_tokens')]
+            entries.append(entry)
+    
+    def save(self):
+        """
+        Write the cassette atomically, so a replay never reads a half-written file
+        """
+        with self._lock:
+            data = json.dumps({'version': CASSETTE_VERSION, 'entries': self._entries}, ensure_ascii=False,
+                              separators=(',', ':'), sort_keys=True).encode('utf-8')
+        if self.path.endswith('.gz'):
+            data = gzip.compress(data, mtime=0)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class RecordingModel:
+    """
+    Model wrapper that calls the model and records every answer in a cassette
+    """
+    
+    def __init__(self, model, model_name, cassette):
+        """
+        Initialize the wrapper
+        
+        Args:
+            model (GenerativeModel): The live model
+            model_name (str): Its name, part of the request key
+            cassette (Cassette): Where answers are recorded
+        """
+        self.model = model
+        self.model_name = model_name
+        self.cassette = cassette
+    
+    def generate_content(self, prompt, generation_config=None, request_options=None):
+        """
+        Call the model and record its answer; same arguments and result as GenerativeModel.generate_content()
+        """
+        started = time.monotonic()
+        response = self.model.generate_content(prompt, generation_config=generation_config,
+                                               request_options=request_options)
+        latency = time.monotonic() - started
+        # Blocked answers have no text; they are not recorded, so a replay fails instead of inventing one
+        text = response.text
+        metadata = getattr(response, 'usage_metadata', None)
+        self.cassette.add(request_key(self.model_name, prompt, generation_config), {
+            'model': self.model_name,
+            'prompt': prompt,
+            'max_output_tokens': (generation_config or {}).get('max_output_tokens'),
+            'text': text,
+            'finish_reason': _finish_reason(response),
+            'prompt_tokens': getattr(metadata, 'prompt_token_count', None),
+            'output_tokens': getattr(metadata, 'candidates_token_count', None),
+            'latency': round(latency, 3),
+        })
+        self.cassette.save()
+        return response
+
+
+class ReplayingModel:
+    """
+    Model stand-in that answers from a cassette, without network access or an API key
+    """
+    
+    def __init__(self, model_name, cassette, latency_scale=1.0):
+        """
+        Initialize the stand-in
+        
+        Args:
+            model_name (str): Name of the model the cassette was recorded with
+            cassette (Cassette): Recorded answers
+            latency_scale (float): Multiple of the recorded latency to wait before answering; 0 answers at once
+        """
+        self.model_name = model_name
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+    
+    def generate_content(self, prompt, generation_config=None, request_options=None):
+        """
+        Answer a request from the cassette; same arguments and result as GenerativeModel.generate_content()
+        
+        Raises:
+            CassetteMiss: If the request was never recorded
+            TimeoutError: If the recorded latency is over the request's timeout
+        """
+        key = request_key(self.model_name, prompt, generation_config)
+        entry = self.cassette.find(key, (generation_config or {}).get('max_output_tokens'))
+        if entry is None:
+            raise CassetteMiss(f"No recorded answer of {self.model_name} for request {key[:12]}; "
+                               f"record it with AISA_MODEL_TRANSPORT=record")
+        delay = (entry.get('latency') or 0) * self.latency_scale
+        timeout = (request_options or {}).get('timeout')
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Replayed call of {self.model_name} took {delay:.1f}s, over its {timeout:.1f}s timeout")
+        if delay > 0:
+            time.sleep(delay)
+        return SimpleNamespace(
+            text=entry['text'],
+            candidates=[SimpleNamespace(finish_reason=entry.get('finish_reason'))],
+            usage_metadata=SimpleNamespace(prompt_token_count=entry.get('prompt_tokens'),
+                                           candidates_token_count=entry.get('output_tokens')),
+        )
+
+
+class ModelTransport:
+    """
+    How the planning agent reaches its models: live, recording to a cassette or replaying one
+    """
+    
+    def __init__(self, mode='live', cassette_path=DEFAULT_CASSETTE_PATH, latency_scale=1.0):
+        """
+        Initialize the transport
+        
+        Args:
+            mode (str): 'live', 'record' or 'replay'
+            cassette_path (str): Cassette file recorded to or replayed from
+            latency_scale (float): Multiple of the recorded latency replayed answers wait
+        
+        Raises:
+            ValueError: If the mode is unknown, or the cassette cannot be read
+            FileNotFoundError: If the cassette to replay does not exist
+        """
+        if mode not in MODEL_TRANSPORTS:
+            raise ValueError(f"Unknown model transport '{mode}'. Use one of: {', '.join(MODEL_TRANSPORTS)}")
+        if mode == 'replay' and not os.path.exists(cassette_path):
+            raise FileNotFoundError(f"Cassette {cassette_path} not found; record it with AISA_MODEL_TRANSPORT=record")
+        self.mode = mode
+        self.latency_scale = max(0.0, latency_scale)
+        self.cassette = Cassette(cassette_path) if mode != 'live' else None
+    
+    @classmethod
+    def from_env(cls):
+        """
+        Read the transport from AISA_MODEL_TRANSPORT, AISA_CASSETTE and AISA_REPLAY_LATENCY_SCALE
+        
+        Returns:
+            ModelTransport: The configured transport
+        """
+        mode = os.environ.get('AISA_MODEL_TRANSPORT', '').strip().lower() or 'live'
+        cassette_path = os.environ.get('AISA_CASSETTE', '').strip() or DEFAULT_CASSETTE_PATH
+        latency_scale = os.environ.get('AISA_REPLAY_LATENCY_SCALE', '').strip()
+        return cls(mode, cassette_path, float(latency_scale) if latency_scale else 1.0)
+    
+    @property
+    def needs_api(self):
+        """
+        Whether models are called over the network, needing google-generativeai and an API key
+        """
+        return self.mode != 'replay'
+    
+    def wrap(self, model_name, factory):
+        """
+        Build the model object for a model name
+        
+        Args:
+            model_name (str): Name of the model
+            factory (callable): Builds the live model; not called when replaying
+        
+        Returns:
+            An object with the generate_content() method of GenerativeModel
+        """
+        if self.mode == 'replay':
+            return ReplayingModel(model_name, self.cassette, self.latency_scale)
+        if self.mode == 'record':
+            return RecordingModel(factory(), model_name, self.cassette)
+        return factory()
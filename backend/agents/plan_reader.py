@@ -0,0 +1,221 @@
+import re
+import json
+
+# Plans at least this large are generated through the streaming path
+STREAMING_THRESHOLD_BYTES = 32 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024  # Characters read from the plan at a time
+
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_HIGH_SURROGATE = re.compile(r'\\u[dD][89abAB][0-9a-fA-F]{2}$')
+_decoder = json.JSONDecoder()
+
+
+class _Scanner:
+    """
+    Minimal incremental JSON scanner over a text file, read a chunk at a time
+    """
+    
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+    
+    def fill(self):
+        """
+        Read the next chunk, dropping the part of the buffer already consumed
+        
+        Returns:
+            bool: False at the end of the file
+        """
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+    
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at character {self.pos} of the plan chunk")
+        self.pos += 1
+    
+    def value(self):
+        """
+        Decode the complete JSON value at the current position
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+    
+    def string_pieces(self, decode=True):
+        """
+        Decode the JSON string at the current position a piece at a time
+        
+        Args:
+            decode (bool): If False, yield the raw pieces, which is enough to skip the string
+        
+        Yields:
+            str: Consecutive parts of the decoded string
+        """
+        self.expect('"')
+        while True:
+            end = self._closing_quote()
+            if end >= 0:
+                piece = self.buffer[self.pos:end]
+                self.pos = end + 1
+                if piece:
+                    yield _decode_piece(piece) if decode else piece
+                return
+            
+            # Hold back an escape sequence that may continue in the next chunk,
+            # including a \uD800-\uDBFF escape that needs the low surrogate after it
+            end = len(self.buffer)
+            hold = end
+            backslash = self.buffer.rfind('\\', max(self.pos, end - 6), end)
+            while backslash >= self.pos and not _is_unescaped(self.buffer, backslash, self.pos):
+                backslash = self.buffer.rfind('\\', max(self.pos, end - 6), backslash)
+            if backslash >= self.pos:
+                escape = self.buffer[backslash:end]
+                if len(escape) < 2 or (escape[1] == 'u' and (len(escape) < 6 or _HIGH_SURROGATE.match(escape))):
+                    hold = backslash
+                    # An incomplete low surrogate keeps its high surrogate company
+                    previous = hold - 6
+                    if len(escape) < 6 and previous >= self.pos and _HIGH_SURROGATE.match(self.buffer, previous, hold) \
+                            and _is_unescaped(self.buffer, previous, self.pos):
+                        hold = previous
+            piece = self.buffer[self.pos:hold]
+            if piece:
+                yield _decode_piece(piece) if decode else piece
+            self.pos = hold
+            if not self.fill():
+                raise ValueError("Unterminated string in plan")
+    
+    def _closing_quote(self):
+        # Index of the quote ending the string, or -1 if it is not in the buffer yet
+        quote = self.buffer.find('"', self.pos)
+        while quote >= 0 and not _is_unescaped(self.buffer, quote, self.pos):
+            quote = self.buffer.find('"', quote + 1)
+        return quote
+
+
+def _is_unescaped(text, index, start):
+    # The character at index is unescaped if an even number of backslashes precede it
+    count = 0
+    while index - count - 1 >= start and text[index - count - 1] == '\\':
+        count += 1
+    return count % 2 == 0
+
+
+def _decode_piece(piece):
+    if '\\' not in piece:
+        return piece
+    return json.loads(f'"{piece}"')
+
+
+class PlanReader:
+    """
+    Reads a project_plan.json without holding its largest string in memory.
+    
+    load() parses every top-level member except the streamed one (the file
+    breakdown by default), whose text is skipped; iter_lines() reads the file
+    again and yields that text line by line. Memory use is bounded by the chunk
+    size and the longest line, not by the size of the plan.
+    """
+    
+    def __init__(self, plan_file_path, streamed_key='file_breakdown', chunk_size=CHUNK_SIZE):
+        """
+        Initialize the reader
+        
+        Args:
+            plan_file_path (str): Path to the project_plan.json file
+            streamed_key (str): Top-level member whose string value is streamed
+            chunk_size (int): Characters read at a time
+        """
+        self.plan_file_path = plan_file_path
+        self.streamed_key = streamed_key
+        self.chunk_size = chunk_size
+        self.streamed = False  # True once load() found the streamed member as a string
+    
+    def _members(self, scanner):
+        scanner.expect('{')
+        if scanner.peek() == '}':
+            return
+        while True:
+            name = scanner.value()
+            scanner.expect(':')
+            yield name
+            if scanner.peek() == ',':
+                scanner.pos += 1
+                continue
+            scanner.expect('}')
+            return
+    
+    def load(self):
+        """
+        Parse the plan, leaving out the text of the streamed member
+        
+        Returns:
+            dict: The project plan without the streamed member
+        """
+        plan = {}
+        with open(self.plan_file_path, 'r', encoding='utf-8', newline='') as f:
+            scanner = _Scanner(f, self.chunk_size)
+            for name in self._members(scanner):
+                if name == self.streamed_key and scanner.peek() == '"':
+                    for _ in scanner.string_pieces(decode=False):
+                        pass
+                    self.streamed = True
+                    plan.pop(name, None)
+                else:
+                    plan[name] = scanner.value()
+        return plan
+    
+    def iter_lines(self):
+        """
+        Stream the lines of the streamed member's text
+        
+        Yields:
+            str: Lines without their line endings
+        """
+        with open(self.plan_file_path, 'r', encoding='utf-8', newline='') as f:
+            scanner = _Scanner(f, self.chunk_size)
+            for name in self._members(scanner):
+                if name != self.streamed_key or scanner.peek() != '"':
+                    scanner.value()
+                    continue
+                # Split like str.splitlines(); a trailing \r may be the first half of \r\n
+                partial = ''
+                for piece in scanner.string_pieces():
+                    lines = (partial + piece).splitlines(True)
+                    last = lines[-1]
+                    if last.endswith('\r') or last.splitlines() == [last]:
+                        partial = lines.pop()
+                    else:
+                        partial = ''
+                    if lines:
+                        yield from ''.join(lines).splitlines()
+                if partial:
+                    yield from partial.splitlines()
+                return
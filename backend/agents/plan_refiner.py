@@ -0,0 +1,324 @@
+import re
+import json
+from agents.breakdown_lexer import iter_file_records, resolve_record_path, strip_root_dir
+
+# Sections of a plan other than the file breakdown, which is refined per file
+PLAN_SECTIONS = ('project_overview', 'technical_requirements', 'project_structure', 'implementation_strategy')
+
+# Words of an instruction that point at a section
+SECTION_KEYWORDS = {
+    'project_overview': ('rename', 'name', 'description', 'describe', 'purpose', 'audience', 'overview', 'feature',
+                         'features'),
+    'technical_requirements': ('gui', 'framework', 'library', 'libraries', 'dependency', 'dependencies', 'package',
+                               'packages', 'version', 'database', 'sqlite', 'postgres', 'api', 'apis', 'requirement',
+                               'requirements', 'tkinter', 'streamlit'),
+    'project_structure': ('folder', 'folders', 'directory', 'directories', 'structure', 'layout', 'move', 'rename',
+                          'split', 'merge', 'module', 'modules', 'file', 'files', 'test', 'tests'),
+    'implementation_strategy': ('phase', 'phases', 'strategy', 'milestone', 'order', 'deploy', 'deployment',
+                                'test', 'tests', 'testing'),
+}
+
+GUI_FRAMEWORKS = ('streamlit', 'tkinter')
+
+_WORD = re.compile(r"[A-Za-z_][\w.+-]*")
+_PATH_TOKEN = re.compile(r"[\w./\\-]+\.\w+|[\w-]+/[\w./\\-]*")
+
+
+class RefinementError(Exception):
+    """
+    Raised when the model's answer to a refinement cannot be applied to the plan
+    """
+
+
+def split_breakdown(file_breakdown, root_dir_name):
+    """
+    Split a file breakdown into its preamble and one section per file
+    
+    Args:
+        file_breakdown (str): The file breakdown text of the plan
+        root_dir_name (str): Name of the project root directory in the plan
+    
+    Returns:
+        tuple: (text before the first file section, list of (project-relative path or None, section text))
+    """
+    lines = file_breakdown.splitlines()
+    sections = []
+    preamble = None
+    for record in iter_file_records(lines):
+        if preamble is None:
+            header = record['section'].split('\n', 1)[0]
+            index = next((i for i, line in enumerate(lines) if line.rstrip('\r\n') == header), 0)
+            preamble = '\n'.join(lines[:index]).strip()
+        file_path, _ = resolve_record_path(record, root_dir_name)
+        sections.append((file_path, record['section']))
+    return (preamble if preamble is not None else file_breakdown.strip()), sections
+
+
+def join_breakdown(preamble, sections):
+    """
+    Rebuild a file breakdown from split_breakdown() parts
+    
+    Args:
+        preamble (str): Text before the first file section
+        sections (list): (path, section text) pairs
+    
+    Returns:
+        str: The breakdown text
+    """
+    parts = [preamble] if preamble else []
+    parts.extend(text for _, text in sections)
+    return '\n\n'.join(parts)
+
+
+def _words(text):
+    return {word.lower().strip('.') for word in _WORD.findall(text)}
+
+
+def _file_aliases(file_path):
+    # Ways an instruction may name a file: its path, its name and its module name
+    name = file_path.rsplit('/', 1)[-1]
+    aliases = {file_path.lower(), name.lower()}
+    if name.endswith('.py'):
+        aliases.add(name[:-3].lower())
+    return aliases
+
+
+def find_scope(plan, instruction):
+    """
+    Work out which sections and files of a plan an instruction affects
+    
+    Sections are picked by keywords; files by name, or because their breakdown
+    section mentions a library or GUI framework the instruction names, so that
+    "use Tkinter instead" reaches the files built on the current framework.
+    
+    Args:
+        plan (dict): The stored project plan
+        instruction (str): The user's change request
+    
+    Returns:
+        dict: 'sections' (list of section names) and 'files' (list of project-relative paths)
+    """
+    words = _words(instruction)
+    lowered = instruction.lower()
+    sections = [section for section in PLAN_SECTIONS
+                if section in plan and words.intersection(SECTION_KEYWORDS[section])]
+    
+    technical = plan.get('technical_requirements') if isinstance(plan.get('technical_requirements'), dict) else {}
+    terms = {framework for framework in GUI_FRAMEWORKS if framework in words}
+    dependencies = {dep.strip().lower() for dep in re.split(r'[,\n]', str(technical.get('dependencies', ''))) if dep.strip()}
+    terms.update(dep for dep in dependencies if dep in words)
+    # Switching GUI framework touches every file built on the current one
+    current_gui = str(technical.get('gui_framework', '')).strip().lower()
+    if terms.intersection(GUI_FRAMEWORKS) and current_gui in GUI_FRAMEWORKS:
+        terms.add(current_gui)
+    if terms and 'technical_requirements' in plan and 'technical_requirements' not in sections:
+        sections.append('technical_requirements')
+    
+    structure = plan.get('project_structure') if isinstance(plan.get('project_structure'), dict) else {}
+    root_dir_name = structure.get('root_directory', '')
+    mentioned = {token.replace('\\', '/').rstrip('.').lower() for token in _PATH_TOKEN.findall(instruction)}
+    files = []
+    _, file_sections = split_breakdown(str(plan.get('file_breakdown', '')), root_dir_name)
+    for file_path, text in file_sections:
+        if file_path is None:
+            continue
+        named = any(alias in mentioned or re.search(rf"\b{re.escape(alias)}\b", lowered)
+                    for alias in _file_aliases(file_path) if len(alias) > 3)
+        uses_term = any(term in text.lower() for term in terms)
+        if (named or uses_term) and file_path not in files:
+            files.append(file_path)
+    
+    # Nothing recognizable: let the model decide from the small sections, without the breakdown
+    if not sections and not files:
+        sections = [section for section in PLAN_SECTIONS if section in plan]
+    return {'sections': [section for section in PLAN_SECTIONS if section in sections], 'files': files}
+
+
+def _scoped_parts(plan, scope, by_path):
+    sections = {section: plan[section] for section in scope['sections']}
+    files = {file_path: by_path[file_path] for file_path in scope['files'] if file_path in by_path}
+    return sections, files
+
+
+def scoped_text(plan, scope):
+    """
+    The plan sections and file breakdown sections a refinement may rewrite, as sent to the model
+    
+    Args:
+        plan (dict): The stored project plan
+        scope (dict): Result of find_scope()
+    
+    Returns:
+        str: JSON text of the sections and file sections in scope
+    """
+    structure = plan.get('project_structure') if isinstance(plan.get('project_structure'), dict) else {}
+    _, file_sections = split_breakdown(str(plan.get('file_breakdown', '')), structure.get('root_directory', ''))
+    sections, files = _scoped_parts(plan, scope, {file_path: text for file_path, text in file_sections if file_path})
+    return json.dumps({'sections': sections, 'files': files}, indent=1, ensure_ascii=False)
+
+
+def build_refine_prompt(plan, instruction, scope):
+    """
+    Build the prompt sending the model only the affected parts of a plan
+    
+    Args:
+        plan (dict): The stored project plan
+        instruction (str): The user's change request
+        scope (dict): Result of find_scope()
+    
+    Returns:
+        str: The prompt
+    """
+    overview = plan.get('project_overview') if isinstance(plan.get('project_overview'), dict) else {}
+    structure = plan.get('project_structure') if isinstance(plan.get('project_structure'), dict) else {}
+    technical = plan.get('technical_requirements') if isinstance(plan.get('technical_requirements'), dict) else {}
+    root_dir_name = structure.get('root_directory', '')
+    _, file_sections = split_breakdown(str(plan.get('file_breakdown', '')), root_dir_name)
+    by_path = {file_path: text for file_path, text in file_sections if file_path}
+    
+    context = {
+        'name': overview.get('name', ''),
+        'description': overview.get('description', ''),
+        'root_directory': root_dir_name,
+        'gui_framework': technical.get('gui_framework', ''),
+        'files': sorted(by_path),
+    }
+    sections, files = _scoped_parts(plan, scope, by_path)
+    
+    return f"""You are a Senior Python Project Planner refining an existing Python project plan.
+
+CHANGE REQUEST: {instruction}
+
+PROJECT CONTEXT (read only):
+{json.dumps(context, indent=1, ensure_ascii=False)}
+
+PLAN SECTIONS YOU MAY CHANGE:
+{json.dumps(sections, indent=1, ensure_ascii=False)}
+
+FILE BREAKDOWN SECTIONS YOU MAY CHANGE (path -> section text):
+{json.dumps(files, indent=1, ensure_ascii=False)}
+
+Apply the change request with the smallest possible edit. Respond with ONLY a JSON object, without markdown or
+explanations, of this form:
+
+{{
+    "sections": {{"<section name>": <complete new value, same shape as given>}},
+    "files": {{"<project-relative path>": "complete new breakdown section for the file, starting with its path on its own line, then - Purpose:, - Key Functions:, - Dependencies: and - Interactions: lines"}},
+    "summary": "string - one sentence describing what changed"
+}}
+
+Only include the sections and files that change. To add a file, include it under "files" with a new path. To remove a
+file, map its path to null. Keep every other section and file out of the answer, and keep the plan Python-only, with
+Streamlit or Tkinter as the only GUI frameworks.
+"""
+
+
+def strip_code_fences(text):
+    """
+    Remove the markdown code fences a model may wrap its JSON answer in
+    
+    Args:
+        text (str): The model's answer
+    
+    Returns:
+        str: The answer without fences and surrounding whitespace
+    """
+    cleaned = text.strip()
+    if cleaned.startswith('```json'):
+        cleaned = cleaned[7:]
+    elif cleaned.startswith('```'):
+        cleaned = cleaned[3:]
+    if cleaned.endswith('```'):
+        cleaned = cleaned[:-3]
+    return cleaned.strip()
+
+
+def parse_model_json(text):
+    """
+    Parse a JSON object answered by the model, tolerating markdown code fences
+    
+    Args:
+        text (str): The model's answer
+    
+    Returns:
+        dict: The parsed object
+    
+    Raises:
+        RefinementError: If the answer is not a JSON object
+    """
+    try:
+        parsed = json.loads(strip_code_fences(text))
+    except json.JSONDecodeError as e:
+        raise RefinementError(f"The model's answer is not valid JSON: {str(e)}")
+    if not isinstance(parsed, dict):
+        raise RefinementError("The model's answer is not a JSON object")
+    return parsed
+
+
+def merge_refinement(plan, delta):
+    """
+    Apply the model's delta to a plan
+    
+    Args:
+        plan (dict): The stored project plan; not modified
+        delta (dict): Parsed answer with 'sections', 'files' and 'summary'
+    
+    Returns:
+        tuple: (refined plan, changes), where changes holds 'sections', 'added', 'modified' and 'removed' lists
+               and the model's 'summary'
+    
+    Raises:
+        RefinementError: If the delta does not fit the plan
+    """
+    refined = dict(plan)
+    changes = {'sections': [], 'added': [], 'modified': [], 'removed': [], 'summary': str(delta.get('summary') or '')}
+    
+    new_sections = delta.get('sections') or {}
+    new_files = delta.get('files') or {}
+    if not isinstance(new_sections, dict) or not isinstance(new_files, dict):
+        raise RefinementError("'sections' and 'files' must be JSON objects")
+    for section, value in new_sections.items():
+        if section not in PLAN_SECTIONS:
+            raise RefinementError(f"Unknown plan section '{section}'")
+        if section in plan and type(value) is not type(plan[section]):
+            raise RefinementError(f"Section '{section}' changed shape")
+        if value != plan.get(section):
+            refined[section] = value
+            changes['sections'].append(section)
+    
+    structure = refined.get('project_structure') if isinstance(refined.get('project_structure'), dict) else {}
+    root_dir_name = structure.get('root_directory', '')
+    preamble, sections = split_breakdown(str(plan.get('file_breakdown', '')), root_dir_name)
+    index = {file_path: i for i, (file_path, _) in enumerate(sections) if file_path}
+    removed = set()
+    for raw_path, text in new_files.items():
+        file_path = raw_path.replace('\\', '/').strip()
+        file_path = strip_root_dir(file_path[2:] if file_path.startswith('./') else file_path, root_dir_name)
+        if text is None:
+            if file_path in index:
+                removed.add(index[file_path])
+                changes['removed'].append(file_path)
+            continue
+        if not isinstance(text, str) or not text.strip():
+            raise RefinementError(f"Breakdown section of '{file_path}' must be text")
+        text = text.strip()
+        record = next(iter_file_records(text.splitlines()), None)
+        if record is None:
+            # The section must start with its path so the generator maps it to the file
+            text = f"{file_path}:\n{text}"
+        else:
+            # The header inside the section is what the generator will read
+            file_path = resolve_record_path(record, root_dir_name)[0] or file_path
+        if file_path in index:
+            if sections[index[file_path]][1] != text:
+                sections[index[file_path]] = (file_path, text)
+                changes['modified'].append(file_path)
+        else:
+            index[file_path] = len(sections)
+            sections.append((file_path, text))
+            changes['added'].append(file_path)
+    
+    if changes['added'] or changes['modified'] or changes['removed']:
+        sections = [section for i, section in enumerate(sections) if i not in removed]
+        refined['file_breakdown'] = join_breakdown(preamble, sections)
+    return refined, changes
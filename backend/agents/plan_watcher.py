@@ -0,0 +1,476 @@
+import os
+import sys
+import time
+import queue
+import errno
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+from agents.project_generator import ProjectGenerator
+from agents.progress import ConsoleReporter
+from agents.storage import workspace_for, read_layout, is_shard_name
+
+PLAN_FILENAME = 'project_plan.json'
+_UNSEEN = object()
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+# Editors either rewrite a plan in place or write a temporary file and rename it over the plan
+PROJECT_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+ROOT_MASK = IN_CREATE | IN_MOVED_TO | IN_ONLYDIR
+
+
+class MtimeIndex:
+    """
+    Index of the plan files under a set of workspace roots and project folders.
+    
+    A scan stats each root (to notice new project folders) and each known plan
+    file; directory listings are only read again when a root's mtime changed.
+    The shard folders of a sharded workspace are tracked as roots themselves.
+    """
+    
+    def __init__(self, roots, project_folders=()):
+        """
+        Initialize the index
+        
+        Args:
+            roots (list): Workspace folders whose subfolders are projects
+            project_folders (list): Individual project folders to watch
+        """
+        self.roots = {root: None for root in roots}
+        self.folders = set(project_folders)
+        self.plans = {}  # Project folder -> (mtime_ns, size) of its plan, or None if it has none yet
+        self._scanned = False
+        self.scan()
+    
+    @staticmethod
+    def _plan_stat(folder):
+        try:
+            stat = os.stat(os.path.join(folder, PLAN_FILENAME))
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _list_root(self, root):
+        try:
+            with os.scandir(root) as entries:
+                folders = [entry.path for entry in entries if entry.is_dir() and not entry.name.startswith('.')]
+        except OSError as e:
+            print(f"⚠️ Cannot list {root}: {str(e)}")
+            return []
+        
+        # The shards of a sharded workspace are roots of their own
+        layout = read_layout(root)
+        if layout is None:
+            return folders
+        projects = []
+        for folder in folders:
+            if is_shard_name(os.path.basename(folder), layout['shard_chars']) and self._plan_stat(folder) is None:
+                projects.extend(self.add_root(folder))
+            else:
+                projects.append(folder)
+        return projects
+    
+    def add_root(self, root):
+        """
+        Start tracking a folder whose subfolders are projects, such as a new shard
+        
+        Returns:
+            list: The project folders it holds; empty if it was already tracked
+        """
+        if root in self.roots:
+            return []
+        try:
+            self.roots[root] = os.stat(root).st_mtime_ns
+        except OSError:
+            return []
+        folders = self._list_root(root)
+        self.folders.update(folders)
+        return folders
+    
+    def scan(self):
+        """
+        Update the index from disk
+        
+        Returns:
+            list: Project folders whose plan was created or modified since the last scan
+        """
+        for root, known_mtime in list(self.roots.items()):
+            try:
+                mtime = os.stat(root).st_mtime_ns
+            except OSError:
+                continue
+            if mtime != known_mtime:
+                self.roots[root] = mtime
+                self.folders.update(self._list_root(root))
+        
+        changed = []
+        for folder in self.folders:
+            current = self._plan_stat(folder)
+            previous = self.plans.get(folder, _UNSEEN)
+            if current != previous:
+                self.plans[folder] = current
+                # Plans present at the first scan are the baseline, not changes
+                if current is not None and (previous is not _UNSEEN or self._scanned):
+                    changed.append(folder)
+        self._scanned = True
+        return sorted(changed)
+    
+    def refresh(self, folder):
+        """
+        Record the current state of one project's plan
+        
+        Returns:
+            bool: True if the plan exists and changed since it was last recorded
+        """
+        self.folders.add(folder)
+        current = self._plan_stat(folder)
+        changed = current is not None and current != self.plans.get(folder)
+        self.plans[folder] = current
+        return changed
+
+
+class PollSource:
+    """
+    Change source that rescans the mtime index at a fixed interval
+    """
+    
+    name = 'mtime poll'
+    
+    def __init__(self, index, interval=0.25):
+        self.index = index
+        self.interval = interval
+        self._next_scan = time.monotonic() + interval
+    
+    def wait(self, timeout):
+        """
+        Wait up to timeout seconds for plan changes
+        
+        Returns:
+            list: Project folders whose plan changed
+        """
+        delay = self._next_scan - time.monotonic()
+        if timeout is not None and timeout < delay:
+            time.sleep(max(0, timeout))
+            return []
+        time.sleep(max(0, delay))
+        self._next_scan = time.monotonic() + self.interval
+        return self.index.scan()
+    
+    def close(self):
+        pass
+
+
+class InotifySource:
+    """
+    Change source backed by Linux inotify, called through ctypes.
+    
+    Every workspace root is watched for new project folders and every project
+    folder for plan writes, so the process sleeps until the kernel reports an
+    event. A kernel queue overflow falls back to one scan of the mtime index.
+    """
+    
+    name = 'inotify'
+    
+    def __init__(self, index):
+        """
+        Initialize the inotify instance and add the watches
+        
+        Raises:
+            OSError: If inotify is unavailable or a watch cannot be added
+        """
+        self.index = index
+        libc_name = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not libc_name:
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'libc has no inotify support')
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches = {}  # Watch descriptor -> (path, is_root)
+        try:
+            for root in index.roots:
+                self._add_watch(root, ROOT_MASK, True)
+            for folder in index.folders:
+                self._add_watch(folder, PROJECT_MASK, False)
+        except OSError:
+            self.close()
+            raise
+    
+    def _add_watch(self, path, mask, is_root):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, f"Cannot watch {path}: {os.strerror(code)}")
+        self.watches[wd] = (path, is_root)
+    
+    def _watch_new_folders(self):
+        watched = {path for path, _ in self.watches.values()}
+        for root in set(self.index.roots) - watched:
+            try:
+                self._add_watch(root, ROOT_MASK, True)
+            except OSError as e:
+                print(f"⚠️ {str(e)}")
+        for folder in self.index.folders - watched:
+            try:
+                self._add_watch(folder, PROJECT_MASK, False)
+            except OSError as e:
+                print(f"⚠️ {str(e)}")
+    
+    def wait(self, timeout):
+        """
+        Wait up to timeout seconds for plan changes
+        
+        Returns:
+            list: Project folders whose plan changed
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + name_length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + name_length
+            
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; the index tells what changed in the meantime
+                changed.update(self.index.scan())
+                self._watch_new_folders()
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            path, is_root = self.watches.get(wd, (None, False))
+            if path is None:
+                continue
+            name = os.fsdecode(name)
+            if is_root:
+                if mask & IN_ISDIR and not name.startswith('.'):
+                    folder = os.path.join(path, name)
+                    layout = read_layout(path)
+                    if layout is not None and is_shard_name(name, layout['shard_chars']):
+                        # A new shard: watch it for projects and pick up those created before the watch
+                        try:
+                            self._add_watch(folder, ROOT_MASK, True)
+                        except OSError as e:
+                            print(f"⚠️ {str(e)}")
+                        projects = self.index.add_root(folder)
+                    else:
+                        projects = [folder]
+                    for project in projects:
+                        try:
+                            self._add_watch(project, PROJECT_MASK, False)
+                        except OSError as e:
+                            print(f"⚠️ {str(e)}")
+                        # The plan may have been written before the watch existed
+                        if self.index.refresh(project):
+                            changed.add(project)
+            elif name == PLAN_FILENAME and self.index.refresh(path):
+                changed.add(path)
+        return sorted(changed)
+    
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_source(index, poll_interval=0.25, use_inotify=True):
+    """
+    Create the most efficient change source available
+    
+    Args:
+        index (MtimeIndex): Index of the watched plans
+        poll_interval (float): Seconds between scans when inotify is unavailable
+        use_inotify (bool): If False, always poll
+    
+    Returns:
+        InotifySource or PollSource: The change source
+    """
+    if use_inotify:
+        try:
+            return InotifySource(index)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify unavailable, polling plan mtimes instead: {str(e)}")
+    return PollSource(index, poll_interval)
+
+
+class PlanWatcher:
+    """
+    Regenerates projects when their project_plan.json is created or modified.
+    
+    Bursts of edits to one plan are debounced into a single regeneration. Due
+    projects go through a bounded queue to a fixed pool of worker threads; a
+    project edited while it is queued or being generated is regenerated once
+    more afterwards, and projects that do not fit in the queue wait for space.
+    """
+    
+    def __init__(self, roots, project_folders=(), use_existing_folder=False, validate=True, workers=2,
+                 queue_size=32, debounce=0.2, poll_interval=0.25, use_inotify=True, on_generated=None, dedup=None):
+        """
+        Initialize the watcher
+        
+        Args:
+            roots (list): Workspace folders whose subfolders are projects
+            project_folders (list): Individual project folders to watch
+            use_existing_folder (bool): If True, use each plan folder as its project root
+            validate (bool): If True, check the generated Python files after each regeneration
+            workers (int): Projects regenerated concurrently
+            queue_size (int): Projects that may wait for a worker
+            debounce (float): Seconds without further edits before a project is regenerated
+            poll_interval (float): Seconds between scans when inotify is unavailable
+            use_inotify (bool): If False, always poll
+            on_generated (callable): Called with (folder, success, seconds since the first edit)
+            dedup (str): If set, share identical files through the workspace blob store
+        """
+        self.use_existing_folder = use_existing_folder
+        self.validate = validate
+        self.debounce = debounce
+        self.on_generated = on_generated
+        self.dedup = dedup
+        self.index = MtimeIndex(roots, project_folders)
+        self.source = create_source(self.index, poll_interval, use_inotify)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.pending = {}  # Project folder -> (due time, time of the first edit)
+        self.active = set()  # Projects queued or being generated
+        self.dirty = {}  # Active projects edited again -> time of the first new edit
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._worker, daemon=True, name=f"plan-watcher-{i}")
+                         for i in range(max(1, workers))]
+    
+    def run(self):
+        """
+        Watch for plan changes until stop() is called
+        """
+        print(f"👀 Watching {len(self.index.folders)} project(s) with {self.source.name}")
+        for thread in self._threads:
+            thread.start()
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                with self._lock:
+                    next_due = min((due for due, _ in self.pending.values()), default=None)
+                    busy = bool(self.active)
+                # Wake at least every second so stop() is noticed, and sooner while
+                # workers may hand back projects that were edited during generation
+                timeout = 1.0 if next_due is None else min(1.0, max(0.0, next_due - now))
+                if busy:
+                    timeout = min(timeout, self.debounce)
+                for folder in self.source.wait(timeout):
+                    self._schedule(folder)
+                self._dispatch()
+        finally:
+            self._stop.set()
+            for _ in self._threads:
+                try:
+                    self.queue.put_nowait(None)
+                except queue.Full:
+                    pass
+            self.source.close()
+    
+    def stop(self):
+        """
+        Ask the watch loop and the workers to finish
+        """
+        self._stop.set()
+    
+    def _schedule(self, folder):
+        now = time.monotonic()
+        with self._lock:
+            if folder in self.active:
+                self.dirty.setdefault(folder, now)
+                return
+            burst = folder in self.pending
+            first_edit = self.pending.get(folder, (None, now))[1]
+            self.pending[folder] = (now + self.debounce, first_edit)
+        if not burst:
+            print(f"📝 Plan changed: {os.path.basename(folder)}")
+    
+    def _dispatch(self):
+        now = time.monotonic()
+        with self._lock:
+            due = sorted((first_edit, folder) for folder, (due_time, first_edit) in self.pending.items() if due_time <= now)
+            for first_edit, folder in due:
+                try:
+                    self.queue.put_nowait((folder, first_edit))
+                except queue.Full:
+                    # Leave it pending; it is retried once a worker frees a slot
+                    self.pending[folder] = (now + self.debounce, first_edit)
+                    continue
+                del self.pending[folder]
+                self.active.add(folder)
+    
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None or self._stop.is_set():
+                return
+            folder, first_edit = item
+            success = self._generate(folder)
+            latency = time.monotonic() - first_edit
+            with self._lock:
+                self.active.discard(folder)
+                edited_again = self.dirty.pop(folder, None)
+                if edited_again is not None:
+                    self.pending[folder] = (time.monotonic() + self.debounce, edited_again)
+            status = '✅ Regenerated' if success else '❌ Failed to regenerate'
+            print(f"{status} {os.path.basename(folder)} {latency:.2f}s after the edit")
+            if self.on_generated:
+                self.on_generated(folder, success, latency)
+    
+    def _generate(self, folder):
+        try:
+            # Workers generate concurrently into one log, so only messages and summaries are printed
+            generator = ProjectGenerator(workspace_for(folder), ConsoleReporter(per_file=False), console=False,
+                                         dedup=self.dedup)
+            return generator.generate_project_from_plan(folder, self.use_existing_folder, validate=self.validate)
+        except Exception as e:
+            print(f"❌ Error regenerating {folder}: {str(e)}")
+            return False
+
+
+def watch(targets, use_existing_folder=False, validate=True, workers=2, debounce=0.2, use_inotify=True, dedup=None):
+    """
+    Watch workspace roots and project folders and regenerate projects when their plan changes
+    
+    Args:
+        targets (list): Workspace roots or folders containing a project_plan.json file
+        use_existing_folder (bool): If True, use each plan folder as its project root
+        validate (bool): If True, check the generated Python files after each regeneration
+        workers (int): Projects regenerated concurrently
+        debounce (float): Seconds without further edits before a project is regenerated
+        use_inotify (bool): If False, poll plan mtimes instead of using inotify
+        dedup (str): If set, share identical files through the workspace blob store
+    """
+    roots = [target for target in targets if not os.path.isfile(os.path.join(target, PLAN_FILENAME))]
+    folders = [target for target in targets if os.path.isfile(os.path.join(target, PLAN_FILENAME))]
+    watcher = PlanWatcher(roots, folders, use_existing_folder, validate, workers,
+                          debounce=debounce, use_inotify=use_inotify, dedup=dedup)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("👋 Stopped watching")
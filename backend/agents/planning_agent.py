@@ -1,153 +1,336 @@
-import google.generativeai as genai
 import os
 from typing import Dict, List, Any
 import json
-from agents.project_generator import generate_project
+import time
+import threading
+from agents.project_generator import ProjectGenerator
+from agents.progress import ConsoleReporter
+from agents.deadline import Cancelled
+from agents.storage import LocalStorage, workspace_for, project_file_path
+from agents.plan_refiner import (find_scope, build_refine_prompt, scoped_text, parse_model_json, merge_refinement,
+                                 strip_code_fences)
+from agents.breakdown_lexer import iter_file_records
+from agents.model_router import ModelRouter, ROUTES
+from agents.model_transport import ModelTransport
+from agents.token_budget import (TokenLedger, MAX_OUTPUT_TOKENS, compact_prompt, estimate_tokens, estimate_plan_output,
+                                 plan_output_budget, refine_output_budget, hit_output_limit, usage_of)
+
+# Replaying recorded model answers needs neither the Gemini client nor network access
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+# Workspace folder where project plans and generated projects are stored
+WORKSPACE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'Workspace')
+
+# Sections every plan must have
+REQUIRED_PLAN_SECTIONS = ('project_overview', 'technical_requirements', 'project_structure', 'file_breakdown',
+                          'implementation_strategy')
+
+def plan_problems(result: str) -> List[str]:
+    """
+    Check a model's answer to a planning prompt, to tell whether a stronger model should be asked instead
+    
+    Args:
+        result (str): The model's answer
+        
+    Returns:
+        List[str]: What is wrong with the plan; empty if it can be saved and generated
+    """
+    try:
+        plan = json.loads(strip_code_fences(result))
+    except json.JSONDecodeError as e:
+        return [f"not valid JSON ({str(e)})"]
+    if not isinstance(plan, dict):
+        return ["not a JSON object"]
+    problems = [f"missing {section}" for section in REQUIRED_PLAN_SECTIONS if section not in plan]
+    overview = plan.get('project_overview')
+    if not isinstance(overview, dict) or not str(overview.get('name', '')).strip():
+        problems.append("no project name")
+    breakdown = plan.get('file_breakdown')
+    if 'file_breakdown' in plan and (not isinstance(breakdown, str)
+                                     or next(iter_file_records(breakdown.splitlines()), None) is None):
+        problems.append("no file sections in file_breakdown")
+    return problems
+
+def build_planning_prompt(user_prompt: str) -> str:
+    """
+    Build the prompt asking the model for the plan of a project
+    
+    Args:
+        user_prompt (str): Natural language description of the desired project
+        
+    Returns:
+        str: The prompt, without the source indentation of its templates
+    """
+    # Create the system prompt for the planning task
+    system_prompt = """You are a Senior Python Project Planner, an expert Python developer and project architect with years of experience 
+    in designing and structuring Python projects. You excel at breaking down complex requirements 
+    into well-organized, modular project structures. You understand best practices for Python 
+    project organization, dependency management, and code architecture.
+    
+    Your task is to analyze user requirements and create detailed project plans that include comprehensive 
+    technical specifications, project structure, and implementation strategies."""
+    
+    # Create the detailed planning prompt
+    planning_prompt = """
+    Based on the following user requirement, create a comprehensive Python project plan:
+    
+    USER REQUIREMENT: {user_prompt}
+    
+    Your task is to analyze this requirement and create a detailed project plan that includes:
+    
+    1. PROJECT OVERVIEW:
+       - Project name and description
+       - Main functionality and purpose
+       - Target audience or use case
+    
+    2. TECHNICAL REQUIREMENTS:
+       - Required Python libraries and dependencies
+       - Recommended Python version
+       - GUI framework choice: Analyze if the project needs a GUI. If yes, choose Streamlit (for web-based, data-driven apps) or Tkinter (for desktop applications). If no GUI needed, specify 'None'.
+       - Database requirements (if any)
+       - External APIs or services needed
+    
+    3. PROJECT STRUCTURE:
+       - Complete folder and file structure
+       - Purpose and responsibility of each directory
+       - Main entry points and configuration files
+    
+    4. FILE BREAKDOWN:
+       - For each Python file that needs to be created:
+         * File path and name
+         * Primary purpose and functionality
+         * Key classes, functions, or components it should contain
+         * Dependencies and imports needed
+         * How it interacts with other files
+    
+    5. IMPLEMENTATION STRATEGY:
+       - Development phases and order of implementation
+       - Critical components that should be built first
+       - Testing strategy and test file requirements
+       - Deployment considerations
+    
+    6. BEST PRACTICES:
+       - Code organization principles to follow
+       - Error handling strategies
+       - Configuration management approach
+       - Documentation requirements
+    
+    IMPORTANT CONSTRAINTS:
+    - Only generate plans for Python projects
+    - For GUI applications, choose between Streamlit (for web-based, data-driven apps) or Tkinter (for desktop applications)
+    - Follow Python best practices and PEP standards
+    - Ensure the project structure is modular and maintainable
+    - Include appropriate testing structure
+    
+    CRITICAL: You MUST respond with ONLY a valid JSON object matching this EXACT schema. Do not include any markdown formatting, code blocks, or explanatory text. All values must be strings (no nested objects or arrays except where explicitly specified):
+    
+    {
+        "project_overview": {
+            "name": "string - project name",
+            "description": "string - detailed project description",
+            "purpose": "string - main functionality and purpose",
+            "audience": "string - target audience or use case"
+        },
+        "technical_requirements": {
+            "python_version": "string - recommended Python version (e.g., '3.9', '3.10', '3.11')",
+            "dependencies": "string - comma-separated list of required libraries",
+            "gui_framework": "string - REQUIRED: Choose 'Streamlit' for web apps, 'Tkinter' for desktop apps, or 'None' if no GUI needed",
+            "gui_framework_justification": "string - REQUIRED: Explain why this GUI choice was made or why no GUI is needed",
+            "database_requirements": "string - database needs description or 'None'",
+            "external_apis": "string - external APIs needed or 'None'",
+            "system_requirements": "string - any special system requirements or 'Standard Python environment'"
+        },
+        "project_structure": {
+            "root_directory": "string - name of the main project directory",
+            "description": "string - overall structure description",
+            "folders": "string - detailed folder structure as text"
+        },
+        "file_breakdown": "string - MANDATORY: Detailed breakdown of ALL files to be created with their exact paths, primary purposes, key functions/classes, dependencies, and file interactions. Format as structured text with clear file sections.",
+        "implementation_strategy": {
+            "development_phases": "string - ordered list of development phases",
+            "test_file_requirements": "string - testing strategy and test files needed"
+        }
+    }
+    
+    IMPORTANT: The file_breakdown field is MANDATORY and must contain detailed information about every file in the project. Do not omit this field.
+    
+    Return ONLY the JSON object with no additional text, markdown formatting, or code blocks.
+    """
+    # The requirement goes in after compacting, so its own lines and indentation are kept as written
+    before, _, after = compact_prompt(planning_prompt).partition('{user_prompt}')
+    return f"{compact_prompt(system_prompt)}\n\n{before}{user_prompt}{after}"
+
+def server_generator(project_dir):
+    """
+    Build the generator for a project the server generates on behalf of a request
+    
+    Per-file lines are left out of the server log, as in batch mode; clients
+    follow a generation through its progress events and the SSE stream.
+    
+    Args:
+        project_dir (str): Path to the project folder
+    
+    Returns:
+        ProjectGenerator: Generator printing only messages and summaries
+    """
+    return ProjectGenerator(workspace_for(project_dir), ConsoleReporter(per_file=False), console=False)
+
+def remove_dropped_files(generator, project_dir, file_paths):
+    """
+    Delete the files a refinement dropped from the breakdown
+    
+    A file is only deleted when the manifest shows it unchanged since it was
+    generated and the project structure no longer lists it; files with no
+    manifest entry, such as those of projects generated before manifests were
+    kept, may have been edited and stay.
+    
+    Args:
+        generator (ProjectGenerator): Generator that just regenerated the project
+        project_dir (str): Path to the project folder
+        file_paths (list): Project-relative paths dropped from the breakdown
+    
+    Returns:
+        list: The paths that were deleted
+    """
+    manifest = generator.manifest
+    removed = []
+    for file_path in file_paths:
+        full_path = project_file_path(project_dir, file_path)
+        if full_path is None or file_path in generator.planned_files or not os.path.isfile(full_path) \
+                or not manifest.is_unedited(file_path):
+            continue
+        os.remove(full_path)
+        manifest.forget(file_path)
+        removed.append(file_path)
+        print(f"🗑️ Removed {file_path}")
+    if removed:
+        manifest.save()
+    return removed
+
+def sanitize_project_name(project_name: str) -> str:
+    """
+    Turn a project name into the folder name used for it in the Workspace
+    
+    Args:
+        project_name (str): Project name from the plan overview
+        
+    Returns:
+        str: Name with spaces and special characters replaced by underscores
+    """
+    return ''.join(c if c.isalnum() else '_' for c in project_name)
 
 class PlanningAgent:
-    def __init__(self):
+    def __init__(self, storage=None):
         """
         Initialize the Planning Agent with Google AI Studio
+        
+        Args:
+            storage (ProjectStorage): Where plans and projects are kept; defaults to the local Workspace
         """
-        # Configure Google AI Studio API
-        api_key = os.getenv('AI_STUDIO_API_KEY')
-        if not api_key:
-            raise ValueError("AI_STUDIO_API_KEY environment variable is required")
+        self.storage = storage or LocalStorage(WORKSPACE_PATH)
+        
+        # Live, recording or replaying model calls (see AISA_MODEL_TRANSPORT in .env)
+        self.transport = ModelTransport.from_env()
         
-        genai.configure(api_key=api_key)
+        # Configure Google AI Studio API
+        if self.transport.needs_api:
+            api_key = os.getenv('AI_STUDIO_API_KEY')
+            if not api_key:
+                raise ValueError("AI_STUDIO_API_KEY environment variable is required")
+            if genai is None:
+                raise ImportError("google-generativeai is required to call the model; "
+                                  "install it, or set AISA_MODEL_TRANSPORT=replay to answer from a cassette")
+            
+            genai.configure(api_key=api_key)
+        else:
+            print(f"📼 Replaying model answers from {self.transport.cassette.path} "
+                  f"({len(self.transport.cassette)} recorded, latency x{self.transport.latency_scale:g})")
+        if self.transport.mode == 'record':
+            print(f"📼 Recording model answers to {self.transport.cassette.path}")
         
-        # Initialize the Gemini model
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        # Initialize the Gemini models; small projects are planned by the fast one, escalating to the strong one
+        self.router = ModelRouter.from_env()
+        self.models = {}
+        for route in ROUTES:
+            name = self.router.models[route]
+            self.models[route] = next((model for other, model in self.models.items()
+                                       if self.router.models[other] == name), None) \
+                or self.transport.wrap(name, lambda: genai.GenerativeModel(name))
+        self.model = self.models['strong']
+        if self.router.enabled:
+            print(f"🧭 Routing plans of up to {self.router.fast_max_files} estimated files to "
+                  f"{self.router.models['fast']}, others to {self.router.models['strong']}")
         
-        # Configure generation settings
+        # Configure generation settings; max_output_tokens is the ceiling, each call gets a budget sized to its answer
         self.generation_config = {
             "temperature": 0.3,
             "top_p": 0.8,
             "top_k": 40,
-            "max_output_tokens": 8192,
+            "max_output_tokens": MAX_OUTPUT_TOKENS,
         }
+        
+        # Estimated and actual token counts of model calls, which also calibrate the output budgets
+        self.token_ledger = TokenLedger()
+        
+        # Refinements of one project are applied one at a time so none is lost
+        self._refine_locks = {}
+        self._refine_locks_guard = threading.Lock()
     
-    def create_project_plan(self, user_prompt: str) -> Dict[str, Any]:
+    def create_project_plan(self, user_prompt: str, deadline=None) -> Dict[str, Any]:
         """
         Create a comprehensive project plan based on user prompt
         
         Args:
             user_prompt (str): Natural language description of the desired project
+            deadline (Deadline): Budget of the request; bounds the model call timeout and stops
+                                 the work, raising Cancelled, once it passes or the client disconnects
             
         Returns:
             Dict[str, Any]: Comprehensive project plan
         """
         
         try:
-            # Create the system prompt for the planning task
-            system_prompt = """You are a Senior Python Project Planner, an expert Python developer and project architect with years of experience 
-            in designing and structuring Python projects. You excel at breaking down complex requirements 
-            into well-organized, modular project structures. You understand best practices for Python 
-            project organization, dependency management, and code architecture.
-
-            Your task is to analyze user requirements and create detailed project plans that include comprehensive 
-            technical specifications, project structure, and implementation strategies."""
-
-            # Create the detailed planning prompt
-            planning_prompt = f"""
-            Based on the following user requirement, create a comprehensive Python project plan:
-            
-            USER REQUIREMENT: {user_prompt}
-            
-            Your task is to analyze this requirement and create a detailed project plan that includes:
-            
-            1. PROJECT OVERVIEW:
-               - Project name and description
-               - Main functionality and purpose
-               - Target audience or use case
-            
-            2. TECHNICAL REQUIREMENTS:
-               - Required Python libraries and dependencies
-               - Recommended Python version
-               - GUI framework choice: Analyze if the project needs a GUI. If yes, choose Streamlit (for web-based, data-driven apps) or Tkinter (for desktop applications). If no GUI needed, specify 'None'.
-               - Database requirements (if any)
-               - External APIs or services needed
-            
-            3. PROJECT STRUCTURE:
-               - Complete folder and file structure
-               - Purpose and responsibility of each directory
-               - Main entry points and configuration files
-            
-            4. FILE BREAKDOWN:
-               - For each Python file that needs to be created:
-                 * File path and name
-                 * Primary purpose and functionality
-                 * Key classes, functions, or components it should contain
-                 * Dependencies and imports needed
-                 * How it interacts with other files
-            
-            5. IMPLEMENTATION STRATEGY:
-               - Development phases and order of implementation
-               - Critical components that should be built first
-               - Testing strategy and test file requirements
-               - Deployment considerations
-            
-            6. BEST PRACTICES:
-               - Code organization principles to follow
-               - Error handling strategies
-               - Configuration management approach
-               - Documentation requirements
-            
-            IMPORTANT CONSTRAINTS:
-            - Only generate plans for Python projects
-            - For GUI applications, choose between Streamlit (for web-based, data-driven apps) or Tkinter (for desktop applications)
-            - Follow Python best practices and PEP standards
-            - Ensure the project structure is modular and maintainable
-            - Include appropriate testing structure
-            
-            CRITICAL: You MUST respond with ONLY a valid JSON object matching this EXACT schema. Do not include any markdown formatting, code blocks, or explanatory text. All values must be strings (no nested objects or arrays except where explicitly specified):
-
-            {{
-                "project_overview": {{
-                    "name": "string - project name",
-                    "description": "string - detailed project description",
-                    "purpose": "string - main functionality and purpose",
-                    "audience": "string - target audience or use case"
-                }},
-                "technical_requirements": {{
-                    "python_version": "string - recommended Python version (e.g., '3.9', '3.10', '3.11')",
-                    "dependencies": "string - comma-separated list of required libraries",
-                    "gui_framework": "string - REQUIRED: Choose 'Streamlit' for web apps, 'Tkinter' for desktop apps, or 'None' if no GUI needed",
-                    "gui_framework_justification": "string - REQUIRED: Explain why this GUI choice was made or why no GUI is needed",
-                    "database_requirements": "string - database needs description or 'None'",
-                    "external_apis": "string - external APIs needed or 'None'",
-                    "system_requirements": "string - any special system requirements or 'Standard Python environment'"
-                }},
-                "project_structure": {{
-                    "root_directory": "string - name of the main project directory",
-                    "description": "string - overall structure description",
-                    "folders": "string - detailed folder structure as text"
-                }},
-                "file_breakdown": "string - MANDATORY: Detailed breakdown of ALL files to be created with their exact paths, primary purposes, key functions/classes, dependencies, and file interactions. Format as structured text with clear file sections.",
-                "implementation_strategy": {{
-                    "development_phases": "string - ordered list of development phases",
-                    "test_file_requirements": "string - testing strategy and test files needed"
-                }}
-            }}
-
-            IMPORTANT: The file_breakdown field is MANDATORY and must contain detailed information about every file in the project. Do not omit this field.
-
-            Return ONLY the JSON object with no additional text, markdown formatting, or code blocks.
-            """
-
             print("🚀 Sending request to Gemini API...")
             
             # Generate the response using Gemini
-            full_prompt = f"{system_prompt}\n\n{planning_prompt}"
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config=self.generation_config
-            )
+            full_prompt = build_planning_prompt(user_prompt)
+            expected_output = estimate_plan_output(user_prompt)
+            budget = plan_output_budget(expected_output, self.token_ledger.calibration('plan'))
+            decision = self.router.choose(user_prompt)
+            routes = decision['routes']
+            print(f"🧭 Planning with the {routes[0]} model ({self.router.models[routes[0]]}): "
+                  f"about {decision['estimated_files']} files, {decision['reason']}")
             
-            print("📥 Received response from Gemini API")
+            # A plan that fails validation, or a failed call, is asked again of the next (stronger) model
+            for attempt, route in enumerate(routes):
+                last = attempt == len(routes) - 1
+                started = time.monotonic()
+                try:
+                    response, _ = self._call_model('plan', full_prompt, budget, expected_output, deadline,
+                                                   self.models[route])
+                    result = response.text
+                except Cancelled:
+                    raise
+                except Exception as e:
+                    self.router.record(route, decision['bucket'], 'error', time.monotonic() - started, not last)
+                    if last:
+                        raise
+                    print(f"⚠️ The {route} model failed ({str(e)}), escalating to the {routes[attempt + 1]} model")
+                    continue
+                problems = plan_problems(result)
+                self.router.record(route, decision['bucket'], 'invalid' if problems else 'valid',
+                                   time.monotonic() - started, bool(problems) and not last)
+                if not problems or last:
+                    break
+                print(f"⚠️ The {route} model's plan failed validation ({'; '.join(problems)}), "
+                      f"escalating to the {routes[attempt + 1]} model")
+                if deadline is not None:
+                    deadline.check('escalation')
             
-            # Get the response text
-            result = response.text
+            print("📥 Received response from Gemini API")
             
             print(f"📝 Response length: {len(result)} characters")
             print(f"📄 Response preview: {result[:200]}...")
@@ -156,19 +339,8 @@ class PlanningAgent:
             try:
                 # Try to parse as JSON if the agent returned JSON
                 if isinstance(result, str):
-                    # Clean up the result string and try to parse as JSON
-                    cleaned_result = result.strip()
-                    
-                    # Remove any markdown formatting if present
-                    if cleaned_result.startswith('```json'):
-                        cleaned_result = cleaned_result[7:]
-                    elif cleaned_result.startswith('```'):
-                        cleaned_result = cleaned_result[3:]
-                    if cleaned_result.endswith('```'):
-                        cleaned_result = cleaned_result[:-3]
-                    
-                    # Remove any leading/trailing whitespace again
-                    cleaned_result = cleaned_result.strip()
+                    # Clean up the result string, removing any markdown formatting, and try to parse as JSON
+                    cleaned_result = strip_code_fences(result)
                     
                     print("🔍 Attempting to parse JSON response...")
                     print(f"📄 Cleaned response preview: {cleaned_result[:300]}...")
@@ -181,15 +353,7 @@ class PlanningAgent:
                     plan = parsed_data
                     
                     # Validate that all required sections are present
-                    required_sections = [
-                        'project_overview', 
-                        'technical_requirements', 
-                        'project_structure', 
-                        'file_breakdown', 
-                        'implementation_strategy'
-                    ]
-                    
-                    missing_sections = [section for section in required_sections if section not in plan]
+                    missing_sections = [section for section in REQUIRED_PLAN_SECTIONS if section not in plan]
                     if missing_sections:
                         print(f"⚠️  Warning: Missing sections in response: {missing_sections}")
                         
@@ -229,31 +393,35 @@ class PlanningAgent:
             # Save the plan to a JSON file in the Workspace folder
             try:
                 if isinstance(plan, dict) and 'project_overview' in plan and 'name' in plan['project_overview']:
+                    if deadline is not None:
+                        deadline.check('save_plan')
+                    
                     # Get the project name from the plan
                     project_name = plan['project_overview']['name']
                     
                     # Create a sanitized version of the project name for the folder name
-                    # Replace spaces and special characters with underscores
-                    sanitized_name = ''.join(c if c.isalnum() else '_' for c in project_name)
-                    
-                    # Create the project directory in the Workspace folder
-                    workspace_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'Workspace')
-                    project_dir = os.path.join(workspace_path, sanitized_name)
-                    os.makedirs(project_dir, exist_ok=True)
+                    sanitized_name = sanitize_project_name(project_name)
                     
-                    # Save the plan as a JSON file
+                    # Save the plan as a JSON file in the project's folder of the Workspace storage
+                    project_dir = self.storage.write_plan(sanitized_name, plan)
                     plan_file_path = os.path.join(project_dir, 'project_plan.json')
-                    with open(plan_file_path, 'w', encoding='utf-8') as f:
-                        json.dump(plan, f, indent=4, ensure_ascii=False)
                     
                     print(f"💾 Project plan saved to: {plan_file_path}")
                     
                     # Generate the project structure based on the saved plan
                     print(f"🏗️ Generating project structure from plan...")
-                    if generate_project(project_dir, use_existing_folder=True):
+                    generator = server_generator(project_dir)
+                    if generator.generate_project_from_plan(project_dir, use_existing_folder=True, deadline=deadline):
                         print(f"✅ Project structure successfully generated")
+                    elif deadline is not None and deadline.cancelled:
+                        raise Cancelled(deadline.reason, 'generation')
                     else:
                         print(f"⚠️ Failed to generate project structure")
+                    
+                    # Publish the plan and generated files to shared storage
+                    changes = self.storage.sync(sanitized_name)
+                    if changes:
+                        print(f"☁️ Synced {changes} file(s) of {sanitized_name} to {self.storage.name} storage")
                 else:
                     print("⚠️ Cannot save plan: Project name not found in plan structure")
             except Exception as save_error:
@@ -275,12 +443,140 @@ class PlanningAgent:
             
             # Try to save error information
             try:
-                workspace_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'Workspace')
-                error_file_path = os.path.join(workspace_path, 'planning_error.json')
+                error_file_path = os.path.join(self.storage.root, 'planning_error.json')
                 with open(error_file_path, 'w', encoding='utf-8') as f:
                     json.dump(error_response, f, indent=4, ensure_ascii=False)
                 print(f"💾 Error information saved to: {error_file_path}")
             except Exception as save_error:
                 print(f"⚠️ Failed to save error information: {str(save_error)}")
                 
-            return error_response
\ No newline at end of file
+            return error_response
+    
+    def _call_model(self, kind, prompt, budget, expected_output, deadline=None, model=None):
+        """
+        Call the model with an output budget, recording estimated and actual token counts
+        
+        An answer cut at the budget is asked for again once with the full
+        MAX_OUTPUT_TOKENS, since a partial plan cannot be parsed.
+        
+        Args:
+            kind (str): Kind of call for the token ledger, 'plan' or 'refine'
+            prompt (str): The prompt
+            budget (int): max_output_tokens of the call
+            expected_output (int): Estimated tokens of the answer
+            deadline (Deadline): Budget of the request; bounds the model call timeout
+            model (GenerativeModel): Model to call; defaults to the strong model
+            
+        Returns:
+            tuple: (response, usage dict with estimated and reported token counts and the budget)
+            
+        Raises:
+            Cancelled: If the deadline passes or the client disconnects while waiting
+        """
+        estimated_prompt = estimate_tokens(prompt)
+        print(f"🧮 {kind.capitalize()} call: about {estimated_prompt} prompt tokens, "
+              f"{expected_output} expected and {budget} budgeted output tokens")
+        
+        while True:
+            remaining = deadline.remaining() if deadline is not None else None
+            
+            def call_model():
+                return (model or self.model).generate_content(
+                    prompt,
+                    generation_config=dict(self.generation_config, max_output_tokens=budget),
+                    request_options={'timeout': remaining} if remaining is not None else None
+                )
+            
+            # An abandoned request stops waiting for the model instead of saving and generating for nobody
+            response = deadline.run(call_model, 'model_call') if deadline is not None else call_model()
+            prompt_tokens, output_tokens = usage_of(response)
+            truncated = hit_output_limit(response)
+            self.token_ledger.record(kind, estimated_prompt, prompt_tokens, budget, expected_output, output_tokens,
+                                     truncated)
+            if prompt_tokens is not None and output_tokens is not None:
+                print(f"🧮 {kind.capitalize()} call used {prompt_tokens} prompt and {output_tokens} output tokens "
+                      f"(estimated {estimated_prompt} and {expected_output})")
+            if not truncated or budget >= MAX_OUTPUT_TOKENS:
+                break
+            print(f"⚠️ Answer cut at {budget} output tokens, asking again with {MAX_OUTPUT_TOKENS}")
+            budget = MAX_OUTPUT_TOKENS
+        
+        return response, {
+            'estimated_prompt_tokens': estimated_prompt,
+            'prompt_tokens': prompt_tokens,
+            'budget_tokens': budget,
+            'estimated_output_tokens': expected_output,
+            'output_tokens': output_tokens,
+        }
+    
+    def refine_project_plan(self, project_id: str, instruction: str, deadline=None) -> Dict[str, Any]:
+        """
+        Apply a change request to a stored plan, regenerating only the parts it affects
+        
+        The model gets the sections and file breakdown entries the instruction
+        refers to plus a short project context, and answers with the changed
+        ones only. The delta is merged into the stored plan and the project is
+        regenerated; the generation manifest rewrites only files whose
+        breakdown section changed, and files dropped from the plan are removed
+        only when the manifest shows them unchanged since they were generated.
+        
+        Args:
+            project_id (str): Project folder name
+            instruction (str): The user's change request, e.g. "use Tkinter instead"
+            deadline (Deadline): Budget of the request; bounds the model call timeout
+            
+        Returns:
+            Dict[str, Any]: 'plan' (the refined plan), 'scope' (sections and files sent to the model),
+                            'changes', 'written' and 'removed' (files rewritten and deleted) and 'usage'
+        
+        Raises:
+            FileNotFoundError: If the project has no stored plan
+            RefinementError: If the model's answer cannot be applied to the plan
+            Cancelled: If the deadline passes or the client disconnects
+        """
+        with self._refine_locks_guard:
+            lock = self._refine_locks.setdefault(project_id, threading.Lock())
+        with lock:
+            project_dir = self.storage.fetch(project_id)
+            if project_dir is None:
+                raise FileNotFoundError(f"Project '{project_id}' not found")
+            with open(os.path.join(project_dir, 'project_plan.json'), 'r', encoding='utf-8') as f:
+                plan = json.load(f)
+            
+            scope = find_scope(plan, instruction)
+            prompt = build_refine_prompt(plan, instruction, scope)
+            print(f"✏️ Refining {project_id}: {', '.join(scope['sections']) or 'no sections'} and "
+                  f"{len(scope['files'])} file(s) in scope, {len(prompt)} prompt characters")
+            
+            expected_output = estimate_tokens(scoped_text(plan, scope))
+            budget = refine_output_budget(expected_output, self.token_ledger.calibration('refine'))
+            response, usage = self._call_model('refine', prompt, budget, expected_output, deadline)
+            refined, changes = merge_refinement(plan, parse_model_json(response.text))
+            usage.update(prompt_chars=len(prompt), plan_chars=len(json.dumps(plan, ensure_ascii=False)))
+            result = {'plan': refined, 'scope': scope, 'changes': changes, 'written': [], 'removed': [], 'usage': usage}
+            
+            if not (changes['sections'] or changes['added'] or changes['modified'] or changes['removed']):
+                print(f"ℹ️ Refinement of {project_id} changed nothing")
+                return result
+            
+            if deadline is not None:
+                deadline.check('save_plan')
+            self.storage.write_plan(project_id, refined)
+            print(f"💾 Refined plan saved: {len(changes['sections'])} section(s), {len(changes['added'])} added, "
+                  f"{len(changes['modified'])} modified and {len(changes['removed'])} removed file(s)")
+            
+            generator = server_generator(project_dir)
+            if not generator.generate_project_from_plan(project_dir, use_existing_folder=True, deadline=deadline):
+                if deadline is not None and deadline.cancelled:
+                    raise Cancelled(deadline.reason, 'generation')
+                print(f"⚠️ Failed to regenerate {project_id} after refinement")
+            
+            manifest = generator.manifest
+            if manifest is not None:
+                result['written'] = list(manifest.written)
+                result['removed'] = remove_dropped_files(generator, project_dir, changes['removed'])
+            
+            synced = self.storage.sync(project_id)
+            if synced:
+                print(f"☁️ Synced {synced} file(s) of {project_id} to {self.storage.name} storage")
+            return result
@@ -0,0 +1,260 @@
+import os
+import sys
+import time
+import queue
+import threading
+
+from agents.project_validator import print_report
+
+
+class ProgressEvent:
+    """
+    Base class of the events ProjectGenerator emits while it works.
+    
+    Each subclass names its kind and its fields; events carry project-relative
+    paths and a wall-clock timestamp, and to_dict() gives the JSON form that is
+    streamed to clients.
+    """
+    
+    kind = 'event'
+    fields = ()
+    
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.fields, args):
+            setattr(self, name, value)
+        for name in self.fields[len(args):]:
+            setattr(self, name, kwargs.get(name))
+        self.timestamp = time.time()
+    
+    def to_dict(self):
+        """
+        Convert the event to a JSON-serializable dictionary
+        
+        Returns:
+            dict: The event type, its timestamp and its fields
+        """
+        data = {'type': self.kind, 'timestamp': round(self.timestamp, 3)}
+        for name in self.fields:
+            data[name] = getattr(self, name)
+        return data
+    
+    def __repr__(self):
+        values = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.fields)
+        return f"{type(self).__name__}({values})"
+
+
+class GenerationStarted(ProgressEvent):
+    kind = 'generation_started'
+    fields = ('plan_path', 'root')
+
+
+class GenerationFinished(ProgressEvent):
+    kind = 'generation_finished'
+    fields = ('success', 'root', 'seconds', 'errors')
+
+
+class GenerationCancelled(ProgressEvent):
+    # reason is 'deadline' or 'disconnected'; phase is the one that was running
+    kind = 'generation_cancelled'
+    fields = ('reason', 'phase')
+
+
+class PhaseStarted(ProgressEvent):
+    kind = 'phase_started'
+    fields = ('phase',)
+
+
+class PhaseFinished(ProgressEvent):
+    kind = 'phase_finished'
+    fields = ('phase', 'seconds')
+
+
+class DirCreated(ProgressEvent):
+    kind = 'dir_created'
+    fields = ('path',)
+
+
+class FileWritten(ProgressEvent):
+    # source is 'structure' for empty placeholders, 'breakdown' or 'generic' for rendered files
+    kind = 'file_written'
+    fields = ('path', 'bytes', 'source')
+
+
+class FileSkipped(ProgressEvent):
+    # reason is 'unchanged' or 'hand_edited'
+    kind = 'file_skipped'
+    fields = ('path', 'reason')
+
+
+class FileRemoved(ProgressEvent):
+    # reason is 'misplaced', 'duplicate' or 'duplicate_in_root'
+    kind = 'file_removed'
+    fields = ('path', 'reason')
+
+
+class FileFailed(ProgressEvent):
+    kind = 'file_failed'
+    fields = ('path', 'error')
+
+
+class ManifestSummary(ProgressEvent):
+    kind = 'manifest_summary'
+    fields = ('written', 'unchanged', 'hand_edited')
+
+
+class ValidationFinished(ProgressEvent):
+    # issues maps each file with problems to its list of issues
+    kind = 'validation_finished'
+    fields = ('summary', 'issues')
+
+
+class Message(ProgressEvent):
+    # level is 'info', 'warning' or 'error'; text is the console line
+    kind = 'message'
+    fields = ('level', 'text')
+
+
+class ConsoleReporter:
+    """
+    Subscriber that prints generator events in the console style of the CLI.
+    
+    With per_file=False the per-directory and per-file lines are left out, which
+    keeps console output (and its cost) independent of the project size.
+    """
+    
+    def __init__(self, stream=None, per_file=True):
+        """
+        Initialize the reporter
+        
+        Args:
+            stream (file): Where to print; defaults to the current sys.stdout
+            per_file (bool): If False, only print messages and summaries
+        """
+        self.stream = stream
+        self.per_file = per_file
+        self.root = ''
+        self._handlers = {
+            'generation_started': self._generation_started,
+            'generation_finished': self._generation_finished,
+            'generation_cancelled': self._generation_cancelled,
+            'dir_created': self._dir_created,
+            'file_written': self._file_written,
+            'file_skipped': self._file_skipped,
+            'file_removed': self._file_removed,
+            'manifest_summary': self._manifest_summary,
+            'validation_finished': self._validation_finished,
+            'message': self._message,
+        }
+    
+    def __call__(self, event):
+        handler = self._handlers.get(event.kind)
+        if handler:
+            handler(event)
+    
+    def _print(self, text):
+        print(text, file=self.stream or sys.stdout)
+    
+    def _full_path(self, path):
+        return os.path.join(self.root, path)
+    
+    def _generation_started(self, event):
+        self.root = event.root
+    
+    def _generation_finished(self, event):
+        if event.errors:
+            self._print(f"❌ Failed to write {len(event.errors)} file(s):")
+            for file_path in sorted(event.errors):
+                self._print(f"   {file_path}: {event.errors[file_path]}")
+        elif event.success:
+            self._print(f"✅ Project structure generated successfully at: {event.root}")
+    
+    def _generation_cancelled(self, event):
+        what = 'deadline exceeded' if event.reason == 'deadline' else 'client disconnected'
+        self._print(f"🛑 Generation cancelled during {event.phase}: {what}")
+    
+    def _dir_created(self, event):
+        if self.per_file:
+            self._print(f"📁 Created directory: {self._full_path(event.path)}")
+    
+    def _file_written(self, event):
+        if not self.per_file:
+            return
+        if event.source == 'structure':
+            self._print(f"📄 Created structure file: {self._full_path(event.path)}")
+        elif event.source == 'generic':
+            self._print(f"📄 Added generic content to: {self._full_path(event.path)}")
+        else:
+            self._print(f"📄 Created file with content: {self._full_path(event.path)}")
+    
+    def _file_skipped(self, event):
+        if event.reason == 'hand_edited' and self.per_file:
+            self._print(f"✋ Skipping hand-edited file: {event.path}")
+    
+    def _file_removed(self, event):
+        if not self.per_file:
+            return
+        if event.reason == 'misplaced':
+            self._print(f"🧹 Removed misplaced file: {self._full_path(event.path)}")
+        elif event.reason == 'duplicate_in_root':
+            self._print(f"   🧹 Removed duplicate in root: {self._full_path(event.path)}")
+        else:
+            self._print(f"   🧹 Removed duplicate: {self._full_path(event.path)}")
+    
+    def _manifest_summary(self, event):
+        self._print(f"📊 Regeneration summary: {event.written} written, "
+                    f"{event.unchanged} unchanged, {len(event.hand_edited)} hand-edited (kept)")
+        for file_path in event.hand_edited:
+            self._print(f"   ✋ Kept hand-edited file: {file_path}")
+    
+    def _validation_finished(self, event):
+        files = {file_path: {'issues': issues} for file_path, issues in event.issues.items()}
+        print_report({'summary': event.summary, 'files': files}, self.stream or sys.stdout)
+    
+    def _message(self, event):
+        self._print(event.text)
+
+
+_CLOSED = object()
+
+
+class EventQueue:
+    """
+    Subscriber that hands events to another thread for iteration.
+    
+    The queue is bounded so a slow consumer slows the generator down instead of
+    buffering the whole run; once the consumer stops iterating, further events
+    are dropped so the generator is never blocked by a client that went away.
+    """
+    
+    def __init__(self, maxsize=1000):
+        self._queue = queue.Queue(maxsize)
+        self._cancelled = threading.Event()
+    
+    def __call__(self, event):
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(event, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def close(self):
+        """
+        Mark the end of the event stream
+        """
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(_CLOSED, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def __iter__(self):
+        try:
+            while True:
+                event = self._queue.get()
+                if event is _CLOSED:
+                    return
+                yield event
+        finally:
+            self._cancelled.set()
@@ -1,73 +1,295 @@
 import os
 import json
 import re
+import time
+import tempfile
+import threading
+from agents.generation_manifest import GenerationManifest, MANIFEST_FILENAME, hash_text
+from agents.breakdown_lexer import iter_file_records, resolve_record_path, split_key_items
+from agents.structure_parser import planned_paths
+from agents.templates import get_registry, file_role, gui_framework, third_party_requirements
+from agents.file_writer import FileWriter, write_text
+from agents.blob_store import BlobStore
+from agents.dependency_graph import DependencyGraph, module_name, module_interface
+from agents.plan_reader import PlanReader, STREAMING_THRESHOLD_BYTES
+from agents.project_validator import ProjectValidator, VALIDATION_FILENAME
+from agents.deadline import Cancelled, Deadline
+from agents.storage import workspace_for
+from agents.progress import (
+    ConsoleReporter, EventQueue, GenerationStarted, GenerationFinished, GenerationCancelled, PhaseStarted, PhaseFinished,
+    DirCreated, FileWritten, FileSkipped, FileRemoved, FileFailed, ManifestSummary, ValidationFinished, Message,
+)
+
+# Bump whenever rendering changes so incremental runs re-render previously generated files
+GENERATOR_VERSION = '1.6.0'
+
+# Breakdown sections rendered and written together when a plan is streamed
+STREAM_BATCH_SIZE = 256
+STREAM_BATCH_BYTES = 4 * 1024 * 1024
 
 class ProjectGenerator:
-    def __init__(self, workspace_path):
+    def __init__(self, workspace_path, on_event=None, console=True, dedup=None):
         """
         Initialize the Project Generator
         
+        Progress is reported as typed events (see agents.progress) to every
+        subscriber; printing to the console is one of them.
+        
         Args:
             workspace_path (str): Path to the workspace directory
+            on_event (callable): Called with every progress event
+            console (bool): If True, print progress to the console
+            dedup (str): If set ('auto', 'reflink' or 'hardlink'), materialize files from the
+                         workspace's content-addressed blob store instead of writing copies
         """
         self.workspace_path = workspace_path
+        self.listeners = []
+        if console:
+            self.listeners.append(ConsoleReporter())
+        if on_event is not None:
+            self.listeners.append(on_event)
+        self.planned_dirs = set()  # Track directories that should be created based on project structure
         self.planned_files = set()  # Track files that should be created based on project structure
+        self.manifest = None
+        self.force = False
+        self.writer = None
+        self.dedup = dedup
+        self.blob_store = None
+        self.errors = {}  # Project-relative path -> error message for files that could not be written
+        self.validation = None  # Report of the post-generation validation pass
+        self.deadline = None  # Deadline of the request the generation runs for, checked between units of work
+        self.phase = None
+        self.interfaces = {}  # Project-relative path -> public names of Python modules other files import
+        self._interface_targets = set()
+        self.templates = get_registry()
+        self.framework = None
+        self.project_name = ''
+        self.run_command = 'python main.py'
+        self.requirements = ''
     
-    def generate_project_from_plan(self, plan_folder_path, use_existing_folder=False):
+    def generate_project_from_plan(self, plan_folder_path, use_existing_folder=False, force=False, workers=1, validate=True,
+                                   stream=None, deadline=None):
         """
         Generate a project structure from a saved project plan
         
+        Only files whose breakdown section or generator version changed since the last
+        run are rewritten; files edited by hand since they were generated are kept.
+        Progress is emitted as events, from generation_started to generation_finished.
+        
         Args:
             plan_folder_path (str): Path to the folder containing the project_plan.json file
             use_existing_folder (bool): If True, use the existing folder as the root instead of creating a subdirectory
+            force (bool): If True, rewrite every file, including unchanged and hand-edited ones
+            workers (int): Number of threads rendering and writing files; 1 writes serially
+            validate (bool): If True, check the syntax and imports of the generated Python files
+                             afterwards; the per-file report is kept in self.validation
+            stream (bool): If True, read the plan incrementally and write the breakdown's files
+                           in bounded batches; None streams plans of STREAMING_THRESHOLD_BYTES or more
+            deadline (Deadline): Stop between phases and files once it passes or is cancelled;
+                                 files written so far are kept in the manifest
             
         Returns:
             bool: True if successful, False otherwise
         """
+        start = time.perf_counter()
+        project_root_path = None
+        success = False
+        self.errors = {}
+        self.deadline = deadline
+        self.manifest = None
         try:
             # Load the project plan JSON file
             plan_file_path = os.path.join(plan_folder_path, 'project_plan.json')
             if not os.path.exists(plan_file_path):
-                print(f"❌ Project plan not found at: {plan_file_path}")
+                self._message('error', f"❌ Project plan not found at: {plan_file_path}")
                 return False
             
-            with open(plan_file_path, 'r', encoding='utf-8') as f:
-                project_plan = json.load(f)
-            
-            print(f"📋 Loaded project plan from: {plan_file_path}")
+            # Very large plans are read incrementally so the breakdown text is never held in memory
+            if stream is None:
+                stream = os.path.getsize(plan_file_path) >= STREAMING_THRESHOLD_BYTES
+            breakdown_lines = None
+            if stream:
+                reader = PlanReader(plan_file_path)
+                project_plan = reader.load()
+                if reader.streamed:
+                    breakdown_lines = reader.iter_lines
+                self._message('info', f"📋 Streaming project plan from: {plan_file_path}")
+            else:
+                with open(plan_file_path, 'r', encoding='utf-8') as f:
+                    project_plan = json.load(f)
+                self._message('info', f"📋 Loaded project plan from: {plan_file_path}")
             
             # Get the root directory name from the plan
             if 'project_structure' not in project_plan or 'root_directory' not in project_plan['project_structure']:
-                print("❌ Project structure or root directory not found in plan")
+                self._message('error', "❌ Project structure or root directory not found in plan")
                 return False
             
             # Determine the project root path
             if use_existing_folder:
                 # Use the folder containing the plan as the project root
                 project_root_path = plan_folder_path
-                print(f"📁 Using existing directory as root: {project_root_path}")
+                self._message('info', f"📁 Using existing directory as root: {project_root_path}")
             else:
                 # Create a subdirectory based on the root_directory name in the plan
                 root_dir_name = project_plan['project_structure']['root_directory']
                 project_root_path = os.path.join(plan_folder_path, root_dir_name)
                 os.makedirs(project_root_path, exist_ok=True)
-                print(f"📁 Created root directory: {project_root_path}")
+                self._message('info', f"📁 Created root directory: {project_root_path}")
+            self.emit(GenerationStarted(plan_file_path, project_root_path))
+            
+            # Load the manifest of the previous run so unchanged files can be skipped
+            self.force = force
+            self.manifest = GenerationManifest(project_root_path, rendering_version())
+            self.manifest.load()
+            
+            # Identical files across projects share one blob instead of one copy each
+            fallbacks = 0
+            if self.dedup:
+                if self.blob_store is None:
+                    self.blob_store = BlobStore(self.workspace_path, self.dedup)
+                fallbacks = self.blob_store.fallbacks
+                if self.blob_store.mode == 'copy':
+                    self._message('warning', "⚠️ The filesystem does not support reflinks; writing plain copies "
+                                             "(--dedup hardlink shares read-only files instead)")
+                else:
+                    self._message('info', f"🗄️ Deduplicating files with {self.blob_store.mode}s to: {self.blob_store.root}")
+                if self.blob_store.mode == 'hardlink':
+                    self._message('info', "🔒 Hardlinked files are read-only; detach them with "
+                                          "generate_project.py --detach before editing them")
             
             # First, parse the folder structure to identify directories AND files that should exist
-            self._parse_folder_structure(project_plan, project_root_path)
+            self._run_phase('parse_structure', self._parse_folder_structure, project_plan, project_root_path)
+            self._prepare_templates(project_plan)
             
-            # Create the directories and files from the folder structure
-            self._create_folder_structure(project_plan, project_root_path)
+            with FileWriter(workers) as self.writer:
+                if self.writer.workers > 1:
+                    self._message('info', f"🧵 Writing files with {self.writer.workers} threads")
+                
+                # Create the directories and files from the folder structure
+                self._run_phase('create_structure', self._create_folder_structure, project_plan, project_root_path)
+                
+                # Parse and create files with their content based on the file breakdown
+                self._run_phase('create_contents', self._create_files_with_content, project_plan, project_root_path, breakdown_lines)
             
-            # Parse and create files with their content based on the file breakdown
-            self._create_files_with_content(project_plan, project_root_path)
+            if self.blob_store is not None and self.blob_store.fallbacks > fallbacks:
+                self._message('warning', f"⚠️ {self.blob_store.fallbacks - fallbacks} file(s) could not be linked "
+                                         f"to the blob store and were written as copies")
             
-            print(f"✅ Project structure generated successfully at: {project_root_path}")
-            return True
+            # Remove duplicates left in the wrong place by this or earlier runs
+            self._run_phase('cleanup', self._cleanup_duplicates, project_root_path)
+            
+            self.manifest.save()
+            self.emit(ManifestSummary(len(self.manifest.written), len(self.manifest.unchanged), list(self.manifest.hand_edited)))
+            
+            # Check the generated Python files for syntax errors and unresolvable imports
+            self.validation = None
+            if validate:
+                try:
+                    self.validation = self._run_phase('validate', ProjectValidator(project_root_path, project_plan).validate)
+                    issues = {file_path: verdict['issues'] for file_path, verdict in self.validation['files'].items() if verdict['issues']}
+                    self.emit(ValidationFinished(self.validation['summary'], issues))
+                except Exception as e:
+                    self._message('warning', f"⚠️ Error validating generated files: {str(e)}")
             
+            success = not self.errors
+            return success
+            
+        except Cancelled as e:
+            self.emit(GenerationCancelled(e.reason, self.phase))
+            # Keep what was written so a later run does not render it again
+            if self.manifest is not None:
+                try:
+                    self.manifest.save()
+                except OSError as save_error:
+                    self._message('warning', f"⚠️ Could not save the manifest: {str(save_error)}")
+            return False
         except Exception as e:
-            print(f"❌ Failed to generate project structure: {str(e)}")
+            self._message('error', f"❌ Failed to generate project structure: {str(e)}")
             return False
+        finally:
+            self.writer = None
+            self.emit(GenerationFinished(success, project_root_path, round(time.perf_counter() - start, 3), dict(self.errors)))
+    
+    def _write_text(self, file_path, content):
+        if self.blob_store is not None:
+            self.blob_store.write_text(file_path, content)
+        else:
+            write_text(file_path, content)
+    
+    def emit(self, event):
+        """
+        Deliver a progress event to every subscriber
+        
+        Args:
+            event (ProgressEvent): The event
+        """
+        for listener in self.listeners:
+            listener(event)
+    
+    def _message(self, level, text):
+        self.emit(Message(level, text))
+    
+    def _run_phase(self, phase, method, *args):
+        """
+        Run one phase of the generation between phase_started and phase_finished events
+        
+        Args:
+            phase (str): Name of the phase
+            method (callable): The phase's implementation
+            *args: Arguments for method
+        
+        Returns:
+            The value returned by method
+        """
+        self.phase = phase
+        self._check_deadline()
+        self.emit(PhaseStarted(phase))
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.emit(PhaseFinished(phase, round(time.perf_counter() - start, 4)))
+    
+    def _check_deadline(self):
+        if self.deadline is not None:
+            self.deadline.check(self.phase)
+    
+    def iter_rendered_files(self, project_plan):
+        """
+        Render the files of a project plan in memory without touching the disk
+        
+        Files are rendered one at a time as the iterator is consumed, so callers such
+        as archive downloads only ever hold a single file's content.
+        
+        Args:
+            project_plan (dict): The project plan
+        
+        Yields:
+            tuple: (project-relative file path, file content) for every file in the plan
+        """
+        root_dir_name = project_plan.get('project_structure', {}).get('root_directory', '')
+        self._parse_folder_structure(project_plan, None)
+        self._prepare_templates(project_plan)
+        
+        # Later sections win when the breakdown describes the same file twice, as on disk
+        records_by_path = {}
+        for record in iter_file_records(project_plan.get('file_breakdown', '').splitlines()):
+            file_path = self._resolve_record_path(record, root_dir_name)
+            if file_path:
+                records_by_path[file_path] = record
+        
+        # Dependencies are rendered first so their interfaces can be named in the files using them
+        graph = self._schedule(records_by_path, report=False)
+        for wave in graph.waves():
+            for file_path in wave:
+                record = dict(records_by_path[file_path], **self._dependency_fields(file_path, graph, None))
+                content = self._generate_file_content(record, file_path)
+                if file_path in self._interface_targets:
+                    self.interfaces[file_path] = module_interface(content)
+                yield file_path, content
+        
+        for file_path in sorted(self.planned_files - set(records_by_path)):
+            yield file_path, self._generate_generic_file_content(file_path)
     
     def _parse_folder_structure(self, project_plan, project_root_path):
         """
@@ -79,7 +301,7 @@ class ProjectGenerator:
         """
         try:
             if 'project_structure' not in project_plan or 'folders' not in project_plan['project_structure']:
-                print("⚠️ No folder structure defined in project plan")
+                self._message('warning', "⚠️ No folder structure defined in project plan")
                 return
             
             folder_structure = project_plan['project_structure']['folders']
@@ -87,78 +309,13 @@ class ProjectGenerator:
             # Get the root directory name for context
             root_dir_name = project_plan['project_structure']['root_directory']
             
-            # Initialize sets to track directories and files
-            self.planned_dirs = set()
-            self.planned_files = set()
-            
-            # Process the folder structure line by line
-            lines = folder_structure.split('\n')
-            current_indent = 0
-            current_path = []
-            
-            for line in lines:
-                # Skip empty lines
-                if not line.strip():
-                    continue
-                
-                # Remove ASCII tree characters and get the cleaned line
-                clean_line = re.sub(r'[│├└─┬┼┤┴]', '', line).strip()
-                
-                # Skip if the line is empty after cleaning
-                if not clean_line:
-                    continue
-                
-                # Calculate the indentation level (each level usually is 2 or 4 spaces)
-                # This helps determine the directory hierarchy
-                indent = len(line) - len(line.lstrip())
-                indent_level = indent // 2  # Assuming 2 spaces per level
-                
-                # Handle directory structure based on indentation
-                if indent_level <= current_indent:
-                    # Pop back up the directory tree
-                    levels_to_pop = current_indent - indent_level + 1
-                    current_path = current_path[:-levels_to_pop] if levels_to_pop <= len(current_path) else []
-                
-                # Strip the root directory from the path if it's included
-                if clean_line.startswith(f"{root_dir_name}/") or clean_line.startswith(f"{root_dir_name}\\"):
-                    clean_line = clean_line[len(root_dir_name)+1:]
-                elif clean_line == root_dir_name:
-                    clean_line = ""
-                
-                # Update the current path
-                if clean_line:
-                    # Check if this is a file or directory
-                    is_file = '.' in clean_line.split('/')[-1] or '.' in clean_line.split('\\')[-1]
-                    
-                    # Remove any path components from clean_line to get just the name
-                    name = clean_line.split('/')[-1] if '/' in clean_line else clean_line.split('\\')[-1] if '\\' in clean_line else clean_line
-                    
-                    if is_file:
-                        # This is a file, add it to the current path for tracking
-                        full_path = '/'.join(current_path + [name]) if current_path else name
-                        self.planned_files.add(full_path)
-                        
-                        # Make sure parent directories are tracked
-                        if current_path:
-                            parent_dir = '/'.join(current_path)
-                            self.planned_dirs.add(parent_dir)
-                    else:
-                        # This is a directory, update the current path
-                        current_path.append(name)
-                        full_path = '/'.join(current_path)
-                        self.planned_dirs.add(full_path)
-                
-                # Update the current indentation level
-                current_indent = indent_level
-            
-            # Convert all paths to use OS-specific separators
-            self.planned_dirs = {os.path.normpath(path) for path in self.planned_dirs}
-            self.planned_files = {os.path.normpath(path) for path in self.planned_files}
+            # Build the directory tree in a single pass; nesting follows the drawn tree prefixes
+            self.planned_dirs, self.planned_files = planned_paths(folder_structure, root_dir_name)
             
-            print(f"📁 Identified {len(self.planned_dirs)} directories and {len(self.planned_files)} files in project structure")
+            self._message('info', f"📁 Identified {len(self.planned_dirs)} directories and {len(self.planned_files)} files in project structure")
         
         except Exception as e:
-            print(f"⚠️ Error parsing folder structure: {str(e)}")
+            self._message('warning', f"⚠️ Error parsing folder structure: {str(e)}")
             import traceback
             traceback.print_exc()
     
@@ -171,338 +328,556 @@ class ProjectGenerator:
             project_root_path (str): Path to the project root directory
         """
         try:
-            # Create all directories first
-            for dir_path in self.planned_dirs:
-                full_path = os.path.join(project_root_path, dir_path)
-                os.makedirs(full_path, exist_ok=True)
-                print(f"📁 Created directory: {full_path}")
+            # Create all directories first, parents before children
+            dir_paths = self.planned_dirs | {os.path.dirname(file_path) for file_path in self.planned_files}
+            failed_dirs = dict(self.writer.make_dirs(project_root_path, dir_paths))
+            for dir_path in sorted(self.planned_dirs):
+                if dir_path in failed_dirs:
+                    full_path = os.path.join(project_root_path, dir_path)
+                    self._message('warning', f"⚠️ Could not create directory {full_path}: {str(failed_dirs[dir_path])}")
+                else:
+                    self.emit(DirCreated(dir_path))
             
             # Create empty files just to establish the correct structure
-            for file_path in self.planned_files:
+            def create_empty(file_path):
                 full_path = os.path.join(project_root_path, file_path)
-                # Ensure parent directory exists
-                os.makedirs(os.path.dirname(full_path), exist_ok=True)
                 # Create an empty file if it doesn't exist
-                if not os.path.exists(full_path):
-                    with open(full_path, 'w', encoding='utf-8') as f:
-                        f.write("")
-                    print(f"📄 Created structure file: {full_path}")
+                if os.path.exists(full_path):
+                    return False
+                self._write_text(full_path, "")
+                return True
+            
+            for file_path, created, error in self.writer.map(create_empty, sorted(self.planned_files)):
+                if error is not None:
+                    self.errors[file_path] = str(error)
+                    self.emit(FileFailed(file_path, str(error)))
+                elif created:
+                    self.emit(FileWritten(file_path, 0, 'structure'))
             
         except Exception as e:
-            print(f"⚠️ Error creating folder structure: {str(e)}")
+            self._message('warning', f"⚠️ Error creating folder structure: {str(e)}")
             import traceback
             traceback.print_exc()
     
-    def _create_files_with_content(self, project_plan, project_root_path):
+    def _create_files_with_content(self, project_plan, project_root_path, breakdown_lines=None):
         """
         Create files with content based on the file breakdown
         
         Args:
             project_plan (dict): The project plan
             project_root_path (str): Path to the project root directory
+            breakdown_lines (callable): Returns a fresh iterator over the lines of a streamed
+                                        breakdown; if None the breakdown is read from the plan
         """
         try:
-            if 'file_breakdown' not in project_plan:
-                print("⚠️ No file breakdown found in project plan")
+            if breakdown_lines is None and 'file_breakdown' not in project_plan:
+                self._message('warning', "⚠️ No file breakdown found in project plan")
                 return
             
-            file_breakdown = project_plan['file_breakdown']
-            
             # Get the root directory name for context
             root_dir_name = project_plan['project_structure']['root_directory']
             
-            # Track files that have been created from the breakdown
-            created_files = set()
-            
-            # Extract file sections using regex
-            # Split the breakdown by file sections (each file section typically starts with a file path)
-            file_sections = []
-            
-            # Look for patterns in the breakdown to identify file sections
-            # The file breakdown format can vary, but typically it's in one of these formats:
-            # 1. file_path\n    * Primary purpose: ...
-            # 2. file_path:\n    - Purpose: ...
+            # Index existing files by name once instead of walking the project for every file
+            existing_by_name = {}
+            for root, _, files in os.walk(project_root_path):
+                for name in files:
+                    existing_by_name.setdefault(name, []).append(os.path.join(root, name))
             
-            # First, try to split by file paths at the beginning of lines
-            file_path_pattern = re.compile(r'^\s*([^\s\*\-\n][^:\n]*(?:/[^:\n]+)+)(?:\n|\s*\*|\s*:)', re.MULTILINE)
-            matches = list(file_path_pattern.finditer(file_breakdown))
-            
-            if matches:
-                # If we found matches, split the breakdown based on those matches
-                for i in range(len(matches)):
-                    start_pos = matches[i].start()
-                    end_pos = matches[i+1].start() if i < len(matches) - 1 else len(file_breakdown)
-                    file_sections.append(file_breakdown[start_pos:end_pos].strip())
+            if breakdown_lines is not None:
+                created_files = self._write_streamed_records(breakdown_lines, root_dir_name, project_root_path, existing_by_name)
             else:
-                # Fallback: try to split by empty lines followed by a non-indented line
-                file_sections = re.split(r'\n\s*\n(?=\S)', file_breakdown)
-            
-            print(f"📋 Found {len(file_sections)} file sections in the breakdown")
-            
-            # Process each file section
-            for section in file_sections:
-                # Skip empty sections
-                if not section.strip():
-                    continue
+                # Track files that have been created from the breakdown
+                created_files = set()
                 
-                # Extract file path
-                file_path = None
+                # Tokenize the breakdown into one record per file in a single pass
+                file_records = list(iter_file_records(project_plan['file_breakdown'].splitlines()))
                 
-                # Try different patterns to extract the file path
+                self._message('info', f"📋 Found {len(file_records)} file sections in the breakdown")
                 
-                # Pattern 1: The section starts with the file path (most common in your format)
-                path_match = re.match(r'^([^\n\*]+)(?:\n|\s*\*)', section)
-                if path_match:
-                    file_path = path_match.group(1).strip()
-                    # Remove trailing colon if present
-                    if file_path.endswith(':'):
-                        file_path = file_path[:-1].strip()
-                    # Remove 'File: ' prefix if present
-                    if file_path.startswith('File:'):
-                        file_path = file_path[5:].strip()
+                # Later sections win when the breakdown describes the same file twice
+                records_by_path = {}
+                for record in file_records:
+                    # Extract the project-relative file path from the record
+                    file_path = self._resolve_record_path(record, root_dir_name)
+                    if file_path:
+                        records_by_path[file_path] = record
                 
-                # Pattern 2: Look for a "Path:" field
-                if not file_path:
-                    path_match = re.search(r'(?:Path|path):\s*([^\n]+)', section)
-                    if path_match:
-                        file_path = path_match.group(1).strip()
-                
-                # Skip if no valid file path found
-                if not file_path:
-                    print(f"⚠️ Could not extract file path from section: {section[:100]}...")
-                    continue
-                
-                # Clean up the file path
-                file_path = file_path.strip()
-                
-                # Skip if file path is actually a directory or doesn't look like a file
-                if file_path.endswith('/') or file_path.endswith('\\'):
-                    continue
-                
-                # Check for file extensions or special files like __init__.py
-                file_name = os.path.basename(file_path)
-                if '.' not in file_name and not (file_name.startswith('__') and file_name.endswith('__')):
-                    print(f"⚠️ Path doesn't appear to be a file: {file_path}")
-                    continue
-                
-                # Strip the root directory from the path if it's included
-                if file_path.startswith(f"{root_dir_name}/") or file_path.startswith(f"{root_dir_name}\\"):
-                    file_path = file_path[len(root_dir_name)+1:]
-                    
-                # Handle cases where the path might be given as a relative path 
-                # without the parent directory structure (e.g. "main.py" instead of "src/main.py")
-                # Check if the file path is just a filename without any directory structure
-                if '/' not in file_path and '\\' not in file_path:
-                    # Look for hints in the section description to identify the correct directory
-                    dir_hints = re.findall(r'(?:in|within|under|inside|the)\s+([a-zA-Z0-9_\-/\\]+)\s+(?:directory|folder|dir)', section, re.IGNORECASE)
-                    if dir_hints:
-                        # Use the first hint as the directory
-                        directory = dir_hints[0].strip()
-                        # Make sure it doesn't include the root directory
-                        if directory.startswith(f"{root_dir_name}/") or directory.startswith(f"{root_dir_name}\\"):
-                            directory = directory[len(root_dir_name)+1:]
-                        # Update the file path to include the directory
-                        file_path = os.path.join(directory, file_path)
-                        print(f"📝 Updated file path using directory hint: {file_path}")
-                
-                # Normalize the path separators
-                file_path = os.path.normpath(file_path)
-                
-                # Create the file with content
-                full_file_path = os.path.join(project_root_path, file_path)
-                
-                # Ensure parent directory exists
-                parent_dir = os.path.dirname(full_file_path)
-                if parent_dir:
-                    os.makedirs(parent_dir, exist_ok=True)
-                    print(f"📁 Ensured directory exists: {parent_dir}")
-                
-                # Generate content for the file
-                file_content = self._generate_file_content(section, file_path)
-                
-                # Check if this file already exists in a different location
-                existing_files = []
-                for root, _, files in os.walk(project_root_path):
-                    if os.path.basename(file_path) in files:
-                        existing_path = os.path.join(root, os.path.basename(file_path))
-                        # Don't include the file we're about to create
-                        if existing_path != full_file_path:
-                            existing_files.append(existing_path)
-                
-                # If we found duplicates in the wrong location, handle them
-                if existing_files:
-                    for existing_path in existing_files:
-                        # Check if the existing file is in the root directory
-                        is_in_root = os.path.dirname(existing_path) == project_root_path
-                        existing_content = ""
-                        try:
-                            with open(existing_path, 'r', encoding='utf-8') as f:
-                                existing_content = f.read()
-                        except Exception:
-                            pass
-                        
-                        # If the file is in the root but should be in a subdirectory, or it has no content
-                        if is_in_root or not existing_content:
-                            # Remove the misplaced file
-                            try:
-                                os.remove(existing_path)
-                                print(f"🧹 Removed misplaced file: {existing_path}")
-                            except Exception as e:
-                                print(f"⚠️ Could not remove misplaced file: {str(e)}")
-                
-                # Write the content to the file
-                with open(full_file_path, 'w', encoding='utf-8') as f:
-                    f.write(file_content)
-                
-                print(f"📄 Created file with content: {full_file_path}")
-                created_files.add(file_path)
+                # Files are written in dependency waves, each rendered and written on the writer's threads;
+                # a wave starts once the modules it imports are final, so it can name their interfaces
+                graph = self._schedule(records_by_path)
+                for wave in graph.waves():
+                    jobs = []
+                    for file_path in wave:
+                        record = dict(records_by_path[file_path], **self._dependency_fields(file_path, graph, project_root_path))
+                        job = self._breakdown_job(file_path, record, project_root_path, existing_by_name, created_files)
+                        if job:
+                            jobs.append(job)
+                    self._write_jobs(jobs, project_root_path)
             
             # Identify files that were in the structure but not in the breakdown
-            missing_content = self.planned_files - created_files
-            for file_path in missing_content:
+            jobs = []
+            for file_path in sorted(self.planned_files - created_files):
                 full_file_path = os.path.join(project_root_path, file_path)
-                if os.path.exists(full_file_path) and os.path.getsize(full_file_path) == 0:
-                    # Generate generic content based on file type
-                    _, ext = os.path.splitext(file_path)
-                    
-                    if ext == '.py':
-                        content = f'"""\n{os.path.basename(file_path)}\n\nGenerated file based on project structure.\n"""\n\n'
-                        if os.path.basename(file_path) == '__init__.py':
-                            pass  # Leave __init__.py empty
-                        elif 'main' in os.path.basename(file_path).lower():
-                            content += "\ndef main():\n    pass\n\nif __name__ == \"__main__\":\n    main()\n"
-                        else:
-                            content += "# Add your code here\n"
-                    elif ext == '.md':
-                        file_basename = os.path.splitext(os.path.basename(file_path))[0]
-                        content = f"# {file_basename}\n\nGenerated file based on project structure.\n"
+                # Generic files are keyed on their path since they have no breakdown section
+                source_hash = hash_text(file_path)
+                if not os.path.exists(full_file_path) or file_path in self.errors:
+                    continue
+                if os.path.getsize(full_file_path) > 0:
+                    # Only files the generator wrote itself may be refreshed
+                    if file_path.replace(os.sep, '/') not in self.manifest.entries:
+                        continue
+                if self._skip_regeneration(file_path, source_hash):
+                    continue
+                jobs.append((file_path, source_hash, None))
+            self._write_jobs(jobs, project_root_path)
+            
+        except Exception as e:
+            self._message('warning', f"⚠️ Error creating files: {str(e)}")
+            import traceback
+            traceback.print_exc()
+    
+    def _write_streamed_records(self, breakdown_lines, root_dir_name, project_root_path, existing_by_name):
+        """
+        Write the files of a streamed breakdown in bounded batches
+        
+        The first pass over the breakdown only notes which section of each file comes
+        last and what it depends on. The second pass writes the first dependency wave
+        and sets the records of later waves aside in a spill file, remembering where
+        each one starts; every later wave then seeks to its own records. The breakdown
+        is read twice however many waves there are, and sections are rendered and
+        written in batches of up to STREAM_BATCH_SIZE files or STREAM_BATCH_BYTES of
+        fields, so no more than one batch is held in memory.
+        
+        Args:
+            breakdown_lines (callable): Returns a fresh iterator over the breakdown's lines
+            root_dir_name (str): Name of the project root directory in the plan
+            project_root_path (str): Path to the project root directory
+            existing_by_name (dict): File name -> list of existing absolute paths
+        
+        Returns:
+            set: Project-relative paths of the files the breakdown describes
+        """
+        # Later sections win when the breakdown describes the same file twice
+        last_section = {}
+        links = {}  # Only the fields the dependency graph needs are kept
+        section_count = 0
+        for index, record in enumerate(iter_file_records(breakdown_lines())):
+            file_path, _ = resolve_record_path(record, root_dir_name)
+            if file_path:
+                last_section[file_path] = index
+                links[file_path] = {'deps': record['deps'], 'interactions': record['interactions']}
+            section_count = index + 1
+        
+        self._message('info', f"📋 Found {section_count} file sections in the breakdown")
+        
+        graph = self._schedule(links)
+        levels = graph.levels()
+        created_files = set()
+        offsets = [[] for _ in graph.waves()]  # Spill file offsets of the records of each wave after the first
+        with tempfile.TemporaryFile() as spill:
+            def first_wave():
+                for index, record in enumerate(iter_file_records(breakdown_lines())):
+                    file_path = self._resolve_record_path(record, root_dir_name)
+                    if not file_path or last_section[file_path] != index:
+                        continue
+                    if levels[file_path] == 0:
+                        yield file_path, record
                     else:
-                        content = f"# {os.path.basename(file_path)}\n# Generated file based on project structure\n"
+                        offsets[levels[file_path]].append(spill.tell())
+                        spill.write(json.dumps([file_path, record]).encode('utf-8') + b'\n')
+            
+            def later_wave(level):
+                for offset in offsets[level]:
+                    spill.seek(offset)
+                    yield json.loads(spill.readline())
+            
+            self._write_streamed_wave(first_wave(), graph, project_root_path, existing_by_name, created_files)
+            for level in range(1, len(offsets)):
+                self._write_streamed_wave(later_wave(level), graph, project_root_path, existing_by_name, created_files)
+        return created_files
+    
+    def _write_streamed_wave(self, records, graph, project_root_path, existing_by_name, created_files):
+        """
+        Render and write one dependency wave of a streamed breakdown in batches
+        
+        Args:
+            records (iterable): (project-relative path, record) pairs of the wave
+            graph (DependencyGraph): The breakdown's dependency graph
+            project_root_path (str): Path to the project root directory
+            existing_by_name (dict): File name -> list of existing absolute paths
+            created_files (set): Paths described by the breakdown, updated with the wave's files
+        """
+        jobs = []
+        batch_bytes = 0
+        for file_path, record in records:
+            record.update(self._dependency_fields(file_path, graph, project_root_path))
+            job = self._breakdown_job(file_path, record, project_root_path, existing_by_name, created_files)
+            if job:
+                # The section text is only needed for the source hash; rendering uses the fields
+                del record['section']
+                jobs.append(job)
+                batch_bytes += sum(len(value) for value in record.values() if isinstance(value, str))
+            if len(jobs) >= STREAM_BATCH_SIZE or batch_bytes >= STREAM_BATCH_BYTES:
+                self._write_jobs(jobs, project_root_path)
+                jobs = []
+                batch_bytes = 0
+        self._write_jobs(jobs, project_root_path)
+    
+    def _schedule(self, records_by_path, report=True):
+        """
+        Build the dependency graph of the breakdown's files and report its waves
+        
+        Args:
+            records_by_path (dict): Project-relative path -> record with 'deps' and 'interactions'
+            report (bool): If True, describe the schedule and any cycles in messages
+        
+        Returns:
+            DependencyGraph: The graph, whose waves are generated in order
+        """
+        graph = DependencyGraph.from_records(records_by_path)
+        self.interfaces = {}
+        self._interface_targets = {path for imports in graph.imports.values() for path in imports.values()}
+        if report and graph.edge_count():
+            for cycle in graph.cycles():
+                self._message('warning', f"⚠️ Dependency cycle between {', '.join(cycle)}; these files are generated together")
+            critical_path = graph.critical_path()
+            self._message('info', f"🧭 Scheduled {len(graph.nodes)} files in {len(graph.waves())} dependency wave(s); "
+                                  f"critical path: {' → '.join(critical_path)}")
+        return graph
+    
+    def _dependency_fields(self, file_path, graph, project_root_path):
+        """
+        Describe the project modules a file imports, with the names each one defines
+        
+        Dependencies are final by the time the file is rendered: either written in an
+        earlier wave or left alone, in which case their interface is read from disk.
+        
+        Args:
+            file_path (str): Project-relative path of the file
+            graph (DependencyGraph): The breakdown's dependency graph
+            project_root_path (str): Path to the project root, or None when rendering in memory
+        
+        Returns:
+            dict: 'uses', the text for the template's {uses} field (empty if the file imports no
+                  project module), and 'local_modules', mapping each import name in the Dependencies
+                  field to the full name of the project module it refers to
+        """
+        if not file_path.endswith('.py'):
+            return {'uses': '', 'local_modules': {}}
+        modules = {name: module_name(dependency) for name, dependency in graph.imports[file_path].items()}
+        items = []
+        levels = graph.levels()
+        for dependency in sorted(set(graph.imports[file_path].values())):
+            # A module in the same cycle is rendered alongside this file, so only its name is known
+            if levels[dependency] == levels[file_path]:
+                items.append(module_name(dependency))
+                continue
+            if dependency not in self.interfaces and project_root_path is not None:
+                try:
+                    with open(os.path.join(project_root_path, dependency), 'r', encoding='utf-8') as f:
+                        self.interfaces[dependency] = module_interface(f.read())
+                except (OSError, UnicodeDecodeError):
+                    self.interfaces[dependency] = []
+            names = self.interfaces.get(dependency) or []
+            items.append(f"{module_name(dependency)} ({', '.join(names)})" if names else module_name(dependency))
+        return {'uses': f"\nUses: {', '.join(items)}\n" if items else '', 'local_modules': modules}
+    
+    def _breakdown_job(self, file_path, record, project_root_path, existing_by_name, created_files):
+        """
+        Decide whether a breakdown record has to be written
+        
+        Args:
+            file_path (str): Project-relative path of the file
+            record (dict): The file's record from the breakdown lexer
+            project_root_path (str): Path to the project root directory
+            existing_by_name (dict): File name -> list of existing absolute paths, kept up to date
+            created_files (set): Paths described by the breakdown, updated with file_path
+        
+        Returns:
+            tuple: (file path, source hash, record) to write, or None if the file is left alone
+        """
+        created_files.add(file_path)
+        
+        # Leave the file alone if its inputs did not change or it was edited by hand
+        source_hash = hash_text(record['section'] + record.get('uses', ''))
+        if self._skip_regeneration(file_path, source_hash):
+            return None
+        
+        full_file_path = os.path.join(project_root_path, file_path)
+        self._remove_misplaced_copies(file_path, full_file_path, project_root_path, existing_by_name)
+        return (file_path, source_hash, record)
+    
+    def _write_jobs(self, jobs, project_root_path):
+        """
+        Render and write files on the writer's threads and record them in the manifest
+        
+        Args:
+            jobs (list): (file path, source hash, breakdown record or None for generic content) tuples
+            project_root_path (str): Path to the project root directory
+        """
+        self._check_deadline()
+        if not jobs:
+            return
+        
+        # Ensure parent directories exist
+        self.writer.make_dirs(project_root_path, {os.path.dirname(file_path) for file_path, _, _ in jobs})
+        
+        def render_and_write(job):
+            file_path, _, record = job
+            # Jobs already queued on the writer's threads are skipped once the request is abandoned
+            if self.deadline is not None and self.deadline.cancelled:
+                return None
+            if record is None:
+                content = self._generate_generic_file_content(file_path)
+            else:
+                content = self._generate_file_content(record, file_path)
+            self._write_text(os.path.join(project_root_path, file_path), content)
+            return content, len(content.encode('utf-8'))
+        
+        # Results come back in job order, so events and the manifest do not depend on thread timing
+        for (file_path, source_hash, record), result, error in self.writer.map(render_and_write, jobs):
+            if error is not None:
+                self.errors[file_path] = str(error)
+                self.emit(FileFailed(file_path, str(error)))
+                continue
+            if result is None:
+                continue
+            content, size = result
+            if file_path in self._interface_targets:
+                self.interfaces[file_path] = module_interface(content)
+            self.emit(FileWritten(file_path, size, 'generic' if record is None else 'breakdown'))
+            self.manifest.record(file_path, source_hash, content)
+            self.manifest.written.append(file_path)
+        self._check_deadline()
+    
+    def _cleanup_duplicates(self, project_root_path):
+        """
+        Check for and remove duplicated files
+        
+        This happens when a file is created both in the root directory and in a subdirectory.
+        
+        Args:
+            project_root_path (str): Path to the project root directory
+        """
+        try:
+            self._message('info', "🧹 Running cleanup to ensure proper file organization...")
+            
+            # First, build a list of all created files with their full paths
+            all_files = []
+            for root, _, files in os.walk(project_root_path):
+                for file in files:
+                    if file not in ('project_plan.json', MANIFEST_FILENAME, VALIDATION_FILENAME):  # Skip the plan and bookkeeping files
+                        relative_path = os.path.relpath(root, project_root_path)
+                        depth = 0 if relative_path == '.' else len(relative_path.split(os.sep))
+                        all_files.append({
+                            'path': os.path.join(root, file),
+                            'name': file,
+                            'depth': depth,
+                            'relative_dir': relative_path
+                        })
+            
+            # Group files by name
+            files_by_name = {}
+            for file_info in all_files:
+                if file_info['name'] not in files_by_name:
+                    files_by_name[file_info['name']] = []
+                files_by_name[file_info['name']].append(file_info)
+            
+            # Find and remove duplicates
+            for name, file_infos in files_by_name.items():
+                if len(file_infos) > 1:
+                    self._message('warning', f"⚠️ Found duplicate files named '{name}':")
                     
-                    # Write the generic content
-                    with open(full_file_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
+                    # Check for hints in the project structure
+                    expected_locations = []
+                    for path in self.planned_files:
+                        if os.path.basename(path) == name:
+                            expected_locations.append(os.path.dirname(path))
                     
-                    print(f"📄 Added generic content to: {full_file_path}")
-            
-            # Cleanup: Check for and remove duplicated files
-            # This happens when a file is created both in the root directory and in a subdirectory
-            try:
-                print("🧹 Running cleanup to ensure proper file organization...")
-                
-                # First, build a list of all created files with their full paths
-                all_files = []
-                for root, _, files in os.walk(project_root_path):
-                    for file in files:
-                        if file != 'project_plan.json':  # Skip the plan file
-                            relative_path = os.path.relpath(root, project_root_path)
-                            depth = 0 if relative_path == '.' else len(relative_path.split(os.sep))
-                            all_files.append({
-                                'path': os.path.join(root, file),
-                                'name': file,
-                                'depth': depth,
-                                'relative_dir': relative_path
-                            })
-                
-                # Group files by name
-                files_by_name = {}
-                for file_info in all_files:
-                    if file_info['name'] not in files_by_name:
-                        files_by_name[file_info['name']] = []
-                    files_by_name[file_info['name']].append(file_info)
-                
-                # Find and remove duplicates
-                for name, file_infos in files_by_name.items():
-                    if len(file_infos) > 1:
-                        print(f"⚠️ Found duplicate files named '{name}':")
-                        
-                        # Check for hints in the project structure
-                        expected_locations = []
-                        for path in self.planned_files:
-                            if os.path.basename(path) == name:
-                                expected_locations.append(os.path.dirname(path))
-                        
-                        # If we have expected locations, use them to decide which file to keep
-                        if expected_locations:
-                            for file_info in file_infos:
-                                rel_dir = file_info['relative_dir']
-                                if rel_dir == '.' and expected_locations[0] != '':
-                                    # This is a root file but should be in a subdirectory
-                                    if os.path.exists(file_info['path']):
-                                        os.remove(file_info['path'])
-                                        print(f"   🧹 Removed duplicate in root: {file_info['path']}")
-                        else:
-                            # Sort by depth (higher depth means deeper in the directory structure)
-                            file_infos.sort(key=lambda x: x['depth'])
-                            
-                            # Keep the file with the greatest depth, remove others
-                            for file_info in file_infos[:-1]:
+                    # If we have expected locations, use them to decide which file to keep
+                    if expected_locations:
+                        for file_info in file_infos:
+                            rel_dir = file_info['relative_dir']
+                            if rel_dir == '.' and expected_locations[0] != '':
+                                # This is a root file but should be in a subdirectory
                                 if os.path.exists(file_info['path']):
                                     os.remove(file_info['path'])
-                                    print(f"   🧹 Removed duplicate: {file_info['path']}")
-            except Exception as cleanup_error:
-                print(f"⚠️ Error during duplicate file cleanup: {str(cleanup_error)}")
-                
-        except Exception as e:
-            print(f"⚠️ Error creating files: {str(e)}")
-            import traceback
-            traceback.print_exc()
+                                    relative_path = os.path.relpath(file_info['path'], project_root_path)
+                                    self.manifest.forget(relative_path)
+                                    self.emit(FileRemoved(relative_path, 'duplicate_in_root'))
+                    else:
+                        # Sort by depth (higher depth means deeper in the directory structure)
+                        file_infos.sort(key=lambda x: x['depth'])
+                        
+                        # Keep the file with the greatest depth, remove others
+                        for file_info in file_infos[:-1]:
+                            if os.path.exists(file_info['path']):
+                                os.remove(file_info['path'])
+                                relative_path = os.path.relpath(file_info['path'], project_root_path)
+                                self.manifest.forget(relative_path)
+                                self.emit(FileRemoved(relative_path, 'duplicate'))
+        except Exception as cleanup_error:
+            self._message('warning', f"⚠️ Error during duplicate file cleanup: {str(cleanup_error)}")
+    
+    def _remove_misplaced_copies(self, file_path, full_file_path, project_root_path, existing_by_name):
+        """
+        Remove copies of a file that an earlier run left in the wrong place
+        
+        A copy is removed when it sits in the project root although the file belongs
+        in a subdirectory, or when it is empty. Copies the structure plans are kept.
+        
+        Args:
+            file_path (str): Project-relative path the file is about to be written to
+            full_file_path (str): Absolute path the file is about to be written to
+            project_root_path (str): Path to the project root directory
+            existing_by_name (dict): File name -> list of existing absolute paths, kept up to date
+        """
+        existing_paths = existing_by_name.get(os.path.basename(file_path), [])
+        for existing_path in list(existing_paths):
+            # Don't include the file we're about to create or files the structure plans there
+            if existing_path == full_file_path or os.path.relpath(existing_path, project_root_path) in self.planned_files:
+                continue
+            
+            # Check if the existing file is in the root directory
+            is_in_root = os.path.dirname(existing_path) == project_root_path
+            existing_content = ""
+            try:
+                with open(existing_path, 'r', encoding='utf-8') as f:
+                    existing_content = f.read()
+            except Exception:
+                pass
+            
+            # If the file is in the root but should be in a subdirectory, or it has no content
+            if is_in_root or not existing_content:
+                # Remove the misplaced file
+                try:
+                    os.remove(existing_path)
+                    existing_paths.remove(existing_path)
+                    relative_path = os.path.relpath(existing_path, project_root_path)
+                    self.manifest.forget(relative_path)
+                    self.emit(FileRemoved(relative_path, 'misplaced'))
+                except Exception as e:
+                    self._message('warning', f"⚠️ Could not remove misplaced file: {str(e)}")
+    
+    def _resolve_record_path(self, record, root_dir_name):
+        """
+        Work out the project-relative path of the file a breakdown record describes
+        
+        Args:
+            record (dict): A file record from the breakdown lexer
+            root_dir_name (str): Name of the project root directory in the plan
+        
+        Returns:
+            str: Normalized file path, or None if the record does not describe a file
+        """
+        file_path, skip_reason = resolve_record_path(record, root_dir_name)
+        if skip_reason == "not a file":
+            self._message('warning', f"⚠️ Path doesn't appear to be a file: {record['raw_path']}")
+        elif file_path and os.path.dirname(file_path) and not any(sep in record['raw_path'] for sep in '/\\'):
+            self._message('info', f"📝 Updated file path using directory hint: {file_path}")
+        return file_path
+    
+    def _generate_generic_file_content(self, file_path):
+        """
+        Generate content for a file that appears in the structure but not in the breakdown
+        
+        Args:
+            file_path (str): Path to the file
+        
+        Returns:
+            str: Generated content for the file
+        """
+        _, ext = os.path.splitext(file_path)
+        context = self._template_context(file_path, "Generated file based on project structure.", "None")
+        return self.templates.render('generic', ext, file_role(file_path), self.framework, context)
+    
+    def _skip_regeneration(self, file_path, source_hash):
+        """
+        Decide whether a file can be left untouched during an incremental run
+        
+        Args:
+            file_path (str): Project-relative path of the output file
+            source_hash (str): Hash of the inputs the file is rendered from
+        
+        Returns:
+            bool: True if the file should not be rewritten
+        """
+        if self.force:
+            return False
+        if self.manifest.is_up_to_date(file_path, source_hash):
+            self.manifest.unchanged.append(file_path)
+            self.emit(FileSkipped(file_path, 'unchanged'))
+            return True
+        if self.manifest.is_hand_edited(file_path):
+            self.emit(FileSkipped(file_path, 'hand_edited'))
+            self.manifest.hand_edited.append(file_path)
+            return True
+        return False
+    
+    def _prepare_templates(self, project_plan):
+        """
+        Collect the project-wide values templates are rendered with
+        
+        Args:
+            project_plan (dict): The project plan
+        """
+        self.framework = gui_framework(project_plan)
+        self.project_name = (project_plan.get('project_overview', {}) or {}).get('name') \
+            or project_plan.get('project_structure', {}).get('root_directory', '')
+        self.requirements = ''.join(f"{name}\n" for name in third_party_requirements(project_plan))
+        
+        # README usage points at the shallowest entry point of the project
+        entry_points = sorted((path for path in self.planned_files if file_role(path) == 'entry_point' and path.endswith('.py')),
+                              key=lambda path: (path.count(os.sep), path))
+        entry_point = entry_points[0].replace(os.sep, '/') if entry_points else 'main.py'
+        self.run_command = f"streamlit run {entry_point}" if self.framework == 'streamlit' else f"python {entry_point}"
+    
+    def _template_context(self, file_path, purpose, interactions):
+        """
+        Build the values shared by every template rendered for a file
+        
+        Args:
+            file_path (str): Path to the file
+            purpose (str): Purpose of the file
+            interactions (str): Interactions with other files
+        
+        Returns:
+            dict: Template context
+        """
+        filename = os.path.basename(file_path)
+        return {
+            'filename': filename,
+            'path': file_path.replace(os.sep, '/'),
+            'title': os.path.splitext(filename)[0],
+            'purpose': purpose,
+            'interactions': interactions,
+            'project_name': self.project_name,
+            'run_command': self.run_command,
+            'requirements': self.requirements,
+        }
     
-    def _generate_file_content(self, file_section, file_path):
+    def _generate_file_content(self, record, file_path):
         """
-        Generate content for a file based on its breakdown section
+        Generate content for a file based on its breakdown record
         
         Args:
-            file_section (str): The section from file breakdown for this file
+            record (dict): The file record from the breakdown lexer
             file_path (str): Path to the file
         
         Returns:
             str: Generated content for the file
         """
-        # Get file extension
         _, ext = os.path.splitext(file_path)
         
-        # Extract information from the file section based on different possible formats
-        
-        # Format 1: Using asterisk bullet points (common in your format)
-        # * Primary purpose: Description
-        # * Key functions: function1, function2
-        # * Dependencies: dep1, dep2
-        
-        # Extract purpose
-        purpose_match = re.search(r'\*\s*(?:Primary )?[Pp]urpose:\s*([^\n]+)', file_section)
-        if not purpose_match:
-            purpose_match = re.search(r'[Pp]urpose:\s*([^\n]+)', file_section)
-        purpose = purpose_match.group(1).strip() if purpose_match else "No purpose specified"
-        
-        # Extract key functions/classes
-        key_funcs_match = re.search(r'\*\s*Key (?:classes/functions|functions|classes):\s*([^\n]+)', file_section)
-        if not key_funcs_match:
-            key_funcs_match = re.search(r'Key (?:classes/functions|functions|classes):\s*([^\n]+)', file_section)
-        key_funcs = key_funcs_match.group(1).strip() if key_funcs_match else "None"
-        
-        # Extract dependencies
-        deps_match = re.search(r'\*\s*Dependencies:\s*([^\n]+)', file_section)
-        if not deps_match:
-            deps_match = re.search(r'Dependencies:\s*([^\n]+)', file_section)
-        deps = deps_match.group(1).strip() if deps_match else "None"
-        
-        # Extract interactions
-        interactions_match = re.search(r'\*\s*Interactions:\s*([^\n]+)', file_section)
-        if not interactions_match:
-            interactions_match = re.search(r'Interactions:\s*([^\n]+)', file_section)
-        interactions = interactions_match.group(1).strip() if interactions_match else "None"
-        
-        # Generate content based on file type
         if ext == '.py':
-            return self._generate_python_file_content(file_path, purpose, key_funcs, deps, interactions)
-        elif ext == '.md':
-            return self._generate_markdown_file_content(file_path, purpose, file_section)
-        else:
-            # Generic content for other file types
-            return f"# {os.path.basename(file_path)}\n# Purpose: {purpose}\n\n"
+            return self._generate_python_file_content(file_path, record['purpose'], record['key_funcs'],
+                                                      record['deps'], record['interactions'], record.get('uses', ''),
+                                                      record.get('local_modules'))
+        
+        context = self._template_context(file_path, record['purpose'], record['interactions'])
+        return self.templates.render('file', ext, file_role(file_path), self.framework, context)
     
-    def _generate_python_file_content(self, file_path, purpose, key_funcs, deps, interactions):
+    def _generate_python_file_content(self, file_path, purpose, key_funcs, deps, interactions, uses='', local_modules=None):
         """
         Generate content for a Python file
         
@@ -512,147 +887,159 @@ class ProjectGenerator:
             key_funcs (str): Key functions/classes in the file
             deps (str): Dependencies of the file
             interactions (str): Interactions with other files
+            uses (str): The {uses} text naming the project modules it imports and their interfaces
+            local_modules (dict): Import names resolved to the full names of project modules
         
         Returns:
             str: Generated content for the Python file
         """
-        filename = os.path.basename(file_path)
-        
-        content = f'"""\n{filename}\n\n{purpose}\n\nInteractions: {interactions}\n"""\n\n'
+        templates = self.templates
+        role = file_role(file_path)
+        framework = self.framework
+        context = self._template_context(file_path, purpose, interactions)
+        context['uses'] = uses
         
         # Add imports
+        imports = []
+        modules = set()
         if deps and deps.lower() != 'none':
-            deps_list = [dep.strip() for dep in deps.split(',')]
-            for dep in deps_list:
-                if dep.strip():
-                    # Handle relative imports differently (e.g., converter.markdown_parser)
-                    if '.' in dep and not dep.startswith(('import ', 'from ')):
-                        parts = dep.split('.')
-                        if len(parts) == 2:  # Simple case like converter.markdown_parser
-                            content += f"from {parts[0]} import {parts[1]}\n"
-                        else:  # More complex cases
-                            content += f"import {dep}\n"
-                    else:
-                        content += f"import {dep}\n"
-            content += "\n"
+            for dep in deps.split(','):
+                dep = dep.strip()
+                if not dep:
+                    continue
+                if dep.startswith(('import ', 'from ')):
+                    imports.append(f"{dep}\n")
+                    modules.add(dep.split()[1])
+                    continue
+                # "typing_test" in the plan is the project module core.typing_test
+                dep = (local_modules or {}).get(dep, dep)
+                parts = dep.split('.')
+                # Handle relative imports differently (e.g., converter.markdown_parser)
+                if len(parts) == 2:
+                    imports.append(templates.render('from_import', '.py', role, framework, {'module': parts[0], 'name': parts[1]}))
+                else:
+                    imports.append(templates.render('import', '.py', role, framework, {'module': dep}))
+                modules.add(parts[0])
+            imports.append("\n")
+        context['imports'] = ''.join(imports)
         
-        # If this is an __init__.py file, keep it minimal
-        if filename == '__init__.py':
-            return content
+        classes = []
+        functions = []
+        has_main = False
         
         # Add function/class stubs based on key_funcs
-        if key_funcs and key_funcs.lower() != 'none':
-            functions = []
-            classes = []
-            
-            # Try to parse key_funcs into functions and classes
-            for item in re.split(r',\s*', key_funcs):
-                item = item.strip()
-                if not item or item.lower() == 'none':
-                    continue
-                
+        if role != 'init' and key_funcs and key_funcs.lower() != 'none':
+            for name, params, methods in split_key_items(key_funcs):
                 # Check if it's a class (usually CamelCase)
-                if re.match(r'^[A-Z][a-zA-Z0-9_]*$', item.split('(')[0]):
-                    # Extract class name and base classes if specified
-                    class_parts = item.split('(')
-                    class_name = class_parts[0].strip()
-                    base_classes = class_parts[1].rstrip(')') if len(class_parts) > 1 else ""
-                    
-                    class_def = f"class {class_name}"
-                    if base_classes:
-                        class_def += f"({base_classes})"
-                    class_def += ":\n    \"\"\"\n    Description of the {class_name} class.\n    \"\"\"\n    \n    def __init__(self):\n        \"\"\"\n        Initialize the {class_name} instance.\n        \"\"\"\n        pass\n\n"
-                    classes.append(class_def)
-                else:
-                    # Assume it's a function
-                    func_parts = item.split('(')
-                    func_name = func_parts[0].strip()
-                    func_params = func_parts[1].rstrip(')') if len(func_parts) > 1 else ""
-                    
-                    # For typical functions in our current example format
-                    if func_name == "parse_markdown":
-                        func_def = f"def {func_name}(markdown_text):\n    \"\"\"\n    Parse Markdown text and convert it to an intermediate representation.\n    \n    Args:\n        markdown_text (str): The Markdown text to parse.\n        \n    Returns:\n        dict: An intermediate representation of the parsed Markdown.\n    \"\"\"\n    # Implementation goes here\n    pass\n\n"
-                    elif func_name == "generate_html":
-                        func_def = f"def {func_name}(parsed_markdown):\n    \"\"\"\n    Generate HTML from parsed Markdown.\n    \n    Args:\n        parsed_markdown (dict): The parsed Markdown in intermediate representation.\n        \n    Returns:\n        str: The generated HTML.\n    \"\"\"\n    # Implementation goes here\n    pass\n\n"
-                    elif func_name == "main":
-                        func_def = f"def {func_name}():\n    \"\"\"\n    Main entry point of the application.\n    \"\"\"\n    # Implementation goes here\n    pass\n\n"
+                if re.match(r'^[A-Z][a-zA-Z0-9_]*$', name):
+                    if params:
+                        bases = f"({params})"
+                    elif role == 'test' and 'unittest' in modules and name.startswith('Test'):
+                        bases = "(unittest.TestCase)"
                     else:
-                        func_def = f"def {func_name}({func_params}):\n    \"\"\"\n    Description of the {func_name} function.\n    \"\"\"\n    # Implementation goes here\n    pass\n\n"
-                    
-                    functions.append(func_def)
-            
-            # Add classes first, then functions
-            for class_def in classes:
-                content += class_def
-            
-            for func_def in functions:
-                content += func_def
-                
-            # Add a main block if this looks like a main file
-            if 'main' in filename.lower() or any('main()' in f for f in functions):
-                content += "\n\nif __name__ == \"__main__\":\n    main()\n"
-        
-        return content
-    
-    def _generate_markdown_file_content(self, file_path, purpose, file_section):
-        """
-        Generate content for a Markdown file
+                        bases = ""
+                    # Only Test* classes in test files are test cases; helpers keep the plain class stub
+                    class_role = role if role != 'test' or name.startswith('Test') else None
+                    # The class template defines __init__ (setUp for test cases) itself
+                    class_methods = [templates.render('method', '.py', class_role, framework, dict(context, method_name=method))
+                                     for method in methods if method not in ('__init__', 'setUp')]
+                    class_context = dict(context, class_name=name, bases=bases, subject=name[4:] if name.startswith('Test') else name,
+                                         methods=''.join(class_methods))
+                    classes.append(templates.render('class', '.py', class_role, framework, class_context))
+                else:
+                    # Functions with a dedicated template (e.g. main, parse_markdown) use it over the generic stub
+                    template = templates.find(f"function:{name}", '.py', role, framework) or templates.find('function', '.py', role, framework)
+                    functions.append(template.render(dict(context, func_name=name, func_params=params)))
+                    has_main = has_main or name == 'main'
         
-        Args:
-            file_path (str): Path to the file
-            purpose (str): Purpose of the file
-            file_section (str): The section from file breakdown for this file
+        # Entry points always get a main function to run
+        if role == 'entry_point' and not has_main:
+            functions.append(templates.render('function:main', '.py', role, framework, context))
+            has_main = True
         
-        Returns:
-            str: Generated content for the Markdown file
-        """
-        filename = os.path.basename(file_path)
-        file_basename = os.path.splitext(filename)[0]
-        
-        # Get the project name - use the directory name as fallback
-        project_name = os.path.basename(os.path.dirname(file_path))
-        
-        # For README.md, create a more structured document
-        if filename.lower() == 'readme.md':
-            content = f"# {project_name}\n\n"
-            content += f"{purpose}\n\n"
-            content += "## Installation\n\n"
-            content += "```bash\n# Clone the repository\ngit clone https://github.com/yourusername/repo-name.git\n\n# Navigate to the project directory\ncd repo-name\n\n# Install dependencies (if any)\n# pip install -r requirements.txt\n```\n\n"
-            content += "## Usage\n\n"
-            content += "```bash\npython main.py\n```\n\n"
-            content += "## Features\n\n"
-            content += "- Feature 1\n"
-            content += "- Feature 2\n\n"
-            content += "## License\n\n"
-            content += "This project is licensed under the MIT License - see the LICENSE file for details.\n"
+        context['classes'] = ''.join(classes)
+        context['functions'] = ''.join(functions)
+        if role == 'test':
+            context['main_guard'] = templates.render('main_guard', '.py', role, framework, context) if 'unittest' in modules else ''
         else:
-            # Generic markdown for other .md files
-            content = f"# {file_basename}\n\n"
-            content += f"{purpose}\n\n"
-            content += "## Overview\n\n"
-            content += "Add an overview here.\n\n"
-            content += "## Contents\n\n"
-            content += "- Section 1\n"
-            content += "- Section 2\n"
-        
-        return content
+            context['main_guard'] = templates.render('main_guard', '.py', role, framework, context) if has_main else ''
+        
+        return templates.render('file', '.py', role, framework, context)
 
-def generate_project(project_plan_folder, use_existing_folder=False):
+def rendering_version():
+    """
+    Identify the generator code and templates that render files
+    
+    Returns:
+        str: GENERATOR_VERSION plus a fingerprint of the loaded templates, so adding or
+             editing a template plugin re-renders previously generated files
+    """
+    return f"{GENERATOR_VERSION}+{get_registry().fingerprint()}"
+
+def generate_project(project_plan_folder, use_existing_folder=False, force=False, workers=1, validate=True, stream=None,
+                     dedup=None, deadline=None):
     """
     Generate a project structure from a saved project plan
     
     Args:
         project_plan_folder (str): Path to the folder containing the project_plan.json file
         use_existing_folder (bool): If True, use the existing folder as the root instead of creating a subdirectory
+        force (bool): If True, rewrite every file instead of only the ones whose inputs changed
+        workers (int): Number of threads rendering and writing files; 1 writes serially
+        validate (bool): If True, check the syntax and imports of the generated Python files
+        stream (bool): If True, read the plan incrementally; None decides by the plan's size
+        dedup (str): If set, share identical files through the workspace blob store ('auto', 'reflink' or 'hardlink')
+        deadline (Deadline): Stop generating once it passes or is cancelled
         
     Returns:
         bool: True if successful, False otherwise
     """
-    # Get the workspace path (parent directory of the project plan folder)
-    workspace_path = os.path.dirname(project_plan_folder)
+    # Get the workspace path (parent directory of the project plan folder, or of its shard)
+    workspace_path = workspace_for(project_plan_folder)
     
     # Create a project generator
-    generator = ProjectGenerator(workspace_path)
+    generator = ProjectGenerator(workspace_path, dedup=dedup)
     
     # Generate the project
-    return generator.generate_project_from_plan(project_plan_folder, use_existing_folder)
+    return generator.generate_project_from_plan(project_plan_folder, use_existing_folder, force, workers, validate, stream,
+                                                deadline)
+
+def iter_generation_events(project_plan_folder, use_existing_folder=False, force=False, workers=1, validate=True,
+                           deadline=None):
+    """
+    Generate a project on a background thread and yield its progress events as they happen
+    
+    Stopping the iteration early, as when a streaming client disconnects, cancels the
+    generation at its next check; the remaining events are dropped.
+    
+    Args:
+        project_plan_folder (str): Path to the folder containing the project_plan.json file
+        use_existing_folder (bool): If True, use the existing folder as the root instead of creating a subdirectory
+        force (bool): If True, rewrite every file instead of only the ones whose inputs changed
+        workers (int): Number of threads rendering and writing files; 1 writes serially
+        validate (bool): If True, check the syntax and imports of the generated Python files
+        deadline (Deadline): Stop generating once it passes; one that never expires is used by default
+    
+    Yields:
+        ProgressEvent: Events in the order they were emitted, ending with generation_finished
+    """
+    events = EventQueue()
+    generator = ProjectGenerator(workspace_for(project_plan_folder), on_event=events, console=False)
+    if deadline is None:
+        deadline = Deadline()
+    finished = threading.Event()
+    
+    def run():
+        try:
+            generator.generate_project_from_plan(project_plan_folder, use_existing_folder, force, workers, validate,
+                                                 deadline=deadline)
+        finally:
+            finished.set()
+            events.close()
+    
+    threading.Thread(target=run, daemon=True, name='project-generation').start()
+    try:
+        yield from events
+    finally:
+        if not finished.is_set():
+            deadline.cancel('disconnected')
@@ -0,0 +1,370 @@
+import os
+import re
+import ast
+import sys
+import json
+import sysconfig
+from concurrent.futures import ProcessPoolExecutor
+from agents.generation_manifest import hash_text
+
+# Verdict cache and last report, stored next to the generation manifest
+VALIDATION_FILENAME = '.aisa_validation.json'
+
+# Bump whenever scan results change shape so cached scans are discarded
+VALIDATOR_VERSION = '1'
+
+# Below this many files to parse, starting worker processes costs more than it saves
+POOL_MIN_FILES = 32
+
+# Distribution names whose import name differs, keyed by normalized distribution name
+DISTRIBUTION_IMPORT_NAMES = {
+    'beautifulsoup4': 'bs4',
+    'pillow': 'PIL',
+    'opencv-python': 'cv2',
+    'opencv-python-headless': 'cv2',
+    'opencv-contrib-python': 'cv2',
+    'scikit-learn': 'sklearn',
+    'scikit-image': 'skimage',
+    'pyyaml': 'yaml',
+    'python-dateutil': 'dateutil',
+    'python-dotenv': 'dotenv',
+    'google-generativeai': 'google',
+    'protobuf': 'google',
+    'pymupdf': 'fitz',
+    'pyqt5': 'PyQt5',
+    'pyqt6': 'PyQt6',
+    'pyside6': 'PySide6',
+    'pyserial': 'serial',
+    'attrs': 'attr',
+    'psycopg2-binary': 'psycopg2',
+    'mysql-connector-python': 'mysql',
+    'python-magic': 'magic',
+    'discord.py': 'discord',
+    'faiss-cpu': 'faiss',
+    'pygithub': 'github',
+    'pyjwt': 'jwt',
+}
+
+# Packaging modules that are present wherever a project can be installed
+BUILD_MODULES = frozenset(('setuptools', 'pkg_resources', 'pip', 'wheel'))
+
+# Directories that never hold project modules
+SKIPPED_DIRS = frozenset(('__pycache__', 'venv', '.venv', 'env', 'node_modules', 'build', 'dist'))
+
+def _stdlib_modules():
+    names = getattr(sys, 'stdlib_module_names', None)
+    if names:
+        return frozenset(names)
+    # Python < 3.10: list the standard library directory instead
+    names = set(sys.builtin_module_names)
+    stdlib_dir = sysconfig.get_paths()['stdlib']
+    for entry in os.listdir(stdlib_dir):
+        name, ext = os.path.splitext(entry)
+        if ext == '.py' or (not ext and os.path.isdir(os.path.join(stdlib_dir, entry))):
+            names.add(name)
+    return frozenset(names)
+
+STDLIB_MODULES = _stdlib_modules()
+
+def scan_source(source, file_path):
+    """
+    Parse a Python source file and collect its imports
+    
+    The result depends only on the source text, which is what makes it safe to
+    cache by content hash.
+    
+    Args:
+        source (str): Python source code
+        file_path (str): Path used in syntax error messages
+    
+    Returns:
+        dict: {'syntax_error': {'line', 'message'} or None,
+               'imports': [[line, level, module, names or None], ...]}
+    """
+    try:
+        tree = compile(source, file_path, 'exec', ast.PyCF_ONLY_AST, dont_inherit=True)
+    except SyntaxError as e:
+        return {'syntax_error': {'line': e.lineno, 'message': e.msg}, 'imports': []}
+    except ValueError as e:
+        return {'syntax_error': {'line': None, 'message': str(e)}, 'imports': []}
+    
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append([node.lineno, 0, alias.name, None])
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.lineno, node.level, node.module or '', [alias.name for alias in node.names]])
+    imports.sort()
+    return {'syntax_error': None, 'imports': imports}
+
+def _scan_item(item):
+    # Process pool entry point: (project-relative path, source) -> scan
+    file_path, source = item
+    return scan_source(source, file_path)
+
+def declared_import_names(project_plan):
+    """
+    Map the dependencies declared in a plan to the names they are imported as
+    
+    Args:
+        project_plan (dict): The project plan
+    
+    Returns:
+        dict: Import name -> declared distribution name
+    """
+    requirements = project_plan.get('technical_requirements', {}) or {}
+    names = {}
+    for dep in str(requirements.get('dependencies') or '').split(','):
+        # Drop version specifiers and extras: "requests>=2.0", "uvicorn[standard]"
+        dist = re.split(r'[<>=!~;\[\s]', dep.strip(), 1)[0]
+        if not dist or dist.lower() == 'none':
+            continue
+        normalized = dist.lower().replace('_', '-')
+        import_name = DISTRIBUTION_IMPORT_NAMES.get(normalized, dist.replace('-', '_'))
+        names[import_name] = dist
+    return names
+
+class ProjectValidator:
+    """
+    Syntax and import validation for the Python files of a generated project.
+    
+    Parsing runs in a process pool and is cached by content hash in
+    VALIDATION_FILENAME, so unchanged files are never parsed again. Import
+    resolution against the standard library, the declared dependencies and the
+    project's own modules is cheap and runs on every pass, so verdicts stay
+    correct when other files of the project change.
+    """
+    
+    def __init__(self, project_root_path, project_plan, workers=None):
+        """
+        Initialize the validator
+        
+        Args:
+            project_root_path (str): Path to the project root directory
+            project_plan (dict): The project plan the project was generated from
+            workers (int): Number of parser processes; defaults to the CPU count
+        """
+        self.project_root_path = project_root_path
+        self.cache_path = os.path.join(project_root_path, VALIDATION_FILENAME)
+        self.workers = workers or os.cpu_count() or 1
+        self.declared = declared_import_names(project_plan)
+        self.scans = {}
+        self.modules = set()  # Dotted names of every module and package in the project
+        self.packages = set()  # Dotted names of the directories among them
+        self.init_packages = set()  # Packages with an __init__.py, which may define any name
+    
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == VALIDATOR_VERSION:
+                self.scans = data.get('scans', {})
+        except (OSError, ValueError):
+            self.scans = {}
+    
+    def _save_cache(self, report, live_hashes):
+        # Only keep scans of files that still exist so the cache cannot grow without bound
+        data = {
+            'version': VALIDATOR_VERSION,
+            'scans': {content_hash: self.scans[content_hash] for content_hash in sorted(live_hashes)},
+            'report': report,
+        }
+        try:
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1)
+        except OSError as e:
+            print(f"⚠️ Could not save validation cache: {str(e)}")
+    
+    def _collect_python_files(self):
+        """
+        Find the project's Python files and record every importable module name
+        
+        Returns:
+            list: Project-relative paths with '/' separators, sorted
+        """
+        python_files = []
+        for root, dirs, files in os.walk(self.project_root_path):
+            dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS and not d.startswith('.'))
+            rel_dir = os.path.relpath(root, self.project_root_path).replace(os.sep, '/')
+            rel_dir = '' if rel_dir == '.' else rel_dir
+            package = rel_dir.replace('/', '.')
+            has_python = False
+            for name in files:
+                if name.endswith('.py'):
+                    has_python = True
+                    python_files.append(f"{rel_dir}/{name}" if rel_dir else name)
+                    stem = name[:-3]
+                    if stem != '__init__':
+                        self.modules.add(f"{package}.{stem}" if package else stem)
+                    elif package:
+                        self.init_packages.add(package)
+            # Directories with Python files import as packages (regular or namespace)
+            if has_python and package:
+                parts = package.split('.')
+                for i in range(1, len(parts) + 1):
+                    self.modules.add('.'.join(parts[:i]))
+                    self.packages.add('.'.join(parts[:i]))
+        python_files.sort()
+        return python_files
+    
+    def _missing_names(self, package, names):
+        """
+        Find names a from-import cannot get from a project package
+        
+        A directory without __init__.py can only provide its submodules; names from
+        packages with an __init__.py or from plain modules are not checked.
+        
+        Args:
+            package (str): Dotted name of the module imported from
+            names (list): Imported names, or None for a plain import
+        
+        Returns:
+            list: Names that do not resolve
+        """
+        if not names or package not in self.packages or package in self.init_packages:
+            return []
+        return [name for name in names if name != '*' and f"{package}.{name}" not in self.modules]
+    
+    def _check_import(self, file_path, level, module, names=None):
+        """
+        Resolve one import statement
+        
+        Args:
+            file_path (str): Project-relative path of the importing file
+            level (int): Number of leading dots of a relative import
+            module (str): Imported module name without the leading dots
+            names (list): Names of a from-import, or None for a plain import
+        
+        Returns:
+            tuple: (severity, message) or None if the import resolves
+        """
+        package_parts = file_path.split('/')[:-1]
+        if level:
+            if level - 1 > len(package_parts):
+                return 'error', f"relative import {'.' * level}{module} goes above the project root"
+            base = package_parts[:len(package_parts) - (level - 1)]
+            target = '.'.join(base + ([module] if module else []))
+            if module and target not in self.modules:
+                return 'error', f"relative import {'.' * level}{module} does not resolve to a project module"
+            missing = self._missing_names(target, names)
+            if missing:
+                return 'error', f"relative import {'.' * level}{module} has no module {', '.join(missing)}"
+            return None
+        
+        top = module.split('.')[0]
+        if top in STDLIB_MODULES or top in self.declared or top in BUILD_MODULES:
+            return None
+        
+        # Modules of the project, importable from the root or, for scripts, from their own directory
+        sibling = '.'.join(package_parts + [module])
+        for target in (module, sibling):
+            if target in self.modules:
+                missing = self._missing_names(target, names)
+                if missing:
+                    return 'error', f"{module} has no module {', '.join(missing)}"
+                return None
+        if top in self.modules or '.'.join(package_parts + [top]) in self.modules:
+            return 'error', f"module {module} is not part of the project"
+        
+        lowered = top.lower()
+        for known in (self.declared, STDLIB_MODULES):
+            for name in known:
+                if name.lower() == lowered:
+                    return 'error', f"{top} should be spelled {name}; imports are case-sensitive"
+        normalized = lowered.replace('_', '-')
+        if normalized in DISTRIBUTION_IMPORT_NAMES:
+            return 'error', f"{top} is a distribution name; import {DISTRIBUTION_IMPORT_NAMES[normalized]} instead"
+        
+        # A project module imported by its bare name from somewhere it cannot be found
+        candidates = sorted(name for name in self.modules if name.rsplit('.', 1)[-1] == top)
+        if candidates:
+            return 'error', f"{top} is not importable from here; use {candidates[0]}"
+        return 'warning', f"{top} is not in the standard library, the declared dependencies or the project"
+    
+    def validate(self):
+        """
+        Validate every Python file of the project
+        
+        Returns:
+            dict: {'files': {path: {'ok', 'cached', 'issues'}}, 'summary': {...}} where each
+                  issue is {'line', 'severity', 'message'}
+        """
+        self._load_cache()
+        python_files = self._collect_python_files()
+        
+        # Hash every file; only files whose content has no cached scan are parsed
+        hashes = {}
+        pending = []
+        for file_path in python_files:
+            try:
+                with open(os.path.join(self.project_root_path, file_path), 'r', encoding='utf-8') as f:
+                    source = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                self.scans[f"unreadable:{file_path}"] = {'syntax_error': {'line': None, 'message': f"cannot read file: {str(e)}"}, 'imports': []}
+                hashes[file_path] = f"unreadable:{file_path}"
+                continue
+            content_hash = hash_text(source)
+            hashes[file_path] = content_hash
+            if content_hash not in self.scans:
+                pending.append((file_path, source))
+        
+        # Identical files (e.g. empty __init__.py) only need one parse
+        unique = list({hashes[file_path]: (file_path, source) for file_path, source in pending}.values())
+        if len(unique) >= POOL_MIN_FILES and self.workers > 1:
+            chunksize = max(1, len(unique) // (self.workers * 4))
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                scans = list(executor.map(_scan_item, unique, chunksize=chunksize))
+        else:
+            scans = [_scan_item(item) for item in unique]
+        for (file_path, _), scan in zip(unique, scans):
+            self.scans[hashes[file_path]] = scan
+        
+        parsed = {file_path for file_path, _ in pending}
+        files = {}
+        errors = warnings = 0
+        for file_path in python_files:
+            scan = self.scans[hashes[file_path]]
+            issues = []
+            if scan['syntax_error']:
+                issues.append({'line': scan['syntax_error']['line'], 'severity': 'error',
+                               'message': f"syntax error: {scan['syntax_error']['message']}"})
+            for line, level, module, names in scan['imports']:
+                problem = self._check_import(file_path, level, module, names)
+                if problem:
+                    issues.append({'line': line, 'severity': problem[0], 'message': problem[1]})
+            file_errors = sum(1 for issue in issues if issue['severity'] == 'error')
+            errors += file_errors
+            warnings += len(issues) - file_errors
+            files[file_path] = {'ok': file_errors == 0, 'cached': file_path not in parsed, 'issues': issues}
+        
+        report = {
+            'files': files,
+            'summary': {
+                'files': len(python_files),
+                'parsed': len(parsed),
+                'cached': len(python_files) - len(parsed),
+                'errors': errors,
+                'warnings': warnings,
+            },
+        }
+        self._save_cache(report, set(hashes.values()))
+        return report
+
+def print_report(report, stream=None):
+    """
+    Print a validation report in the generator's console style
+    
+    Args:
+        report (dict): Report returned by ProjectValidator.validate
+        stream (file): Where to print; defaults to the current sys.stdout
+    """
+    stream = stream or sys.stdout
+    summary = report['summary']
+    for file_path, verdict in report['files'].items():
+        for issue in verdict['issues']:
+            icon = '❌' if issue['severity'] == 'error' else '⚠️'
+            location = f"{file_path}:{issue['line']}" if issue['line'] else file_path
+            print(f"   {icon} {location}: {issue['message']}", file=stream)
+    print(f"🔎 Validated {summary['files']} Python files ({summary['cached']} cached): "
+          f"{summary['errors']} errors, {summary['warnings']} warnings", file=stream)
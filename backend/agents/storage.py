@@ -0,0 +1,645 @@
+import os
+import hmac
+import json
+import shutil
+import hashlib
+import tempfile
+import datetime
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+
+PLAN_FILENAME = 'project_plan.json'
+LAYOUT_FILENAME = '.aisa_storage.json'
+# MD5 of every file of a cached project as it was last downloaded or uploaded; never uploaded itself
+SYNC_STATE_FILENAME = '.aisa_synced.json'
+STORAGE_BACKENDS = ('local', 's3')
+
+# Projects are spread over 16 ** shard_chars directories named by a hash prefix of their ID
+DEFAULT_SHARD_CHARS = 2
+MAX_SHARD_CHARS = 4
+
+S3_NAMESPACE = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+
+
+def shard_of(project_id, shard_chars=DEFAULT_SHARD_CHARS):
+    """
+    Name of the shard directory a project belongs to
+    
+    Args:
+        project_id (str): Project folder name
+        shard_chars (int): Length of the hash prefix
+    
+    Returns:
+        str: Lowercase hex prefix of the SHA-1 of the ID
+    """
+    return hashlib.sha1(project_id.encode('utf-8')).hexdigest()[:shard_chars]
+
+
+def is_shard_name(name, shard_chars):
+    """
+    Check whether a directory name is a shard of a workspace
+    
+    Args:
+        name (str): Directory name
+        shard_chars (int): Shard width of the workspace
+    
+    Returns:
+        bool: True if it is a hash prefix of that width
+    """
+    return len(name) == shard_chars and all(c in '0123456789abcdef' for c in name)
+
+
+def read_layout(root):
+    """
+    Read the layout marker of a sharded workspace
+    
+    Args:
+        root (str): Workspace directory
+    
+    Returns:
+        dict: {'layout': 'sharded', 'shard_chars': n}, or None for a flat directory of projects
+    """
+    try:
+        with open(os.path.join(root, LAYOUT_FILENAME), 'r', encoding='utf-8') as f:
+            layout = json.load(f)
+        return layout if isinstance(layout.get('shard_chars'), int) else None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def workspace_for(project_dir):
+    """
+    Find the workspace a project folder belongs to, whether it is sharded or flat
+    
+    Args:
+        project_dir (str): Path to the project folder
+    
+    Returns:
+        str: The workspace directory, where shared state such as the blob store lives
+    """
+    project_dir = os.path.abspath(project_dir)
+    parent = os.path.dirname(project_dir)
+    grandparent = os.path.dirname(parent)
+    layout = read_layout(grandparent)
+    if layout and os.path.basename(parent) == shard_of(os.path.basename(project_dir), layout['shard_chars']):
+        return grandparent
+    return parent
+
+
+def _check_project_id(project_id):
+    if not project_id or project_id.startswith('.') or '/' in project_id or '\\' in project_id \
+            or project_id != os.path.basename(project_id):
+        raise ValueError(f"Invalid project ID '{project_id}'")
+
+
+def project_file_path(project_dir, rel_path):
+    """
+    Map an untrusted project-relative path to a file inside a local project folder
+    
+    Paths come from object store keys or from plans written by the model: one
+    with an absolute, empty, '.' or '..' component, a backslash or a drive, or
+    that resolves outside the folder through a symlink, has no local path.
+    
+    Args:
+        project_dir (str): Local folder of the project
+        rel_path (str): '/'-separated path, e.g. an object key relative to the project's prefix
+    
+    Returns:
+        str: Path of the local file, or None if the path is unsafe
+    """
+    parts = rel_path.split('/')
+    if any(part in ('', '.', '..') or '\\' in part or os.path.splitdrive(part)[0] for part in parts):
+        return None
+    path = os.path.join(project_dir, *parts)
+    root = os.path.realpath(project_dir)
+    if os.path.commonpath([root, os.path.realpath(path)]) != root:
+        return None
+    return path
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _md5_file(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ProjectStorage:
+    """
+    Where project plans and generated projects are kept.
+    
+    The planner and the generator work on a local project folder; a storage
+    backend decides where that folder lives and, for remote backends, keeps it
+    in step with the shared copy: fetch() brings a project's files into the
+    local folder before it is read, sync() pushes them back after it changed.
+    Workspace-wide state (blob store, retention index) lives in root.
+    """
+    
+    name = None
+    root = None  # Local workspace directory
+    
+    def project_dir(self, project_id):
+        """
+        Local folder of a project, whether or not it exists yet
+        
+        Args:
+            project_id (str): Project folder name
+        
+        Returns:
+            str: Path to the folder
+        """
+        raise NotImplementedError
+    
+    def list_projects(self):
+        """
+        List the projects that have a plan
+        
+        Returns:
+            list: Sorted project IDs
+        """
+        raise NotImplementedError
+    
+    def exists(self, project_id):
+        """
+        Check whether a project has a plan
+        
+        Args:
+            project_id (str): Project folder name
+        
+        Returns:
+            bool: True if the project exists
+        """
+        raise NotImplementedError
+    
+    def write_plan(self, project_id, plan):
+        """
+        Store a project's plan, creating the project if needed
+        
+        Args:
+            project_id (str): Project folder name
+            plan (dict): The project plan
+        
+        Returns:
+            str: Local folder of the project
+        """
+        raise NotImplementedError
+    
+    def fetch(self, project_id):
+        """
+        Make the local folder of a project current
+        
+        Args:
+            project_id (str): Project folder name
+        
+        Returns:
+            str: Local folder of the project, or None if there is no such project
+        """
+        raise NotImplementedError
+    
+    def sync(self, project_id):
+        """
+        Publish the local changes of a project
+        
+        Args:
+            project_id (str): Project folder name
+        
+        Returns:
+            int: Number of files uploaded or deleted remotely
+        """
+        raise NotImplementedError
+    
+    def delete(self, project_id):
+        """
+        Delete a project everywhere
+        
+        Args:
+            project_id (str): Project folder name
+        """
+        raise NotImplementedError
+
+
+class LocalStorage(ProjectStorage):
+    """
+    Projects on the local disk, sharded by a hash prefix of their ID.
+    
+    New projects go to root/<shard>/<project_id>, with 16 ** shard_chars shard
+    directories so no directory grows past a few thousand entries. The shard
+    width is recorded in root/.aisa_storage.json when the first project is
+    created. Projects of the older flat layout, root/<project_id>, are still
+    found and listed; migrate() moves them into their shards.
+    """
+    
+    name = 'local'
+    
+    def __init__(self, root, shard_chars=None):
+        """
+        Initialize the storage
+        
+        Args:
+            root (str): Workspace directory
+            shard_chars (int): Hash prefix length for a new workspace; defaults to
+                               AISA_STORAGE_SHARD_CHARS or DEFAULT_SHARD_CHARS. An existing
+                               workspace keeps the width it was created with
+        """
+        self.root = root
+        layout = read_layout(root)
+        if layout is not None:
+            self.shard_chars = layout['shard_chars']
+            self._layout_written = True
+        else:
+            if shard_chars is None:
+                shard_chars = int(os.environ.get('AISA_STORAGE_SHARD_CHARS') or DEFAULT_SHARD_CHARS)
+            self.shard_chars = min(max(1, shard_chars), MAX_SHARD_CHARS)
+            self._layout_written = False
+    
+    def _ensure_layout(self):
+        if not self._layout_written:
+            layout = {'layout': 'sharded', 'shard_chars': self.shard_chars}
+            _atomic_write(os.path.join(self.root, LAYOUT_FILENAME), json.dumps(layout, indent=4).encode('utf-8'))
+            self._layout_written = True
+    
+    def _sharded_dir(self, project_id):
+        return os.path.join(self.root, shard_of(project_id, self.shard_chars), project_id)
+    
+    def project_dir(self, project_id):
+        _check_project_id(project_id)
+        sharded = self._sharded_dir(project_id)
+        if not os.path.isdir(sharded):
+            legacy = os.path.join(self.root, project_id)
+            if os.path.isfile(os.path.join(legacy, PLAN_FILENAME)):
+                return legacy
+        return sharded
+    
+    def list_projects(self):
+        projects = set()
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            return []
+        sharded = read_layout(self.root) is not None
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith('.'):
+                continue
+            if os.path.isfile(os.path.join(entry.path, PLAN_FILENAME)):
+                projects.add(entry.name)
+            elif sharded and is_shard_name(entry.name, self.shard_chars):
+                with os.scandir(entry.path) as shard_entries:
+                    for project in shard_entries:
+                        if project.is_dir() and os.path.isfile(os.path.join(project.path, PLAN_FILENAME)):
+                            projects.add(project.name)
+        return sorted(projects)
+    
+    def exists(self, project_id):
+        return os.path.isfile(os.path.join(self.project_dir(project_id), PLAN_FILENAME))
+    
+    def write_plan(self, project_id, plan):
+        project_dir = self.project_dir(project_id)
+        self._ensure_layout()
+        _atomic_write(os.path.join(project_dir, PLAN_FILENAME),
+                      json.dumps(plan, indent=4, ensure_ascii=False).encode('utf-8'))
+        return project_dir
+    
+    def fetch(self, project_id):
+        return self.project_dir(project_id) if self.exists(project_id) else None
+    
+    def sync(self, project_id):
+        return 0
+    
+    def delete(self, project_id):
+        shutil.rmtree(self.project_dir(project_id), ignore_errors=True)
+    
+    def migrate(self):
+        """
+        Move projects of the flat layout into their shards
+        
+        Returns:
+            list: IDs of the projects moved
+        """
+        moved = []
+        self._ensure_layout()
+        for entry in sorted(os.scandir(self.root), key=lambda entry: entry.name):
+            if not entry.is_dir() or entry.name.startswith('.') \
+                    or not os.path.isfile(os.path.join(entry.path, PLAN_FILENAME)):
+                continue
+            target = self._sharded_dir(entry.name)
+            if os.path.exists(target):
+                print(f"⚠️ Not migrating {entry.name}: {target} already exists")
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.rename(entry.path, target)
+            moved.append(entry.name)
+        return moved
+
+
+class S3Storage(ProjectStorage):
+    """
+    Projects in an S3-compatible object store, shared by several backend nodes.
+    
+    Objects are named <prefix><shard>/<project_id>/<relative path>, with the
+    same shards as LocalStorage, and addressed path-style so MinIO and other
+    S3-compatible servers work. Requests are signed with AWS Signature V4 when
+    credentials are set. Each node generates into a local cache, a LocalStorage;
+    fetch() downloads objects whose ETag differs from the local file's MD5
+    and removes local files that no longer exist remotely, sync() uploads
+    changed files and deletes objects whose local file is gone. Concurrent
+    writers of the same project are last-writer-wins per file.
+    
+    Each cached project records what it last exchanged with the bucket, so
+    fetch() leaves alone the files written locally since the last sync, such
+    as those of a generation still in progress, instead of deleting or
+    overwriting them.
+    """
+    
+    name = 's3'
+    
+    def __init__(self, bucket, cache_root, endpoint=None, prefix='', region='us-east-1',
+                 access_key=None, secret_key=None, session_token=None, timeout=30):
+        """
+        Initialize the storage
+        
+        Args:
+            bucket (str): Bucket name
+            cache_root (str): Local workspace the projects are generated in
+            endpoint (str): Server URL, e.g. http://localhost:9000; defaults to AWS S3 in the region
+            prefix (str): Key prefix of the workspace inside the bucket
+            region (str): Region used in signatures
+            access_key (str): Access key ID; requests are anonymous without one
+            secret_key (str): Secret access key
+            session_token (str): Session token of temporary credentials
+            timeout (float): Seconds per HTTP request
+        """
+        self.bucket = bucket
+        self.cache = LocalStorage(cache_root)
+        self.root = cache_root
+        self.endpoint = (endpoint or f"https://s3.{region}.amazonaws.com").rstrip('/')
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.session_token = session_token
+        self.timeout = timeout
+        self.host = urllib.parse.urlsplit(self.endpoint).netloc
+        self._locks = {}  # Project ID -> lock serializing its fetch, sync and sync state
+        self._locks_guard = threading.Lock()
+    
+    def _project_prefix(self, project_id):
+        return f"{self.prefix}{shard_of(project_id, self.cache.shard_chars)}/{project_id}/"
+    
+    def _sign(self, method, path, query, headers, payload_hash):
+        # AWS Signature Version 4 for the s3 service
+        now = datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        date = amz_date[:8]
+        headers['x-amz-date'] = amz_date
+        headers['x-amz-content-sha256'] = payload_hash
+        if self.session_token:
+            headers['x-amz-security-token'] = self.session_token
+        names = sorted(name.lower() for name in headers)
+        values = {name.lower(): ' '.join(str(value).split()) for name, value in headers.items()}
+        canonical_query = '&'.join(f"{urllib.parse.quote(k, safe='-_.~')}={urllib.parse.quote(v, safe='-_.~')}"
+                                   for k, v in sorted(query.items()))
+        canonical_request = '\n'.join([
+            method, path, canonical_query,
+            ''.join(f"{name}:{values[name]}\n" for name in names),
+            ';'.join(names), payload_hash,
+        ])
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope,
+                                    hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()])
+        key = f"AWS4{self.secret_key}".encode('utf-8')
+        for part in (date, self.region, 's3', 'aws4_request'):
+            key = hmac.new(key, part.encode('utf-8'), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        headers['Authorization'] = (f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+                                    f"SignedHeaders={';'.join(names)}, Signature={signature}")
+    
+    def _request(self, method, key='', query=None, body=b''):
+        """
+        Send a request to the bucket
+        
+        Returns:
+            tuple: (status, response headers, response body); 404 is returned, other errors raise
+        
+        Raises:
+            OSError: If the server fails or cannot be reached
+        """
+        query = query or {}
+        path = '/' + urllib.parse.quote(f"{self.bucket}/{key}" if key else self.bucket, safe='/-_.~')
+        headers = {'host': self.host}
+        if body:
+            headers['content-length'] = str(len(body))
+        if self.access_key and self.secret_key:
+            self._sign(method, path, query, headers, hashlib.sha256(body).hexdigest() if body else EMPTY_SHA256)
+        url = self.endpoint + path + ('?' + urllib.parse.urlencode(sorted(query.items()), quote_via=urllib.parse.quote)
+                                      if query else '')
+        request = urllib.request.Request(url, data=body if method in ('PUT', 'POST') else None,
+                                         headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return 404, e.headers, b''
+            detail = e.read()[:300].decode('utf-8', 'replace')
+            raise OSError(f"S3 {method} {key or self.bucket} failed with {e.code}: {detail}")
+        except urllib.error.URLError as e:
+            raise OSError(f"S3 endpoint {self.endpoint} unreachable: {e.reason}")
+    
+    def _list(self, prefix, delimiter=None):
+        # ListObjectsV2 over every page: ({key: etag}, [common prefixes])
+        objects = {}
+        prefixes = []
+        query = {'list-type': '2', 'prefix': prefix}
+        if delimiter:
+            query['delimiter'] = delimiter
+        while True:
+            status, _, body = self._request('GET', query=query)
+            if status == 404:
+                raise OSError(f"S3 bucket '{self.bucket}' not found")
+            root = ET.fromstring(body)
+            for item in root.iter(f"{S3_NAMESPACE}Contents"):
+                objects[item.findtext(f"{S3_NAMESPACE}Key")] = item.findtext(f"{S3_NAMESPACE}ETag", '').strip('"')
+            for item in root.iter(f"{S3_NAMESPACE}CommonPrefixes"):
+                prefixes.append(item.findtext(f"{S3_NAMESPACE}Prefix"))
+            token = root.findtext(f"{S3_NAMESPACE}NextContinuationToken")
+            if root.findtext(f"{S3_NAMESPACE}IsTruncated") != 'true' or not token:
+                return objects, prefixes
+            query['continuation-token'] = token
+    
+    def _lock(self, project_id):
+        with self._locks_guard:
+            return self._locks.setdefault(project_id, threading.Lock())
+    
+    def _read_sync_state(self, project_dir):
+        # None for a cache written before the state was kept
+        try:
+            with open(os.path.join(project_dir, SYNC_STATE_FILENAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_sync_state(self, project_dir, state):
+        _atomic_write(os.path.join(project_dir, SYNC_STATE_FILENAME),
+                      json.dumps(state, indent=1, sort_keys=True).encode('utf-8'))
+    
+    def project_dir(self, project_id):
+        return self.cache.project_dir(project_id)
+    
+    def list_projects(self):
+        projects = set()
+        _, shards = self._list(self.prefix, '/')
+        for shard in shards:
+            _, folders = self._list(shard, '/')
+            projects.update(folder[len(shard):].rstrip('/') for folder in folders)
+        return sorted(projects)
+    
+    def exists(self, project_id):
+        _check_project_id(project_id)
+        status, _, _ = self._request('HEAD', self._project_prefix(project_id) + PLAN_FILENAME)
+        return status == 200
+    
+    def write_plan(self, project_id, plan):
+        project_dir = self.cache.write_plan(project_id, plan)
+        with open(os.path.join(project_dir, PLAN_FILENAME), 'rb') as f:
+            body = f.read()
+        with self._lock(project_id):
+            self._request('PUT', self._project_prefix(project_id) + PLAN_FILENAME, body=body)
+            state = self._read_sync_state(project_dir)
+            if state is None and set(self._local_files(project_dir)) == {PLAN_FILENAME}:
+                state = {}  # A new project; an older cache keeps no state until its next fetch or sync
+            if state is not None:
+                state[PLAN_FILENAME] = hashlib.md5(body).hexdigest()
+                self._write_sync_state(project_dir, state)
+        return project_dir
+    
+    def _local_files(self, project_dir):
+        files = {}
+        for root, dirs, names in os.walk(project_dir):
+            for name in names:
+                if not name.startswith('.tmp-') and not (root == project_dir and name == SYNC_STATE_FILENAME):
+                    full_path = os.path.join(root, name)
+                    files[os.path.relpath(full_path, project_dir).replace(os.sep, '/')] = full_path
+        return files
+    
+    def fetch(self, project_id):
+        _check_project_id(project_id)
+        prefix = self._project_prefix(project_id)
+        with self._lock(project_id):
+            remote, _ = self._list(prefix)
+            if prefix + PLAN_FILENAME not in remote:
+                return None
+            project_dir = self.cache.project_dir(project_id)
+            self.cache._ensure_layout()
+            local = self._local_files(project_dir)
+            state = self._read_sync_state(project_dir)
+            synced = {}
+            for key, etag in remote.items():
+                rel_path = key[len(prefix):]
+                path = project_file_path(project_dir, rel_path)
+                if path is None:
+                    print(f"⚠️ Skipping object with an unsafe key: {key}")
+                    continue
+                if rel_path in local:
+                    digest = _md5_file(path)
+                    if digest == etag:
+                        synced[rel_path] = etag
+                        continue
+                    if state is not None and state.get(rel_path) != digest:
+                        continue  # Written here since the last sync, which will upload it
+                status, _, body = self._request('GET', key)
+                if status == 200:
+                    _atomic_write(path, body)
+                    synced[rel_path] = etag
+            # Only files unchanged since they were last synced are gone remotely; the others are unsynced writes
+            if state is not None:
+                for rel_path, path in local.items():
+                    if prefix + rel_path not in remote and rel_path in state and _md5_file(path) == state[rel_path]:
+                        os.remove(path)
+            self._write_sync_state(project_dir, synced)
+        return project_dir
+    
+    def sync(self, project_id):
+        _check_project_id(project_id)
+        prefix = self._project_prefix(project_id)
+        project_dir = self.cache.project_dir(project_id)
+        with self._lock(project_id):
+            remote, _ = self._list(prefix)
+            local = self._local_files(project_dir)
+            synced = {}
+            changes = 0
+            for rel_path, path in sorted(local.items()):
+                digest = _md5_file(path)
+                synced[rel_path] = digest
+                if remote.get(prefix + rel_path) == digest:
+                    continue
+                with open(path, 'rb') as f:
+                    self._request('PUT', prefix + rel_path, body=f.read())
+                changes += 1
+            for key in sorted(remote):
+                if key[len(prefix):] not in local:
+                    self._request('DELETE', key)
+                    changes += 1
+            if os.path.isdir(project_dir):
+                self._write_sync_state(project_dir, synced)
+        return changes
+    
+    def delete(self, project_id):
+        _check_project_id(project_id)
+        remote, _ = self._list(self._project_prefix(project_id))
+        for key in sorted(remote):
+            self._request('DELETE', key)
+        self.cache.delete(project_id)
+
+
+def get_storage(workspace_path):
+    """
+    Create the storage backend selected by AISA_STORAGE ('local' or 's3')
+    
+    The S3 backend reads AISA_S3_BUCKET, AISA_S3_ENDPOINT, AISA_S3_PREFIX,
+    AISA_S3_REGION and the standard AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY
+    and AWS_SESSION_TOKEN; the workspace is its local cache.
+    
+    Args:
+        workspace_path (str): Local workspace directory
+    
+    Returns:
+        ProjectStorage: The backend
+    
+    Raises:
+        ValueError: If the backend is unknown or misconfigured
+    """
+    backend = (os.environ.get('AISA_STORAGE') or 'local').strip().lower()
+    if backend == 'local':
+        return LocalStorage(workspace_path)
+    if backend == 's3':
+        bucket = os.environ.get('AISA_S3_BUCKET')
+        if not bucket:
+            raise ValueError("AISA_S3_BUCKET is required when AISA_STORAGE=s3")
+        return S3Storage(
+            bucket, workspace_path,
+            endpoint=os.environ.get('AISA_S3_ENDPOINT') or None,
+            prefix=os.environ.get('AISA_S3_PREFIX', ''),
+            region=os.environ.get('AISA_S3_REGION') or 'us-east-1',
+            access_key=os.environ.get('AWS_ACCESS_KEY_ID'),
+            secret_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
+            session_token=os.environ.get('AWS_SESSION_TOKEN'),
+        )
+    raise ValueError(f"Unknown storage backend '{backend}', expected one of: {', '.join(STORAGE_BACKENDS)}")
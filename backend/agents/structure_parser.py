@@ -0,0 +1,145 @@
+import os
+
+# Characters used to draw trees: box-drawing (├── │ └──), ASCII (|-- +-- `--), list bullets and indentation
+TREE_CHARS = ' \t│├└─┬┼┤┴|+`-*'
+
+# Files that are commonly written without an extension
+EXTENSIONLESS_FILES = frozenset((
+    'LICENSE', 'LICENCE', 'COPYING', 'Makefile', 'Dockerfile', 'Procfile', 'Pipfile',
+    'README', 'CHANGELOG', 'AUTHORS', 'NOTICE', 'MANIFEST', 'Vagrantfile',
+))
+
+def _new_node(name, explicit_dir):
+    # Children are keyed by name so entries listed twice share one node; dicts keep plan order
+    return {'name': name, 'children': {}, 'explicit_dir': explicit_dir}
+
+def _entry_name(rest):
+    """
+    Extract the entry name from a tree line with its drawing prefix removed
+    
+    Trailing comments like "main.py   # Entry point" or "main.py - entry point" are dropped.
+    
+    Args:
+        rest (str): The line after the tree prefix
+    
+    Returns:
+        str: The file or directory name, possibly containing '/' separators
+    """
+    if ' ' in rest:
+        for marker in (' #', '  ', ' - ', ' -- ', ' <-', ' ('):
+            cut = rest.find(marker)
+            if cut != -1:
+                rest = rest[:cut]
+        rest = rest.strip()
+    if '\\' in rest:
+        rest = rest.replace('\\', '/')
+    return rest.strip('`*"\'')
+
+def _is_dir(node):
+    if node['explicit_dir'] or node['children']:
+        return True
+    name = node['name']
+    if name in EXTENSIONLESS_FILES or (name.startswith('__') and name.endswith('__')):
+        return False
+    # Dotfiles (.gitignore, .env, .flake8); a dot directory is written with its trailing '/' or children
+    if name.startswith('.'):
+        return False
+    return '.' not in name.strip('.')
+
+def parse_folder_tree(folder_structure, root_dir_name=''):
+    """
+    Parse a drawn folder tree into a node tree in a single pass
+    
+    The nesting depth of every entry is taken from the width of its drawing
+    prefix and compared against a stack of open directories, so trees drawn
+    with "├──"/"│   " (4 columns), plain 2- or 4-space indentation or ASCII
+    "|--" all nest correctly without assuming an indent width.
+    
+    Args:
+        folder_structure (str): The folders text from the project plan
+        root_dir_name (str): Name of the project root directory; a top-level
+                             entry with this name is treated as the root itself
+    
+    Returns:
+        dict: {'root': root node, 'dirs': [dir paths], 'files': [file paths]} with
+              '/'-separated paths relative to the project root
+    """
+    root = _new_node('', True)
+    # Stack of (indent, node) for the directories enclosing the current line
+    stack = [(-1, root)]
+    
+    for line in folder_structure.splitlines():
+        if '\t' in line:
+            line = line.expandtabs(4)
+        rest = line.lstrip(TREE_CHARS)
+        if not rest:
+            continue
+        name = _entry_name(rest)
+        if not name:
+            continue
+        indent = len(line) - len(rest)
+        
+        while stack[-1][0] >= indent:
+            stack.pop()
+        node = stack[-1][1]
+        
+        explicit_dir = name.endswith('/')
+        if '/' in name:
+            # "src/utils/helpers.py" on one line creates the intermediate directories
+            parts = [part for part in name.split('/') if part and part != '.']
+            if not parts:
+                continue
+            last = len(parts) - 1
+            for i, part in enumerate(parts):
+                child = node['children'].get(part)
+                if child is None:
+                    child = node['children'][part] = _new_node(part, explicit_dir or i < last)
+                elif explicit_dir or i < last:
+                    child['explicit_dir'] = True
+                node = child
+        else:
+            child = node['children'].get(name)
+            if child is None:
+                child = node['children'][name] = _new_node(name, False)
+            node = child
+        stack.append((indent, node))
+    
+    # A single top-level entry named after the project is the project root itself
+    top = root['children']
+    if len(top) == 1 and root_dir_name:
+        only = next(iter(top.values()))
+        if only['name'].lower() == root_dir_name.strip('/').lower():
+            root = only
+    
+    # Paths are only built here, once per node, relative to whichever node is the root
+    dirs = []
+    files = []
+    pending = [('', node) for node in root['children'].values()]
+    while pending:
+        parent_path, node = pending.pop()
+        path = f"{parent_path}/{node['name']}" if parent_path else node['name']
+        if _is_dir(node):
+            dirs.append(path)
+            pending.extend((path, child) for child in node['children'].values())
+        else:
+            files.append(path)
+    dirs.sort()
+    files.sort()
+    return {'root': root, 'dirs': dirs, 'files': files}
+
+def planned_paths(folder_structure, root_dir_name=''):
+    """
+    Parse a drawn folder tree into sets of OS-specific relative paths
+    
+    Args:
+        folder_structure (str): The folders text from the project plan
+        root_dir_name (str): Name of the project root directory
+    
+    Returns:
+        tuple: (set of directory paths, set of file paths)
+    """
+    tree = parse_folder_tree(folder_structure, root_dir_name)
+    if os.sep == '/':
+        return set(tree['dirs']), set(tree['files'])
+    return ({os.path.normpath(path) for path in tree['dirs']},
+            {os.path.normpath(path) for path in tree['files']})
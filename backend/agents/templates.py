@@ -0,0 +1,308 @@
+import os
+import sys
+import string
+import hashlib
+import importlib.util
+
+# Directory of template plugins loaded on top of the built-in templates
+TEMPLATE_DIR_ENV = 'AISA_TEMPLATE_DIR'
+
+# Wildcard file type used when no template is registered for an extension
+ANY_TYPE = '*'
+
+ENTRY_POINT_NAMES = frozenset(('main', '__main__', 'app', 'run', 'cli', 'gui', 'streamlit_app'))
+CONFIG_NAMES = frozenset((
+    'requirements.txt', 'setup.py', 'setup.cfg', 'pyproject.toml', 'config.py', 'settings.py',
+    '.env', 'config.json', 'config.yaml', 'config.yml', 'config.ini', 'settings.json',
+))
+
+class Template:
+    """
+    A template compiled once into literal segments and field slots.
+    
+    Sources use str.format field syntax ("{purpose}", with "{{" and "}}" for literal
+    braces). Compiling splits the source up front, so rendering only fills the slots
+    and joins the segments once.
+    """
+    
+    __slots__ = ('name', 'source', 'fields', '_segments', '_slots')
+    
+    def __init__(self, name, source):
+        """
+        Compile a template
+        
+        Args:
+            name (str): Name used in error messages
+            source (str): Template text
+        """
+        self.name = name
+        self.source = source
+        self._segments = []
+        self._slots = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if literal:
+                self._segments.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"Template {name} uses unsupported field '{{{field}}}'; only plain names are allowed")
+            self._slots.append((len(self._segments), field))
+            self._segments.append('')
+        self.fields = frozenset(field for _, field in self._slots)
+    
+    def render(self, context):
+        """
+        Render the template
+        
+        Args:
+            context (dict): Values for every field of the template
+        
+        Returns:
+            str: The rendered text
+        """
+        segments = self._segments.copy()
+        try:
+            for index, field in self._slots:
+                segments[index] = context[field]
+        except KeyError as e:
+            raise KeyError(f"Template {self.name} needs a value for {e}") from None
+        return ''.join(segments)
+
+class TemplateRegistry:
+    """
+    Templates keyed by part, file type, role and GUI framework.
+    
+    A part names what a template renders: 'file' for a file described in the
+    breakdown, 'generic' for a file that only appears in the folder structure, and
+    snippets such as 'import', 'class', 'method', 'function' or 'function:main' that file
+    templates are assembled from. Lookups fall back from the most specific key to
+    the framework-independent, role-independent and finally wildcard-type templates.
+    """
+    
+    def __init__(self):
+        self._templates = {}
+        self._resolved = {}
+    
+    def register(self, part, file_type, source, role=None, framework=None):
+        """
+        Compile and register a template, replacing any template with the same key
+        
+        Args:
+            part (str): What the template renders, e.g. 'file' or 'function'
+            file_type (str): Extension including the dot, e.g. '.py', or '*' for any
+            source (str): Template text
+            role (str): File role such as 'entry_point', 'test', 'init', 'readme' or 'config'
+            framework (str): GUI framework such as 'streamlit' or 'tkinter'
+        """
+        key = (part, file_type, role, framework)
+        self._templates[key] = Template('/'.join(str(k) for k in key), source)
+        self._resolved.clear()
+    
+    def find(self, part, file_type, role=None, framework=None):
+        """
+        Find the most specific template for a key
+        
+        Args:
+            part (str): What the template renders
+            file_type (str): Extension including the dot
+            role (str): File role, or None
+            framework (str): GUI framework, or None
+        
+        Returns:
+            Template: The template, or None if nothing matches
+        """
+        key = (part, file_type, role, framework)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        template = None
+        for candidate in ((part, file_type, role, framework), (part, file_type, role, None),
+                          (part, file_type, None, framework), (part, file_type, None, None),
+                          (part, ANY_TYPE, role, framework), (part, ANY_TYPE, role, None),
+                          (part, ANY_TYPE, None, None)):
+            template = self._templates.get(candidate)
+            if template is not None:
+                break
+        self._resolved[key] = template
+        return template
+    
+    def render(self, part, file_type, role, framework, context):
+        """
+        Render the most specific template for a key
+        
+        Returns:
+            str: The rendered text
+        """
+        template = self.find(part, file_type, role, framework)
+        if template is None:
+            raise KeyError(f"No template registered for {part} {file_type}")
+        return template.render(context)
+    
+    def fingerprint(self):
+        """
+        Hash every registered template so output produced by different templates can be told apart
+        
+        Returns:
+            str: Short hex digest of the registry contents
+        """
+        digest = hashlib.sha256()
+        for key in sorted(self._templates, key=lambda k: tuple(str(part) for part in k)):
+            digest.update(repr(key).encode('utf-8'))
+            digest.update(self._templates[key].source.encode('utf-8'))
+        return digest.hexdigest()[:12]
+    
+    def load_plugins(self, plugin_dir):
+        """
+        Load template plugins from a directory
+        
+        Every .py file in the directory is imported and its register(registry)
+        function is called, in file name order, so plugins can override built-ins.
+        
+        Args:
+            plugin_dir (str): Path to the plugin directory
+        
+        Returns:
+            int: Number of plugins loaded
+        """
+        loaded = 0
+        if not os.path.isdir(plugin_dir):
+            print(f"⚠️ Template plugin directory not found: {plugin_dir}")
+            return loaded
+        for filename in sorted(os.listdir(plugin_dir)):
+            if not filename.endswith('.py') or filename.startswith('_'):
+                continue
+            plugin_path = os.path.join(plugin_dir, filename)
+            try:
+                spec = importlib.util.spec_from_file_location(f"aisa_templates_{filename[:-3]}", plugin_path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                module.register(self)
+                loaded += 1
+                print(f"🧩 Loaded template plugin: {plugin_path}")
+            except Exception as e:
+                print(f"❌ Failed to load template plugin {plugin_path}: {str(e)}")
+        return loaded
+
+def file_role(file_path):
+    """
+    Work out the role a file plays in the project from its path
+    
+    Args:
+        file_path (str): Project-relative file path
+    
+    Returns:
+        str: 'init', 'test', 'entry_point', 'readme', 'config' or None for an ordinary module
+    """
+    filename = os.path.basename(file_path)
+    lowered = filename.lower()
+    stem = os.path.splitext(lowered)[0]
+    if filename == '__init__.py':
+        return 'init'
+    if stem == 'readme':
+        return 'readme'
+    if lowered in CONFIG_NAMES:
+        return 'config'
+    parts = file_path.replace('\\', '/').split('/')
+    if stem.startswith('test_') or 'tests' in parts[:-1] or 'test' in parts[:-1]:
+        return 'test'
+    if stem in ENTRY_POINT_NAMES or 'main' in stem:
+        return 'entry_point'
+    return None
+
+def gui_framework(project_plan):
+    """
+    Normalize the GUI framework named in a project plan
+    
+    Args:
+        project_plan (dict): The project plan
+    
+    Returns:
+        str: 'streamlit', 'tkinter' or None
+    """
+    requirements = project_plan.get('technical_requirements', {}) or {}
+    named = f"{requirements.get('gui_framework') or ''} {requirements.get('dependencies') or ''}".lower()
+    if 'streamlit' in named:
+        return 'streamlit'
+    if 'tkinter' in named:
+        return 'tkinter'
+    return None
+
+def third_party_requirements(project_plan):
+    """
+    List the declared dependencies that are not part of the standard library
+    
+    Args:
+        project_plan (dict): The project plan
+    
+    Returns:
+        list: Distribution names in plan order, without duplicates
+    """
+    requirements = project_plan.get('technical_requirements', {}) or {}
+    stdlib = getattr(sys, 'stdlib_module_names', frozenset())
+    names = []
+    for dep in str(requirements.get('dependencies') or '').split(','):
+        dep = dep.strip()
+        if dep and dep.lower() != 'none' and dep.lower() not in stdlib and dep.lower() not in (n.lower() for n in names):
+            names.append(dep)
+    return names
+
+# Built-in templates as (part, file type, role, framework, source)
+BUILTIN_TEMPLATES = (
+    # Python files described in the breakdown
+    ('file', '.py', None, None, '"""\n{filename}\n\n{purpose}\n\nInteractions: {interactions}\n{uses}"""\n\n{imports}{classes}{functions}{main_guard}'),
+    ('file', '.py', 'init', None, '"""\n{filename}\n\n{purpose}\n\nInteractions: {interactions}\n{uses}"""\n\n{imports}'),
+    ('import', '.py', None, None, 'import {module}\n'),
+    ('from_import', '.py', None, None, 'from {module} import {name}\n'),
+    ('class', '.py', None, None, 'class {class_name}{bases}:\n    """\n    Description of the {class_name} class.\n    """\n    \n    def __init__(self):\n        """\n        Initialize the {class_name} instance.\n        """\n        pass\n{methods}\n'),
+    ('class', '.py', 'test', None, 'class {class_name}{bases}:\n    """\n    Test cases for {subject}.\n    """\n    \n    def setUp(self):\n        """\n        Prepare the fixtures used by each test.\n        """\n        pass\n{methods}\n'),
+    ('method', '.py', None, None, '    \n    def {method_name}(self):\n        """\n        Description of the {method_name} method.\n        """\n        pass\n'),
+    ('method', '.py', 'test', None, '    \n    def {method_name}(self):\n        """\n        Description of the {method_name} test case.\n        """\n        pass\n'),
+    ('function', '.py', None, None, 'def {func_name}({func_params}):\n    """\n    Description of the {func_name} function.\n    """\n    # Implementation goes here\n    pass\n\n'),
+    ('function:main', '.py', None, None, 'def main():\n    """\n    Main entry point of the application.\n    """\n    # Implementation goes here\n    pass\n\n'),
+    ('function:main', '.py', 'entry_point', 'streamlit', 'def main():\n    """\n    Main entry point of the Streamlit app, started with `streamlit run {path}`.\n    """\n    # Build the page layout here\n    pass\n\n'),
+    ('function:main', '.py', 'entry_point', 'tkinter', 'def main():\n    """\n    Main entry point of the application.\n    """\n    import tkinter as tk\n    \n    root = tk.Tk()\n    root.title("{project_name}")\n    # Build the widgets here\n    root.mainloop()\n\n'),
+    ('function:parse_markdown', '.py', None, None, 'def parse_markdown(markdown_text):\n    """\n    Parse Markdown text and convert it to an intermediate representation.\n    \n    Args:\n        markdown_text (str): The Markdown text to parse.\n        \n    Returns:\n        dict: An intermediate representation of the parsed Markdown.\n    """\n    # Implementation goes here\n    pass\n\n'),
+    ('function:generate_html', '.py', None, None, 'def generate_html(parsed_markdown):\n    """\n    Generate HTML from parsed Markdown.\n    \n    Args:\n        parsed_markdown (dict): The parsed Markdown in intermediate representation.\n        \n    Returns:\n        str: The generated HTML.\n    """\n    # Implementation goes here\n    pass\n\n'),
+    ('main_guard', '.py', None, None, '\n\nif __name__ == "__main__":\n    main()\n'),
+    ('main_guard', '.py', 'test', None, '\n\nif __name__ == "__main__":\n    unittest.main()\n'),
+    
+    # Markdown files described in the breakdown
+    ('file', '.md', None, None, '# {title}\n\n{purpose}\n\n## Overview\n\nAdd an overview here.\n\n## Contents\n\n- Section 1\n- Section 2\n'),
+    ('file', '.md', 'readme', None, '# {project_name}\n\n{purpose}\n\n## Installation\n\n```bash\n# Clone the repository\ngit clone https://github.com/yourusername/repo-name.git\n\n# Navigate to the project directory\ncd repo-name\n\n# Install dependencies (if any)\n# pip install -r requirements.txt\n```\n\n## Usage\n\n```bash\n{run_command}\n```\n\n## Features\n\n- Feature 1\n- Feature 2\n\n## License\n\nThis project is licensed under the MIT License - see the LICENSE file for details.\n'),
+    
+    # Any other file described in the breakdown
+    ('file', ANY_TYPE, None, None, '# {filename}\n# Purpose: {purpose}\n\n'),
+    ('file', '.txt', 'config', None, '# {filename}\n# Purpose: {purpose}\n\n{requirements}'),
+    
+    # Files that only appear in the folder structure
+    ('generic', '.py', None, None, '"""\n{filename}\n\nGenerated file based on project structure.\n"""\n\n# Add your code here\n'),
+    ('generic', '.py', 'init', None, '"""\n{filename}\n\nGenerated file based on project structure.\n"""\n\n'),
+    ('generic', '.py', 'entry_point', None, '"""\n{filename}\n\nGenerated file based on project structure.\n"""\n\n\ndef main():\n    pass\n\nif __name__ == "__main__":\n    main()\n'),
+    ('generic', '.md', None, None, '# {title}\n\nGenerated file based on project structure.\n'),
+    ('generic', ANY_TYPE, None, None, '# {filename}\n# Generated file based on project structure\n'),
+    ('generic', '.txt', 'config', None, '# {filename}\n# Generated file based on project structure\n\n{requirements}'),
+)
+
+_registry = None
+
+def get_registry():
+    """
+    Get the shared template registry, compiling it on first use
+    
+    The built-in templates are compiled once per process, then plugins from the
+    directory named by AISA_TEMPLATE_DIR are loaded on top of them.
+    
+    Returns:
+        TemplateRegistry: The shared registry
+    """
+    global _registry
+    if _registry is None:
+        registry = TemplateRegistry()
+        for part, file_type, role, framework, source in BUILTIN_TEMPLATES:
+            registry.register(part, file_type, source, role=role, framework=framework)
+        plugin_dir = os.getenv(TEMPLATE_DIR_ENV)
+        if plugin_dir:
+            registry.load_plugins(plugin_dir)
+        _registry = registry
+    return _registry
@@ -0,0 +1,345 @@
+import os
+import re
+import math
+import textwrap
+import threading
+
+# Characters per token of English text and Python identifiers for the Gemini tokenizer, on average
+CHARS_PER_TOKEN = 4.0
+
+# Longest user prompt accepted, in estimated tokens, and what happens to longer ones
+DEFAULT_MAX_PROMPT_TOKENS = 2000
+PROMPT_OVERFLOW_POLICIES = ('reject', 'truncate')
+
+# Bounds of the output budget of a plan; the model's own limit is the upper one
+MIN_OUTPUT_TOKENS = 2048
+MAX_OUTPUT_TOKENS = 8192
+
+# Output of a plan besides the file breakdown, and per planned file, as observed
+PLAN_BASE_TOKENS = 400
+TOKENS_PER_FILE = 125
+
+# The budget is this multiple of the expected answer, since an answer cut at the budget is not valid JSON
+OUTPUT_HEADROOM = 2.0
+
+# Output bounds of a refinement, which answers with the changed sections only
+MIN_REFINE_OUTPUT_TOKENS = 1024
+REFINE_BASE_TOKENS = 256
+
+# Files a project needs at least, and at most as far as the budget is concerned
+MIN_PLANNED_FILES = 4
+MAX_PLANNED_FILES = 40
+
+# Words of a prompt that each point at a part of the project needing files of its own
+COMPONENT_KEYWORDS = (
+    'database', 'sqlite', 'postgres', 'mysql', 'api', 'rest', 'gui', 'dashboard', 'interface', 'streamlit',
+    'tkinter', 'login', 'authentication', 'auth', 'user', 'users', 'admin', 'report', 'reports', 'export',
+    'import', 'csv', 'excel', 'pdf', 'chart', 'charts', 'graph', 'graphs', 'visualization', 'scraper', 'scrape',
+    'crawler', 'email', 'notification', 'notifications', 'schedule', 'scheduler', 'cache', 'config',
+    'configuration', 'plugin', 'plugins', 'cli', 'command', 'model', 'models', 'machine', 'learning', 'train',
+    'prediction', 'search', 'upload', 'download', 'payment', 'inventory', 'game', 'multiplayer', 'chat',
+    'server', 'client', 'websocket', 'queue', 'worker', 'logging', 'tests', 'testing',
+)
+
+# Weight of the latest answer in the moving ratio of actual to estimated output tokens
+CALIBRATION_SMOOTHING = 0.2
+# The output estimate is never scaled by more than this either way
+MAX_CALIBRATION = 2.0
+
+_TOKEN_PIECES = re.compile(r"\w+|\s{2,}|[^\w\s]")
+_WORD = re.compile(r"[a-z]+")
+_LIST_SEPARATORS = re.compile(r",|;|\band\b|\n\s*(?:[-*•]|\d+[.)])", re.IGNORECASE)
+
+
+class PromptTooLong(ValueError):
+    """
+    Raised when a prompt is over the token limit and the policy is to reject it
+    """
+    
+    def __init__(self, estimated_tokens, max_tokens):
+        """
+        Initialize the error
+        
+        Args:
+            estimated_tokens (int): Estimated tokens of the prompt
+            max_tokens (int): Limit the prompt is over
+        """
+        super().__init__(f"Prompt is too long: about {estimated_tokens} tokens, at most {max_tokens} are accepted")
+        self.estimated_tokens = estimated_tokens
+        self.max_tokens = max_tokens
+
+
+def estimate_tokens(text):
+    """
+    Estimate how many tokens the model counts for a text, without calling it
+    
+    Words count one token per CHARS_PER_TOKEN characters, punctuation one each,
+    and runs of whitespace such as indentation one per CHARS_PER_TOKEN characters.
+    
+    Args:
+        text (str): The text
+    
+    Returns:
+        int: Estimated tokens
+    """
+    if not text:
+        return 0
+    return sum(math.ceil(len(piece) / CHARS_PER_TOKEN) if len(piece) > 1 else 1
+               for piece in _TOKEN_PIECES.findall(text))
+
+
+def compact_prompt(text):
+    """
+    Remove the source indentation and trailing spaces of a prompt template, which the model
+    is billed for on every call, keeping the relative indentation of nested lines
+    
+    Args:
+        text (str): Prompt written as an indented triple-quoted string
+    
+    Returns:
+        str: The prompt without the common indentation
+    """
+    first, _, rest = text.strip('\n').partition('\n')
+    lines = [first.strip()] + textwrap.dedent(rest).splitlines()
+    return re.sub(r"\n{3,}", "\n\n", '\n'.join(line.rstrip() for line in lines)).strip()
+
+
+def estimate_planned_files(user_prompt):
+    """
+    Estimate how many files the plan of a project will describe, from its description
+    
+    Args:
+        user_prompt (str): Natural language description of the project
+    
+    Returns:
+        int: Estimated files, between MIN_PLANNED_FILES and MAX_PLANNED_FILES
+    """
+    components = set(_WORD.findall(user_prompt.lower())).intersection(COMPONENT_KEYWORDS)
+    listed = len(_LIST_SEPARATORS.findall(user_prompt))
+    length = estimate_tokens(user_prompt) // 60
+    files = MIN_PLANNED_FILES + len(components) + listed + length
+    return max(MIN_PLANNED_FILES, min(MAX_PLANNED_FILES, files))
+
+
+def estimate_plan_output(user_prompt):
+    """
+    Estimate how many tokens the plan of a project takes, from its description
+    
+    Args:
+        user_prompt (str): Natural language description of the project
+    
+    Returns:
+        int: Expected output tokens
+    """
+    return PLAN_BASE_TOKENS + TOKENS_PER_FILE * estimate_planned_files(user_prompt)
+
+
+def plan_output_budget(expected_tokens, calibration=1.0):
+    """
+    Pick max_output_tokens for the plan of a project, so small projects are not given
+    (and do not wait for) the budget of large ones
+    
+    Args:
+        expected_tokens (int): Result of estimate_plan_output()
+        calibration (float): Observed ratio of actual to expected output tokens
+    
+    Returns:
+        int: Output token budget, between MIN_OUTPUT_TOKENS and MAX_OUTPUT_TOKENS
+    """
+    budget = math.ceil(expected_tokens * calibration * OUTPUT_HEADROOM)
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, budget))
+
+
+def refine_output_budget(expected_tokens, calibration=1.0):
+    """
+    Pick max_output_tokens for a refinement
+    
+    Args:
+        expected_tokens (int): Estimated tokens of the plan sections and files sent to the model,
+                               which bound what it rewrites
+        calibration (float): Observed ratio of actual to expected output tokens
+    
+    Returns:
+        int: Output token budget, between MIN_REFINE_OUTPUT_TOKENS and MAX_OUTPUT_TOKENS
+    """
+    budget = REFINE_BASE_TOKENS + math.ceil(expected_tokens * calibration * OUTPUT_HEADROOM)
+    return max(MIN_REFINE_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, budget))
+
+
+def hit_output_limit(response):
+    """
+    Tell whether the model stopped answering because it ran out of output tokens
+    
+    Args:
+        response: Response of GenerativeModel.generate_content()
+    
+    Returns:
+        bool: True if the answer was cut at max_output_tokens
+    """
+    try:
+        reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return False
+    return getattr(reason, 'name', reason) in ('MAX_TOKENS', 2)
+
+
+def usage_of(response):
+    """
+    Read the token counts the model reported for a call
+    
+    Args:
+        response: Response of GenerativeModel.generate_content()
+    
+    Returns:
+        tuple: (prompt tokens, output tokens), each None if not reported
+    """
+    metadata = getattr(response, 'usage_metadata', None)
+    if metadata is None:
+        return None, None
+    return getattr(metadata, 'prompt_token_count', None), getattr(metadata, 'candidates_token_count', None)
+
+
+class PromptLimit:
+    """
+    Bound on the length of user prompts, checked before a request is queued
+    """
+    
+    def __init__(self, max_tokens=DEFAULT_MAX_PROMPT_TOKENS, policy='reject'):
+        """
+        Initialize the limit
+        
+        Args:
+            max_tokens (int): Longest prompt accepted, in estimated tokens
+            policy (str): 'reject' to refuse longer prompts, 'truncate' to cut them to the limit
+        
+        Raises:
+            ValueError: If the policy is unknown
+        """
+        if policy not in PROMPT_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown prompt overflow policy '{policy}'. Use one of: {', '.join(PROMPT_OVERFLOW_POLICIES)}")
+        self.max_tokens = max(1, max_tokens)
+        self.policy = policy
+    
+    @classmethod
+    def from_env(cls):
+        """
+        Read the limit from AISA_MAX_PROMPT_TOKENS and AISA_PROMPT_OVERFLOW
+        
+        Returns:
+            PromptLimit: The configured limit
+        """
+        max_tokens = os.environ.get('AISA_MAX_PROMPT_TOKENS', '').strip()
+        policy = os.environ.get('AISA_PROMPT_OVERFLOW', '').strip().lower() or 'reject'
+        return cls(int(max_tokens) if max_tokens else DEFAULT_MAX_PROMPT_TOKENS, policy)
+    
+    def apply(self, text):
+        """
+        Check a prompt against the limit
+        
+        Args:
+            text (str): The user's prompt
+        
+        Returns:
+            tuple: (prompt to use, True if it was truncated)
+        
+        Raises:
+            PromptTooLong: If the prompt is over the limit and the policy is 'reject'
+        """
+        estimated = estimate_tokens(text)
+        if estimated <= self.max_tokens:
+            return text, False
+        if self.policy == 'reject':
+            raise PromptTooLong(estimated, self.max_tokens)
+        # Keep whole pieces up to the limit, cutting at the last word boundary
+        kept = 0
+        end = 0
+        for match in _TOKEN_PIECES.finditer(text):
+            piece = match.group()
+            cost = math.ceil(len(piece) / CHARS_PER_TOKEN) if len(piece) > 1 else 1
+            if kept + cost > self.max_tokens:
+                break
+            kept += cost
+            end = match.end()
+        return text[:end].rstrip(), True
+
+
+class TokenLedger:
+    """
+    Estimated and actual token counts of model calls, per kind of call
+    
+    The moving ratio of actual to estimated output tokens calibrates the
+    output budget of later calls to the answers the model really gives.
+    """
+    
+    def __init__(self):
+        self._calls = {}
+        self._calibration = {}
+        self._lock = threading.Lock()
+    
+    def calibration(self, kind):
+        """
+        Ratio to scale output estimates of a kind of call by
+        
+        Args:
+            kind (str): Kind of call, e.g. 'plan' or 'refine'
+        
+        Returns:
+            float: Between 1 / MAX_CALIBRATION and MAX_CALIBRATION; 1.0 until an answer was measured
+        """
+        with self._lock:
+            return self._calibration.get(kind, 1.0)
+    
+    def record(self, kind, estimated_prompt, actual_prompt, budget, estimated_output, actual_output, truncated=False):
+        """
+        Record one model call
+        
+        Args:
+            kind (str): Kind of call, e.g. 'plan' or 'refine'
+            estimated_prompt (int): Estimated tokens of the prompt
+            actual_prompt (int): Prompt tokens reported by the model, or None
+            budget (int): max_output_tokens of the call
+            estimated_output (int): Expected tokens of the answer, before calibration
+            actual_output (int): Output tokens reported by the model, or None
+            truncated (bool): Whether the answer was cut at the budget
+        """
+        with self._lock:
+            calls = self._calls.setdefault(kind, {
+                'calls': 0, 'truncated': 0, 'budget_tokens': 0,
+                'estimated_prompt_tokens': 0, 'prompt_tokens': 0, 'prompt_calls_measured': 0,
+                'estimated_output_tokens': 0, 'output_tokens': 0, 'output_calls_measured': 0,
+            })
+            calls['calls'] += 1
+            calls['truncated'] += int(bool(truncated))
+            calls['budget_tokens'] += budget
+            if actual_prompt is not None:
+                calls['estimated_prompt_tokens'] += estimated_prompt
+                calls['prompt_tokens'] += actual_prompt
+                calls['prompt_calls_measured'] += 1
+            if actual_output is not None:
+                calls['estimated_output_tokens'] += estimated_output
+                calls['output_tokens'] += actual_output
+                calls['output_calls_measured'] += 1
+                # A cut answer only shows the budget was too small, not how long the answer would have been
+                if estimated_output and not truncated:
+                    ratio = max(1 / MAX_CALIBRATION, min(MAX_CALIBRATION, actual_output / estimated_output))
+                    previous = self._calibration.get(kind, ratio)
+                    self._calibration[kind] = previous + CALIBRATION_SMOOTHING * (ratio - previous)
+    
+    def snapshot(self):
+        """
+        Current counts
+        
+        Returns:
+            dict: Kind -> counts, plus the prompt and output estimate ratios and the output calibration
+        """
+        with self._lock:
+            result = {}
+            for kind, calls in self._calls.items():
+                entry = dict(calls)
+                entry['prompt_ratio'] = (round(calls['prompt_tokens'] / calls['estimated_prompt_tokens'], 3)
+                                         if calls['estimated_prompt_tokens'] else None)
+                entry['output_ratio'] = (round(calls['output_tokens'] / calls['estimated_output_tokens'], 3)
+                                         if calls['estimated_output_tokens'] else None)
+                entry['output_calibration'] = round(self._calibration.get(kind, 1.0), 3)
+                result[kind] = entry
+            return result
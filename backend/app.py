@@ -1,18 +1,258 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, make_response, send_file
 from flask_cors import CORS
 import os
+import json
+import socket
+import select
+import functools
 from dotenv import load_dotenv
-from agents.planning_agent import PlanningAgent
+from agents.planning_agent import PlanningAgent, WORKSPACE_PATH, sanitize_project_name
+from agents.project_generator import ProjectGenerator, rendering_version, iter_generation_events
+from agents.storage import LocalStorage, get_storage
+from agents.plan_refiner import RefinementError
+from agents.token_budget import PromptLimit, PromptTooLong
+from agents.deadline import (Deadline, Cancelled, CancellationCounter, DEADLINE_HEADER, PROBE_INTERVAL_SECONDS,
+                             stream_deadline_seconds)
+from services import admission, archive, idempotency, plan_views, profiling, retention
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['Content-Disposition', 'Content-Range', 'Accept-Ranges', 'ETag', idempotency.REPLAYED_HEADER,
+                        profiling.PROFILE_ID_HEADER])
+
+# Parsed file entries of recently paged plans, so each page does not re-parse the breakdown
+plan_file_entries = plan_views.FileEntryCache()
+
+# Archive lengths are remembered so resumed downloads don't regenerate the archive twice
+archive_lengths = archive.ArchiveLengthCache()
+
+# Where plans and generated projects are kept (see AISA_STORAGE in .env); the Workspace is the local copy
+try:
+    storage = get_storage(WORKSPACE_PATH)
+except ValueError as e:
+    print(f"❌ {str(e)}; using local storage")
+    storage = LocalStorage(WORKSPACE_PATH)
+
+# Project sizes and last accesses, and the quotas the Workspace is kept within (see .env);
+# the index is only built, on first use, when a quota is set
+workspace_retention = retention.WorkspaceRetention.from_env(WORKSPACE_PATH)
+
+# Plan requests wait on the model; bound how many run and queue so a slowdown sheds load instead of piling up
+plan_admission = admission.AdmissionController.from_env('/api/plan', 'AISA_PLAN')
+
+# Work stopped because its deadline passed or its client went away, per endpoint
+cancellations = CancellationCounter()
+
+# Longest prompt and refinement instruction accepted, checked before a request waits for a slot
+try:
+    prompt_limit = PromptLimit.from_env()
+except ValueError as e:
+    print(f"❌ {str(e)}; rejecting prompts over the default limit")
+    prompt_limit = PromptLimit()
+
+# Requests profiled on demand (X-Profile header) or at AISA_PROFILE_SAMPLE_RATE, and their stored profiles
+try:
+    request_profiler = profiling.ProfileStore.from_env()
+except ValueError as e:
+    print(f"❌ {str(e)}; using cProfile")
+    request_profiler = profiling.ProfileStore(os.environ.get('AISA_PROFILE_DIR', '').strip() or profiling.DEFAULT_PROFILE_DIR)
+
+# Outcomes of requests sent with an Idempotency-Key, replayed to their retries
+idempotency_store = idempotency.IdempotencyStore.from_env()
+
+def client_id():
+    """
+    Identify the caller of the current request for per-client limits
+    
+    Returns:
+        str: The client's address as seen by the server
+    """
+    return request.remote_addr or 'unknown'
+
+def disconnect_probe(environ):
+    """
+    Build a check for whether the client of the current request has closed its connection
+    
+    The connection is peeked at without consuming anything, so it only works once the
+    request body has been read, and only on servers that expose the socket (werkzeug's).
+    
+    Args:
+        environ (dict): WSGI environment of the request
+        
+    Returns:
+        callable: Returns True once the client is gone, or None if the socket is not available
+    """
+    sock = environ.get('werkzeug.socket')
+    if sock is None:
+        return None
+    
+    def disconnected():
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            # A readable socket with nothing to read has been closed by the peer
+            return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b''
+        except ValueError:
+            return False  # TLS sockets cannot be peeked at
+        except OSError:
+            return True
+    return disconnected
+
+def request_deadline(probe=None, default_seconds=None):
+    """
+    Deadline of the current request from its X-Request-Deadline header or the server default
+    
+    Args:
+        probe (callable): Returns True once the client has disconnected
+        default_seconds (float): Server default and maximum; AISA_REQUEST_DEADLINE_SECONDS by default
+        
+    Returns:
+        Deadline: The deadline
+    """
+    return Deadline.from_header(request.headers.get(DEADLINE_HEADER), default_seconds, probe)
+
+def cancelled_response(error):
+    """
+    Build the response for a request whose work was cancelled
+    
+    Args:
+        error (Cancelled): Why the work stopped
+        
+    Returns:
+        tuple: JSON body and status code; 499 is never seen by a client that went away
+    """
+    return jsonify({
+        'success': False,
+        'error': f"Request cancelled: {error}",
+        'reason': error.reason
+    }), 504 if error.reason == 'deadline' else 499
+
+def overloaded_response(error):
+    """
+    Build the response for a shed request
+    
+    Args:
+        error (admission.Overloaded): Why the request was shed
+        
+    Returns:
+        tuple: JSON body, status code and Retry-After header
+    """
+    return jsonify({
+        'success': False,
+        'error': f"Server is busy, retry in {error.retry_after}s ({error})",
+        'reason': error.reason
+    }), error.status, {'Retry-After': str(error.retry_after)}
+
+def idempotent(view):
+    """
+    Let retries of a POST endpoint sent with the same Idempotency-Key reuse the first request's outcome
+    
+    The first request with a key runs the view. A retry with the same key and body
+    waits for it while it runs, within its own deadline, and gets its response
+    replayed afterwards with an Idempotent-Replayed header. If the first request
+    failed transiently (5xx, shed, cancelled), the retry runs the view again.
+    Reusing a key for a different body is rejected with 422.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(idempotency.IDEMPOTENCY_HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key.strip() or len(key) > idempotency.MAX_KEY_LENGTH:
+            return jsonify({
+                'success': False,
+                'error': f"{idempotency.IDEMPOTENCY_HEADER} must be 1 to {idempotency.MAX_KEY_LENGTH} characters"
+            }), 400
+        
+        # The query string selects what is returned (fields=), so it is part of the request
+        fingerprint = idempotency.request_fingerprint(request.method, request.full_path, request.get_data())
+        deadline = None
+        while True:
+            try:
+                entry, owner = idempotency_store.begin(key, fingerprint)
+            except idempotency.KeyReused as e:
+                return jsonify({'success': False, 'error': str(e)}), 422
+            if owner:
+                break
+            
+            if entry.in_progress:
+                print(f"🔁 Request with idempotency key {key} attached to the one in progress")
+                deadline = deadline or request_deadline(disconnect_probe(request.environ))
+                while not entry.wait(PROBE_INTERVAL_SECONDS):
+                    if deadline.cancelled:
+                        cancellations.record(request.path, deadline.reason)
+                        return cancelled_response(Cancelled(deadline.reason, 'idempotent_wait'))
+            if entry.response is not None:
+                status, body, content_type = entry.response
+                print(f"🔁 Replaying response {status} for idempotency key {key}")
+                return Response(body, status=status, content_type=content_type,
+                                headers={idempotency.REPLAYED_HEADER: 'true'})
+            # The first request failed transiently; run it again, unless another retry already does
+        
+        try:
+            response = make_response(view(*args, **kwargs))
+        except BaseException:
+            idempotency_store.release(entry)
+            raise
+        idempotency_store.complete(entry, response.status_code, response.get_data(), response.content_type)
+        return response
+    return wrapper
+
+def profiled(view):
+    """
+    Profile requests that ask for it with the X-Profile header, or are sampled at AISA_PROFILE_SAMPLE_RATE
+    
+    The request runs under cProfile (or the sampling profiler) and the memory
+    tracer, and the profile is stored under the request's X-Request-ID, or a
+    new ID, returned in the X-Profile-Id header. Other requests only pay for
+    the header lookup.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not request_profiler.wants(request.headers):
+            return view(*args, **kwargs)
+        
+        session = request_profiler.start(request.headers.get(profiling.REQUEST_ID_HEADER), request.path,
+                                         request.method)
+        status = 500
+        try:
+            response = make_response(view(*args, **kwargs))
+            status = response.status_code
+        finally:
+            try:
+                metadata = session.stop(status)
+                print(f"🔬 Profiled {request.method} {request.path} as {session.profile_id}: "
+                      f"{metadata['duration_seconds']}s, peak {metadata['peak_memory_bytes'] / (1024 * 1024):.1f} MB")
+            except Exception as e:
+                print(f"⚠️ Failed to store profile {session.profile_id}: {str(e)}")
+        response.headers[profiling.PROFILE_ID_HEADER] = session.profile_id
+        return response
+    return wrapper
+
+def resolve_project_dir(project_id):
+    """
+    Map a project ID to its folder in the Workspace, bringing it up to date from storage
+    
+    Args:
+        project_id (str): Sanitized project folder name
+        
+    Returns:
+        str: Path to the project folder, or None if there is no such project
+    """
+    if not project_id or project_id != sanitize_project_name(project_id):
+        return None
+    try:
+        return storage.fetch(project_id)
+    except OSError as e:
+        # Serve the local copy, if any, while the shared storage is unreachable
+        print(f"⚠️ Could not fetch {project_id} from {storage.name} storage: {str(e)}")
+        project_dir = storage.project_dir(project_id)
+        return project_dir if os.path.isfile(os.path.join(project_dir, 'project_plan.json')) else None
 
 # Initialize the planning agent with error handling
 try:
-    planning_agent = PlanningAgent()
+    planning_agent = PlanningAgent(storage)
     print("✅ Planning Agent initialized successfully")
 except Exception as e:
     print(f"❌ Failed to initialize Planning Agent: {str(e)}")
@@ -22,9 +262,15 @@ except Exception as e:
     planning_agent = None
 
 @app.route('/api/plan', methods=['POST'])
+@idempotent
+@profiled
 def create_plan():
     """
     Endpoint to create a project plan based on user prompt
+    
+    Pass fields=project_overview,project_structure,... (query string or JSON body)
+    to receive only those sections of the plan; the file breakdown can then be
+    paged from GET /api/plans/<project_id>/files.
     """
     try:
         # Check if planning agent is initialized
@@ -44,10 +290,36 @@ def create_plan():
             print("❌ No prompt provided")
             return jsonify({'error': 'Prompt is required'}), 400
         
+        try:
+            user_prompt, prompt_truncated = prompt_limit.apply(user_prompt)
+        except PromptTooLong as e:
+            print(f"❌ {str(e)}")
+            return jsonify({'success': False, 'error': str(e)}), 413
+        if prompt_truncated:
+            print(f"✂️ Prompt truncated to about {prompt_limit.max_tokens} tokens")
+        
+        try:
+            fields = plan_views.parse_fields(request.args.get('fields') or data.get('fields'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
         print("🤖 Generating plan with Planning Agent...")
         
-        # Generate plan using the planning agent
-        plan = planning_agent.create_project_plan(user_prompt)
+        # Generate plan using the planning agent, once a slot is free and while the client still waits
+        client = client_id()
+        deadline = request_deadline(disconnect_probe(request.environ))
+        try:
+            with plan_admission.admit(client, deadline.remaining()) as slot:
+                if slot.queued_seconds:
+                    print(f"🚦 Plan request from {client} admitted after {slot.queued_seconds:.1f}s in queue")
+                plan = planning_agent.create_project_plan(user_prompt, deadline)
+        except admission.Overloaded as e:
+            print(f"🚦 Shedding plan request from {client}: {e}")
+            return overloaded_response(e)
+        except Cancelled as e:
+            cancellations.record('/api/plan', e.reason)
+            print(f"🛑 Plan request from {client} cancelled: {e}")
+            return cancelled_response(e)
         
         print(f"✅ Plan generated successfully. Keys: {list(plan.keys())}")
         
@@ -61,8 +333,17 @@ def create_plan():
         
         response_data = {
             'success': True,
-            'plan': plan
+            'plan': plan_views.select_fields(plan, fields)
         }
+        if prompt_truncated:
+            response_data['prompt_truncated'] = True
+        
+        # Tell the client where the plan was stored so it can fetch the generated project
+        if isinstance(plan.get('project_overview'), dict) and plan['project_overview'].get('name'):
+            response_data['project_id'] = sanitize_project_name(plan['project_overview']['name'])
+            response_data['files_url'] = f"/api/plans/{response_data['project_id']}/files"
+            workspace_retention.touch(response_data['project_id'], 'plan', measure=True)
+            workspace_retention.collect_async()
         
         print(f"📤 Sending response with success: {response_data['success']}")
         return jsonify(response_data)
@@ -74,6 +355,264 @@ def create_plan():
             'error': f'Server error: {str(e)}'
         }), 500
 
+@app.route('/api/plans/<project_id>', methods=['GET'])
+def get_plan(project_id):
+    """
+    Return a stored plan, or only the sections selected with fields=
+    
+    The file breakdown is not decoded unless it is selected, so asking for the
+    other sections stays cheap however large the plan is.
+    """
+    try:
+        fields = plan_views.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    project_dir = resolve_project_dir(project_id)
+    if project_dir is None:
+        return jsonify({'success': False, 'error': f"Project '{project_id}' not found"}), 404
+    workspace_retention.touch(project_id, 'plan_view')
+    
+    plan = plan_views.load_plan(os.path.join(project_dir, 'project_plan.json'), fields)
+    return jsonify({'success': True, 'project_id': project_id, 'plan': plan})
+
+@app.route('/api/plans/<project_id>/files', methods=['GET'])
+def list_plan_files(project_id):
+    """
+    Page through the file breakdown of a stored plan as parsed per-file entries
+    
+    Each page holds up to limit= entries (50 by default) and a next_cursor to pass
+    as cursor= for the following page; it is null on the last page. A cursor is
+    rejected with 410 once the plan has changed.
+    """
+    try:
+        limit = int(request.args.get('limit', plan_views.DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= plan_views.MAX_PAGE_SIZE:
+        return jsonify({'success': False, 'error': f"limit must be between 1 and {plan_views.MAX_PAGE_SIZE}"}), 400
+    
+    project_dir = resolve_project_dir(project_id)
+    if project_dir is None:
+        return jsonify({'success': False, 'error': f"Project '{project_id}' not found"}), 404
+    
+    plan_file_path = os.path.join(project_dir, 'project_plan.json')
+    version = plan_views.plan_version(os.stat(plan_file_path))
+    cursor = request.args.get('cursor')
+    try:
+        offset = plan_views.decode_cursor(cursor, version)
+    except plan_views.StaleCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 410
+    except plan_views.InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not cursor:
+        workspace_retention.touch(project_id, 'plan_view')
+    
+    entries = plan_file_entries.get(plan_file_path, version)
+    return jsonify({'success': True, 'project_id': project_id, **plan_views.page_entries(entries, offset, limit, version)})
+
+@app.route('/api/plans/<project_id>/refine', methods=['POST'])
+@idempotent
+@profiled
+def refine_plan(project_id):
+    """
+    Apply a change request to a stored plan and regenerate only what it affects
+    
+    The JSON body holds an instruction ("use Tkinter instead", "add a tests
+    folder"). Only the sections and files it refers to are sent to the model,
+    the returned delta is merged into the stored plan, and only the files whose
+    breakdown changed are rewritten. fields= selects the plan sections returned.
+    """
+    if planning_agent is None:
+        print("❌ Planning Agent not initialized")
+        return jsonify({
+            'success': False,
+            'error': 'Planning Agent not initialized. Please check server logs and environment configuration.'
+        }), 500
+    
+    data = request.get_json(silent=True) or {}
+    instruction = str(data.get('instruction', '')).strip()
+    if not instruction:
+        return jsonify({'success': False, 'error': 'Instruction is required'}), 400
+    try:
+        instruction, instruction_truncated = prompt_limit.apply(instruction)
+    except PromptTooLong as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    try:
+        fields = plan_views.parse_fields(request.args.get('fields') or data.get('fields'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if resolve_project_dir(project_id) is None:
+        return jsonify({'success': False, 'error': f"Project '{project_id}' not found"}), 404
+    
+    print(f"✏️ Received refinement of {project_id}: {instruction[:100]}")
+    
+    # Refinements call the model too, so they share the plan requests' admission control
+    client = client_id()
+    deadline = request_deadline(disconnect_probe(request.environ))
+    try:
+        with plan_admission.admit(client, deadline.remaining()):
+            result = planning_agent.refine_project_plan(project_id, instruction, deadline)
+    except admission.Overloaded as e:
+        print(f"🚦 Shedding refinement from {client}: {e}")
+        return overloaded_response(e)
+    except Cancelled as e:
+        cancellations.record('/api/plans/refine', e.reason)
+        print(f"🛑 Refinement of {project_id} cancelled: {e}")
+        return cancelled_response(e)
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except RefinementError as e:
+        print(f"❌ Could not apply refinement of {project_id}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 502
+    except Exception as e:
+        print(f"❌ Server error: {str(e)}")
+        return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
+    
+    workspace_retention.touch(project_id, 'refine', measure=True)
+    workspace_retention.collect_async()
+    response_data = {
+        'success': True,
+        'project_id': project_id,
+        'plan': plan_views.select_fields(result['plan'], fields),
+        'scope': result['scope'],
+        'changes': result['changes'],
+        'written': result['written'],
+        'removed': result['removed'],
+        'usage': result['usage']
+    }
+    if instruction_truncated:
+        response_data['prompt_truncated'] = True
+    return jsonify(response_data)
+
+@app.route('/api/projects/<project_id>/archive', methods=['GET'])
+def download_project_archive(project_id):
+    """
+    Stream a generated project as a zip or tar.gz archive
+    
+    The archive is produced on the fly from the stored project tree, or from an
+    in-memory rendering of the plan with ?source=plan, and supports Range requests
+    so large downloads can be resumed.
+    """
+    archive_format = request.args.get('format', 'zip')
+    if archive_format not in archive.ARCHIVE_FORMATS:
+        return jsonify({
+            'success': False,
+            'error': f"Unsupported archive format '{archive_format}'. Use one of: {', '.join(archive.ARCHIVE_FORMATS)}"
+        }), 400
+    
+    project_dir = resolve_project_dir(project_id)
+    if project_dir is None:
+        return jsonify({'success': False, 'error': f"Project '{project_id}' not found"}), 404
+    workspace_retention.touch(project_id, 'archive')
+    
+    source = request.args.get('source', 'tree')
+    if source == 'plan':
+        plan_file_path = os.path.join(project_dir, 'project_plan.json')
+        plan_stat = os.stat(plan_file_path)
+        
+        def entries_factory():
+            with open(plan_file_path, 'r', encoding='utf-8') as f:
+                project_plan = json.load(f)
+            generator = ProjectGenerator(WORKSPACE_PATH, console=False)
+            return archive.rendered_entries(generator.iter_rendered_files(project_plan), project_id, plan_stat.st_mtime)
+        
+        etag = archive.plan_etag(plan_stat, archive_format, rendering_version())
+    elif source == 'tree':
+        tree = archive.tree_entries(project_dir, project_id)
+        entries_factory = lambda: tree
+        etag = archive.tree_etag(tree, archive_format)
+    else:
+        return jsonify({'success': False, 'error': f"Unknown source '{source}'. Use 'tree' or 'plan'"}), 400
+    
+    mimetype, extension = archive.ARCHIVE_FORMATS[archive_format]
+    headers = {
+        'Content-Disposition': f'attachment; filename="{project_id}{extension}"',
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
+    }
+    
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range == etag):
+        total_length = archive_lengths.get(etag)
+        if total_length is None:
+            total_length = archive.archive_length(entries_factory, archive_format)
+            archive_lengths.put(etag, total_length)
+        try:
+            byte_range = archive.parse_range_header(range_header, total_length)
+        except ValueError:
+            byte_range = False
+        if byte_range is None:
+            return Response(status=416, headers={'Content-Range': f'bytes */{total_length}', **headers})
+        if byte_range:
+            start, end = byte_range
+            headers['Content-Range'] = f'bytes {start}-{end}/{total_length}'
+            headers['Content-Length'] = str(end - start + 1)
+            print(f"📦 Streaming {archive_format} archive of {project_id} (bytes {start}-{end}/{total_length})")
+            return Response(
+                stream_with_context(archive.stream_archive(entries_factory(), archive_format, start, end)),
+                status=206, mimetype=mimetype, headers=headers
+            )
+    
+    total_length = archive_lengths.get(etag)
+    if total_length is not None:
+        headers['Content-Length'] = str(total_length)
+    print(f"📦 Streaming {archive_format} archive of {project_id}")
+    return Response(
+        stream_with_context(archive.stream_archive(entries_factory(), archive_format)),
+        mimetype=mimetype, headers=headers
+    )
+
+@app.route('/api/projects/<project_id>/generate', methods=['POST'])
+def generate_project_files(project_id):
+    """
+    Regenerate a project from its stored plan and stream the progress
+    
+    The response is a text/event-stream with one server-sent event per generator
+    event (dir_created, file_written, phase_finished, ...); the JSON data of the
+    last one, generation_finished, says whether the run succeeded. Pass force=true
+    to rewrite every file and validate=false to skip the validation pass.
+    """
+    project_dir = resolve_project_dir(project_id)
+    if project_dir is None:
+        return jsonify({'success': False, 'error': f"Project '{project_id}' not found"}), 404
+    
+    options = request.get_json(silent=True) or {}
+    force = str(options.get('force', request.args.get('force', 'false'))).lower() == 'true'
+    validate = str(options.get('validate', request.args.get('validate', 'true'))).lower() != 'false'
+    
+    workspace_retention.touch(project_id, 'generate')
+    
+    # A client that disconnects or stops reading the stream cancels the generation, as does the deadline,
+    # which is the streaming one (AISA_GENERATE_DEADLINE_SECONDS) rather than the request default
+    deadline = request_deadline(disconnect_probe(request.environ), stream_deadline_seconds())
+    
+    def stream_events():
+        events = iter_generation_events(project_dir, True, force, validate=validate, deadline=deadline)
+        try:
+            for event_id, event in enumerate(events):
+                yield f"id: {event_id}\nevent: {event.kind}\ndata: {json.dumps(event.to_dict())}\n\n"
+        finally:
+            events.close()
+            if deadline.reason:
+                cancellations.record('/api/projects/generate', deadline.reason)
+                print(f"🛑 Generation of {project_id} cancelled: {deadline.reason}")
+            try:
+                storage.sync(project_id)
+            except OSError as e:
+                print(f"⚠️ Could not sync {project_id} to {storage.name} storage: {str(e)}")
+            # The project may have grown; re-measure it and enforce the quotas
+            workspace_retention.touch(project_id, 'generate', measure=True)
+            workspace_retention.collect_async()
+    
+    print(f"🏗️ Streaming generation of {project_id}")
+    return Response(
+        stream_with_context(stream_events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """
@@ -82,9 +621,66 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'message': 'AI Python Code Generator Backend is running',
-        'planning_agent_initialized': planning_agent is not None
+        'planning_agent_initialized': planning_agent is not None,
+        'storage': storage.name,
+        'model_transport': planning_agent.transport.mode if planning_agent is not None else None,
+        'plan_queue_depth': plan_admission.snapshot()['queue_depth']
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """
+    Admission control gauges and counters (requests in flight, queue depth, shed counts),
+    counts of work cancelled by deadlines and disconnects, estimated versus actual
+    token counts of model calls, and the latency and success of each model route
+    """
+    return jsonify({
+        'plan_admission': plan_admission.snapshot(),
+        'cancellations': cancellations.snapshot(),
+        'idempotency': idempotency_store.snapshot(),
+        'tokens': planning_agent.token_ledger.snapshot() if planning_agent is not None else {},
+        'routing': planning_agent.router.snapshot() if planning_agent is not None else {}
     })
 
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    """
+    List stored request profiles, newest first; ?limit= bounds how many
+    """
+    if not request_profiler.authorized(request.headers):
+        return jsonify({'success': False, 'error': f"Profiles need the {profiling.PROFILE_HEADER} token"}), 403
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    return jsonify({'success': True, 'profiles': request_profiler.list(max(1, limit))})
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """
+    Summary of a stored profile: duration, peak memory, top functions and top allocations
+    """
+    if not request_profiler.authorized(request.headers):
+        return jsonify({'success': False, 'error': f"Profiles need the {profiling.PROFILE_HEADER} token"}), 403
+    metadata = request_profiler.load(profile_id)
+    if metadata is None:
+        return jsonify({'success': False, 'error': f"Profile '{profile_id}' not found"}), 404
+    return jsonify({'success': True, 'profile': metadata})
+
+@app.route('/api/profiles/<profile_id>/raw', methods=['GET'])
+def download_profile(profile_id):
+    """
+    Download the raw profile: a pstats file (cProfile) or collapsed stacks (sampling profiler)
+    """
+    if not request_profiler.authorized(request.headers):
+        return jsonify({'success': False, 'error': f"Profiles need the {profiling.PROFILE_HEADER} token"}), 403
+    path = request_profiler.artifact_path(profile_id)
+    if path is None:
+        return jsonify({'success': False, 'error': f"Profile '{profile_id}' not found"}), 404
+    extension = os.path.splitext(path)[1]
+    return send_file(path, as_attachment=True, download_name=f"{profile_id}{extension}",
+                     mimetype='application/octet-stream' if extension == '.prof' else 'text/plain')
+
 @app.route('/api/test', methods=['POST'])
 def test_endpoint():
     """
@@ -0,0 +1,260 @@
+import os
+import math
+import time
+import threading
+from collections import deque
+
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_MAX_WAIT_SECONDS = 30.0
+DEFAULT_PER_CLIENT = 2
+
+# Weight of the latest request in the moving average of service times
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request is shed instead of admitted
+    """
+    
+    def __init__(self, reason, retry_after, message):
+        """
+        Initialize the error
+        
+        Args:
+            reason (str): 'queue_full', 'wait_estimate', 'queue_timeout' or 'client_limit'
+            retry_after (int): Seconds the client should wait before retrying
+            message (str): Human-readable explanation
+        """
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+        # A client over its own cap is throttled; everything else means the server is busy
+        self.status = 429 if reason == 'client_limit' else 503
+
+
+class AdmissionController:
+    """
+    Bounded FIFO admission for slow requests, with load shedding.
+    
+    At most max_concurrent requests run at once and at most max_queue wait for
+    a slot, in arrival order. A request is shed on arrival when the queue is
+    full or when its estimated wait (queue position times the moving average
+    of service times, divided by the concurrency) exceeds max_wait_seconds,
+    and while queued once it has actually waited that long. Each client may
+    hold at most per_client running or queued requests. Shedding early keeps
+    the accepted requests fast when the upstream model slows down, instead
+    of letting every request time out together.
+    """
+    
+    def __init__(self, name, max_concurrent=DEFAULT_MAX_CONCURRENT, max_queue=DEFAULT_MAX_QUEUE,
+                 max_wait_seconds=DEFAULT_MAX_WAIT_SECONDS, per_client=DEFAULT_PER_CLIENT):
+        """
+        Initialize the controller
+        
+        Args:
+            name (str): Name of the guarded endpoint, used in messages
+            max_concurrent (int): Requests running at once
+            max_queue (int): Requests waiting for a slot; 0 sheds whenever all slots are busy
+            max_wait_seconds (float): Longest acceptable time in the queue
+            per_client (int): Running or queued requests per client; None for no cap
+        """
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self.per_client = per_client
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._in_flight = 0
+        self._clients = {}  # Client -> running or queued requests
+        self._service_seconds = None
+        self._counters = {'admitted': 0, 'completed': 0, 'failed': 0}
+        self._shed = {'queue_full': 0, 'wait_estimate': 0, 'queue_timeout': 0, 'client_limit': 0}
+        self._queue_seconds_total = 0.0
+    
+    @classmethod
+    def from_env(cls, name, prefix):
+        """
+        Read the limits from <prefix>_CONCURRENCY, _QUEUE, _MAX_WAIT_SECONDS and _PER_CLIENT
+        
+        Args:
+            name (str): Name of the guarded endpoint
+            prefix (str): Environment variable prefix, e.g. 'AISA_PLAN'
+        
+        Returns:
+            AdmissionController: The configured controller
+        """
+        def number(suffix, default, kind=int):
+            value = os.environ.get(f"{prefix}_{suffix}", '').strip()
+            return kind(value) if value else default
+        
+        per_client = number('PER_CLIENT', DEFAULT_PER_CLIENT)
+        return cls(name, number('CONCURRENCY', DEFAULT_MAX_CONCURRENT), number('QUEUE', DEFAULT_MAX_QUEUE),
+                   number('MAX_WAIT_SECONDS', DEFAULT_MAX_WAIT_SECONDS, float), per_client if per_client > 0 else None)
+    
+    def estimated_wait(self, position):
+        """
+        Estimate how long a request at a given queue position waits for a slot
+        
+        Args:
+            position (int): Requests ahead of it in the queue, plus one
+        
+        Returns:
+            float: Seconds; 0 until a service time has been measured
+        """
+        if self._service_seconds is None:
+            return 0.0
+        return math.ceil(position / self.max_concurrent) * self._service_seconds
+    
+    def _retry_after(self):
+        # Time for the current backlog to drain, at least a second
+        return max(1, math.ceil(self.estimated_wait(len(self._queue) + 1) or self.max_wait_seconds / 2))
+    
+    def _reject(self, reason, message):
+        self._shed[reason] += 1
+        return Overloaded(reason, self._retry_after(), f"{self.name}: {message}")
+    
+    def acquire(self, client, max_wait=None):
+        """
+        Wait for a slot or shed the request
+        
+        Args:
+            client (str): Identifier of the caller, for the per-client cap
+            max_wait (float): Shorter wait limit for this request, e.g. what is left of its deadline
+        
+        Returns:
+            float: Seconds spent queued
+        
+        Raises:
+            Overloaded: If the request is shed
+        """
+        arrived = time.monotonic()
+        max_wait = self.max_wait_seconds if max_wait is None else min(max_wait, self.max_wait_seconds)
+        with self._condition:
+            if self.per_client is not None and self._clients.get(client, 0) >= self.per_client:
+                raise self._reject('client_limit', f"client already has {self.per_client} request(s) in progress")
+            
+            if self._in_flight < self.max_concurrent and not self._queue:
+                self._admit(client)
+                return 0.0
+            
+            if len(self._queue) >= self.max_queue:
+                raise self._reject('queue_full', f"queue full ({self._in_flight} running, {len(self._queue)} waiting)")
+            estimate = self.estimated_wait(len(self._queue) + 1)
+            if estimate > max_wait:
+                raise self._reject('wait_estimate', f"estimated wait {estimate:.1f}s exceeds {max_wait:.0f}s")
+            
+            ticket = object()
+            self._queue.append(ticket)
+            self._clients[client] = self._clients.get(client, 0) + 1
+            try:
+                deadline = arrived + max_wait
+                while self._queue[0] is not ticket or self._in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject('queue_timeout', f"no slot within {max_wait:.0f}s")
+                    self._condition.wait(remaining)
+            except BaseException:
+                self._queue.remove(ticket)
+                self._release_client(client)
+                # The next request may now be at the head of the queue
+                self._condition.notify_all()
+                raise
+            self._queue.popleft()
+            self._release_client(client)
+            self._admit(client)
+            waited = time.monotonic() - arrived
+            self._queue_seconds_total += waited
+            self._condition.notify_all()
+            return waited
+    
+    def _admit(self, client):
+        self._in_flight += 1
+        self._clients[client] = self._clients.get(client, 0) + 1
+        self._counters['admitted'] += 1
+    
+    def _release_client(self, client):
+        self._clients[client] -= 1
+        if not self._clients[client]:
+            del self._clients[client]
+    
+    def release(self, client, service_seconds=None, failed=False):
+        """
+        Free the slot of an admitted request
+        
+        Args:
+            client (str): Identifier passed to acquire()
+            service_seconds (float): Time the request ran, to refine the wait estimate
+            failed (bool): Whether the request ended with an error
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._release_client(client)
+            self._counters['failed' if failed else 'completed'] += 1
+            if service_seconds is not None:
+                if self._service_seconds is None:
+                    self._service_seconds = service_seconds
+                else:
+                    self._service_seconds += SERVICE_TIME_SMOOTHING * (service_seconds - self._service_seconds)
+            self._condition.notify_all()
+    
+    def admit(self, client, max_wait=None):
+        """
+        Context manager holding a slot for the duration of a block
+        
+        Args:
+            client (str): Identifier of the caller
+            max_wait (float): Shorter wait limit for this request
+        
+        Returns:
+            _Slot: Context manager; entering it raises Overloaded if the request is shed
+        """
+        return _Slot(self, client, max_wait)
+    
+    def snapshot(self):
+        """
+        Current queue depth and counters
+        
+        Returns:
+            dict: Limits, gauges and counters suitable for a metrics endpoint
+        """
+        with self._condition:
+            admitted = self._counters['admitted']
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'max_wait_seconds': self.max_wait_seconds,
+                'per_client': self.per_client,
+                'in_flight': self._in_flight,
+                'queue_depth': len(self._queue),
+                'clients': len(self._clients),
+                **self._counters,
+                'shed': dict(self._shed),
+                'shed_total': sum(self._shed.values()),
+                'avg_service_seconds': round(self._service_seconds, 3) if self._service_seconds is not None else None,
+                'avg_queue_seconds': round(self._queue_seconds_total / admitted, 3) if admitted else 0.0,
+                'estimated_wait_seconds': round(self.estimated_wait(len(self._queue) + 1), 3)
+                                          if self._in_flight >= self.max_concurrent else 0.0,
+            }
+
+
+class _Slot:
+    # Acquires on enter and releases with the measured service time on exit
+    
+    def __init__(self, controller, client, max_wait=None):
+        self.controller = controller
+        self.client = client
+        self.max_wait = max_wait
+        self.queued_seconds = 0.0
+        self._started = None
+    
+    def __enter__(self):
+        self.queued_seconds = self.controller.acquire(self.client, self.max_wait)
+        self._started = time.monotonic()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.controller.release(self.client, time.monotonic() - self._started, failed=exc_type is not None)
+        return False
@@ -0,0 +1,319 @@
+import os
+import io
+import gzip
+import time
+import tarfile
+import zipfile
+import hashlib
+import threading
+from collections import OrderedDict
+
+CHUNK_SIZE = 64 * 1024
+
+ARCHIVE_FORMATS = {
+    'zip': ('application/zip', '.zip'),
+    'tar.gz': ('application/gzip', '.tar.gz'),
+}
+
+# Files that belong to the generator's bookkeeping rather than to the project
+EXCLUDED_FILES = {'.aisa_manifest.json', '.aisa_validation.json', '.aisa_synced.json'}
+
+
+class ArchiveEntry:
+    """
+    A single file to be written into an archive
+    """
+    
+    def __init__(self, arcname, size, mtime, opener):
+        """
+        Initialize an archive entry
+        
+        Args:
+            arcname (str): Path of the file inside the archive
+            size (int): Size of the file content in bytes
+            mtime (float): Modification time stored in the archive
+            opener (callable): Returns a binary file object with the content
+        """
+        self.arcname = arcname
+        self.size = size
+        self.mtime = mtime
+        self.opener = opener
+
+
+def tree_entries(project_dir, prefix):
+    """
+    Collect archive entries for every file stored under a project directory
+    
+    Only file metadata is collected here; content is opened lazily while streaming.
+    
+    Args:
+        project_dir (str): Path to the project directory
+        prefix (str): Top-level folder name inside the archive
+    
+    Returns:
+        list: ArchiveEntry objects sorted by archive path
+    """
+    entries = []
+    for root, dirs, files in os.walk(project_dir):
+        dirs.sort()
+        for name in files:
+            if name in EXCLUDED_FILES:
+                continue
+            full_path = os.path.join(root, name)
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            rel_path = os.path.relpath(full_path, project_dir).replace(os.sep, '/')
+            entries.append(ArchiveEntry(
+                f"{prefix}/{rel_path}",
+                stat.st_size,
+                stat.st_mtime,
+                lambda path=full_path: open(path, 'rb')
+            ))
+    entries.sort(key=lambda entry: entry.arcname)
+    return entries
+
+
+def rendered_entries(rendered_files, prefix, mtime):
+    """
+    Wrap in-memory rendered files as archive entries
+    
+    Args:
+        rendered_files (iterable): (relative path, content) pairs, consumed lazily
+        prefix (str): Top-level folder name inside the archive
+        mtime (float): Modification time stored for every entry
+    
+    Yields:
+        ArchiveEntry: One entry per rendered file
+    """
+    for rel_path, content in rendered_files:
+        data = content.encode('utf-8')
+        yield ArchiveEntry(
+            f"{prefix}/{rel_path.replace(os.sep, '/')}",
+            len(data),
+            mtime,
+            lambda data=data: io.BytesIO(data)
+        )
+
+
+def tree_etag(entries, archive_format):
+    """
+    Compute an ETag for an archive of a stored tree
+    
+    Archives are written deterministically, so the same file metadata always
+    produces the same bytes and the ETag can be used to validate resumed downloads.
+    
+    Args:
+        entries (list): ArchiveEntry objects of the tree
+        archive_format (str): 'zip' or 'tar.gz'
+    
+    Returns:
+        str: Quoted ETag value
+    """
+    digest = hashlib.sha256(archive_format.encode('utf-8'))
+    for entry in entries:
+        digest.update(f"{entry.arcname}\0{entry.size}\0{entry.mtime}\n".encode('utf-8'))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def plan_etag(plan_stat, archive_format, generator_version):
+    """
+    Compute an ETag for an archive rendered in memory from a plan
+    
+    Args:
+        plan_stat (os.stat_result): Stat of the project_plan.json file
+        archive_format (str): 'zip' or 'tar.gz'
+        generator_version (str): Version of the generator doing the rendering
+    
+    Returns:
+        str: Quoted ETag value
+    """
+    key = f"{archive_format}\0{plan_stat.st_size}\0{plan_stat.st_mtime}\0{generator_version}"
+    return f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
+
+class _ChunkSink:
+    """
+    Write-only file object that buffers archive output until it is drained
+    
+    It deliberately has no tell()/seek() so zipfile and gzip stream their output
+    with data descriptors instead of seeking back to patch headers.
+    """
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        if data:
+            self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _read_entry(entry):
+    # Never emit more or fewer bytes than announced, even if the file changed meanwhile
+    remaining = entry.size
+    with entry.opener() as src:
+        while remaining > 0:
+            chunk = src.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    while remaining > 0:
+        padding = min(CHUNK_SIZE, remaining)
+        remaining -= padding
+        yield b'\0' * padding
+
+
+def _zip_chunks(entries):
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for entry in entries:
+            date_time = time.gmtime(max(entry.mtime, 315532800))[:6]  # Zip dates start in 1980
+            zinfo = zipfile.ZipInfo(entry.arcname, date_time=date_time)
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            zinfo.external_attr = 0o644 << 16
+            zinfo.file_size = entry.size
+            with zf.open(zinfo, 'w') as dst:
+                for chunk in _read_entry(entry):
+                    dst.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _tar_gz_chunks(entries):
+    sink = _ChunkSink()
+    # A fixed gzip header timestamp keeps the output byte-for-byte reproducible
+    gz = gzip.GzipFile(filename='', mode='wb', fileobj=sink, mtime=0)
+    for entry in entries:
+        tarinfo = tarfile.TarInfo(entry.arcname)
+        tarinfo.size = entry.size
+        tarinfo.mtime = int(entry.mtime)
+        tarinfo.mode = 0o644
+        gz.write(tarinfo.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'surrogateescape'))
+        for chunk in _read_entry(entry):
+            gz.write(chunk)
+            yield sink.drain()
+        remainder = entry.size % tarfile.BLOCKSIZE
+        if remainder:
+            gz.write(b'\0' * (tarfile.BLOCKSIZE - remainder))
+    # End-of-archive marker: two zero blocks
+    gz.write(b'\0' * (tarfile.BLOCKSIZE * 2))
+    gz.close()
+    yield sink.drain()
+
+
+def stream_archive(entries, archive_format, start=0, end=None):
+    """
+    Stream an archive of the given entries as a sequence of byte chunks
+    
+    Nothing is staged on disk and at most one read chunk per entry is buffered,
+    so memory stays flat regardless of project size. A byte range can be
+    requested, in which case the output before start is generated and dropped.
+    
+    Args:
+        entries (iterable): ArchiveEntry objects in archive order
+        archive_format (str): 'zip' or 'tar.gz'
+        start (int): Offset of the first byte to emit
+        end (int): Offset of the last byte to emit (inclusive), or None for the rest
+    
+    Yields:
+        bytes: Archive data
+    """
+    chunks = _zip_chunks(entries) if archive_format == 'zip' else _tar_gz_chunks(entries)
+    position = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        chunk_start = position
+        position += len(chunk)
+        if position <= start:
+            continue
+        if end is not None and chunk_start > end:
+            break
+        lower = max(start - chunk_start, 0)
+        upper = len(chunk) if end is None else min(end - chunk_start + 1, len(chunk))
+        yield chunk[lower:upper]
+
+
+class ArchiveLengthCache:
+    """
+    Bounded cache of archive lengths keyed by ETag
+    
+    Resumed downloads need the total length; computing it means generating the
+    archive once, so the result is remembered for subsequent range requests.
+    """
+    
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lengths = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, etag):
+        with self._lock:
+            length = self._lengths.get(etag)
+            if length is not None:
+                self._lengths.move_to_end(etag)
+            return length
+    
+    def put(self, etag, length):
+        with self._lock:
+            self._lengths[etag] = length
+            self._lengths.move_to_end(etag)
+            while len(self._lengths) > self.max_entries:
+                self._lengths.popitem(last=False)
+
+
+def archive_length(entries_factory, archive_format):
+    """
+    Compute the total length of an archive by generating and counting it
+    
+    Args:
+        entries_factory (callable): Returns a fresh iterable of ArchiveEntry objects
+        archive_format (str): 'zip' or 'tar.gz'
+    
+    Returns:
+        int: Archive length in bytes
+    """
+    return sum(len(chunk) for chunk in stream_archive(entries_factory(), archive_format))
+
+
+def parse_range_header(range_header, total_length):
+    """
+    Parse a single-range HTTP Range header
+    
+    Args:
+        range_header (str): Value of the Range header, e.g. 'bytes=1000-'
+        total_length (int): Total length of the resource
+    
+    Returns:
+        tuple: (start, end) inclusive offsets, or None if the range is not satisfiable
+    
+    Raises:
+        ValueError: If the header is malformed or requests multiple ranges
+    """
+    units, _, spec = range_header.partition('=')
+    if units.strip() != 'bytes' or ',' in spec:
+        raise ValueError(f"Unsupported range: {range_header}")
+    first, _, last = spec.strip().partition('-')
+    if first == '':
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix <= 0:
+            return None
+        return max(total_length - suffix, 0), total_length - 1
+    start = int(first)
+    end = int(last) if last else total_length - 1
+    if start >= total_length or end < start:
+        return None
+    return start, min(end, total_length - 1)
@@ -0,0 +1,217 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+DEFAULT_TTL_SECONDS = 3600.0
+DEFAULT_MAX_ENTRIES = 256
+
+
+class KeyReused(Exception):
+    """
+    Raised when an idempotency key is sent again with a different request body
+    """
+
+
+def request_fingerprint(method, path, body):
+    """
+    Identify a request so a key cannot be replayed for a different one
+    
+    Args:
+        method (str): HTTP method
+        path (str): Request path
+        body (bytes): Raw request body
+    
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256(f"{method} {path}\n".encode('utf-8'))
+    digest.update(body or b'')
+    return digest.hexdigest()
+
+
+def is_replayable(status):
+    """
+    Decide whether a response is the final outcome of a request
+    
+    Server errors, cancellations and throttling are transient, so a retry with
+    the same key runs the request again instead of replaying them.
+    
+    Args:
+        status (int): HTTP status code
+    
+    Returns:
+        bool: True if retries should get this response
+    """
+    return 200 <= status < 500 and status not in (408, 409, 429, 499)
+
+
+class IdempotencyEntry:
+    """
+    Outcome of the first request sent with a key: in progress until completed
+    """
+    
+    def __init__(self, key, fingerprint):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.created = time.monotonic()
+        self.response = None  # (status, body bytes, content type) once completed
+        self.attached = 0  # Retries that waited for or replayed this outcome
+        self._done = threading.Event()
+    
+    @property
+    def in_progress(self):
+        return not self._done.is_set()
+    
+    def wait(self, timeout=None):
+        """
+        Wait for the first request to finish
+        
+        Args:
+            timeout (float): Seconds to wait; None waits indefinitely
+        
+        Returns:
+            bool: True if it finished, whether or not it left a response to replay
+        """
+        return self._done.wait(timeout)
+
+
+class IdempotencyStore:
+    """
+    Bounded, expiring store of request outcomes keyed by Idempotency-Key.
+    
+    The first request with a key owns it and runs. Retries with the same key
+    and body attach to it while it runs and replay its response afterwards,
+    for ttl_seconds after it started. A transient failure releases the key so
+    the next retry runs again. Beyond max_entries the oldest finished outcomes
+    are dropped; running requests are never dropped, their number is bounded
+    by admission control.
+    """
+    
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Initialize the store
+        
+        Args:
+            ttl_seconds (float): How long an outcome is kept
+            max_entries (int): Outcomes kept at most
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # Key -> entry, oldest first
+        self._lock = threading.Lock()
+        self._counters = {'executed': 0, 'replayed': 0, 'attached': 0, 'mismatched': 0,
+                          'released': 0, 'expired': 0, 'evicted': 0}
+    
+    @classmethod
+    def from_env(cls):
+        """
+        Read the window and size from AISA_IDEMPOTENCY_TTL_SECONDS and AISA_IDEMPOTENCY_MAX_ENTRIES
+        
+        Returns:
+            IdempotencyStore: The configured store
+        """
+        ttl = os.environ.get('AISA_IDEMPOTENCY_TTL_SECONDS', '').strip()
+        max_entries = os.environ.get('AISA_IDEMPOTENCY_MAX_ENTRIES', '').strip()
+        return cls(float(ttl) if ttl else DEFAULT_TTL_SECONDS, int(max_entries) if max_entries else DEFAULT_MAX_ENTRIES)
+    
+    def _expire(self, now):
+        # Entries are ordered by start time, so expired ones are at the front
+        for key, entry in list(self._entries.items()):
+            if now - entry.created < self.ttl_seconds:
+                break
+            # A request running longer than the window keeps its key until it finishes
+            if not entry.in_progress:
+                del self._entries[key]
+                self._counters['expired'] += 1
+    
+    def _evict(self):
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        for key in [key for key, entry in self._entries.items() if not entry.in_progress][:excess]:
+            del self._entries[key]
+            self._counters['evicted'] += 1
+    
+    def begin(self, key, fingerprint):
+        """
+        Claim a key or attach to the request that already claimed it
+        
+        Args:
+            key (str): Idempotency-Key header value
+            fingerprint (str): request_fingerprint() of the request
+        
+        Returns:
+            tuple: (entry, owner); owner is True if the caller must run the request and then
+                   call complete() or release(), False if it should wait for the entry's response
+        
+        Raises:
+            KeyReused: If the key was used for a different request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.fingerprint != fingerprint:
+                    self._counters['mismatched'] += 1
+                    raise KeyReused(f"Idempotency key '{key}' was already used for a different request")
+                entry.attached += 1
+                self._counters['attached' if entry.in_progress else 'replayed'] += 1
+                return entry, False
+            entry = IdempotencyEntry(key, fingerprint)
+            self._entries[key] = entry
+            self._counters['executed'] += 1
+            self._evict()
+            return entry, True
+    
+    def complete(self, entry, status, body, content_type):
+        """
+        Store the response of an owned request for its retries, or release the key if it is transient
+        
+        Args:
+            entry (IdempotencyEntry): Entry returned by begin()
+            status (int): HTTP status code
+            body (bytes): Response body
+            content_type (str): Response content type
+        """
+        if not is_replayable(status):
+            self.release(entry)
+            return
+        with self._lock:
+            entry.response = (status, body, content_type)
+            entry._done.set()
+    
+    def release(self, entry):
+        """
+        Forget an owned request that failed transiently so the next retry runs it again
+        
+        Args:
+            entry (IdempotencyEntry): Entry returned by begin()
+        """
+        with self._lock:
+            if self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+            self._counters['released'] += 1
+            entry._done.set()
+    
+    def snapshot(self):
+        """
+        Current size and counters
+        
+        Returns:
+            dict: Configuration, entry counts and counters suitable for a metrics endpoint
+        """
+        with self._lock:
+            in_progress = sum(1 for entry in self._entries.values() if entry.in_progress)
+            return {
+                'ttl_seconds': self.ttl_seconds,
+                'max_entries': self.max_entries,
+                'entries': len(self._entries),
+                'in_progress': in_progress,
+                **self._counters,
+            }
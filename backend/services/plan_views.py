@@ -0,0 +1,228 @@
+import json
+import base64
+import threading
+from collections import OrderedDict
+
+from agents.breakdown_lexer import iter_file_records, resolve_record_path
+from agents.plan_reader import PlanReader
+
+# Top-level sections of a project plan, in the order the planner writes them
+PLAN_SECTIONS = ('project_overview', 'technical_requirements', 'project_structure', 'file_breakdown',
+                 'implementation_strategy')
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a pagination cursor is malformed
+    """
+
+
+class StaleCursor(InvalidCursor):
+    """
+    Raised when a pagination cursor belongs to an older version of the plan
+    """
+
+
+def parse_fields(value):
+    """
+    Parse a fields= selection of plan sections
+    
+    Args:
+        value (str or list): Comma-separated section names, or a list of them; None or empty selects everything
+    
+    Returns:
+        list: Selected sections in plan order, or None for the whole plan
+    
+    Raises:
+        ValueError: If a name is not a plan section
+    """
+    if not value:
+        return None
+    names = value.split(',') if isinstance(value, str) else value
+    selected = {str(name).strip() for name in names if str(name).strip()}
+    unknown = sorted(selected.difference(PLAN_SECTIONS))
+    if unknown:
+        raise ValueError(f"Unknown plan field(s): {', '.join(unknown)}. Use any of: {', '.join(PLAN_SECTIONS)}")
+    return [section for section in PLAN_SECTIONS if section in selected] or None
+
+
+def select_fields(plan, fields):
+    """
+    Keep only the selected sections of a plan
+    
+    Args:
+        plan (dict): The project plan
+        fields (list): Sections to keep, as returned by parse_fields(); None keeps everything
+    
+    Returns:
+        dict: The plan itself, or a copy with the selected sections
+    """
+    if fields is None:
+        return plan
+    return {section: plan[section] for section in fields if section in plan}
+
+
+def load_plan(plan_file_path, fields=None):
+    """
+    Read a stored plan, without decoding the file breakdown unless it is selected
+    
+    Args:
+        plan_file_path (str): Path to the project_plan.json file
+        fields (list): Sections to return, as returned by parse_fields(); None returns the whole plan
+    
+    Returns:
+        dict: The selected sections of the plan
+    """
+    if fields is not None and 'file_breakdown' not in fields:
+        return select_fields(PlanReader(plan_file_path).load(), fields)
+    with open(plan_file_path, 'r', encoding='utf-8') as f:
+        return select_fields(json.load(f), fields)
+
+
+def plan_version(plan_stat):
+    """
+    Identify a version of a stored plan, so cursors of a replaced plan are rejected
+    
+    Args:
+        plan_stat (os.stat_result): Stat of the project_plan.json file
+    
+    Returns:
+        str: Version string
+    """
+    return f"{plan_stat.st_mtime_ns:x}-{plan_stat.st_size:x}"
+
+
+def encode_cursor(offset, version):
+    """
+    Build the opaque cursor of the page starting at an offset
+    
+    Args:
+        offset (int): Index of the first entry of the page
+        version (str): plan_version() of the plan being paged
+    
+    Returns:
+        str: URL-safe cursor
+    """
+    return base64.urlsafe_b64encode(f"{offset}:{version}".encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, version):
+    """
+    Read the offset from a cursor returned by an earlier page
+    
+    Args:
+        cursor (str): Cursor from the client; None or empty for the first page
+        version (str): plan_version() of the plan as it is now
+    
+    Returns:
+        int: Offset of the page
+    
+    Raises:
+        InvalidCursor: If the cursor is malformed
+        StaleCursor: If the plan changed since it was issued
+    """
+    if not cursor:
+        return 0
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        offset, cursor_version = text.split(':', 1)
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Malformed cursor")
+    if offset < 0:
+        raise InvalidCursor("Malformed cursor")
+    if cursor_version != version:
+        raise StaleCursor("The plan changed since this cursor was issued; start again without a cursor")
+    return offset
+
+
+def iter_file_entries(plan_file_path):
+    """
+    Parse the file breakdown of a stored plan into one entry per file, streaming the plan
+    
+    Args:
+        plan_file_path (str): Path to the project_plan.json file
+    
+    Yields:
+        dict: Entries with 'file_path', 'purpose', 'key_functions', 'dependencies' and 'interactions' keys,
+              in breakdown order; sections that do not describe a file are skipped
+    """
+    reader = PlanReader(plan_file_path)
+    plan = reader.load()
+    if not reader.streamed:
+        return
+    root_dir_name = (plan.get('project_structure') or {}).get('root_directory', '')
+    for record in iter_file_records(reader.iter_lines()):
+        file_path, _ = resolve_record_path(record, root_dir_name)
+        if file_path:
+            yield {
+                'file_path': file_path,
+                'purpose': record['purpose'],
+                'key_functions': record['key_funcs'],
+                'dependencies': record['deps'],
+                'interactions': record['interactions'],
+            }
+
+
+class FileEntryCache:
+    """
+    Bounded cache of the parsed file entries of recently paged plans
+    
+    Paging a breakdown would otherwise re-parse the plan up to the requested
+    page on every request; entries are keyed by plan path and version so an
+    edited plan is parsed again.
+    """
+    
+    def __init__(self, max_plans=8):
+        self.max_plans = max_plans
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, plan_file_path, version):
+        """
+        Return the file entries of a plan, parsing it if it is not cached
+        
+        Args:
+            plan_file_path (str): Path to the project_plan.json file
+            version (str): plan_version() of the file
+        
+        Returns:
+            list: Entries from iter_file_entries()
+        """
+        key = (plan_file_path, version)
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries is not None:
+                self._entries.move_to_end(key)
+                return entries
+        entries = list(iter_file_entries(plan_file_path))
+        with self._lock:
+            self._entries[key] = entries
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_plans:
+                self._entries.popitem(last=False)
+        return entries
+
+
+def page_entries(entries, offset, limit, version):
+    """
+    Cut one page out of a plan's file entries
+    
+    Args:
+        entries (list): All file entries of the plan
+        offset (int): Index of the first entry of the page
+        limit (int): Entries per page
+        version (str): plan_version() of the plan
+    
+    Returns:
+        dict: 'files', 'total' and 'next_cursor', which is None on the last page
+    """
+    end = offset + limit
+    return {
+        'files': entries[offset:end],
+        'total': len(entries),
+        'next_cursor': encode_cursor(end, version) if end < len(entries) else None,
+    }
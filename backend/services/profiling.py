@@ -0,0 +1,416 @@
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import uuid
+import random
+import shutil
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+# Request header turning profiling on for one request ('1', or the token when AISA_PROFILE_TOKEN is set)
+PROFILE_HEADER = 'X-Profile'
+# Response header naming the stored profile
+PROFILE_ID_HEADER = 'X-Profile-Id'
+# Request header whose value, if it is a valid profile ID, keys the profile
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+# 'cprofile' traces every call (pstats output); 'sampling' records the request thread's stack at an interval
+PROFILERS = ('cprofile', 'sampling')
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                   'profiles')
+DEFAULT_MAX_PROFILES = 100
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+
+# Entries kept in the stored summary; the full data is in the pstats or collapsed stacks file
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 25
+
+METADATA_FILENAME = 'profile.json'
+ARTIFACT_FILENAMES = {'cprofile': 'profile.prof', 'sampling': 'stacks.collapsed'}
+
+_PROFILE_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# tracemalloc is process-wide; it runs while any profiled request does
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started_here = False
+
+
+def _start_tracing():
+    global _tracing_users, _tracing_started_here
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started_here = True
+        _tracing_users += 1
+        tracemalloc.reset_peak()
+
+
+def _stop_tracing():
+    global _tracing_users, _tracing_started_here
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started_here:
+            tracemalloc.stop()
+            _tracing_started_here = False
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval, in collapsed-stack form
+    
+    Collapsed stacks ("outer;inner;leaf count" lines) are read by flamegraph.pl,
+    speedscope and most flame graph viewers. Work the thread hands to helper
+    threads shows as the time it spends waiting for them.
+    """
+    
+    def __init__(self, thread_id, interval_seconds):
+        """
+        Initialize the sampler
+        
+        Args:
+            thread_id (int): ident of the thread to sample
+            interval_seconds (float): Time between samples
+        """
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='profile-sampler')
+    
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+    
+    def start(self):
+        """
+        Start sampling in the background
+        """
+        self._thread.start()
+    
+    def stop(self):
+        """
+        Stop sampling and wait for the last sample
+        """
+        self._stop.set()
+        self._thread.join()
+    
+    def collapsed(self):
+        """
+        The samples as collapsed stacks
+        
+        Returns:
+            str: One "stack count" line per distinct stack
+        """
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+    
+    def top_functions(self, limit=TOP_FUNCTIONS):
+        """
+        Functions at the top of the most samples
+        
+        Returns:
+            list: Dicts with 'function', 'samples' and 'seconds'
+        """
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return [{'function': function, 'samples': count, 'seconds': round(count * self.interval_seconds, 4)}
+                for function, count in leaves.most_common(limit)]
+
+
+class ProfileSession:
+    """
+    Profiling of one request, from start() until stop() stores it
+    """
+    
+    def __init__(self, store, profile_id, endpoint, method):
+        self.store = store
+        self.profile_id = profile_id
+        self.endpoint = endpoint
+        self.method = method
+        self.profiler = store.profiler
+        self._profile = None
+        self._sampler = None
+        self._baseline = None
+        self._started_at = None
+        self._started = None
+    
+    def start(self):
+        """
+        Start the memory tracer and the profiler on the calling thread
+        """
+        _start_tracing()
+        self._baseline = tracemalloc.take_snapshot()
+        self._started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        if self.profiler == 'cprofile':
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Python 3.12+ runs one cProfile at a time; concurrent profiled requests are sampled instead
+                self._profile = None
+                self.profiler = 'sampling'
+        if self.profiler == 'sampling':
+            self._sampler = StackSampler(threading.get_ident(), self.store.sample_interval_ms / 1000)
+            self._sampler.start()
+    
+    def stop(self, status):
+        """
+        Stop profiling and store the profile
+        
+        Args:
+            status (int): HTTP status of the response
+        
+        Returns:
+            dict: The stored summary
+        """
+        duration = time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        try:
+            _, peak = tracemalloc.get_traced_memory()
+            # Allocations of the tracer and of this module's bookkeeping are not the request's
+            filters = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+            snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+            allocations = snapshot.compare_to(self._baseline.filter_traces(filters), 'lineno')
+        finally:
+            _stop_tracing()
+        
+        metadata = {
+            'profile_id': self.profile_id,
+            'endpoint': self.endpoint,
+            'method': self.method,
+            'status': status,
+            'started_at': self._started_at.isoformat(),
+            'duration_seconds': round(duration, 4),
+            'profiler': self.profiler,
+            'artifact': ARTIFACT_FILENAMES[self.profiler],
+            'peak_memory_bytes': peak,
+            'top_allocations': [{
+                'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                'size_bytes': stat.size_diff,
+                'count': stat.count_diff,
+            } for stat in allocations if stat.size_diff > 0][:TOP_ALLOCATIONS],
+        }
+        profile_dir = os.path.join(self.store.directory, self.profile_id)
+        os.makedirs(profile_dir, exist_ok=True)
+        artifact_path = os.path.join(profile_dir, metadata['artifact'])
+        if self._profile is not None:
+            self._profile.dump_stats(artifact_path)
+            stats = pstats.Stats(self._profile)
+            ranked = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+            metadata['top_functions'] = [{
+                'function': f"{os.path.basename(filename)}:{line}({name})",
+                'calls': calls,
+                'total_seconds': round(total, 4),
+                'cumulative_seconds': round(cumulative, 4),
+            } for (filename, line, name), (_, calls, total, cumulative, _) in ranked]
+        else:
+            with open(artifact_path, 'w', encoding='utf-8') as f:
+                f.write(self._sampler.collapsed())
+            metadata['samples'] = self._sampler.samples
+            metadata['top_functions'] = self._sampler.top_functions()
+        with open(os.path.join(profile_dir, METADATA_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=4)
+        self.store.prune()
+        return metadata
+
+
+class ProfileStore:
+    """
+    Decides which requests are profiled and keeps their profiles
+    
+    A request is profiled when it carries the X-Profile header, or at random
+    with probability sample_rate. With neither, the only cost is one header
+    lookup. Profiles are stored as <directory>/<profile_id>/ with a
+    profile.json summary and the raw profile; the oldest are deleted beyond
+    max_profiles.
+    """
+    
+    def __init__(self, directory=DEFAULT_PROFILE_DIR, sample_rate=0.0, profiler='cprofile', token=None,
+                 max_profiles=DEFAULT_MAX_PROFILES, sample_interval_ms=DEFAULT_SAMPLE_INTERVAL_MS):
+        """
+        Initialize the store
+        
+        Args:
+            directory (str): Where profiles are stored
+            sample_rate (float): Share of requests profiled without the header, 0 to 1
+            profiler (str): 'cprofile' or 'sampling'
+            token (str): If set, the header must carry it, and listing or fetching profiles needs it too
+            max_profiles (int): Profiles kept
+            sample_interval_ms (float): Interval of the sampling profiler
+        
+        Raises:
+            ValueError: If the profiler is unknown
+        """
+        if profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler '{profiler}'. Use one of: {', '.join(PROFILERS)}")
+        self.directory = directory
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.profiler = profiler
+        self.token = token or None
+        self.max_profiles = max(1, max_profiles)
+        self.sample_interval_ms = max(0.5, sample_interval_ms)
+        self._prune_lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls):
+        """
+        Read the settings from AISA_PROFILE_DIR, AISA_PROFILE_SAMPLE_RATE, AISA_PROFILER,
+        AISA_PROFILE_TOKEN, AISA_PROFILE_MAX_COUNT and AISA_PROFILE_INTERVAL_MS
+        
+        Returns:
+            ProfileStore: The configured store
+        """
+        def number(name, default, kind=float):
+            value = os.environ.get(name, '').strip()
+            return kind(value) if value else default
+        
+        return cls(os.environ.get('AISA_PROFILE_DIR', '').strip() or DEFAULT_PROFILE_DIR,
+                   number('AISA_PROFILE_SAMPLE_RATE', 0.0),
+                   os.environ.get('AISA_PROFILER', '').strip().lower() or 'cprofile',
+                   os.environ.get('AISA_PROFILE_TOKEN', '').strip() or None,
+                   number('AISA_PROFILE_MAX_COUNT', DEFAULT_MAX_PROFILES, int),
+                   number('AISA_PROFILE_INTERVAL_MS', DEFAULT_SAMPLE_INTERVAL_MS))
+    
+    def authorized(self, headers):
+        """
+        Check whether a request may see profiles
+        
+        Args:
+            headers: Request headers
+        
+        Returns:
+            bool: True without a token, else whether the X-Profile header carries it
+        """
+        if self.token is None:
+            return True
+        return hmac.compare_digest(headers.get(PROFILE_HEADER, ''), self.token)
+    
+    def wants(self, headers):
+        """
+        Decide whether to profile a request
+        
+        Args:
+            headers: Request headers
+        
+        Returns:
+            bool: Whether the request is profiled
+        """
+        value = headers.get(PROFILE_HEADER)
+        if value:
+            if self.token is not None:
+                return hmac.compare_digest(value, self.token)
+            return value.strip().lower() not in ('0', 'false', 'no', 'off')
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+    
+    def start(self, request_id, endpoint, method):
+        """
+        Start profiling a request on the calling thread
+        
+        Args:
+            request_id (str): X-Request-ID of the request; a new ID is used if it is invalid or taken
+            endpoint (str): Request path
+            method (str): HTTP method
+        
+        Returns:
+            ProfileSession: The running session; call stop() when the response is ready
+        """
+        profile_id = request_id if request_id and _PROFILE_ID.match(request_id) else None
+        if profile_id is None or os.path.exists(os.path.join(self.directory, profile_id)):
+            profile_id = uuid.uuid4().hex
+        session = ProfileSession(self, profile_id, endpoint, method)
+        session.start()
+        return session
+    
+    def _profile_dirs(self):
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.is_dir() and os.path.isfile(os.path.join(entry.path, METADATA_FILENAME))]
+        except OSError:
+            return []
+        return sorted(entries, key=lambda entry: entry.stat().st_mtime, reverse=True)
+    
+    def list(self, limit=None):
+        """
+        List stored profiles, newest first
+        
+        Args:
+            limit (int): Most profiles to return
+        
+        Returns:
+            list: Summaries without the top functions and allocations
+        """
+        profiles = []
+        for entry in self._profile_dirs()[:limit]:
+            metadata = self.load(entry.name)
+            if metadata is not None:
+                profiles.append({key: value for key, value in metadata.items()
+                                 if key not in ('top_functions', 'top_allocations')})
+        return profiles
+    
+    def load(self, profile_id):
+        """
+        Read the summary of a stored profile
+        
+        Args:
+            profile_id (str): ID of the profile
+        
+        Returns:
+            dict: The summary, or None if there is no such profile
+        """
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, profile_id, METADATA_FILENAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def artifact_path(self, profile_id):
+        """
+        Locate the raw profile (pstats or collapsed stacks) of a stored profile
+        
+        Args:
+            profile_id (str): ID of the profile
+        
+        Returns:
+            str: Path to the file, or None if there is no such profile
+        """
+        metadata = self.load(profile_id)
+        if metadata is None or metadata.get('artifact') not in ARTIFACT_FILENAMES.values():
+            return None
+        path = os.path.join(self.directory, profile_id, metadata['artifact'])
+        return path if os.path.isfile(path) else None
+    
+    def prune(self):
+        """
+        Delete the oldest profiles beyond max_profiles
+        """
+        with self._prune_lock:
+            for entry in self._profile_dirs()[self.max_profiles:]:
+                shutil.rmtree(entry.path, ignore_errors=True)
@@ -0,0 +1,450 @@
+import os
+import json
+import time
+import shutil
+import threading
+
+from services import archive
+from agents.blob_store import prune_blobs
+from agents.storage import LocalStorage, workspace_for
+
+INDEX_FILENAME = '.aisa_index.json'
+PLAN_FILENAME = 'project_plan.json'
+
+# Projects used this recently are never evicted, so a run in progress is not deleted under it
+DEFAULT_MIN_IDLE_SECONDS = 300
+
+
+def measure_project(project_dir):
+    """
+    Measure the disk space a project directory uses
+    
+    Blocks shared through hardlinks (see the blob store) are split evenly among
+    the files linking them, so evicting a project is credited with what it frees.
+    
+    Args:
+        project_dir (str): Path to the project directory
+    
+    Returns:
+        tuple: (bytes, number of files)
+    """
+    total = 0
+    files = 0
+    stack = [project_dir]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        size = st.st_blocks * 512 if hasattr(st, 'st_blocks') else st.st_size
+                        total += size // max(1, st.st_nlink)
+                        files += 1
+        except OSError:
+            continue
+    return total, files
+
+
+class WorkspaceIndex:
+    """
+    Persistent record of every project's size and last access in a workspace.
+    
+    Sizes are measured per project when it changes, so retention decisions read
+    only the index and never walk the whole workspace; the workspace is walked
+    once, when there is no index yet. The index is saved atomically and reloaded
+    when another process (the CLI, a second server) has saved it since.
+    """
+    
+    def __init__(self, workspace_path):
+        """
+        Initialize the index
+        
+        Args:
+            workspace_path (str): Workspace directory whose subfolders, or shard subfolders, are projects
+        """
+        self.workspace_path = workspace_path
+        self.storage = LocalStorage(workspace_path)
+        self.index_path = os.path.join(workspace_path, INDEX_FILENAME)
+        self.projects = {}  # Project ID -> {'bytes', 'files', 'created', 'last_access', 'last_reason'}
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.load()
+    
+    def load(self):
+        """
+        Read the index from disk, rebuilding it from the workspace if it is missing or unreadable
+        """
+        with self._lock:
+            self._load()
+    
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.projects = json.load(f).get('projects', {})
+            self._mtime = os.stat(self.index_path).st_mtime_ns
+        except (OSError, ValueError):
+            self._rebuild()
+    
+    def _rebuild(self):
+        self.projects = {}
+        for project_id in self.storage.list_projects():
+            mtime = os.stat(os.path.join(self.storage.project_dir(project_id), PLAN_FILENAME)).st_mtime
+            self.projects[project_id] = self._measure(project_id, mtime, mtime, 'indexed')
+        self._save()
+    
+    def _measure(self, project_id, created, last_access, reason):
+        size, files = measure_project(self.storage.project_dir(project_id))
+        return {'bytes': size, 'files': files, 'created': created, 'last_access': last_access, 'last_reason': reason}
+    
+    def _refresh(self):
+        # Pick up changes saved by another process
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self._load()
+    
+    def _save(self):
+        os.makedirs(self.workspace_path, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'projects': self.projects}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        self._mtime = os.stat(self.index_path).st_mtime_ns
+    
+    def touch(self, project_id, reason, measure=False):
+        """
+        Record an access to a project
+        
+        Args:
+            project_id (str): Project folder name
+            reason (str): What accessed it, e.g. 'plan', 'archive' or 'generate'
+            measure (bool): If True, re-measure the project's size (after it was written)
+        """
+        self.touch_many([project_id], reason, measure)
+    
+    def touch_many(self, project_ids, reason, measure=False):
+        """
+        Record an access to several projects with a single save of the index
+        
+        Args:
+            project_ids (iterable): Project folder names
+            reason (str): What accessed them
+            measure (bool): If True, re-measure their sizes
+        """
+        with self._lock:
+            self._refresh()
+            now = time.time()
+            for project_id in project_ids:
+                entry = self.projects.get(project_id)
+                if not os.path.isdir(self.storage.project_dir(project_id)):
+                    self.projects.pop(project_id, None)
+                    continue
+                if entry is None or measure:
+                    created = entry['created'] if entry else now
+                    entry = self._measure(project_id, created, now, reason)
+                entry['last_access'] = now
+                entry['last_reason'] = reason
+                self.projects[project_id] = entry
+            self._save()
+    
+    def remove(self, project_id):
+        with self._lock:
+            self._refresh()
+            if self.projects.pop(project_id, None) is not None:
+                self._save()
+    
+    def snapshot(self):
+        """
+        Returns:
+            dict: Copy of the per-project entries
+        """
+        with self._lock:
+            self._refresh()
+            return {project_id: dict(entry) for project_id, entry in self.projects.items()}
+
+
+def record_access(project_dirs, reason, measure=False):
+    """
+    Record an access to projects in their workspace's index, if the workspace has one
+    
+    Used by the command line tools, which should keep an existing index current
+    but not start one in arbitrary folders.
+    
+    Args:
+        project_dirs (iterable): Paths to project folders
+        reason (str): What accessed them
+        measure (bool): If True, re-measure their sizes
+    """
+    by_workspace = {}
+    for project_dir in project_dirs:
+        project_dir = os.path.abspath(project_dir)
+        by_workspace.setdefault(workspace_for(project_dir), []).append(os.path.basename(project_dir))
+    for workspace_path, project_ids in by_workspace.items():
+        if os.path.isfile(os.path.join(workspace_path, INDEX_FILENAME)):
+            WorkspaceIndex(workspace_path).touch_many(project_ids, reason, measure)
+
+
+class RetentionPolicy:
+    """
+    Quotas a workspace is kept within; None disables a limit
+    """
+    
+    def __init__(self, max_total_bytes=None, max_projects=None, max_age_seconds=None,
+                 min_idle_seconds=DEFAULT_MIN_IDLE_SECONDS):
+        """
+        Initialize the policy
+        
+        Args:
+            max_total_bytes (int): Total size of all projects
+            max_projects (int): Number of projects
+            max_age_seconds (float): Time since a project was last accessed
+            min_idle_seconds (float): Projects accessed more recently are never evicted
+        """
+        self.max_total_bytes = max_total_bytes
+        self.max_projects = max_projects
+        self.max_age_seconds = max_age_seconds
+        self.min_idle_seconds = min_idle_seconds
+    
+    @classmethod
+    def from_env(cls):
+        """
+        Read the policy from AISA_WORKSPACE_MAX_MB, AISA_WORKSPACE_MAX_PROJECTS and AISA_WORKSPACE_MAX_AGE_DAYS
+        
+        Returns:
+            RetentionPolicy: The configured policy
+        """
+        def number(name, scale):
+            value = os.environ.get(name, '').strip()
+            return float(value) * scale if value else None
+        
+        max_bytes = number('AISA_WORKSPACE_MAX_MB', 1024 * 1024)
+        max_projects = number('AISA_WORKSPACE_MAX_PROJECTS', 1)
+        return cls(int(max_bytes) if max_bytes is not None else None,
+                   int(max_projects) if max_projects is not None else None,
+                   number('AISA_WORKSPACE_MAX_AGE_DAYS', 24 * 60 * 60))
+    
+    @property
+    def enabled(self):
+        return any(limit is not None for limit in (self.max_total_bytes, self.max_projects, self.max_age_seconds))
+
+
+class WorkspaceGC:
+    """
+    Evicts least recently used projects until the workspace is within its quotas.
+    
+    Projects past the maximum age go first, then the least recently accessed
+    ones while there are too many projects or too many bytes. Evicted projects
+    are archived to the cold store as tar.gz first when one is configured.
+    """
+    
+    def __init__(self, workspace_path, policy, cold_store_path=None, index=None):
+        """
+        Initialize the collector
+        
+        Args:
+            workspace_path (str): Workspace directory whose subfolders are projects
+            policy (RetentionPolicy): Quotas to enforce
+            cold_store_path (str): Folder receiving an archive of each evicted project, or None to only delete
+            index (WorkspaceIndex): Index to use; one is loaded from the workspace by default
+        """
+        self.workspace_path = workspace_path
+        self.policy = policy
+        self.cold_store_path = cold_store_path
+        self.index = index or WorkspaceIndex(workspace_path)
+        self._running = threading.Lock()
+    
+    def plan_evictions(self, now=None):
+        """
+        Decide which projects to evict, from the index alone
+        
+        Args:
+            now (float): Current time, for testing
+        
+        Returns:
+            list: (project ID, reason) pairs in eviction order
+        """
+        now = time.time() if now is None else now
+        policy = self.policy
+        projects = sorted(self.index.snapshot().items(), key=lambda item: item[1]['last_access'])
+        total_bytes = sum(entry['bytes'] for _, entry in projects)
+        count = len(projects)
+        
+        evictions = []
+        for project_id, entry in projects:
+            idle = now - entry['last_access']
+            if idle < policy.min_idle_seconds:
+                break  # Sorted by last access: every remaining project is in use too
+            if policy.max_age_seconds is not None and idle > policy.max_age_seconds:
+                reason = 'expired'
+            elif policy.max_projects is not None and count > policy.max_projects:
+                reason = 'project_quota'
+            elif policy.max_total_bytes is not None and total_bytes > policy.max_total_bytes:
+                reason = 'size_quota'
+            else:
+                continue
+            evictions.append((project_id, reason))
+            total_bytes -= entry['bytes']
+            count -= 1
+        return evictions
+    
+    def collect(self, dry_run=False):
+        """
+        Evict projects until the workspace is within its quotas
+        
+        Args:
+            dry_run (bool): If True, only report what would be evicted
+        
+        Returns:
+            dict: Evicted projects with their reason, size and archive path, plus totals
+        """
+        report = {'evicted': [], 'freed_bytes': 0, 'failed': []}
+        if not self.policy.enabled:
+            return report
+        with self._running:
+            entries = self.index.snapshot()
+            for project_id, reason in self.plan_evictions():
+                entry = entries[project_id]
+                project_dir = self.index.storage.project_dir(project_id)
+                item = {'project': project_id, 'reason': reason, 'bytes': entry['bytes'], 'archive': None}
+                if not dry_run:
+                    try:
+                        if self.cold_store_path and os.path.isdir(project_dir):
+                            item['archive'] = self._archive(project_id, project_dir)
+                        shutil.rmtree(project_dir, ignore_errors=True)
+                        self.index.remove(project_id)
+                    except Exception as e:
+                        print(f"❌ Could not evict {project_id}: {str(e)}")
+                        report['failed'].append(project_id)
+                        continue
+                    archived = f", archived to {item['archive']}" if item['archive'] else ''
+                    print(f"🗑️ Evicted {project_id} ({reason}, {entry['bytes'] / (1024 * 1024):.2f} MB){archived}")
+                else:
+                    print(f"🗑️ Would evict {project_id} ({reason}, {entry['bytes'] / (1024 * 1024):.2f} MB)")
+                report['evicted'].append(item)
+                report['freed_bytes'] += entry['bytes']
+            
+            # Blobs no longer linked from any project are garbage once their projects are gone
+            if report['evicted'] and not dry_run:
+                report['pruned_blobs'] = prune_blobs(self.workspace_path)
+        return report
+    
+    def collect_async(self):
+        """
+        Run collect() on a background thread unless a collection is already running
+        """
+        if not self.policy.enabled or self._running.locked():
+            return
+        
+        def run():
+            try:
+                self.collect()
+            except Exception as e:
+                print(f"⚠️ Workspace garbage collection failed: {str(e)}")
+        
+        threading.Thread(target=run, daemon=True, name='workspace-gc').start()
+    
+    def _archive(self, project_id, project_dir):
+        os.makedirs(self.cold_store_path, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+        archive_path = os.path.join(self.cold_store_path, f"{project_id}-{stamp}.tar.gz")
+        tmp_path = archive_path + '.tmp'
+        entries = archive.tree_entries(project_dir, project_id)
+        with open(tmp_path, 'wb') as f:
+            for chunk in archive.stream_archive(entries, 'tar.gz'):
+                f.write(chunk)
+        os.replace(tmp_path, archive_path)
+        return archive_path
+
+
+class WorkspaceRetention:
+    """
+    The index and collector a server keeps for its workspace, built on first use.
+    
+    Without a quota nothing is evicted, so no index is started: accesses only
+    keep an index the CLI already started current, as record_access() does.
+    """
+    
+    def __init__(self, workspace_path, policy, cold_store_path=None):
+        """
+        Initialize the retention
+        
+        Args:
+            workspace_path (str): Workspace directory whose subfolders, or shard subfolders, are projects
+            policy (RetentionPolicy): Quotas to enforce
+            cold_store_path (str): Folder receiving an archive of each evicted project, or None to only delete
+        """
+        self.workspace_path = workspace_path
+        self.policy = policy
+        self.cold_store_path = cold_store_path
+        self._gc = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls, workspace_path):
+        """
+        Read the policy, and the cold store from AISA_COLD_STORE
+        
+        Args:
+            workspace_path (str): Workspace directory
+        
+        Returns:
+            WorkspaceRetention: The configured retention
+        """
+        return cls(workspace_path, RetentionPolicy.from_env(), os.environ.get('AISA_COLD_STORE') or None)
+    
+    @property
+    def gc(self):
+        """
+        Returns:
+            WorkspaceGC: The collector, whose index is loaded on first use, or None when no quota is set
+        """
+        if not self.policy.enabled:
+            return None
+        with self._lock:
+            if self._gc is None:
+                self._gc = WorkspaceGC(self.workspace_path, self.policy, self.cold_store_path)
+            return self._gc
+    
+    def touch(self, project_id, reason, measure=False):
+        """
+        Record an access to a project
+        
+        Args:
+            project_id (str): Project folder name
+            reason (str): What accessed it, e.g. 'plan', 'archive' or 'generate'
+            measure (bool): If True, re-measure the project's size (after it was written)
+        """
+        gc = self.gc
+        if gc is not None:
+            gc.index.touch(project_id, reason, measure)
+        else:
+            record_access([LocalStorage(self.workspace_path).project_dir(project_id)], reason, measure)
+    
+    def collect_async(self):
+        """
+        Start a background collection when a quota is set
+        """
+        gc = self.gc
+        if gc is not None:
+            gc.collect_async()
+
+
+def print_gc_report(report):
+    """
+    Print the report returned by WorkspaceGC.collect()
+    
+    Args:
+        report (dict): Collection report
+    """
+    mb = 1024 * 1024
+    if not report['evicted']:
+        print("✅ Workspace is within its retention quotas")
+        return
+    print(f"📊 Evicted {len(report['evicted'])} project(s), {report['freed_bytes'] / mb:.2f} MB freed"
+          + (f", {report['pruned_blobs']} unreferenced blob(s) pruned" if report.get('pruned_blobs') else ''))
+    if report['failed']:
+        print(f"❌ Could not evict: {', '.join(report['failed'])}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark disk usage and generation time with and without the blob store
+
+Generates the same scratch workspace of many small projects with plain copies
+and through the content-addressed blob store in each mode the filesystem
+supports. Projects are built from a handful of plan shapes, as in a real
+workspace where most files are empty __init__.py modules, boilerplate READMEs
+and generic stubs. Disk usage counts allocated blocks and inodes once per
+inode, blobs included; every mode must produce the same file contents.
+
+Usage:
+    python benchmarks/bench_blob_store.py [--projects 200 1000] [--files 30] [--json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+
+# Add the backend directory to the system path to import the generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from agents.project_generator import ProjectGenerator
+from agents.blob_store import BlobStore, BLOB_DIRNAME
+
+def synthesize_plan(index, file_count):
+    """
+    Build a small project plan; every fifth project has its own module names
+    """
+    variant = index % 5 if index % 5 else index
+    folders = ["app/"]
+    sections = []
+    for i in range(file_count):
+        package = f"pkg_{i % 4}"
+        folders.append(f"├── {package}/__init__.py")
+        folders.append(f"├── {package}/module_{i}.py")
+        if i % 3:
+            sections.append(f"File: app/{package}/module_{i}.py\nPurpose: Handles part {i} of variant {variant}\n"
+                            f"Key Classes/Functions: Worker{i}, process_{i}(data)\nDependencies: os, json\n"
+                            "Interactions: None\n")
+    folders += ["├── README.md", "└── main.py"]
+    return {
+        'project_overview': {'name': 'Dedup Project'},
+        'technical_requirements': {'dependencies': 'requests'},
+        'project_structure': {'root_directory': 'app', 'folders': "\n".join(folders)},
+        'file_breakdown': "\n".join(sections),
+    }
+
+def disk_usage(workspace):
+    """
+    Count allocated bytes and inodes, each inode once, and hash every project file
+    """
+    seen = set()
+    blocks = 0
+    contents = {}
+    for root, dirs, files in os.walk(workspace):
+        for name in files:
+            st = os.lstat(os.path.join(root, name))
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                blocks += st.st_blocks
+            if BLOB_DIRNAME not in root and not name.startswith('.aisa'):
+                with open(os.path.join(root, name), 'rb') as f:
+                    contents[os.path.relpath(os.path.join(root, name), workspace)] = hashlib.sha256(f.read()).hexdigest()
+    return blocks * 512, len(seen), contents
+
+def run(project_count, file_count, dedup):
+    workspace = tempfile.mkdtemp(prefix='aisa_dedup_')
+    try:
+        folders = []
+        for i in range(project_count):
+            folder = os.path.join(workspace, f"project_{i}")
+            os.makedirs(folder)
+            with open(os.path.join(folder, 'project_plan.json'), 'w', encoding='utf-8') as f:
+                json.dump(synthesize_plan(i, file_count), f)
+            folders.append(folder)
+        
+        generator = ProjectGenerator(workspace, console=False, dedup=dedup)
+        start = time.perf_counter()
+        ok = all(generator.generate_project_from_plan(folder, use_existing_folder=True, validate=False) for folder in folders)
+        seconds = time.perf_counter() - start
+        
+        # Regenerating unchanged projects is the common case and must stay cheap
+        start = time.perf_counter()
+        for folder in folders:
+            generator.generate_project_from_plan(folder, use_existing_folder=True, validate=False)
+        rerun_seconds = time.perf_counter() - start
+        
+        disk_bytes, inodes, contents = disk_usage(workspace)
+        mode = generator.blob_store.mode if generator.blob_store else 'copy'
+        result = {
+            'projects': project_count,
+            'mode': mode,
+            'ok': ok,
+            'seconds': round(seconds, 3),
+            'rerun_seconds': round(rerun_seconds, 3),
+            'disk_mb': round(disk_bytes / (1024 * 1024), 2),
+            'inodes': inodes,
+            'fallbacks': generator.blob_store.fallbacks if generator.blob_store else 0,
+        }
+        print(f"🗄️ {project_count:5} projects {mode:8}: {result['seconds']:6.2f}s (rerun {result['rerun_seconds']:5.2f}s), "
+              f"{result['disk_mb']:8.2f} MB on disk, {inodes} inodes")
+        return result, contents
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the deduplicating blob store against plain copies')
+    parser.add_argument('--projects', type=int, nargs='+', default=[200, 1000], help='Workspace sizes to benchmark')
+    parser.add_argument('--files', type=int, default=30, help='Modules per project')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    
+    # Reflinks are only measured where the filesystem supports them
+    probe = tempfile.mkdtemp(prefix='aisa_probe_')
+    modes = [None, 'hardlink'] + (['reflink'] if BlobStore(probe).mode == 'reflink' else [])
+    shutil.rmtree(probe, ignore_errors=True)
+    if 'reflink' not in modes:
+        print("⚠️ Reflinks are not supported on this filesystem; only hardlinks are measured")
+    
+    results = []
+    identical = True
+    for project_count in args.projects:
+        baseline = None
+        for dedup in modes:
+            result, contents = run(project_count, args.files, dedup)
+            if baseline is None:
+                baseline = contents
+            result['identical_output'] = contents == baseline
+            identical = identical and result['identical_output'] and result['ok']
+            if not result['identical_output']:
+                print(f"❌ {result['mode']} output differs from plain copies")
+            results.append(result)
+    
+    if args.json:
+        print(json.dumps(results, indent=4))
+    return 0 if identical else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark and fuzz the single-pass file_breakdown lexer
+
+Compares the lexer against the regex-based section splitting it replaced on
+multi-megabyte breakdowns in every format the planner emits, times both on
+pathological input that makes the old regex backtrack, and fuzzes the lexer
+with random line soup to check it never fails or slows down superlinearly.
+
+Usage:
+    python benchmarks/bench_breakdown_lexer.py [--sizes-mb 1 4 8] [--fuzz-iterations 2000] [--json]
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+# Add the backend directory to the system path to import the generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from agents.breakdown_lexer import parse_file_breakdown
+
+# The four layouts found in Workspace/*/project_plan.json
+SECTION_FORMATS = {
+    'file_prefix': "File: {root}/{path}\nPurpose: {purpose}\nKey Classes/Functions: {funcs}\nDependencies: {deps}\nInteractions: {inter}\n\n",
+    'star_bullets': "{root}/{path}\n    * Primary purpose: {purpose}\n    * Key classes/functions: {funcs}\n    * Dependencies: {deps}\n    * Interactions: {inter}\n\n",
+    'dash_colon': "{path}:\n  - Primary purpose: {purpose}\n  - Key components: {funcs}\n  - Dependencies: {deps}\n  - Interactions: {inter}\n\n",
+    'key_components': "File: {root}/{path}\nPurpose: {purpose}\nKey Components: {funcs}\nDependencies: {deps}\nInteractions: {inter}\n\n",
+}
+
+def legacy_split(file_breakdown):
+    """
+    The regex-based section splitting used before the lexer, kept for comparison
+    """
+    file_path_pattern = re.compile(r'^\s*([^\s\*\-\n][^:\n]*(?:/[^:\n]+)+)(?:\n|\s*\*|\s*:)', re.MULTILINE)
+    matches = list(file_path_pattern.finditer(file_breakdown))
+    if matches:
+        sections = []
+        for i in range(len(matches)):
+            end_pos = matches[i+1].start() if i < len(matches) - 1 else len(file_breakdown)
+            sections.append(file_breakdown[matches[i].start():end_pos].strip())
+    else:
+        sections = re.split(r'\n\s*\n(?=\S)', file_breakdown)
+    # The old generator then ran one search per field on every section
+    for section in sections:
+        re.search(r'[Pp]urpose:\s*([^\n]+)', section)
+        re.search(r'Key (?:classes/functions|functions|classes):\s*([^\n]+)', section)
+        re.search(r'Dependencies:\s*([^\n]+)', section)
+        re.search(r'Interactions:\s*([^\n]+)', section)
+        re.findall(r'(?:in|within|under|inside|the)\s+([a-zA-Z0-9_\-/\\]+)\s+(?:directory|folder|dir)', section, re.IGNORECASE)
+    return sections
+
+def synthesize_breakdown(target_bytes, fmt, seed=0):
+    """
+    Build a breakdown of roughly target_bytes in the given format
+    """
+    rng = random.Random(seed)
+    template = SECTION_FORMATS[fmt]
+    parts = []
+    size = 0
+    i = 0
+    while size < target_bytes:
+        section = template.format(
+            root='bench_project',
+            path=f"pkg_{i % 97}/module_{i}.py",
+            purpose="Handles part of the benchmark workload " + "and more detail " * rng.randint(1, 8),
+            funcs=", ".join(f"func_{i}_{j}()" for j in range(rng.randint(1, 6))),
+            deps="os, json, pkg_0.module_0",
+            inter="Used by main.py in the pkg directory",
+        )
+        parts.append(section)
+        size += len(section)
+        i += 1
+    return ''.join(parts), i
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def run_throughput(sizes_mb):
+    results = []
+    for fmt in SECTION_FORMATS:
+        for size_mb in sizes_mb:
+            text, expected = synthesize_breakdown(int(size_mb * 1024 * 1024), fmt)
+            lexer_time, records = time_call(parse_file_breakdown, text)
+            legacy_time, sections = time_call(legacy_split, text)
+            assert len(records) == expected, f"{fmt}: expected {expected} records, got {len(records)}"
+            mb = len(text) / (1024 * 1024)
+            results.append({
+                'format': fmt,
+                'size_mb': round(mb, 2),
+                'files': expected,
+                'lexer_seconds': round(lexer_time, 4),
+                'lexer_mb_per_s': round(mb / lexer_time, 1),
+                'legacy_seconds': round(legacy_time, 4),
+                'legacy_sections': len(sections),
+            })
+            print(f"📈 {fmt:15} {mb:6.1f} MB  lexer {mb / lexer_time:7.1f} MB/s  "
+                  f"legacy {legacy_time:7.3f}s ({len(sections)} sections)  lexer {lexer_time:7.3f}s ({len(records)} records)")
+    return results
+
+def run_pathological():
+    results = []
+    # Slash-separated runs with no terminator make the old nested quantifier backtrack exponentially
+    for segments in (12, 14, 16, 18):
+        text = "a/" * segments + "b"
+        legacy_time, _ = time_call(legacy_split, text)
+        lexer_time, _ = time_call(parse_file_breakdown, text)
+        results.append({'segments': segments, 'legacy_seconds': round(legacy_time, 4), 'lexer_seconds': round(lexer_time, 6)})
+        print(f"🐌 {segments} path segments: legacy {legacy_time:.4f}s, lexer {lexer_time:.6f}s")
+    # The lexer must stay linear on the same shape at sizes the regex could never finish
+    for segments in (10_000, 100_000, 1_000_000):
+        text = "a/" * segments + "b"
+        lexer_time, _ = time_call(parse_file_breakdown, text)
+        results.append({'segments': segments, 'legacy_seconds': None, 'lexer_seconds': round(lexer_time, 6)})
+        print(f"⚡ {segments} path segments: lexer {lexer_time:.4f}s")
+    return results
+
+FUZZ_TOKENS = [
+    'File:', 'src/', 'main.py', '__init__.py', '*', '-', '•', ':', 'Purpose:', 'Key Components:',
+    'Dependencies:', 'Interactions:', 'in the', 'directory', '`', '**', '#', '1.', '\\', '/', '.', ' ',
+    '    ', 'a' * 50, '/' * 20, 'x/' * 30, '├──', '│', 'é', '\t', 'None',
+]
+
+def run_fuzz(iterations, seed=0):
+    rng = random.Random(seed)
+    failures = 0
+    slowest = 0.0
+    for _ in range(iterations):
+        lines = []
+        for _ in range(rng.randint(1, 60)):
+            lines.append(''.join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, 12))))
+        text = '\n'.join(lines)
+        try:
+            elapsed, records = time_call(parse_file_breakdown, text)
+        except Exception as e:
+            failures += 1
+            print(f"❌ Lexer raised {type(e).__name__} on input: {text[:200]!r}")
+            continue
+        slowest = max(slowest, elapsed / max(len(text), 1))
+        # Every record must come from the input, in order, with all fields filled
+        position = 0
+        for record in records:
+            first_line = record['section'].split('\n', 1)[0]
+            found = text.find(first_line, position)
+            if found < 0 or not all(record[k] for k in ('purpose', 'key_funcs', 'deps', 'interactions')):
+                failures += 1
+                print(f"❌ Inconsistent record {record!r} for input: {text[:200]!r}")
+                break
+            position = found
+    print(f"🎲 Fuzzed {iterations} inputs: {failures} failures, worst {slowest * 1e9:.0f} ns/byte")
+    return {'iterations': iterations, 'failures': failures, 'worst_ns_per_byte': round(slowest * 1e9, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark and fuzz the file_breakdown lexer')
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[1, 4, 8], help='Breakdown sizes to benchmark')
+    parser.add_argument('--fuzz-iterations', type=int, default=2000, help='Number of random inputs to fuzz')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    
+    results = {
+        'throughput': run_throughput(args.sizes_mb),
+        'pathological': run_pathological(),
+        'fuzz': run_fuzz(args.fuzz_iterations),
+    }
+    if args.json:
+        print(json.dumps(results, indent=4))
+    return 1 if results['fuzz']['failures'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for ProjectGenerator on synthetic plans of increasing size
+
+Synthesizes project_plan.json files with 10 to 10,000 files, drawing the folder
+tree and writing the file breakdown in the layouts the planner emits, and runs
+generate_project_from_plan on each. Every phase (parse structure, create
+structure, create contents, cleanup, validate) is timed, and a second traced run
+counts filesystem calls and peak Python memory per phase. A third run on the
+already generated project measures an incremental regeneration.
+
+Filesystem calls are counted at the Python level by wrapping open() and the os
+functions everything else is built on (stat, mkdir, scandir, ...), so os.walk,
+os.makedirs and os.path.exists are counted by the calls they make.
+
+Results are printed as JSON or written with --output; --compare reads an earlier
+results file and exits non-zero when a run got slower than --threshold.
+
+Usage:
+    python benchmarks/bench_generator.py [--sizes 10 100 1000 10000] [--formats all]
+                                         [--workers 1] [--repeat 1] [--output results.json]
+                                         [--compare baseline.json] [--threshold 0.2]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import builtins
+import tempfile
+import tracemalloc
+import contextlib
+from collections import Counter
+
+# Add the backend directory to the system path to import the generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import agents.project_generator as project_generator
+from agents.project_generator import ProjectGenerator, rendering_version
+
+# File breakdown layouts found in stored plans and in planner output
+SECTION_FORMATS = {
+    'file_prefix': "File: {root}/{path}\nPurpose: {purpose}\nKey Classes/Functions: {funcs}\nDependencies: {deps}\nInteractions: {inter}\n\n",
+    'star_bullets': "{root}/{path}\n    * Primary purpose: {purpose}\n    * Key classes/functions: {funcs}\n    * Dependencies: {deps}\n    * Interactions: {inter}\n\n",
+    'dash_colon': "{path}:\n  - Primary purpose: {purpose}\n  - Key components: {funcs}\n  - Dependencies: {deps}\n  - Interactions: {inter}\n\n",
+    'key_components': "File: {root}/{path}\nPurpose: {purpose}\nKey Components: {funcs}\nDependencies: {deps}\nInteractions: {inter}\n\n",
+    'markdown_heading': "### `{path}`\n- **Purpose:** {purpose}\n- **Key functions:** {funcs}\n- **Dependencies:** {deps}\n- **Interactions:** {inter}\n\n",
+    'numbered': "{index}. **{path}**\n   - Purpose: {purpose}\n   - Key classes: {funcs}\n   - Dependencies: {deps}\n   - Interactions: {inter}\n\n",
+}
+
+# Folder tree drawing styles, paired with the breakdown layouts in turn
+TREE_STYLES = ('box', 'indent', 'ascii', 'flat')
+
+PHASES = (
+    ('parse_structure', '_parse_folder_structure'),
+    ('create_structure', '_create_folder_structure'),
+    ('create_contents', '_create_files_with_content'),
+    ('cleanup', '_cleanup_duplicates'),
+)
+
+def synthesize_files(file_count):
+    """
+    Lay out file_count files over nested packages, tests, docs and config files
+    
+    Returns:
+        list: Project-relative paths with '/' separators
+    """
+    paths = ['main.py', 'README.md', 'requirements.txt']
+    i = 0
+    while len(paths) < file_count:
+        kind = i % 10
+        if kind == 0:
+            paths.append(f"tests/test_module_{i}.py")
+        elif kind == 1:
+            paths.append(f"docs/page_{i}.md")
+        elif kind == 2:
+            paths.append(f"pkg_{i % 7}/sub_{i % 3}/module_{i}.py")
+        else:
+            paths.append(f"pkg_{i % 7}/module_{i}.py")
+        i += 1
+    return paths[:file_count]
+
+def draw_tree(root_name, paths, style):
+    """
+    Draw a folder tree for the given file paths in one of the TREE_STYLES
+    """
+    if style == 'flat':
+        return '\n'.join([f"{root_name}/"] + [f"{root_name}/{path}" for path in paths])
+    
+    tree = {}
+    for path in paths:
+        node = tree
+        for part in path.split('/')[:-1]:
+            node = node.setdefault(part + '/', {})
+        node[path.split('/')[-1]] = None
+    
+    lines = [f"{root_name}/"]
+    
+    def walk(node, prefix):
+        names = list(node)
+        for i, name in enumerate(names):
+            last = i == len(names) - 1
+            if style == 'box':
+                connector, child_prefix = ('└── ' if last else '├── '), prefix + ('    ' if last else '│   ')
+            elif style == 'ascii':
+                connector, child_prefix = ('`-- ' if last else '|-- '), prefix + ('    ' if last else '|   ')
+            else:
+                connector, child_prefix = '', prefix + '  '
+            lines.append(f"{prefix}{connector}{name}")
+            if node[name] is not None:
+                walk(node[name], child_prefix)
+    
+    walk(tree, '' if style != 'indent' else '  ')
+    return '\n'.join(lines)
+
+def synthesize_plan(file_count, section_format, tree_style):
+    """
+    Build a project plan describing file_count files
+    """
+    root_name = 'bench_project'
+    paths = synthesize_files(file_count)
+    template = SECTION_FORMATS[section_format]
+    sections = []
+    for index, path in enumerate(paths, 1):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if path.startswith('tests/'):
+            funcs = f"Test{stem.title().replace('_', '')} class, test_{stem}()"
+            deps = "unittest"
+        elif path.endswith('.py'):
+            funcs = f"{stem.title().replace('_', '')}, process_{stem}(data), main()" if stem == 'main' else f"{stem.title().replace('_', '')}, process_{stem}(data)"
+            deps = "os, json, requests"
+        else:
+            funcs = "None"
+            deps = "None"
+        sections.append(template.format(root=root_name, path=path, index=index, purpose=f"Implements {stem}",
+                                        funcs=funcs, deps=deps, inter="Used by main.py"))
+    return {
+        'project_overview': {'name': 'Bench Project', 'description': 'Synthetic benchmark project'},
+        'technical_requirements': {'python_version': '3.10', 'dependencies': 'requests, streamlit', 'gui_framework': 'Streamlit'},
+        'project_structure': {'root_directory': root_name, 'folders': draw_tree(root_name, paths, tree_style)},
+        'file_breakdown': ''.join(sections),
+    }
+
+class FilesystemCallCounter:
+    """
+    Counts filesystem calls made through open() and the os primitives while active
+    """
+    
+    OS_FUNCTIONS = ('stat', 'lstat', 'mkdir', 'scandir', 'listdir', 'remove', 'unlink', 'rename', 'replace', 'rmdir', 'utime')
+    
+    def __init__(self):
+        self.counts = Counter()
+        self._originals = {}
+    
+    def _wrap(self, name, func):
+        counts = self.counts
+        
+        def counted(*args, **kwargs):
+            counts[name] += 1
+            return func(*args, **kwargs)
+        return counted
+    
+    def __enter__(self):
+        for name in self.OS_FUNCTIONS:
+            original = getattr(os, name)
+            self._originals[('os', name)] = original
+            setattr(os, name, self._wrap(name, original))
+        self._originals[('builtins', 'open')] = builtins.open
+        builtins.open = self._wrap('open', builtins.open)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        for (module, name), original in self._originals.items():
+            setattr(os if module == 'os' else builtins, name, original)
+        self._originals.clear()
+        return False
+
+class PhaseRecorder:
+    """
+    Wraps the generator's phase methods to record time, memory and filesystem calls per phase
+    """
+    
+    def __init__(self, generator, counter=None, trace_memory=False):
+        self.generator = generator
+        self.counter = counter
+        self.trace_memory = trace_memory
+        self.phases = {}
+        for phase, method_name in PHASES:
+            setattr(generator, method_name, self._wrap(phase, getattr(generator, method_name)))
+    
+    def _wrap(self, phase, method):
+        def recorded(*args, **kwargs):
+            calls_before = sum(self.counter.counts.values()) if self.counter else 0
+            if self.trace_memory:
+                tracemalloc.reset_peak()
+                memory_before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record = self.phases.setdefault(phase, {})
+                record['seconds'] = round(time.perf_counter() - start, 4)
+                if self.counter:
+                    record['fs_calls'] = sum(self.counter.counts.values()) - calls_before
+                if self.trace_memory:
+                    record['peak_kb'] = round((tracemalloc.get_traced_memory()[1] - memory_before) / 1024, 1)
+        return recorded
+
+@contextlib.contextmanager
+def timed_validation(recorder_holder):
+    """
+    Time the validation pass, which the generator constructs internally
+    """
+    original = project_generator.ProjectValidator
+    
+    class TimedValidator(original):
+        def validate(self):
+            recorder = recorder_holder[0]
+            return recorder._wrap('validate', super().validate)()
+    
+    project_generator.ProjectValidator = TimedValidator
+    try:
+        yield
+    finally:
+        project_generator.ProjectValidator = original
+
+def generate(scratch, workers, validate, counter=None, trace_memory=False):
+    generator = ProjectGenerator(os.path.dirname(scratch))
+    holder = [PhaseRecorder(generator, counter, trace_memory)]
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), timed_validation(holder):
+        start = time.perf_counter()
+        ok = generator.generate_project_from_plan(scratch, use_existing_folder=True, workers=workers, validate=validate)
+        total = time.perf_counter() - start
+    if not ok:
+        raise RuntimeError(f"Generation failed in {scratch}: {generator.errors}")
+    return total, holder[0].phases, generator
+
+def run_case(file_count, section_format, tree_style, workers, validate, repeat=1):
+    plan = synthesize_plan(file_count, section_format, tree_style)
+    result = {'files': file_count, 'format': section_format, 'tree_style': tree_style}
+    scratch = tempfile.mkdtemp(prefix='aisa_bench_')
+    traced_scratch = tempfile.mkdtemp(prefix='aisa_bench_')
+    try:
+        for directory in (scratch, traced_scratch):
+            with open(os.path.join(directory, 'project_plan.json'), 'w', encoding='utf-8') as f:
+                json.dump(plan, f)
+        
+        # Timing runs without tracing overhead, keeping the fastest
+        best = None
+        for attempt in range(repeat):
+            if attempt:
+                # Start again from an empty project folder
+                for name in os.listdir(scratch):
+                    path = os.path.join(scratch, name)
+                    if os.path.isdir(path):
+                        shutil.rmtree(path)
+                    elif name != 'project_plan.json':
+                        os.remove(path)
+            run = generate(scratch, workers, validate)
+            if best is None or run[0] < best[0]:
+                best = run
+        total, phases, generator = best
+        result['total_seconds'] = round(total, 4)
+        result['phases'] = phases
+        result['written'] = len(generator.manifest.written)
+        
+        # Incremental rerun: every file is unchanged
+        rerun_total, _, rerun_generator = generate(scratch, workers, validate)
+        result['rerun_seconds'] = round(rerun_total, 4)
+        result['rerun_unchanged'] = len(rerun_generator.manifest.unchanged)
+        
+        # Traced run for filesystem calls and memory
+        tracemalloc.start()
+        try:
+            with FilesystemCallCounter() as counter:
+                _, traced_phases, _ = generate(traced_scratch, workers, validate, counter, trace_memory=True)
+            result['peak_memory_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+        for phase, record in traced_phases.items():
+            result['phases'].setdefault(phase, {}).update({key: record[key] for key in ('fs_calls', 'peak_kb') if key in record})
+        result['fs_calls'] = dict(sorted(counter.counts.items()))
+        result['fs_calls_total'] = sum(counter.counts.values())
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+        shutil.rmtree(traced_scratch, ignore_errors=True)
+    
+    phase_summary = ', '.join(f"{phase} {record.get('seconds', 0):.3f}s" for phase, record in result['phases'].items())
+    print(f"📈 {file_count:6} files {section_format:16} {tree_style:6} total {result['total_seconds']:7.3f}s "
+          f"rerun {result['rerun_seconds']:7.3f}s fs calls {result['fs_calls_total']:7} peak {result['peak_memory_kb']:9.1f} KB "
+          f"({phase_summary})", file=sys.stderr)
+    return result
+
+def compare(results, baseline_path, threshold):
+    """
+    Compare total times against an earlier results file
+    
+    Returns:
+        list: Descriptions of the runs that regressed by more than threshold
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(run['files'], run['format'], run['tree_style']): run for run in baseline.get('results', [])}
+    regressions = []
+    for run in results:
+        old = previous.get((run['files'], run['format'], run['tree_style']))
+        if not old:
+            continue
+        for metric in ('total_seconds', 'rerun_seconds', 'fs_calls_total'):
+            if old.get(metric) and run[metric] > old[metric] * (1 + threshold):
+                regressions.append(f"{run['files']} files {run['format']}/{run['tree_style']}: {metric} "
+                                   f"{old[metric]} -> {run[metric]} ({run[metric] / old[metric]:.2f}x)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ProjectGenerator on synthetic plans')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000], help='Number of files per plan')
+    parser.add_argument('--formats', nargs='+', default=['all'], help=f"Breakdown layouts: {', '.join(SECTION_FORMATS)} or all")
+    parser.add_argument('--workers', type=int, default=1, help='Threads rendering and writing files')
+    parser.add_argument('--repeat', type=int, default=1, help='Timing runs per plan; the fastest is reported')
+    parser.add_argument('--no-validate', action='store_true', help='Skip the validation phase')
+    parser.add_argument('--output', type=str, help='Write the JSON results to this file instead of stdout')
+    parser.add_argument('--compare', type=str, help='Earlier results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown before a run counts as a regression')
+    args = parser.parse_args()
+    
+    formats = list(SECTION_FORMATS) if 'all' in args.formats else args.formats
+    results = []
+    for file_count in args.sizes:
+        for i, section_format in enumerate(formats):
+            results.append(run_case(file_count, section_format, TREE_STYLES[i % len(TREE_STYLES)],
+                                    args.workers, not args.no_validate, args.repeat))
+    
+    report = {
+        'generator_version': rendering_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'workers': args.workers,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+        print(f"💾 Results written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=4))
+    
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"✅ No regressions against {args.compare}", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial and parallel file materialization in ProjectGenerator
+
+Generates synthetic projects of increasing size into a scratch directory with
+1 worker and with a thread pool, checks both runs produce identical trees, and
+reports wall time per mode. Local disks make syscalls nearly free, so
+--latency-ms adds a fixed blocking delay to every file write and directory
+creation to emulate network filesystems and container overlay mounts.
+
+Usage:
+    python benchmarks/bench_parallel_writer.py [--files 100 500 2000] [--workers 8] [--latency-ms 2] [--json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import contextlib
+
+# Add the backend directory to the system path to import the generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import agents.file_writer as file_writer
+import agents.project_generator as project_generator
+from agents.project_generator import ProjectGenerator
+
+def synthesize_plan(file_count):
+    """
+    Build a project plan with file_count Python files spread over 20 packages
+    """
+    root_name = 'bench_project'
+    folders = [f"{root_name}/"]
+    sections = []
+    for i in range(file_count):
+        path = f"pkg_{i % 20}/module_{i}.py"
+        folders.append(f"├── {path}")
+        sections.append(f"File: {root_name}/{path}\nPurpose: Handles part {i} of the workload\n"
+                        f"Key Classes/Functions: Worker{i}, process_{i}(data)\nDependencies: os, json\nInteractions: None\n")
+    return {
+        'project_overview': {'name': 'Bench Project'},
+        'technical_requirements': {'dependencies': 'requests'},
+        'project_structure': {'root_directory': root_name, 'folders': '\n'.join(folders)},
+        'file_breakdown': '\n'.join(sections),
+    }
+
+@contextlib.contextmanager
+def simulated_latency(latency_s):
+    """
+    Add a blocking delay to every file write and directory creation the generator makes
+    """
+    if latency_s <= 0:
+        yield
+        return
+    original_write = project_generator.write_text
+    original_makedirs = file_writer.os.makedirs
+    
+    def slow_write(file_path, content):
+        time.sleep(latency_s)
+        original_write(file_path, content)
+    
+    def slow_makedirs(path, *args, **kwargs):
+        time.sleep(latency_s)
+        original_makedirs(path, *args, **kwargs)
+    
+    project_generator.write_text = slow_write
+    file_writer.os.makedirs = slow_makedirs
+    try:
+        yield
+    finally:
+        project_generator.write_text = original_write
+        file_writer.os.makedirs = original_makedirs
+
+def tree_digest(root_path):
+    # Hash every generated file so the serial and parallel trees can be compared
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(root_path):
+        dirs.sort()
+        for name in sorted(files):
+            if name == project_generator.MANIFEST_FILENAME:
+                continue
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, root_path).encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def run_once(plan, workers, latency_s):
+    scratch = tempfile.mkdtemp(prefix='aisa_bench_')
+    try:
+        with open(os.path.join(scratch, 'project_plan.json'), 'w', encoding='utf-8') as f:
+            json.dump(plan, f)
+        generator = ProjectGenerator(os.path.dirname(scratch))
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), simulated_latency(latency_s):
+            start = time.perf_counter()
+            ok = generator.generate_project_from_plan(scratch, use_existing_folder=True, workers=workers)
+            elapsed = time.perf_counter() - start
+        if not ok:
+            raise RuntimeError(f"Generation failed with {workers} workers: {generator.errors}")
+        return elapsed, tree_digest(scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark serial and parallel file materialization')
+    parser.add_argument('--files', type=int, nargs='+', default=[100, 500, 2000], help='Project sizes to benchmark')
+    parser.add_argument('--workers', type=int, default=8, help='Threads for the parallel mode')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Simulated latency per write or mkdir (0 for raw disk)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    
+    latency_s = args.latency_ms / 1000
+    results = []
+    for file_count in args.files:
+        plan = synthesize_plan(file_count)
+        serial_time, serial_digest = run_once(plan, 1, latency_s)
+        parallel_time, parallel_digest = run_once(plan, args.workers, latency_s)
+        identical = serial_digest == parallel_digest
+        results.append({
+            'files': file_count,
+            'latency_ms': args.latency_ms,
+            'serial_seconds': round(serial_time, 3),
+            'parallel_seconds': round(parallel_time, 3),
+            'workers': args.workers,
+            'speedup': round(serial_time / parallel_time, 2),
+            'identical_output': identical,
+        })
+        print(f"📈 {file_count:6} files: serial {serial_time:7.3f}s, {args.workers} workers {parallel_time:7.3f}s "
+              f"({serial_time / parallel_time:5.2f}x){'' if identical else '  ❌ outputs differ'}")
+    
+    if args.json:
+        print(json.dumps(results, indent=4))
+    return 0 if all(result['identical_output'] for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark the planning pipeline offline by replaying recorded model answers
+
+Runs PlanningAgent.create_project_plan, and the project generation it triggers,
+for every prompt of a cassette, with the model calls answered from the cassette
+instead of the network: no API key or google-generativeai is needed and every
+run sees the same answers. Each latency scale is run for several rounds in
+fresh scratch workspaces; 0 answers at once, so the time measured is the
+pipeline's own, and 1 waits as long as the recorded calls took. Every round
+must generate the same files.
+
+Without --cassette, one is synthesized from the plans in Workspace/, each
+answering a prompt made of the project's name and description with the
+recorded latency given by --synthetic-latency.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--cassette cassettes/model_calls.json.gz] [--latency-scale 0 1] [--rounds 3] [--json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import contextlib
+
+# Add the backend directory to the system path to import the planning agent
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from agents.planning_agent import PlanningAgent, WORKSPACE_PATH, build_planning_prompt
+from agents.model_transport import Cassette, request_key
+from agents.storage import LocalStorage, PLAN_FILENAME
+
+# The line of the planning prompt holding the user's prompt
+PROMPT_MARKER = 'USER REQUIREMENT: '
+
+def replay_agent(cassette_path, latency_scale, storage):
+    """
+    Build a planning agent answering from a cassette
+    """
+    os.environ['AISA_MODEL_TRANSPORT'] = 'replay'
+    os.environ['AISA_CASSETTE'] = cassette_path
+    os.environ['AISA_REPLAY_LATENCY_SCALE'] = str(latency_scale)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return PlanningAgent(storage)
+
+def synthesize_cassette(cassette_path, latency):
+    """
+    Record every Workspace plan as the answer to a prompt describing its project, for every routed model
+    
+    Returns:
+        list: The prompts
+    """
+    Cassette(cassette_path).save()
+    scratch = tempfile.mkdtemp(prefix='aisa_pipeline_')
+    try:
+        agent = replay_agent(cassette_path, 0, LocalStorage(scratch))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    
+    cassette = Cassette(cassette_path)
+    workspace = LocalStorage(WORKSPACE_PATH)
+    prompts = []
+    for project_id in workspace.list_projects():
+        with open(os.path.join(workspace.project_dir(project_id), PLAN_FILENAME), 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        overview = plan.get('project_overview') if isinstance(plan.get('project_overview'), dict) else {}
+        prompt = f"{overview.get('name', project_id)}: {overview.get('description', '')}".strip()
+        full_prompt = build_planning_prompt(prompt)
+        for model_name in sorted(set(agent.router.models.values())):
+            cassette.add(request_key(model_name, full_prompt, agent.generation_config), {
+                'model': model_name,
+                'prompt': full_prompt,
+                'max_output_tokens': None,
+                'text': json.dumps(plan, indent=4, ensure_ascii=False),
+                'finish_reason': 'STOP',
+                'prompt_tokens': None,
+                'output_tokens': None,
+                'latency': latency,
+            })
+        prompts.append(prompt)
+    cassette.save()
+    return prompts
+
+def cassette_prompts(cassette_path):
+    """
+    The user prompts of the planning requests recorded in a cassette
+    """
+    prompts = []
+    for _, entry in Cassette(cassette_path).iter_entries():
+        for line in entry.get('prompt', '').splitlines():
+            if line.startswith(PROMPT_MARKER) and line[len(PROMPT_MARKER):] not in prompts:
+                prompts.append(line[len(PROMPT_MARKER):])
+    return prompts
+
+def tree_digest(root):
+    """
+    Hash of the paths and contents of every generated file under a workspace
+    """
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        for name in sorted(filenames):
+            if name.startswith('.'):
+                continue
+            path = os.path.join(dirpath, name)
+            digest.update(os.path.relpath(path, root).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def run_round(cassette_path, latency_scale, prompts):
+    """
+    Plan and generate every prompt in a fresh scratch workspace
+    """
+    scratch = tempfile.mkdtemp(prefix='aisa_pipeline_')
+    try:
+        agent = replay_agent(cassette_path, latency_scale, LocalStorage(scratch))
+        seconds = []
+        failures = 0
+        for prompt in prompts:
+            started = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                plan = agent.create_project_plan(prompt)
+            seconds.append(time.perf_counter() - started)
+            failures += int(bool(plan.get('error')) or plan.get('format') == 'text')
+        return seconds, failures, tree_digest(scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the planning pipeline offline from a cassette')
+    parser.add_argument('--cassette', type=str, help='Cassette to replay; synthesized from Workspace/ if omitted')
+    parser.add_argument('--latency-scale', type=float, nargs='+', default=[0.0], help='Multiples of the recorded latency')
+    parser.add_argument('--rounds', type=int, default=3, help='Runs of every prompt per latency scale')
+    parser.add_argument('--synthetic-latency', type=float, default=2.0,
+                        help='Recorded latency of synthesized answers, in seconds')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    
+    cassette_dir = tempfile.mkdtemp(prefix='aisa_cassette_')
+    try:
+        if args.cassette:
+            cassette_path = os.path.abspath(args.cassette)
+            prompts = cassette_prompts(cassette_path)
+        else:
+            cassette_path = os.path.join(cassette_dir, 'synthesized.json.gz')
+            prompts = synthesize_cassette(cassette_path, args.synthetic_latency)
+        if not prompts:
+            print("❌ No planning prompts to replay")
+            return 1
+        
+        results = []
+        digests = set()
+        for latency_scale in args.latency_scale:
+            seconds = []
+            failures = 0
+            for _ in range(args.rounds):
+                round_seconds, round_failures, digest = run_round(cassette_path, latency_scale, prompts)
+                seconds.extend(round_seconds)
+                failures += round_failures
+                digests.add(digest)
+            seconds.sort()
+            result = {
+                'latency_scale': latency_scale,
+                'prompts': len(prompts),
+                'rounds': args.rounds,
+                'failures': failures,
+                'total_seconds': round(sum(seconds), 3),
+                'mean_ms': round(1000 * sum(seconds) / len(seconds), 1),
+                'p50_ms': round(1000 * seconds[len(seconds) // 2], 1),
+                'max_ms': round(1000 * seconds[-1], 1),
+            }
+            results.append(result)
+            print(f"📼 Latency x{latency_scale:g}: {len(seconds)} plans in {result['total_seconds']}s, "
+                  f"mean {result['mean_ms']} ms, p50 {result['p50_ms']} ms, max {result['max_ms']} ms"
+                  f"{'' if not failures else f'  ❌ {failures} failed'}")
+    finally:
+        shutil.rmtree(cassette_dir, ignore_errors=True)
+    
+    if args.json:
+        print(json.dumps(results, indent=4))
+    
+    # Replays are deterministic: every round of every scale must generate the same files
+    if len(digests) > 1:
+        print(f"❌ Rounds generated {len(digests)} different trees")
+    return 0 if len(digests) == 1 and not any(result['failures'] for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
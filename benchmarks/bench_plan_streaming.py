@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of in-memory and streamed generation of very large plans
+
+Synthesizes plans of increasing size with a fixed number of files, so the growth
+is in the breakdown text (long notes in every section, as in imported plans),
+and generates each one in a fresh subprocess with and without streaming. The
+peak resident set size above the child's baseline is reported per mode; the
+streamed peak should stay flat as the plan grows. Both modes must produce the
+same manifest.
+
+Usage:
+    python benchmarks/bench_plan_streaming.py [--plan-mb 8 32 128] [--files 2000] [--json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BACKEND_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+# The streamed peak may grow by a tenth of the plan's growth, plus a fixed allowance: the allocator keeps a
+# few MB more once it has recycled many chunk-sized buffers, which levels off whatever the plan size
+STREAMED_GROWTH_RATIO = 0.1
+STREAMED_GROWTH_ALLOWANCE_MB = 4.0
+
+def write_plan(plan_path, file_count, plan_bytes):
+    """
+    Write a plan of about plan_bytes whose sections carry long notes, without building it in memory
+    """
+    note_line = "Notes: " + "the planner explains this file at length, " * 24 + "\n"
+    notes_per_section = max(1, round((plan_bytes / file_count - 300) / len(note_line)))
+    encoder = json.JSONEncoder()
+    with open(plan_path, 'w', encoding='utf-8') as f:
+        f.write('{"project_overview": {"name": "Large Plan"}, ')
+        f.write('"technical_requirements": {"dependencies": "requests"}, ')
+        folders = "big_project/\n" + ''.join(f"├── pkg_{i % 20}/module_{i}.py\n" for i in range(file_count))
+        f.write(f'"project_structure": {{"root_directory": "big_project", "folders": {encoder.encode(folders)}}}, ')
+        f.write('"file_breakdown": "')
+        for i in range(file_count):
+            section = (f"File: big_project/pkg_{i % 20}/module_{i}.py\nPurpose: Handles part {i} of the workload\n"
+                       f"Key Classes/Functions: Worker{i}, process_{i}(data)\nDependencies: os, json\n"
+                       f"Interactions: None\n{note_line * notes_per_section}\n")
+            f.write(encoder.encode(section)[1:-1])
+        f.write('"}')
+
+def child(plan_folder, stream):
+    # Runs in a fresh interpreter: measure the peak RSS the generation adds
+    sys.path.insert(0, BACKEND_PATH)
+    from agents.project_generator import ProjectGenerator
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    generator = ProjectGenerator(os.path.dirname(plan_folder), console=False)
+    ok = generator.generate_project_from_plan(plan_folder, use_existing_folder=True, validate=False, stream=stream)
+    print(json.dumps({
+        'ok': ok,
+        'seconds': round(time.perf_counter() - start, 2),
+        'peak_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024, 1),
+        'written': len(generator.manifest.written),
+    }))
+
+def run_mode(plan_path, stream):
+    scratch = tempfile.mkdtemp(prefix='aisa_stream_')
+    try:
+        os.symlink(plan_path, os.path.join(scratch, 'project_plan.json'))
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', scratch] + (['--stream'] if stream else []),
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        with open(os.path.join(scratch, '.aisa_manifest.json'), 'r', encoding='utf-8') as f:
+            result['manifest'] = f.read()
+        return result
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory of streamed plan generation')
+    parser.add_argument('--plan-mb', type=int, nargs='+', default=[8, 32, 128], help='Plan sizes in MB')
+    parser.add_argument('--files', type=int, default=2000, help='Files per plan')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.add_argument('--child', type=str, help=argparse.SUPPRESS)
+    parser.add_argument('--stream', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        child(args.child, args.stream)
+        return 0
+    
+    results = []
+    plan_dir = tempfile.mkdtemp(prefix='aisa_plan_')
+    try:
+        for plan_mb in args.plan_mb:
+            plan_path = os.path.join(plan_dir, f"plan_{plan_mb}.json")
+            write_plan(plan_path, args.files, plan_mb * 1024 * 1024)
+            in_memory = run_mode(plan_path, False)
+            streamed = run_mode(plan_path, True)
+            result = {
+                'plan_mb': round(os.path.getsize(plan_path) / (1024 * 1024), 1),
+                'files': args.files,
+                'in_memory_peak_mb': in_memory['peak_mb'],
+                'streamed_peak_mb': streamed['peak_mb'],
+                'in_memory_seconds': in_memory['seconds'],
+                'streamed_seconds': streamed['seconds'],
+                'identical_output': in_memory['manifest'] == streamed['manifest'] and in_memory['ok'] and streamed['ok'],
+            }
+            results.append(result)
+            print(f"🧠 {result['plan_mb']:7.1f} MB plan: in memory peak +{result['in_memory_peak_mb']:7.1f} MB "
+                  f"({result['in_memory_seconds']}s), streamed peak +{result['streamed_peak_mb']:6.1f} MB "
+                  f"({result['streamed_seconds']}s){'' if result['identical_output'] else '  ❌ outputs differ'}")
+            os.remove(plan_path)
+    finally:
+        shutil.rmtree(plan_dir, ignore_errors=True)
+    
+    if args.json:
+        print(json.dumps(results, indent=4))
+    
+    # The streamed peak must not grow with the plan the way the in-memory one does
+    streamed_growth = results[-1]['streamed_peak_mb'] - results[0]['streamed_peak_mb']
+    plan_growth = results[-1]['plan_mb'] - results[0]['plan_mb']
+    allowed_growth = STREAMED_GROWTH_RATIO * plan_growth + STREAMED_GROWTH_ALLOWANCE_MB
+    bounded = len(results) < 2 or streamed_growth < allowed_growth
+    if not bounded:
+        print(f"❌ Streamed peak grew by {streamed_growth:.1f} MB while the plan grew by {plan_growth:.1f} MB "
+              f"(at most {allowed_growth:.1f} MB allowed)")
+    return 0 if bounded and all(result['identical_output'] for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
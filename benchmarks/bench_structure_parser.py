@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark the project_structure.folders tree parser against the previous implementation
+
+Synthesizes trees drawn with box-drawing prefixes ("├── "/"│   ", as stored plans
+use) and with plain 2-space indentation, then times both parsers and checks how
+many of the expected paths each one reproduces.
+
+Usage:
+    python benchmarks/bench_structure_parser.py [--entries 1000 10000 50000] [--json]
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+# Add the backend directory to the system path to import the generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from agents.structure_parser import parse_folder_tree
+
+def legacy_parse(folder_structure, root_dir_name):
+    """
+    The line-by-line parser used before the tree parser, kept for comparison
+    """
+    planned_dirs = set()
+    planned_files = set()
+    current_indent = 0
+    current_path = []
+    for line in folder_structure.split('\n'):
+        if not line.strip():
+            continue
+        clean_line = re.sub(r'[│├└─┬┼┤┴]', '', line).strip()
+        if not clean_line:
+            continue
+        indent = len(line) - len(line.lstrip())
+        indent_level = indent // 2
+        if indent_level <= current_indent:
+            levels_to_pop = current_indent - indent_level + 1
+            current_path = current_path[:-levels_to_pop] if levels_to_pop <= len(current_path) else []
+        if clean_line.startswith(f"{root_dir_name}/") or clean_line.startswith(f"{root_dir_name}\\"):
+            clean_line = clean_line[len(root_dir_name)+1:]
+        elif clean_line == root_dir_name:
+            clean_line = ""
+        if clean_line:
+            is_file = '.' in clean_line.split('/')[-1] or '.' in clean_line.split('\\')[-1]
+            name = clean_line.split('/')[-1] if '/' in clean_line else clean_line.split('\\')[-1] if '\\' in clean_line else clean_line
+            if is_file:
+                full_path = '/'.join(current_path + [name]) if current_path else name
+                planned_files.add(full_path)
+                if current_path:
+                    planned_dirs.add('/'.join(current_path))
+            else:
+                current_path.append(name)
+                planned_dirs.add('/'.join(current_path))
+        current_indent = indent_level
+    return planned_dirs, planned_files
+
+def synthesize_tree(entries, style, seed=0):
+    """
+    Build a drawn tree with about `entries` lines and the set of file paths it describes
+    """
+    rng = random.Random(seed)
+    root_name = 'bench_project'
+    lines = [f"{root_name}/"]
+    files = set()
+    counter = [0]
+    
+    def emit(prefix, path, depth):
+        children = []
+        width = rng.randint(2, 6) if depth < 4 else 0
+        for _ in range(width):
+            if counter[0] >= entries:
+                break
+            counter[0] += 1
+            if depth < 3 and rng.random() < 0.35:
+                children.append(('dir', f"pkg_{counter[0]}"))
+            else:
+                children.append(('file', f"module_{counter[0]}.py"))
+        for i, (kind, name) in enumerate(children):
+            last = i == len(children) - 1
+            if style == 'box':
+                connector = '└── ' if last else '├── '
+                child_prefix = prefix + ('    ' if last else '│   ')
+            else:
+                connector = ''
+                child_prefix = prefix + '  '
+            child_path = f"{path}/{name}" if path else name
+            lines.append(f"{prefix}{connector}{name}{'/' if kind == 'dir' else ''}")
+            if kind == 'dir':
+                emit(child_prefix, child_path, depth + 1)
+            else:
+                files.add(child_path)
+    
+    while counter[0] < entries:
+        emit('' if style == 'box' else '  ', '', 0)
+    return root_name, '\n'.join(lines), files
+
+def time_call(func, *args, repeat=5):
+    # Best of several runs, so a stray GC pause or scheduler hiccup does not decide the comparison
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the folder tree parser')
+    parser.add_argument('--entries', type=int, nargs='+', default=[1000, 10000, 50000], help='Tree sizes to benchmark')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    
+    results = []
+    for style in ('box', 'indent'):
+        for entries in args.entries:
+            root_name, text, expected_files = synthesize_tree(entries, style)
+            new_time, tree = time_call(parse_folder_tree, text, root_name)
+            legacy_time, (_, legacy_files) = time_call(legacy_parse, text, root_name)
+            new_correct = len(expected_files & set(tree['files']))
+            legacy_correct = len(expected_files & legacy_files)
+            results.append({
+                'style': style,
+                'entries': entries,
+                'files': len(expected_files),
+                'parser_ms': round(new_time * 1000, 2),
+                'parser_correct_files': new_correct,
+                'legacy_ms': round(legacy_time * 1000, 2),
+                'legacy_correct_files': legacy_correct,
+            })
+            print(f"🌳 {style:6} {entries:6} entries  parser {new_time * 1000:8.2f} ms ({new_correct}/{len(expected_files)} correct)  "
+                  f"legacy {legacy_time * 1000:8.2f} ms ({legacy_correct}/{len(expected_files)} correct)")
+    
+    if args.json:
+        print(json.dumps(results, indent=4))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark the post-generation validation pass
+
+Generates a synthetic project with the real generator, then times a cold
+validation (every file parsed in the process pool), a warm one (every verdict
+served from the content-hash cache) and a run after touching a handful of
+files. Seeded broken files check that syntax errors and bad imports are found.
+
+Usage:
+    python benchmarks/bench_validator.py [--files 500 2000] [--workers N] [--json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+# Add the backend directory to the system path to import the generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from agents.project_generator import ProjectGenerator
+from agents.project_validator import ProjectValidator, VALIDATION_FILENAME
+
+def synthesize_plan(file_count):
+    """
+    Build a project plan with file_count Python files that import each other and declared dependencies
+    """
+    root_name = 'bench_project'
+    folders = [f"{root_name}/"]
+    sections = []
+    for i in range(file_count):
+        package = f"pkg_{i % 25}"
+        path = f"{package}/module_{i}.py"
+        folders.append(f"├── {path}")
+        # Every module imports the next module of its package, which the validator must resolve
+        deps = f"os, json, requests, {package}.module_{i + 25}" if i + 25 < file_count else "os, json, requests"
+        sections.append(f"File: {root_name}/{path}\nPurpose: Handles part {i} of the workload\n"
+                        f"Key Classes/Functions: Worker{i}, process_{i}(data)\nDependencies: {deps}\nInteractions: None\n")
+    return {
+        'project_overview': {'name': 'Bench Project'},
+        'technical_requirements': {'dependencies': 'requests, beautifulsoup4'},
+        'project_structure': {'root_directory': root_name, 'folders': '\n'.join(folders)},
+        'file_breakdown': '\n'.join(sections),
+    }
+
+def time_validation(project_dir, plan, workers):
+    start = time.perf_counter()
+    report = ProjectValidator(project_dir, plan, workers).validate()
+    return time.perf_counter() - start, report
+
+def run(file_count, workers):
+    scratch = tempfile.mkdtemp(prefix='aisa_validate_')
+    try:
+        plan = synthesize_plan(file_count)
+        with open(os.path.join(scratch, 'project_plan.json'), 'w', encoding='utf-8') as f:
+            json.dump(plan, f)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            ProjectGenerator(os.path.dirname(scratch)).generate_project_from_plan(scratch, use_existing_folder=True, validate=False)
+        
+        # Seed known problems so the benchmark also checks the verdicts
+        with open(os.path.join(scratch, 'pkg_0', 'broken_syntax.py'), 'w', encoding='utf-8') as f:
+            f.write("def broken(:\n    pass\n")
+        with open(os.path.join(scratch, 'pkg_0', 'bad_imports.py'), 'w', encoding='utf-8') as f:
+            f.write("import beautifulsoup4\nimport Requests\nfrom . import missing_module\nimport module_3\n")
+        
+        cold_time, cold = time_validation(scratch, plan, workers)
+        warm_time, warm = time_validation(scratch, plan, workers)
+        
+        # Touch a few files; only those are parsed again
+        for i in range(5):
+            with open(os.path.join(scratch, f"pkg_{i}", f"module_{i}.py"), 'a', encoding='utf-8') as f:
+                f.write("\n# edited\n")
+        touched_time, touched = time_validation(scratch, plan, workers)
+        
+        bad = cold['files'].get('pkg_0/bad_imports.py', {'issues': []})
+        result = {
+            'files': cold['summary']['files'],
+            'cold_seconds': round(cold_time, 3),
+            'warm_seconds': round(warm_time, 3),
+            'touched_seconds': round(touched_time, 3),
+            'cold_parsed': cold['summary']['parsed'],
+            'warm_parsed': warm['summary']['parsed'],
+            'touched_parsed': touched['summary']['parsed'],
+            'syntax_error_found': not cold['files'].get('pkg_0/broken_syntax.py', {'ok': True})['ok'],
+            'bad_import_errors': sum(1 for issue in bad['issues'] if issue['severity'] == 'error'),
+            'cache_bytes': os.path.getsize(os.path.join(scratch, VALIDATION_FILENAME)),
+        }
+        print(f"🔎 {result['files']:5} files: cold {cold_time:6.3f}s ({result['cold_parsed']} parsed), "
+              f"warm {warm_time:6.3f}s ({result['warm_parsed']} parsed), "
+              f"5 edited {touched_time:6.3f}s ({result['touched_parsed']} parsed); "
+              f"syntax error found: {result['syntax_error_found']}, bad imports flagged: {result['bad_import_errors']}/4")
+        return result
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the project validation pass')
+    parser.add_argument('--files', type=int, nargs='+', default=[500, 2000], help='Project sizes to benchmark')
+    parser.add_argument('--workers', type=int, default=None, help='Parser processes (default: CPU count)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    
+    results = [run(file_count, args.workers) for file_count in args.files]
+    if args.json:
+        print(json.dumps(results, indent=4))
+    ok = all(result['syntax_error_found'] and result['bad_import_errors'] == 4 for result in results)
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark the plan watcher's edit-to-regenerated latency and idle cost
+
+Builds a scratch workspace of small projects, starts a PlanWatcher on it with
+inotify and with the mtime poll, rewrites plans one at a time and measures the
+time from each write to the end of the regeneration. The CPU time the watcher
+burns while nothing changes shows the cost of watching a large workspace.
+
+Usage:
+    python benchmarks/bench_watcher.py [--projects 50 1000] [--edits 10] [--json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+import statistics
+
+# Add the backend directory to the system path to import the watcher
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from agents.plan_watcher import PlanWatcher, PLAN_FILENAME
+
+def synthesize_plan(revision):
+    """
+    Build a small project plan; each revision changes one file's purpose
+    """
+    return {
+        'project_overview': {'name': 'Watched Project'},
+        'technical_requirements': {'dependencies': 'requests'},
+        'project_structure': {'root_directory': 'watched', 'folders': "watched/\n├── main.py\n├── app/\n│   └── core.py"},
+        'file_breakdown': (f"File: watched/main.py\nPurpose: Entry point, revision {revision}\n"
+                           "Key Classes/Functions: main()\nDependencies: app.core\nInteractions: None\n\n"
+                           "File: watched/app/core.py\nPurpose: Core logic\n"
+                           "Key Classes/Functions: Engine, run(data)\nDependencies: os\nInteractions: None\n"),
+    }
+
+def write_plan(folder, revision):
+    with open(os.path.join(folder, PLAN_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(synthesize_plan(revision), f)
+
+def run(project_count, edits, use_inotify, debounce):
+    workspace = tempfile.mkdtemp(prefix='aisa_watch_')
+    try:
+        folders = []
+        for i in range(project_count):
+            folder = os.path.join(workspace, f"project_{i}")
+            os.makedirs(folder)
+            write_plan(folder, 0)
+            folders.append(folder)
+        
+        done = threading.Event()
+        latencies = []
+        
+        def on_generated(folder, success, latency):
+            done.set()
+        
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            watcher = PlanWatcher([workspace], use_existing_folder=True, validate=False, workers=2,
+                                  debounce=debounce, use_inotify=use_inotify, on_generated=on_generated)
+            thread = threading.Thread(target=watcher.run, daemon=True)
+            thread.start()
+            time.sleep(0.5)
+            
+            # Idle cost: CPU time used by the whole process while nothing changes
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            time.sleep(2.0)
+            idle_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+            
+            for i in range(edits):
+                done.clear()
+                start = time.perf_counter()
+                write_plan(folders[(i * 7) % project_count], i + 1)
+                if done.wait(10):
+                    latencies.append(time.perf_counter() - start)
+            
+            watcher.stop()
+            thread.join(5)
+        
+        source = watcher.source.name
+        result = {
+            'projects': project_count,
+            'source': source,
+            'debounce_seconds': debounce,
+            'edits': edits,
+            'regenerated': len(latencies),
+            'median_latency_seconds': round(statistics.median(latencies), 3) if latencies else None,
+            'max_latency_seconds': round(max(latencies), 3) if latencies else None,
+            'idle_cpu_ms_per_second': round(idle_cpu * 1000, 2),
+        }
+        print(f"👀 {project_count:5} projects {source:10}: median {result['median_latency_seconds']}s, "
+              f"max {result['max_latency_seconds']}s after the edit ({len(latencies)}/{edits} regenerated), "
+              f"idle {result['idle_cpu_ms_per_second']} ms CPU per second")
+        return result
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the plan watcher')
+    parser.add_argument('--projects', type=int, nargs='+', default=[50, 1000], help='Workspace sizes to benchmark')
+    parser.add_argument('--edits', type=int, default=10, help='Plan edits per run')
+    parser.add_argument('--debounce', type=float, default=0.2, help='Watcher debounce in seconds')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    
+    results = []
+    for project_count in args.projects:
+        for use_inotify in (True, False):
+            results.append(run(project_count, args.edits, use_inotify, args.debounce))
+    if args.json:
+        print(json.dumps(results, indent=4))
+    return 0 if all(result['regenerated'] == result['edits'] for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
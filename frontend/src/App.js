@@ -5,10 +5,15 @@ import PlanDisplay from './components/PlanDisplay';
 import './App.css';
 
 const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5000';
+// How long to wait for a plan; the backend stops working on it once this passes
+const PLAN_DEADLINE_SECONDS = 120;
+// The file breakdown can be large; it is paged from the backend when its section is opened
+const PLAN_FIELDS = 'project_overview,technical_requirements,project_structure,implementation_strategy';
 
 function App() {
   const [prompt, setPrompt] = useState('');
   const [plan, setPlan] = useState(null);
+  const [projectId, setProjectId] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
 
@@ -24,13 +29,23 @@ function App() {
     setLoading(true);
     setError('');
     setPlan(null);
+    setProjectId(null);
 
     try {
       console.log(`📤 Sending request to: ${API_BASE_URL}/api/plan`);
       console.log(`📝 Prompt: ${prompt.substring(0, 100)}...`);
       
+      // Retries of this submission (by proxies or the browser) reuse its outcome instead of planning again
+      const idempotencyKey = window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random().toString(36).slice(2)}`;
       const response = await axios.post(`${API_BASE_URL}/api/plan`, {
         prompt: prompt.trim()
+      }, {
+        params: { fields: PLAN_FIELDS },
+        timeout: PLAN_DEADLINE_SECONDS * 1000,
+        headers: {
+          'X-Request-Deadline': String(PLAN_DEADLINE_SECONDS),
+          'Idempotency-Key': idempotencyKey
+        }
       });
 
       console.log('📥 Received response:', response);
@@ -40,6 +55,7 @@ function App() {
       if (response.data.success) {
         console.log('✅ Plan generation successful');
         console.log('📦 Plan data:', response.data.plan);
+        setProjectId(response.data.project_id || null);
         setPlan(response.data.plan);
       } else {
         console.log('❌ Plan generation failed:', response.data.error);
@@ -60,6 +76,7 @@ function App() {
 
   const handleClearPlan = () => {
     setPlan(null);
+    setProjectId(null);
     setError('');
   };
 
@@ -145,7 +162,7 @@ function App() {
         {/* Plan Display */}
         {plan && (
           <div className="max-w-6xl mx-auto">
-            <PlanDisplay plan={plan} />
+            <PlanDisplay plan={plan} projectId={projectId} apiBaseUrl={API_BASE_URL} />
           </div>
         )}
 
@@ -1,5 +1,9 @@
-import React, { useState } from 'react';
-import { ChevronDown, ChevronRight, FileText, Folder, Code, List, CheckCircle, AlertCircle } from 'lucide-react';
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
+import { ChevronDown, ChevronRight, FileText, Folder, Code, List, CheckCircle, AlertCircle, Loader2 } from 'lucide-react';
+
+// File entries fetched per page when the plan arrives without its file breakdown
+const FILE_PAGE_SIZE = 50;
 
 // Helper function to safely render content (handles both strings and objects)
 const SafeContent = ({ content }) => {
@@ -22,7 +26,7 @@ const SafeContent = ({ content }) => {
   }
 };
 
-const PlanDisplay = ({ plan }) => {
+const PlanDisplay = ({ plan, projectId, apiBaseUrl }) => {
   const [expandedSections, setExpandedSections] = useState({
     overview: true,
     technical: false,
@@ -31,6 +35,41 @@ const PlanDisplay = ({ plan }) => {
     implementation: false
   });
 
+  const [filePages, setFilePages] = useState({ entries: [], cursor: null, total: null, loading: false, error: '' });
+  const pagedFiles = plan.file_breakdown === undefined && Boolean(projectId);
+
+  const loadFilePage = async (cursor) => {
+    setFilePages(prev => ({ ...prev, loading: true, error: '' }));
+    try {
+      const response = await axios.get(`${apiBaseUrl}/api/plans/${projectId}/files`, {
+        params: { limit: FILE_PAGE_SIZE, ...(cursor ? { cursor } : {}) }
+      });
+      console.log(`📄 Loaded ${response.data.files.length} file entries of ${response.data.total}`);
+      setFilePages(prev => ({
+        entries: cursor ? [...prev.entries, ...response.data.files] : response.data.files,
+        cursor: response.data.next_cursor,
+        total: response.data.total,
+        loading: false,
+        error: ''
+      }));
+    } catch (err) {
+      console.error('❌ Error loading file entries:', err);
+      if (err.response?.status === 410) {
+        // The plan changed since the last page; start over from the first one
+        setFilePages({ entries: [], cursor: null, total: null, loading: false, error: '' });
+        return;
+      }
+      setFilePages(prev => ({ ...prev, loading: false, error: err.response?.data?.error || 'Failed to load file entries' }));
+    }
+  };
+
+  // The file breakdown is only fetched once its section is opened
+  useEffect(() => {
+    if (pagedFiles && expandedSections.files && filePages.total === null && !filePages.loading && !filePages.error) {
+      loadFilePage(null);
+    }
+  }, [pagedFiles, expandedSections.files, filePages.total, filePages.loading, filePages.error]);
+
   console.log('🎨 PlanDisplay received plan:', plan);
   console.log('📊 Plan keys:', Object.keys(plan || {}));
 
@@ -262,7 +301,86 @@ const PlanDisplay = ({ plan }) => {
     );
   };
 
+  const renderFileCard = (fileInfo, index) => (
+    <div key={index} className="border border-gray-200 rounded-lg p-4">
+      <div className="flex items-center mb-2">
+        <FileText className="h-4 w-4 text-blue-500 mr-2" />
+        <code className="font-medium text-gray-900 bg-gray-100 px-2 py-1 rounded">
+          {fileInfo.file_path || fileInfo.path || `File ${index + 1}`}
+        </code>
+      </div>
+      
+      <div className="space-y-2 ml-6">
+        {fileInfo.purpose && (
+          <p className="text-gray-700"><strong>Purpose:</strong> <SafeContent content={fileInfo.purpose} /></p>
+        )}
+        {fileInfo.functionality && (
+          <p className="text-gray-700"><strong>Functionality:</strong> <SafeContent content={fileInfo.functionality} /></p>
+        )}
+        {fileInfo.key_functions && fileInfo.key_functions !== 'None' && (
+          <p className="text-gray-700"><strong>Key Functions:</strong> <SafeContent content={fileInfo.key_functions} /></p>
+        )}
+        {fileInfo.components && Array.isArray(fileInfo.components) && fileInfo.components.length > 0 && (
+          <div>
+            <strong className="text-gray-700">Key Components:</strong>
+            <ul className="list-disc list-inside ml-4 text-gray-600">
+              {fileInfo.components.map((component, idx) => (
+                <li key={idx}>{component}</li>
+              ))}
+            </ul>
+          </div>
+        )}
+        {fileInfo.dependencies && (
+          <div>
+            <strong className="text-gray-700">Dependencies:</strong>
+            {Array.isArray(fileInfo.dependencies) ? (
+              <ul className="list-disc list-inside ml-4 text-gray-600">
+                {fileInfo.dependencies.map((dep, idx) => (
+                  <li key={idx}><code className="text-sm bg-gray-100 px-1 rounded">{dep}</code></li>
+                ))}
+              </ul>
+            ) : (
+              <span className="ml-2 text-gray-600">{fileInfo.dependencies}</span>
+            )}
+          </div>
+        )}
+        {fileInfo.interactions && (
+          <p className="text-gray-700"><strong>Interactions:</strong> <SafeContent content={fileInfo.interactions} /></p>
+        )}
+      </div>
+    </div>
+  );
+
+  const renderPagedFiles = () => (
+    <div className="space-y-4">
+      {filePages.entries.map(renderFileCard)}
+      
+      {filePages.error && (
+        <p className="text-red-600 text-sm">{filePages.error}</p>
+      )}
+      
+      {filePages.total === 0 && (
+        <p className="text-gray-500 italic">No file breakdown available</p>
+      )}
+      
+      {(filePages.cursor || filePages.loading) && (
+        <button
+          onClick={() => loadFilePage(filePages.cursor)}
+          disabled={filePages.loading}
+          className="px-4 py-2 border border-gray-300 rounded-lg text-gray-700 hover:bg-gray-50 disabled:opacity-50 flex items-center"
+        >
+          {filePages.loading && <Loader2 className="animate-spin h-4 w-4 mr-2" />}
+          {filePages.loading ? 'Loading files...' : `Load more files (${filePages.entries.length} of ${filePages.total})`}
+        </button>
+      )}
+    </div>
+  );
+
   const renderFileBreakdown = () => {
+    if (pagedFiles) {
+      return renderPagedFiles();
+    }
+    
     const files = plan.file_breakdown || '';
     
     // Handle the new string format for file_breakdown
@@ -304,52 +422,7 @@ const PlanDisplay = ({ plan }) => {
     
     return (
       <div className="space-y-4">
-        {fileList.map((fileInfo, index) => (
-          <div key={index} className="border border-gray-200 rounded-lg p-4">
-            <div className="flex items-center mb-2">
-              <FileText className="h-4 w-4 text-blue-500 mr-2" />
-              <code className="font-medium text-gray-900 bg-gray-100 px-2 py-1 rounded">
-                {fileInfo.file_path || fileInfo.path || `File ${index + 1}`}
-              </code>
-            </div>
-            
-            <div className="space-y-2 ml-6">
-              {fileInfo.purpose && (
-                <p className="text-gray-700"><strong>Purpose:</strong> <SafeContent content={fileInfo.purpose} /></p>
-              )}
-              {fileInfo.functionality && (
-                <p className="text-gray-700"><strong>Functionality:</strong> <SafeContent content={fileInfo.functionality} /></p>
-              )}
-              {fileInfo.components && Array.isArray(fileInfo.components) && fileInfo.components.length > 0 && (
-                <div>
-                  <strong className="text-gray-700">Key Components:</strong>
-                  <ul className="list-disc list-inside ml-4 text-gray-600">
-                    {fileInfo.components.map((component, idx) => (
-                      <li key={idx}>{component}</li>
-                    ))}
-                  </ul>
-                </div>
-              )}
-              {fileInfo.dependencies && (
-                <div>
-                  <strong className="text-gray-700">Dependencies:</strong>
-                  {Array.isArray(fileInfo.dependencies) ? (
-                    <ul className="list-disc list-inside ml-4 text-gray-600">
-                      {fileInfo.dependencies.map((dep, idx) => (
-                        <li key={idx}><code className="text-sm bg-gray-100 px-1 rounded">{dep}</code></li>
-                      ))}
-                    </ul>
-                  ) : (
-                    <span className="ml-2 text-gray-600">{fileInfo.dependencies}</span>
-                  )}
-                </div>
-              )}
-              {fileInfo.interactions && (
-                <p className="text-gray-700"><strong>Interactions:</strong> <SafeContent content={fileInfo.interactions} /></p>
-              )}
-            </div>
-          </div>
-        ))}
+        {fileList.map(renderFileCard)}
         
         {fileList.length === 0 && (
           <p className="text-gray-500 italic">No file breakdown available</p>
@@ -1,44 +1,162 @@
 import sys
 import os
+import glob
 import argparse
 
 # Add the backend directory to the system path to import the generator
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
 
 from agents.project_generator import generate_project
+from agents.batch_generator import find_plan_folders, generate_batch
+from agents.plan_watcher import watch
+from agents.blob_store import BlobStore, BLOB_DIRNAME, DEDUP_MODES, detach_files, print_dedup_report
+from agents.storage import LocalStorage
+from services.retention import RetentionPolicy, WorkspaceGC, record_access, print_gc_report
 
 def main():
     """
-    Generate a project structure from a saved project plan
+    Generate project structures from saved project plans
+    
+    A single plan folder is generated in this process with its output shown as it
+    runs. Several folders, glob patterns or a workspace root are generated in
+    batch mode across a process pool, with a progress line per project and a
+    summary report at the end. With --watch, the targets are watched and projects
+    are regenerated whenever their plan is created or edited.
     """
-    parser = argparse.ArgumentParser(description='Generate a project structure from a saved project plan')
-    parser.add_argument('project_dir', type=str, help='Path to the directory containing the project_plan.json file')
+    parser = argparse.ArgumentParser(description='Generate project structures from saved project plans')
+    parser.add_argument('project_dirs', type=str, nargs='+',
+                        help='Folders containing a project_plan.json file, glob patterns, or a workspace root')
     parser.add_argument('--use-existing-folder', '-e', action='store_true', 
                         help='Use the existing folder as the project root instead of creating a subdirectory')
+    parser.add_argument('--force', '-f', action='store_true',
+                        help='Rewrite every file, including unchanged and hand-edited ones')
+    parser.add_argument('--workers', '-j', type=int, default=1,
+                        help='Number of threads rendering and writing files (default: 1, serial)')
+    parser.add_argument('--no-validate', action='store_true',
+                        help='Skip the syntax and import check of the generated Python files')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read the plan incrementally with bounded memory (automatic for plans of 32 MB or more)')
+    parser.add_argument('--processes', '-p', type=int, default=None,
+                        help='Projects generated in parallel in batch mode (default: CPU count) or watch mode (default: 2)')
+    parser.add_argument('--report', type=str, default=None,
+                        help='Write the JSON report of a batch run to this file (default: no report file)')
+    parser.add_argument('--watch', '-w', action='store_true',
+                        help='Keep running and regenerate projects whenever their plan is created or edited')
+    parser.add_argument('--debounce', type=float, default=0.2,
+                        help='Seconds without further edits before a watched project is regenerated (default: 0.2)')
+    parser.add_argument('--poll', action='store_true',
+                        help='Poll plan modification times instead of using inotify in watch mode')
+    parser.add_argument('--dedup', nargs='?', const='auto', choices=DEDUP_MODES, default=None,
+                        help='Share identical files across projects through a content-addressed blob store '
+                             'in the workspace, using reflinks where supported, else plain copies (default mode: '
+                             'auto); hardlink shares read-only files, see --detach')
+    parser.add_argument('--detach', action='store_true',
+                        help='Give the hardlinked files of each given file or folder a private, writable copy '
+                             'so they can be edited, and exit')
+    parser.add_argument('--dedup-stats', action='store_true',
+                        help='Report the disk usage saved by the blob store of each given workspace and exit')
+    parser.add_argument('--migrate-storage', action='store_true',
+                        help='Move the projects of each given workspace from the flat layout into hash-prefix shard '
+                             'folders and exit')
+    parser.add_argument('--gc', action='store_true',
+                        help='Evict least recently used projects from each given workspace until it is within the '
+                             'quotas set by AISA_WORKSPACE_MAX_MB, AISA_WORKSPACE_MAX_PROJECTS and '
+                             'AISA_WORKSPACE_MAX_AGE_DAYS, and exit')
+    parser.add_argument('--cold-store', type=str, default=os.environ.get('AISA_COLD_STORE'),
+                        help='With --gc, archive evicted projects as tar.gz to this folder (default: $AISA_COLD_STORE)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='With --gc, only report what would be evicted')
     
     args = parser.parse_args()
-    project_dir = args.project_dir
     use_existing_folder = args.use_existing_folder
+    force = args.force
+    workers = args.workers
+    validate = not args.no_validate
+    dedup = args.dedup
     
-    # Check if the directory exists
-    if not os.path.isdir(project_dir):
-        print(f"❌ Directory not found: {project_dir}")
-        return 1
+    if args.detach:
+        missing = [path for path in args.project_dirs if not os.path.exists(path)]
+        if missing:
+            print(f"❌ Not found: {', '.join(missing)}")
+            return 1
+        print(f"✂️ Detached {detach_files(args.project_dirs)} file(s) from the blob store")
+        return 0
     
-    # Check if the project_plan.json file exists
-    plan_file_path = os.path.join(project_dir, 'project_plan.json')
-    if not os.path.isfile(plan_file_path):
-        print(f"❌ Project plan not found: {plan_file_path}")
-        return 1
+    if args.dedup_stats:
+        for workspace in args.project_dirs:
+            if not os.path.isdir(workspace):
+                print(f"❌ Directory not found: {workspace}")
+                return 1
+            if not os.path.isdir(os.path.join(workspace, BLOB_DIRNAME)):
+                print(f"⚠️ No blob store in: {workspace}")
+                continue
+            print_dedup_report(BlobStore(workspace, dedup or 'auto').stats(verify=True))
+        return 0
+    
+    if args.migrate_storage:
+        for workspace in args.project_dirs:
+            if not os.path.isdir(workspace):
+                print(f"❌ Directory not found: {workspace}")
+                return 1
+            storage = LocalStorage(workspace)
+            moved = storage.migrate()
+            print(f"🗂️ Moved {len(moved)} project(s) of {workspace} into {16 ** storage.shard_chars} shards")
+        return 0
+    
+    if args.gc:
+        policy = RetentionPolicy.from_env()
+        if not policy.enabled:
+            print("⚠️ No retention quota is set; nothing to collect")
+            return 0
+        for workspace in args.project_dirs:
+            if not os.path.isdir(workspace):
+                print(f"❌ Directory not found: {workspace}")
+                return 1
+            print(f"🧹 Collecting workspace: {workspace}")
+            print_gc_report(WorkspaceGC(workspace, policy, args.cold_store).collect(args.dry_run))
+        return 0
     
-    # Generate the project
-    print(f"🏗️ Generating project structure from plan...")
-    if generate_project(project_dir, use_existing_folder):
-        print(f"✅ Project structure successfully generated")
+    if args.watch:
+        missing = [target for target in args.project_dirs if not os.path.isdir(target)]
+        if missing:
+            print(f"❌ Directory not found: {', '.join(missing)}")
+            return 1
+        watch(args.project_dirs, use_existing_folder, validate, args.processes or 2, args.debounce, not args.poll, dedup)
         return 0
-    else:
-        print(f"❌ Failed to generate project structure")
+    
+    if len(args.project_dirs) == 1 and not glob.has_magic(args.project_dirs[0]):
+        project_dir = args.project_dirs[0]
+        
+        # Check if the directory exists
+        if not os.path.isdir(project_dir):
+            print(f"❌ Directory not found: {project_dir}")
+            return 1
+        
+        # A folder with a plan is a single project; one without is a workspace root
+        plan_file_path = os.path.join(project_dir, 'project_plan.json')
+        if os.path.isfile(plan_file_path):
+            # Generate the project
+            print(f"🏗️ Generating project structure from plan...")
+            ok = generate_project(project_dir, use_existing_folder, force, workers, validate, args.stream or None, dedup)
+            record_access([project_dir], 'generate', measure=True)
+            if ok:
+                print(f"✅ Project structure successfully generated")
+                return 0
+            else:
+                print(f"❌ Failed to generate project structure")
+                return 1
+    
+    plan_folders, unmatched = find_plan_folders(args.project_dirs)
+    for target in unmatched:
+        print(f"⚠️ No project plan found for: {target}")
+    if not plan_folders:
+        print(f"❌ Project plan not found in: {', '.join(args.project_dirs)}")
         return 1
+    
+    report = generate_batch(plan_folders, use_existing_folder, force, workers, validate, args.processes, args.report, dedup,
+                            args.stream or None)
+    record_access(plan_folders, 'generate', measure=True)
+    return 1 if report['summary']['failed'] or unmatched else 0
 
 if __name__ == '__main__':
     sys.exit(main())
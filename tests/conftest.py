@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Add the backend directory to the system path to import the agents and services
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
@@ -0,0 +1,183 @@
+import threading
+import time
+
+import pytest
+
+from services.admission import AdmissionController, Overloaded
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def queue_depth(controller):
+    return controller.snapshot()['queue_depth']
+
+
+class Waiter(threading.Thread):
+    # Acquires a slot in the background and records the outcome
+    
+    def __init__(self, controller, client, max_wait=None, admitted=None):
+        super().__init__(daemon=True)
+        self.controller = controller
+        self.client = client
+        self.max_wait = max_wait
+        self.admitted = admitted
+        self.error = None
+        self.waited = None
+    
+    def run(self):
+        try:
+            self.waited = self.controller.acquire(self.client, self.max_wait)
+        except Overloaded as e:
+            self.error = e
+            return
+        if self.admitted is not None:
+            self.admitted.append(self.client)
+        self.controller.release(self.client)
+
+
+def test_free_slot_admits_immediately():
+    controller = AdmissionController('test', max_concurrent=2)
+    assert controller.acquire('a') == 0.0
+    assert controller.acquire('b') == 0.0
+    assert controller.snapshot()['in_flight'] == 2
+    controller.release('a', service_seconds=1.0)
+    controller.release('b', failed=True)
+    snapshot = controller.snapshot()
+    assert (snapshot['in_flight'], snapshot['admitted'], snapshot['completed'], snapshot['failed']) == (0, 2, 1, 1)
+    assert snapshot['avg_service_seconds'] == 1.0 and snapshot['clients'] == 0
+
+
+def test_queue_full():
+    controller = AdmissionController('test', max_concurrent=1, max_queue=0)
+    controller.acquire('a')
+    with pytest.raises(Overloaded) as excinfo:
+        controller.acquire('b')
+    assert excinfo.value.reason == 'queue_full' and excinfo.value.status == 503
+    assert excinfo.value.retry_after >= 1
+    snapshot = controller.snapshot()
+    assert snapshot['shed'] == {'queue_full': 1, 'wait_estimate': 0, 'queue_timeout': 0, 'client_limit': 0}
+    assert snapshot['shed_total'] == 1 and snapshot['clients'] == 1
+
+
+def test_wait_estimate():
+    controller = AdmissionController('test', max_concurrent=1, max_queue=4, max_wait_seconds=5)
+    controller.acquire('a')
+    controller.release('a', service_seconds=10.0)
+    controller.acquire('a')
+    with pytest.raises(Overloaded) as excinfo:
+        controller.acquire('b')
+    assert excinfo.value.reason == 'wait_estimate' and excinfo.value.status == 503
+    assert excinfo.value.retry_after == 10
+    assert controller.snapshot()['shed']['wait_estimate'] == 1
+    assert queue_depth(controller) == 0
+
+
+def test_client_limit_is_a_429():
+    controller = AdmissionController('test', max_concurrent=1, max_queue=4, per_client=1)
+    controller.acquire('a')
+    with pytest.raises(Overloaded) as excinfo:
+        controller.acquire('a')
+    assert excinfo.value.reason == 'client_limit' and excinfo.value.status == 429
+    assert controller.snapshot()['shed']['client_limit'] == 1
+    
+    # A queued request counts against its client too
+    waiter = Waiter(controller, 'b')
+    waiter.start()
+    wait_until(lambda: queue_depth(controller) == 1)
+    with pytest.raises(Overloaded) as excinfo:
+        controller.acquire('b')
+    assert excinfo.value.reason == 'client_limit'
+    controller.release('a')
+    waiter.join(2)
+    assert waiter.error is None
+    assert controller.snapshot()['shed']['client_limit'] == 2
+
+
+def test_no_client_cap():
+    controller = AdmissionController('test', max_concurrent=3, per_client=None)
+    for _ in range(3):
+        controller.acquire('a')
+    assert controller.snapshot()['in_flight'] == 3
+
+
+def test_queue_timeout():
+    controller = AdmissionController('test', max_concurrent=1, max_queue=4, max_wait_seconds=0.1)
+    controller.acquire('a')
+    started = time.monotonic()
+    with pytest.raises(Overloaded) as excinfo:
+        controller.acquire('b')
+    assert time.monotonic() - started >= 0.1
+    assert excinfo.value.reason == 'queue_timeout' and excinfo.value.status == 503
+    snapshot = controller.snapshot()
+    assert snapshot['shed']['queue_timeout'] == 1
+    assert (snapshot['queue_depth'], snapshot['clients'], snapshot['in_flight']) == (0, 1, 1)
+
+
+def test_timed_out_request_frees_its_place_in_the_queue():
+    controller = AdmissionController('test', max_concurrent=1, max_queue=4, per_client=1)
+    controller.acquire('a')
+    admitted = []
+    impatient = Waiter(controller, 'b', max_wait=0.1, admitted=admitted)
+    impatient.start()
+    wait_until(lambda: queue_depth(controller) == 1)
+    patient = Waiter(controller, 'c', admitted=admitted)
+    patient.start()
+    wait_until(lambda: queue_depth(controller) == 2)
+    
+    impatient.join(2)
+    assert impatient.error is not None and impatient.error.reason == 'queue_timeout'
+    assert queue_depth(controller) == 1
+    
+    # The client of the timed-out request may queue again
+    retry = Waiter(controller, 'b', admitted=admitted)
+    retry.start()
+    wait_until(lambda: queue_depth(controller) == 2)
+    
+    controller.release('a')
+    patient.join(2)
+    retry.join(2)
+    assert patient.error is None and retry.error is None
+    assert admitted == ['c', 'b']
+    snapshot = controller.snapshot()
+    assert (snapshot['in_flight'], snapshot['queue_depth'], snapshot['clients']) == (0, 0, 0)
+
+
+def test_fifo_order():
+    controller = AdmissionController('test', max_concurrent=1, max_queue=8)
+    controller.acquire('holder')
+    admitted = []
+    waiters = []
+    for i in range(5):
+        waiter = Waiter(controller, f"client{i}", admitted=admitted)
+        waiter.start()
+        wait_until(lambda: queue_depth(controller) == i + 1)
+        waiters.append(waiter)
+    controller.release('holder')
+    for waiter in waiters:
+        waiter.join(2)
+        assert waiter.error is None and waiter.waited > 0
+    assert admitted == [f"client{i}" for i in range(5)]
+    assert controller.snapshot()['admitted'] == 6
+
+
+def test_admit_releases_on_error():
+    controller = AdmissionController('test', max_concurrent=1)
+    with pytest.raises(RuntimeError):
+        with controller.admit('a'):
+            raise RuntimeError('boom')
+    snapshot = controller.snapshot()
+    assert (snapshot['in_flight'], snapshot['failed'], snapshot['clients']) == (0, 1, 0)
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv('TEST_CONCURRENCY', '3')
+    monkeypatch.setenv('TEST_QUEUE', '0')
+    monkeypatch.setenv('TEST_MAX_WAIT_SECONDS', '2.5')
+    monkeypatch.setenv('TEST_PER_CLIENT', '0')
+    controller = AdmissionController.from_env('test', 'TEST')
+    assert (controller.max_concurrent, controller.max_queue, controller.max_wait_seconds, controller.per_client) == (3, 0, 2.5, None)
@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+import subprocess
+
+from agents import batch_generator
+from agents.project_generator import ProjectGenerator
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'generate_project.py')
+
+PLAN = {
+    'project_overview': {'name': 'Demo'},
+    'project_structure': {'root_directory': 'demo', 'folders': "demo/\n├── main.py\n└── README.md"},
+    'file_breakdown': "File: demo/main.py\nPurpose: Entry point\nKey Functions: main()\nDependencies: None\nInteractions: None\n",
+}
+
+
+def make_workspace(tmp_path, names=('One', 'Two')):
+    folders = []
+    for name in names:
+        folder = tmp_path / 'Workspace' / name
+        folder.mkdir(parents=True)
+        (folder / 'project_plan.json').write_text(json.dumps(PLAN), encoding='utf-8')
+        folders.append(str(folder))
+    return folders
+
+
+def test_batch_writes_no_report_unless_asked(tmp_path, monkeypatch):
+    folders = make_workspace(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    report = batch_generator.generate_batch(folders, use_existing_folder=True, processes=1)
+    assert report['summary']['succeeded'] == 2
+    assert sorted(os.listdir(tmp_path)) == ['Workspace']
+    
+    report_path = tmp_path / 'report.json'
+    batch_generator.generate_batch(folders, use_existing_folder=True, processes=1, report_path=str(report_path))
+    with open(report_path, 'r', encoding='utf-8') as f:
+        assert json.load(f)['summary']['projects'] == 2
+
+
+def test_batch_passes_stream_to_every_project(tmp_path, monkeypatch):
+    folders = make_workspace(tmp_path)
+    streams = []
+    generate = ProjectGenerator.generate_project_from_plan
+    
+    def spy(self, plan_folder, use_existing_folder=False, force=False, workers=1, validate=True, stream=None, deadline=None):
+        streams.append(stream)
+        return generate(self, plan_folder, use_existing_folder, force, workers, validate, stream, deadline)
+    
+    monkeypatch.setattr(ProjectGenerator, 'generate_project_from_plan', spy)
+    report = batch_generator.generate_batch(folders, use_existing_folder=True, processes=1, stream=True)
+    assert report['summary']['succeeded'] == 2
+    assert streams == [True, True]
+    assert os.path.isfile(os.path.join(folders[0], 'main.py'))
+
+
+def test_cli_batch_leaves_the_current_directory_alone(tmp_path):
+    make_workspace(tmp_path)
+    run = subprocess.run([sys.executable, CLI, str(tmp_path / 'Workspace'), '-e', '-p', '1', '--stream'],
+                         cwd=tmp_path, capture_output=True, text=True)
+    assert run.returncode == 0, run.stdout + run.stderr
+    assert sorted(os.listdir(tmp_path)) == ['Workspace']
@@ -0,0 +1,86 @@
+import os
+import stat
+import hashlib
+
+from agents import blob_store
+from agents.blob_store import BlobStore, detach_files
+from agents.file_writer import write_text
+
+
+def make_projects(tmp_path, store, content="print('hello')\n"):
+    paths = []
+    for name in ('one', 'two'):
+        os.makedirs(tmp_path / name)
+        path = str(tmp_path / name / 'main.py')
+        store.write_text(path, content)
+        paths.append(path)
+    return paths
+
+
+def test_hardlinked_files_share_a_read_only_blob(tmp_path):
+    store = BlobStore(str(tmp_path), 'hardlink')
+    one, two = make_projects(tmp_path, store)
+    assert os.stat(one).st_ino == os.stat(two).st_ino
+    assert not os.stat(one).st_mode & stat.S_IWUSR
+
+
+def test_detach_gives_a_private_writable_copy(tmp_path):
+    store = BlobStore(str(tmp_path), 'hardlink')
+    one, two = make_projects(tmp_path, store)
+    
+    assert detach_files([str(tmp_path / 'one')]) == 1
+    assert os.stat(one).st_nlink == 1
+    assert os.stat(one).st_mode & stat.S_IWUSR
+    with open(one, 'a', encoding='utf-8') as f:
+        f.write("# edited\n")
+    
+    with open(two, 'r', encoding='utf-8') as f:
+        assert f.read() == "print('hello')\n"
+    assert not store.stats(verify=True)['corrupt_blobs']
+    assert not BlobStore.detach(one)
+
+
+def test_auto_writes_plain_copies_without_reflinks(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, '_reflink_supported', lambda directory: False)
+    store = BlobStore(str(tmp_path), 'auto')
+    one, two = make_projects(tmp_path, store)
+    assert store.mode == 'copy'
+    assert os.stat(one).st_ino != os.stat(two).st_ino
+    assert os.stat(one).st_mode & stat.S_IWUSR
+    assert store.stats()['blobs'] == 0
+
+
+def test_rewriting_a_file_left_read_only_by_a_pruned_blob(tmp_path):
+    store = BlobStore(str(tmp_path), 'hardlink')
+    one, two = make_projects(tmp_path, store)
+    os.remove(two)
+    os.remove(store.blob_path(hashlib.sha256(b"print('hello')\n").hexdigest()))
+    
+    write_text(one, "print('changed')\n")
+    assert os.stat(one).st_mode & stat.S_IWUSR
+    with open(one, 'r', encoding='utf-8') as f:
+        assert f.read() == "print('changed')\n"
+
+
+def test_stats_leave_out_the_empty_placeholder_blob(tmp_path):
+    store = BlobStore(str(tmp_path), 'hardlink')
+    os.makedirs(tmp_path / 'one')
+    path = str(tmp_path / 'one' / 'main.py')
+    # The generator creates every planned file empty before writing its content
+    store.write_text(path, "")
+    store.write_text(path, "print('hello')\n")
+    
+    stats = store.stats()
+    assert stats['blobs'] == 1
+    assert stats['unreferenced_blobs'] == 0
+    assert stats['saved_inodes'] == 0
+
+
+def test_stats_count_empty_files_linked_to_the_empty_blob(tmp_path):
+    store = BlobStore(str(tmp_path), 'hardlink')
+    make_projects(tmp_path, store, content="")
+    
+    stats = store.stats()
+    assert stats['blobs'] == 0
+    assert stats['linked_files'] == 2
+    assert stats['saved_inodes'] == 1
@@ -0,0 +1,157 @@
+import ast
+import random
+
+import pytest
+
+from agents.breakdown_lexer import match_header, parse_file_breakdown, resolve_record_path, split_key_items
+from agents.project_generator import ProjectGenerator
+
+
+FIELDS = "Purpose: Runs the game\nKey Functions: main()\nDependencies: os\nInteractions: None\n"
+
+
+@pytest.mark.parametrize('header, expected', [
+    ("src/main.py", "src/main.py"),
+    ("src/main.py:", "src/main.py"),
+    ("File: src/main.py", "src/main.py"),
+    ("Path: **src/main.py**", "src/main.py"),
+    ("1. src/main.py", "src/main.py"),
+    ("12) `src/main.py`:", "src/main.py"),
+    ("**src/main.py**:", "src/main.py"),
+    ("`src/main.py`", "src/main.py"),
+    ("### src/main.py", "src/main.py"),
+    ("## 3. **src/main.py**", "src/main.py"),
+    ("game/main.py", "main.py"),
+    ("File: game/src/main.py", "src/main.py"),
+    ("src\\utils\\helpers.py", "src/utils/helpers.py"),
+    ("2. `game\\src\\main.py`:", "src/main.py"),
+    ("__init__.py", "__init__.py"),
+    ("**game/__init__.py**", "__init__.py"),
+    ("_src/main.py_", "src/main.py"),
+    ("Dockerfile", None),
+])
+def test_header_variants(header, expected):
+    records = parse_file_breakdown(f"{header}\n{FIELDS}")
+    if expected is None:
+        assert not records or resolve_record_path(records[0], 'game')[0] is None
+        return
+    assert len(records) == 1
+    assert resolve_record_path(records[0], 'game') == (expected, None)
+    assert records[0]['purpose'] == "Runs the game"
+    assert records[0]['key_funcs'] == "main()"
+
+
+@pytest.mark.parametrize('line', [
+    "- src/main.py",
+    "* Purpose: src/main.py",
+    "Handles the src/main.py entry point",
+    "1.",
+    "# Project files",
+])
+def test_lines_that_are_not_headers(line):
+    assert match_header(line) is None
+    assert not parse_file_breakdown(line)
+
+
+def test_star_bullets_and_multi_line_values():
+    records = parse_file_breakdown(
+        "Overview of the files:\n\n"
+        "game/main.py\n"
+        "    * Primary purpose: Entry point\n"
+        "    * Key components:\n"
+        "        - Game class (play, stop)\n"
+        "        - main()\n"
+        "    * Dependencies: game.engine\n\n"
+        "utils.py\n"
+        "  - Purpose: Helpers kept in the helpers directory\n"
+    )
+    assert [record['raw_path'] for record in records] == ['game/main.py', 'utils.py']
+    assert records[0]['key_funcs'] == "Game class (play, stop), main()"
+    assert split_key_items(records[0]['key_funcs']) == [('Game', '', ['play', 'stop']), ('main', '', [])]
+    assert records[0]['interactions'] == "None"
+    assert resolve_record_path(records[1], 'game') == ('helpers/utils.py', None)
+
+
+def test_pathological_slash_runs():
+    # The regex the lexer replaced backtracked exponentially on these
+    records = parse_file_breakdown("a/" * 100_000 + "b")
+    assert len(records) == 1
+    assert resolve_record_path(records[0], 'game') == (None, "not a file")
+
+
+FUZZ_TOKENS = [
+    'File:', 'src/', 'main.py', '__init__.py', '*', '-', '•', ':', 'Purpose:', 'Key Components:',
+    'Dependencies:', 'Interactions:', 'in the', 'directory', '`', '**', '#', '1.', '\\', '/', '.', ' ',
+    '    ', 'a' * 50, '/' * 20, 'x/' * 30, '├──', '│', 'é', '\t', 'None', '(', ')', ',', 'class',
+]
+
+
+def test_fuzzed_breakdowns_give_consistent_records():
+    rng = random.Random(0)
+    for _ in range(500):
+        text = '\n'.join(''.join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, 12)))
+                         for _ in range(rng.randint(1, 40)))
+        position = 0
+        for record in parse_file_breakdown(text):
+            # Every record comes from the input, in order, with all fields filled
+            first_line = record['section'].split('\n', 1)[0]
+            found = text.find(first_line, position)
+            assert found >= 0, text
+            assert all(record[key] for key in ('purpose', 'key_funcs', 'deps', 'interactions'))
+            position = found
+            resolve_record_path(record, 'src')
+            for name, params, methods in split_key_items(record['key_funcs']):
+                assert name.isidentifier() and all(method.isidentifier() for method in methods)
+
+
+def test_class_with_method_list():
+    items = split_key_items("TypingTest class (start_test, process_input, calculate_results).")
+    assert items == [('TypingTest', '', ['start_test', 'process_input', 'calculate_results'])]
+
+
+def test_commas_inside_parentheses_do_not_split_items():
+    items = split_key_items("NumberGuesser class (generate_number, check_guess), draw(x, y), main()")
+    assert items == [
+        ('NumberGuesser', '', ['generate_number', 'check_guess']),
+        ('draw', 'x, y', []),
+        ('main', '', []),
+    ]
+
+
+def test_function_description_is_not_a_parameter_list():
+    assert split_key_items("generate_text function (returns a string of random words).") == [('generate_text', '', [])]
+
+
+def test_unclosed_method_list_and_prose_items():
+    assert split_key_items("Streamlit UI elements (text input, display text)") == []
+    assert split_key_items("NumberGuesser class (generate_number, check_guess") == [
+        ('NumberGuesser', '', ['generate_number', 'check_guess'])]
+    assert split_key_items("None") == []
+
+
+def test_class_methods_are_rendered_inside_the_class():
+    plan = {
+        'project_structure': {'root_directory': 'typing_speed_test',
+                              'folders': "typing_speed_test/\n├── core/\n│   ├── typing_test.py\n│   └── text_generator.py"},
+        'file_breakdown': (
+            "File: typing_speed_test/core/typing_test.py\n"
+            "Purpose: Runs the typing test.\n"
+            "Key Components: TypingTest class (start_test, process_input, calculate_results).\n"
+            "Dependencies: time, text_generator\n"
+            "Interactions: Uses text_generator to get the text to type.\n\n"
+            "File: typing_speed_test/core/text_generator.py\n"
+            "Purpose: Generates random text.\n"
+            "Key Components: generate_text function (returns a string of random words).\n"
+            "Dependencies: random\n"
+            "Interactions: None\n"
+        ),
+    }
+    files = dict(ProjectGenerator('.', console=False).iter_rendered_files(plan))
+    
+    tree = ast.parse(files['core/typing_test.py'])
+    assert [node.name for node in tree.body if isinstance(node, (ast.ClassDef, ast.FunctionDef))] == ['TypingTest']
+    methods = [node.name for node in tree.body[-1].body if isinstance(node, ast.FunctionDef)]
+    assert methods == ['__init__', 'start_test', 'process_input', 'calculate_results']
+    
+    # Files importing the module only see its public top-level names
+    assert "Uses: core.text_generator (generate_text)" in files['core/typing_test.py']
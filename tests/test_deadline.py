@@ -0,0 +1,34 @@
+import json
+
+from agents.deadline import Deadline, DEFAULT_DEADLINE_SECONDS, DEFAULT_STREAM_DEADLINE_SECONDS, stream_deadline_seconds
+from agents.project_generator import iter_generation_events
+
+PLAN = {
+    'project_overview': {'name': 'Demo'},
+    'project_structure': {'root_directory': 'demo', 'folders': "demo/\n├── core/\n│   └── game.py\n└── main.py"},
+    'file_breakdown': "File: demo/main.py\nPurpose: Entry point\nKey Functions: main()\nDependencies: None\nInteractions: None\n",
+}
+
+
+def test_streams_have_their_own_configurable_deadline(monkeypatch):
+    monkeypatch.delenv('AISA_GENERATE_DEADLINE_SECONDS', raising=False)
+    monkeypatch.setenv('AISA_REQUEST_DEADLINE_SECONDS', '5')
+    assert stream_deadline_seconds() == DEFAULT_STREAM_DEADLINE_SECONDS > DEFAULT_DEADLINE_SECONDS
+    assert Deadline.from_header(None, stream_deadline_seconds()).remaining() > 5
+    
+    monkeypatch.setenv('AISA_GENERATE_DEADLINE_SECONDS', '30')
+    assert 29 < Deadline.from_header(None, stream_deadline_seconds()).remaining() <= 30
+    assert Deadline.from_header('10', stream_deadline_seconds()).remaining() <= 10
+    assert 29 < Deadline.from_header('3600', stream_deadline_seconds()).remaining() <= 30
+
+
+def test_a_disconnected_client_cancels_the_stream(tmp_path):
+    project_dir = tmp_path / 'Demo'
+    project_dir.mkdir()
+    (project_dir / 'project_plan.json').write_text(json.dumps(PLAN), encoding='utf-8')
+    
+    deadline = Deadline(probe=lambda: True)
+    kinds = [event.kind for event in iter_generation_events(str(project_dir), True, deadline=deadline)]
+    assert deadline.reason == 'disconnected'
+    assert 'generation_cancelled' in kinds
+    assert kinds[-1] == 'generation_finished'
@@ -0,0 +1,117 @@
+from agents.dependency_graph import DependencyGraph, module_interface, module_name
+
+
+def record(deps='None', interactions='None'):
+    return {'deps': deps, 'interactions': interactions}
+
+
+def test_chain():
+    graph = DependencyGraph.from_records({
+        'main.py': record('game'),
+        'game.py': record('board'),
+        'board.py': record(),
+    })
+    assert graph.dependencies == {'main.py': {'game.py'}, 'game.py': {'board.py'}, 'board.py': set()}
+    assert graph.levels() == {'board.py': 0, 'game.py': 1, 'main.py': 2}
+    assert graph.waves() == [['board.py'], ['game.py'], ['main.py']]
+    assert graph.critical_path() == ['board.py', 'game.py', 'main.py']
+    assert graph.cycles() == []
+    assert graph.edge_count() == 2
+
+
+def test_diamond():
+    graph = DependencyGraph.from_records({
+        'main.py': record('left, right'),
+        'left.py': record('base'),
+        'right.py': record('from base import Shape'),
+        'base.py': record(),
+    })
+    assert graph.waves() == [['base.py'], ['left.py', 'right.py'], ['main.py']]
+    assert graph.imports['main.py'] == {'left': 'left.py', 'right': 'right.py'}
+    assert graph.imports['right.py'] == {'base': 'base.py'}
+    assert graph.edge_count() == 4
+    path = graph.critical_path()
+    assert path[0] == 'base.py' and path[-1] == 'main.py' and len(path) == 3
+
+
+def test_two_cycle_is_one_unit():
+    graph = DependencyGraph.from_records({
+        'main.py': record('player'),
+        'player.py': record('enemy'),
+        'enemy.py': record('player'),
+    })
+    assert graph.cycles() == [['enemy.py', 'player.py']]
+    assert graph.levels() == {'enemy.py': 0, 'player.py': 0, 'main.py': 1}
+    assert graph.waves() == [['player.py', 'enemy.py'], ['main.py']]
+
+
+def test_long_chain_does_not_recurse():
+    paths = [f"step{i}.py" for i in range(3000)]
+    graph = DependencyGraph.from_records({
+        path: record(f"step{i + 1}" if i + 1 < len(paths) else 'None') for i, path in enumerate(paths)
+    })
+    assert len(graph.waves()) == len(paths)
+    assert graph.critical_path() == paths[::-1]
+
+
+def test_used_by_reverses_the_edge():
+    graph = DependencyGraph.from_records({
+        'main.py': record(),
+        'config.py': record(interactions='Used by main.py to load settings'),
+        'view.py': record(interactions='Reads config.py; used by main.py'),
+    })
+    assert graph.dependencies['main.py'] == {'config.py', 'view.py'}
+    assert graph.dependencies['view.py'] == {'config.py'}
+    assert graph.dependencies['config.py'] == set()
+    assert graph.waves() == [['config.py'], ['view.py'], ['main.py']]
+
+
+def test_ambiguous_name_stays_unresolved():
+    graph = DependencyGraph.from_records({
+        'main.py': record('utils, client.utils'),
+        'client/utils.py': record(),
+        'server/utils.py': record(),
+    })
+    assert graph.dependencies['main.py'] == {'client/utils.py'}
+    assert graph.imports['main.py'] == {'client.utils': 'client/utils.py'}
+
+
+def test_dotted_reference_resolves_to_the_longest_known_prefix():
+    graph = DependencyGraph.from_records({
+        'app.py': record('pkg.mod.Class, pkg.helpers.load'),
+        'pkg/__init__.py': record(),
+        'pkg/mod.py': record(),
+        'pkg/helpers.py': record(),
+    })
+    assert graph.imports['app.py'] == {'pkg.mod': 'pkg/mod.py', 'pkg.helpers': 'pkg/helpers.py'}
+    assert graph.dependencies['app.py'] == {'pkg/mod.py', 'pkg/helpers.py'}
+
+
+def test_package_is_known_by_its_directory():
+    graph = DependencyGraph.from_records({
+        'app.py': record('import pkg'),
+        'pkg/__init__.py': record(),
+    })
+    assert graph.imports['app.py'] == {'pkg': 'pkg/__init__.py'}
+
+
+def test_non_python_files_are_dependencies_but_not_imports():
+    graph = DependencyGraph.from_records({
+        'main.py': record(interactions='Reads settings.json at startup'),
+        'settings.json': record(),
+    })
+    assert graph.dependencies['main.py'] == {'settings.json'}
+    assert graph.imports['main.py'] == {}
+
+
+def test_empty_graph():
+    graph = DependencyGraph.from_records({})
+    assert graph.waves() == [] and graph.critical_path() == [] and graph.cycles() == []
+
+
+def test_module_name_and_interface():
+    assert module_name('core/typing_test.py') == 'core.typing_test'
+    assert module_name('pkg\\__init__.py') == 'pkg'
+    source = "import os\n\nclass Board:\n    pass\n\ndef _helper():\n    pass\n\nasync def run():\n    pass\n"
+    assert module_interface(source) == ['Board', 'run']
+    assert module_interface("def broken(:\n") == []
@@ -0,0 +1,238 @@
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify, request
+
+import app as app_module
+from agents.deadline import DEADLINE_HEADER
+from services import idempotency
+from services.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, IdempotencyStore, KeyReused
+
+
+class Clock:
+    # Stands in for the time module so expiry does not need to sleep
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+
+
+def test_replay_after_completion():
+    store = IdempotencyStore()
+    entry, owner = store.begin('key', 'fingerprint')
+    assert owner and entry.in_progress
+    store.complete(entry, 200, b'{"ok": true}', 'application/json')
+    
+    replayed, owner = store.begin('key', 'fingerprint')
+    assert replayed is entry and not owner and not replayed.in_progress
+    assert replayed.response == (200, b'{"ok": true}', 'application/json')
+    snapshot = store.snapshot()
+    assert (snapshot['executed'], snapshot['replayed'], snapshot['attached'], snapshot['entries']) == (1, 1, 0, 1)
+
+
+def test_attach_while_in_progress():
+    store = IdempotencyStore()
+    entry, _ = store.begin('key', 'fingerprint')
+    attached, owner = store.begin('key', 'fingerprint')
+    assert attached is entry and not owner and attached.in_progress
+    assert not attached.wait(0.01)
+    threading.Timer(0.05, store.complete, (entry, 201, b'done', 'text/plain')).start()
+    assert attached.wait(2)
+    assert attached.response == (201, b'done', 'text/plain') and attached.attached == 1
+    assert store.snapshot()['attached'] == 1
+
+
+def test_different_body_is_rejected():
+    store = IdempotencyStore()
+    store.begin('key', idempotency.request_fingerprint('POST', '/api/plan?', b'{"prompt": "a"}'))
+    with pytest.raises(KeyReused):
+        store.begin('key', idempotency.request_fingerprint('POST', '/api/plan?', b'{"prompt": "b"}'))
+    assert store.snapshot()['mismatched'] == 1
+
+
+@pytest.mark.parametrize('status', [500, 502, 499, 429, 408, 409])
+def test_transient_outcome_releases_the_key(status):
+    store = IdempotencyStore()
+    entry, _ = store.begin('key', 'fingerprint')
+    store.complete(entry, status, b'error', 'application/json')
+    assert not entry.in_progress and entry.response is None
+    assert store.snapshot()['released'] == 1
+    _, owner = store.begin('key', 'fingerprint')
+    assert owner
+
+
+@pytest.mark.parametrize('status', [200, 201, 400, 404, 413, 422])
+def test_final_outcome_is_replayable(status):
+    assert idempotency.is_replayable(status)
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(idempotency, 'time', clock)
+    store = IdempotencyStore(ttl_seconds=60)
+    entry, _ = store.begin('done', 'fingerprint')
+    store.complete(entry, 200, b'ok', 'text/plain')
+    running, _ = store.begin('running', 'fingerprint')
+    
+    clock.now += 59
+    assert not store.begin('done', 'fingerprint')[1]
+    clock.now += 1
+    # The finished outcome expires; the request still running keeps its key
+    _, owner = store.begin('done', 'fingerprint')
+    assert owner
+    assert store.begin('running', 'fingerprint')[0] is running
+    snapshot = store.snapshot()
+    assert snapshot['expired'] == 1 and snapshot['entries'] == 2
+
+
+def test_eviction_keeps_running_requests():
+    store = IdempotencyStore(max_entries=2)
+    running, _ = store.begin('running', 'fingerprint')
+    for key in ('a', 'b'):
+        entry, _ = store.begin(key, 'fingerprint')
+        store.complete(entry, 200, key.encode(), 'text/plain')
+    # 'running' is the oldest entry but only the oldest finished one is dropped
+    assert store.snapshot()['evicted'] == 1
+    assert store.begin('running', 'fingerprint')[0] is running
+    assert not store.begin('b', 'fingerprint')[1]
+    assert store.begin('a', 'fingerprint')[1]
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv('AISA_IDEMPOTENCY_TTL_SECONDS', '90')
+    monkeypatch.setenv('AISA_IDEMPOTENCY_MAX_ENTRIES', '8')
+    store = IdempotencyStore.from_env()
+    assert (store.ttl_seconds, store.max_entries) == (90.0, 8)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = IdempotencyStore()
+    monkeypatch.setattr(app_module, 'idempotency_store', store)
+    return store
+
+
+@pytest.fixture
+def endpoint():
+    # A POST endpoint behind the idempotent decorator, answering with the status it is asked for
+    calls = []
+    gate = threading.Event()
+    gate.set()
+    test_app = Flask(__name__)
+    
+    @test_app.route('/work', methods=['POST'])
+    @app_module.idempotent
+    def work():
+        calls.append(request.get_json())
+        assert gate.wait(5)
+        status = int(request.args.get('status', 200))
+        return jsonify({'call': len(calls)}), status
+    
+    test_app.calls = calls
+    test_app.gate = gate
+    return test_app
+
+
+def post(test_app, key='key-1', body=None, status=200, headers=None):
+    headers = {IDEMPOTENCY_HEADER: key, **(headers or {})} if key is not None else headers
+    return test_app.test_client().post(f"/work?status={status}", json=body or {'prompt': 'a'}, headers=headers)
+
+
+def test_http_replay(store, endpoint):
+    first = post(endpoint)
+    second = post(endpoint)
+    assert first.status_code == second.status_code == 200
+    assert second.get_json() == first.get_json() == {'call': 1}
+    assert REPLAYED_HEADER not in first.headers and second.headers[REPLAYED_HEADER] == 'true'
+    assert len(endpoint.calls) == 1
+
+
+def test_http_without_a_key_always_runs(store, endpoint):
+    post(endpoint, key=None)
+    post(endpoint, key=None)
+    assert len(endpoint.calls) == 2 and store.snapshot()['entries'] == 0
+
+
+def test_http_invalid_key(store, endpoint):
+    assert post(endpoint, key=' ').status_code == 400
+    assert post(endpoint, key='k' * (idempotency.MAX_KEY_LENGTH + 1)).status_code == 400
+    assert not endpoint.calls
+
+
+def test_http_different_body_is_a_422(store, endpoint):
+    post(endpoint, body={'prompt': 'a'})
+    response = post(endpoint, body={'prompt': 'b'})
+    assert response.status_code == 422 and 'key-1' in response.get_json()['error']
+    assert len(endpoint.calls) == 1
+
+
+def test_http_query_string_is_part_of_the_request(store, endpoint):
+    post(endpoint, status=200)
+    assert post(endpoint, status=201).status_code == 422
+
+
+@pytest.mark.parametrize('status', [500, 499, 429])
+def test_http_transient_failure_runs_again(store, endpoint, status):
+    assert post(endpoint, status=status).status_code == status
+    assert store.snapshot()['entries'] == 0
+    # The retry carries the same key and the same request, so it runs the view again
+    assert post(endpoint, status=status).get_json() == {'call': 2}
+    assert store.snapshot()['released'] == 2
+
+
+def test_http_attach_while_in_progress(store, endpoint):
+    endpoint.gate.clear()
+    responses = {}
+    
+    def send(name):
+        responses[name] = post(endpoint)
+    
+    first = threading.Thread(target=send, args=('first',))
+    first.start()
+    deadline = time.monotonic() + 2
+    while not endpoint.calls:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    retry = threading.Thread(target=send, args=('retry',))
+    retry.start()
+    while store.snapshot()['attached'] < 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    endpoint.gate.set()
+    first.join(5)
+    retry.join(5)
+    
+    assert len(endpoint.calls) == 1
+    assert responses['first'].get_json() == responses['retry'].get_json() == {'call': 1}
+    assert responses['retry'].headers[REPLAYED_HEADER] == 'true'
+
+
+def test_http_attached_retry_gives_up_at_its_deadline(store, endpoint):
+    endpoint.gate.clear()
+    first = threading.Thread(target=post, args=(endpoint,))
+    first.start()
+    deadline = time.monotonic() + 2
+    while not endpoint.calls:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    try:
+        response = post(endpoint, headers={DEADLINE_HEADER: '0.1'})
+        assert response.status_code == 504 and response.get_json()['reason'] == 'deadline'
+    finally:
+        endpoint.gate.set()
+        first.join(5)
+    assert len(endpoint.calls) == 1
+
+
+def test_plan_endpoint_releases_the_key_on_a_server_error(store, monkeypatch):
+    # Without a model the plan endpoint answers 500, which a retry must not get replayed
+    monkeypatch.setattr(app_module, 'planning_agent', None)
+    client = app_module.app.test_client()
+    for _ in range(2):
+        response = client.post('/api/plan', json={'prompt': 'A todo app'}, headers={IDEMPOTENCY_HEADER: 'plan-1'})
+        assert response.status_code == 500 and REPLAYED_HEADER not in response.headers
+    snapshot = store.snapshot()
+    assert (snapshot['executed'], snapshot['released'], snapshot['entries']) == (2, 2, 0)
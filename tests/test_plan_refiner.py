@@ -0,0 +1,90 @@
+import pytest
+
+from agents import planning_agent
+from agents.plan_refiner import RefinementError, merge_refinement, parse_model_json, split_breakdown, strip_code_fences
+
+PLAN = {
+    'project_overview': {'name': 'Demo', 'description': 'A demo'},
+    'technical_requirements': {'gui_framework': 'streamlit', 'dependencies': 'streamlit'},
+    'project_structure': {'root_directory': 'demo', 'folders': "demo/\n├── main.py\n└── utils.py"},
+    'file_breakdown': (
+        "Files of the project:\n\n"
+        "demo/main.py:\n- Purpose: Entry point\n- Key Functions: main()\n- Dependencies: utils\n- Interactions: None\n\n"
+        "demo/utils.py:\n- Purpose: Helpers\n- Key Functions: load()\n- Dependencies: None\n- Interactions: None"
+    ),
+}
+
+
+def breakdown_paths(plan):
+    _, sections = split_breakdown(plan['file_breakdown'], 'demo')
+    return [file_path for file_path, _ in sections]
+
+
+def test_added_file():
+    section = "demo/gui.py:\n- Purpose: Window\n- Key Functions: draw()\n- Dependencies: None\n- Interactions: None"
+    refined, changes = merge_refinement(PLAN, {'files': {'gui.py': section}, 'summary': 'Adds a GUI'})
+    assert changes['added'] == ['gui.py'] and not changes['modified'] and not changes['removed']
+    assert changes['summary'] == 'Adds a GUI'
+    assert breakdown_paths(refined) == ['main.py', 'utils.py', 'gui.py']
+    assert refined['file_breakdown'].startswith("Files of the project:")
+    assert PLAN['file_breakdown'].count('gui.py') == 0
+
+
+def test_added_file_without_a_header_gets_one():
+    refined, changes = merge_refinement(PLAN, {'files': {'./demo/cli.py': "- Purpose: Command line\n- Key Functions: run()"}})
+    assert changes['added'] == ['cli.py']
+    assert "cli.py:\n- Purpose: Command line" in refined['file_breakdown']
+
+
+def test_modified_file_strips_the_root_directory():
+    section = "demo/main.py:\n- Purpose: Entry point with a menu\n- Key Functions: main(), menu()"
+    refined, changes = merge_refinement(PLAN, {'files': {'demo/main.py': section}})
+    assert changes['modified'] == ['main.py'] and not changes['added']
+    assert breakdown_paths(refined) == ['main.py', 'utils.py']
+    assert 'menu()' in refined['file_breakdown']
+    
+    _, unchanged = merge_refinement(refined, {'files': {'main.py': section}})
+    assert not unchanged['modified']
+
+
+def test_null_removes_a_file():
+    refined, changes = merge_refinement(PLAN, {'files': {'demo\\utils.py': None, 'missing.py': None}})
+    assert changes['removed'] == ['utils.py']
+    assert breakdown_paths(refined) == ['main.py']
+
+
+def test_sections_are_replaced():
+    overview = {'name': 'Demo', 'description': 'A better demo'}
+    refined, changes = merge_refinement(PLAN, {'sections': {'project_overview': overview,
+                                                             'technical_requirements': PLAN['technical_requirements']}})
+    assert changes['sections'] == ['project_overview']
+    assert refined['project_overview'] == overview
+    assert refined['file_breakdown'] == PLAN['file_breakdown']
+
+
+@pytest.mark.parametrize('delta', [
+    {'sections': {'project_overview': "A string instead of an object"}},
+    {'sections': {'file_breakdown': "Sections only"}},
+    {'sections': ['project_overview']},
+    {'files': {'main.py': 42}},
+    {'files': {'main.py': '   '}},
+])
+def test_deltas_that_do_not_fit_the_plan(delta):
+    with pytest.raises(RefinementError):
+        merge_refinement(PLAN, delta)
+
+
+def test_parse_model_json():
+    assert parse_model_json('```json\n{"summary": "ok"}\n```') == {'summary': 'ok'}
+    assert parse_model_json(' {"files": {}} ') == {'files': {}}
+    with pytest.raises(RefinementError):
+        parse_model_json('```\n["not", "an", "object"]\n```')
+    with pytest.raises(RefinementError):
+        parse_model_json('Sure! Here is the plan')
+
+
+def test_plans_and_refinements_strip_the_same_fences():
+    assert planning_agent.strip_code_fences is strip_code_fences
+    assert strip_code_fences('  ```json\n{"a": 1}\n```  ') == '{"a": 1}'
+    assert strip_code_fences('```\n{"a": 1}```') == '{"a": 1}'
+    assert strip_code_fences('{"a": 1}') == '{"a": 1}'
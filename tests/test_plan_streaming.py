@@ -0,0 +1,57 @@
+import os
+import json
+
+from agents import plan_reader
+from agents.project_generator import ProjectGenerator
+
+
+def write_chain_plan(project_dir, length):
+    # module_0 imports module_1, which imports module_2, ...: one dependency wave per module
+    sections = []
+    for i in range(length):
+        deps = f"pkg.module_{i + 1}" if i + 1 < length else "os"
+        sections.append(f"File: chain/pkg/module_{i}.py\nPurpose: Step {i}\nKey Functions: Step{i} class (run), helper_{i}()\n"
+                        f"Dependencies: {deps}\nInteractions: None\nNotes: {'long notes ' * 20}\n")
+    sections.append("File: chain/README.md\nPurpose: Documentation\nKey Functions: None\nDependencies: None\n"
+                    "Interactions: None\n")
+    plan = {
+        'project_overview': {'name': 'Chain'},
+        'project_structure': {'root_directory': 'chain', 'folders': "chain/\n├── pkg/\n└── README.md"},
+        'file_breakdown': '\n'.join(sections),
+    }
+    os.makedirs(project_dir)
+    with open(os.path.join(project_dir, 'project_plan.json'), 'w', encoding='utf-8') as f:
+        json.dump(plan, f)
+
+
+def generate(project_dir, stream):
+    generator = ProjectGenerator(os.path.dirname(project_dir), console=False)
+    assert generator.generate_project_from_plan(project_dir, use_existing_folder=True, validate=False, stream=stream)
+    files = {}
+    for root, _, names in os.walk(project_dir):
+        for name in names:
+            if name != 'project_plan.json':
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    files[os.path.relpath(os.path.join(root, name), project_dir)] = f.read()
+    return files
+
+
+def test_streamed_generation_reads_the_breakdown_twice_whatever_the_waves(tmp_path, monkeypatch):
+    write_chain_plan(str(tmp_path / 'memory' / 'Chain'), 12)
+    write_chain_plan(str(tmp_path / 'stream' / 'Chain'), 12)
+    reads = []
+    iter_lines = plan_reader.PlanReader.iter_lines
+    
+    def counting_iter_lines(self):
+        reads.append(self.plan_file_path)
+        return iter_lines(self)
+    
+    monkeypatch.setattr(plan_reader.PlanReader, 'iter_lines', counting_iter_lines)
+    in_memory = generate(str(tmp_path / 'memory' / 'Chain'), False)
+    streamed = generate(str(tmp_path / 'stream' / 'Chain'), True)
+    
+    assert len(reads) == 2
+    assert len(streamed) > 13
+    assert streamed == in_memory
+    # Later waves see what earlier ones wrote
+    assert "Uses: pkg.module_1 (Step1, helper_1)" in streamed[os.path.join('pkg', 'module_0.py')]
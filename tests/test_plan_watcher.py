@@ -0,0 +1,22 @@
+import json
+
+from agents.plan_watcher import PlanWatcher
+
+PLAN = {
+    'project_overview': {'name': 'Demo'},
+    'project_structure': {'root_directory': 'demo', 'folders': "demo/\n├── core/\n│   └── game.py\n└── main.py"},
+    'file_breakdown': "File: demo/main.py\nPurpose: Entry point\nKey Functions: main()\nDependencies: None\nInteractions: None\n",
+}
+
+
+def test_regenerations_leave_per_file_lines_out_of_the_log(tmp_path, capsys):
+    project_dir = tmp_path / 'Demo'
+    project_dir.mkdir()
+    (project_dir / 'project_plan.json').write_text(json.dumps(PLAN), encoding='utf-8')
+    watcher = PlanWatcher([str(tmp_path)], use_existing_folder=True, use_inotify=False)
+    
+    assert watcher._generate(str(project_dir))
+    log = capsys.readouterr().out
+    assert (project_dir / 'core' / 'game.py').exists()
+    assert '📄' not in log and '📁 Created directory' not in log
+    assert '✅ Project structure generated successfully' in log
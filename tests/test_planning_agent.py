@@ -0,0 +1,64 @@
+import json
+
+from agents.planning_agent import build_planning_prompt, remove_dropped_files, server_generator
+
+PLAN = {
+    'project_overview': {'name': 'Demo'},
+    'project_structure': {'root_directory': 'demo', 'folders': "demo/\n├── core/\n│   └── game.py\n└── main.py"},
+    'file_breakdown': "File: demo/main.py\nPurpose: Entry point\nKey Functions: main()\nDependencies: None\nInteractions: None\n",
+}
+
+
+def test_server_generations_leave_per_file_lines_out_of_the_log(tmp_path, capsys):
+    project_dir = tmp_path / 'Demo'
+    project_dir.mkdir()
+    (project_dir / 'project_plan.json').write_text(json.dumps(PLAN), encoding='utf-8')
+    events = []
+    generator = server_generator(str(project_dir))
+    generator.listeners.append(events.append)
+    
+    assert generator.generate_project_from_plan(str(project_dir), use_existing_folder=True)
+    log = capsys.readouterr().out
+    assert '📄' not in log and '📁 Created directory' not in log
+    assert '✅ Project structure generated successfully' in log
+    assert {'core/game.py', 'main.py'} <= {event.path for event in events if event.kind == 'file_written'}
+
+
+def write_plan(project_dir, plan):
+    (project_dir / 'project_plan.json').write_text(json.dumps(plan), encoding='utf-8')
+
+
+def test_refinements_only_remove_files_unchanged_since_generation(tmp_path):
+    project_dir = tmp_path / 'Workspace' / 'Demo'
+    project_dir.mkdir(parents=True)
+    sections = {name: f"File: demo/{name}\nPurpose: {name}\nKey Functions: run()\nDependencies: None\nInteractions: None\n"
+                for name in ('utils.py', 'helpers.py')}
+    write_plan(project_dir, dict(PLAN, file_breakdown=PLAN['file_breakdown'] + ''.join(sections.values())))
+    assert server_generator(str(project_dir)).generate_project_from_plan(str(project_dir), use_existing_folder=True)
+    
+    # Edited by hand, written before manifests were kept, and outside the project
+    with open(project_dir / 'helpers.py', 'a', encoding='utf-8') as f:
+        f.write("# edited\n")
+    (project_dir / 'legacy.py').write_text("print('mine')\n", encoding='utf-8')
+    (tmp_path / 'Workspace' / 'outside.py').write_text("print('outside')\n", encoding='utf-8')
+    
+    write_plan(project_dir, PLAN)
+    generator = server_generator(str(project_dir))
+    assert generator.generate_project_from_plan(str(project_dir), use_existing_folder=True)
+    removed = remove_dropped_files(generator, str(project_dir),
+                                   ['utils.py', 'helpers.py', 'legacy.py', 'main.py', '../outside.py', '/etc/hosts'])
+    
+    assert removed == ['utils.py']
+    assert not (project_dir / 'utils.py').exists()
+    assert (project_dir / 'helpers.py').exists() and (project_dir / 'legacy.py').exists()
+    assert (project_dir / 'main.py').exists() and (tmp_path / 'Workspace' / 'outside.py').exists()
+    with open(project_dir / '.aisa_manifest.json', 'r', encoding='utf-8') as f:
+        assert 'utils.py' not in json.load(f)['files']
+
+
+def test_planning_prompt_inserts_the_requirement_once_as_written():
+    requirement = "A todo app with {user_prompt} in its name\n    and an indented second line"
+    prompt = build_planning_prompt(requirement)
+    assert prompt.count(requirement) == 1
+    assert f"USER REQUIREMENT: {requirement}\n" in prompt
+    assert '{{' not in prompt and '"project_overview": {\n' in prompt
@@ -0,0 +1,44 @@
+import os
+import json
+
+from services.retention import INDEX_FILENAME, RetentionPolicy, WorkspaceIndex, WorkspaceRetention
+
+PLAN = {'project_overview': {'name': 'Demo'}, 'project_structure': {'root_directory': 'demo'}}
+
+
+def make_project(workspace, name='Demo'):
+    folder = workspace / name
+    folder.mkdir(parents=True)
+    (folder / 'project_plan.json').write_text(json.dumps(PLAN), encoding='utf-8')
+    (folder / 'main.py').write_text("print('hello')\n", encoding='utf-8')
+
+
+def test_no_index_is_started_without_a_quota(tmp_path):
+    make_project(tmp_path)
+    workspace_retention = WorkspaceRetention(str(tmp_path), RetentionPolicy())
+    workspace_retention.touch('Demo', 'generate', measure=True)
+    workspace_retention.collect_async()
+    assert workspace_retention.gc is None
+    assert not os.path.exists(tmp_path / INDEX_FILENAME)
+
+
+def test_an_existing_index_is_kept_current_without_a_quota(tmp_path):
+    make_project(tmp_path)
+    WorkspaceIndex(str(tmp_path))
+    make_project(tmp_path, 'Other')
+    WorkspaceRetention(str(tmp_path), RetentionPolicy()).touch('Other', 'plan', measure=True)
+    
+    projects = WorkspaceIndex(str(tmp_path)).snapshot()
+    assert sorted(projects) == ['Demo', 'Other']
+    assert projects['Other']['last_reason'] == 'plan'
+
+
+def test_the_index_is_built_on_first_use_with_a_quota(tmp_path):
+    make_project(tmp_path)
+    workspace_retention = WorkspaceRetention(str(tmp_path), RetentionPolicy(max_projects=10))
+    assert not os.path.exists(tmp_path / INDEX_FILENAME)
+    
+    workspace_retention.touch('Demo', 'archive')
+    assert os.path.exists(tmp_path / INDEX_FILENAME)
+    assert workspace_retention.gc.index.snapshot()['Demo']['last_reason'] == 'archive'
+    assert workspace_retention.gc is workspace_retention.gc
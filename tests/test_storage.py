@@ -0,0 +1,227 @@
+import os
+import json
+import hashlib
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+import pytest
+
+from agents.storage import LocalStorage, S3Storage, PLAN_FILENAME, shard_of
+
+PLAN = {'project_overview': {'name': 'Demo'}, 'project_structure': {'root_directory': 'demo'}}
+
+
+class S3StandIn(BaseHTTPRequestHandler):
+    """
+    The part of the S3 API the storage uses, path-style and in memory
+    
+    Listings return PAGE_SIZE keys at a time so the pagination is exercised.
+    """
+    
+    PAGE_SIZE = 2
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _target(self):
+        url = urllib.parse.urlsplit(self.path)
+        bucket, _, key = urllib.parse.unquote(url.path).lstrip('/').partition('/')
+        return bucket, key, dict(urllib.parse.parse_qsl(url.query))
+    
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+    
+    def do_GET(self):
+        bucket, key, query = self._target()
+        if bucket != self.server.bucket:
+            return self._reply(404)
+        if key:
+            if key not in self.server.objects:
+                return self._reply(404)
+            return self._reply(200, self.server.objects[key])
+        self._list(query)
+    
+    def do_HEAD(self):
+        _, key, _ = self._target()
+        self._reply(200 if key in self.server.objects else 404)
+    
+    def do_PUT(self):
+        _, key, _ = self._target()
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.objects[key] = body
+        self._reply(200, headers={'ETag': f'"{hashlib.md5(body).hexdigest()}"'})
+    
+    def do_DELETE(self):
+        _, key, _ = self._target()
+        self.server.objects.pop(key, None)
+        self._reply(204)
+    
+    def _list(self, query):
+        prefix = query.get('prefix', '')
+        delimiter = query.get('delimiter')
+        entries = []
+        for key in sorted(self.server.objects):
+            if not key.startswith(prefix):
+                continue
+            rest = key[len(prefix):]
+            if delimiter and delimiter in rest:
+                common = prefix + rest.split(delimiter, 1)[0] + delimiter
+                if ('prefix', common) not in entries:
+                    entries.append(('prefix', common))
+            else:
+                entries.append(('key', key))
+        start = int(query.get('continuation-token', 0))
+        page = entries[start:start + self.PAGE_SIZE]
+        truncated = start + self.PAGE_SIZE < len(entries)
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">',
+                 f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>"]
+        if truncated:
+            parts.append(f"<NextContinuationToken>{start + self.PAGE_SIZE}</NextContinuationToken>")
+        for kind, name in page:
+            if kind == 'key':
+                etag = hashlib.md5(self.server.objects[name]).hexdigest()
+                parts.append(f"<Contents><Key>{escape(name)}</Key><ETag>&quot;{etag}&quot;</ETag></Contents>")
+            else:
+                parts.append(f"<CommonPrefixes><Prefix>{escape(name)}</Prefix></CommonPrefixes>")
+        parts.append('</ListBucketResult>')
+        self._reply(200, ''.join(parts).encode('utf-8'), {'Content-Type': 'application/xml'})
+
+
+@pytest.fixture
+def s3_endpoint():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), S3StandIn)
+    server.bucket = 'aisa'
+    server.objects = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def node(server, tmp_path, name):
+    return S3Storage('aisa', str(tmp_path / name), endpoint=f"http://127.0.0.1:{server.server_port}", prefix='workspace')
+
+
+def test_plans_and_files_are_shared_between_nodes(s3_endpoint, tmp_path):
+    first = node(s3_endpoint, tmp_path, 'first')
+    second = node(s3_endpoint, tmp_path, 'second')
+    for project_id in ('Demo', 'Other', 'Third'):
+        first.write_plan(project_id, PLAN)
+    assert f"workspace/{shard_of('Demo')}/Demo/{PLAN_FILENAME}" in s3_endpoint.objects
+    
+    # Generated files are uploaded by sync() and only when they changed
+    project_dir = first.project_dir('Demo')
+    os.makedirs(os.path.join(project_dir, 'core'))
+    with open(os.path.join(project_dir, 'core', 'game.py'), 'w', encoding='utf-8') as f:
+        f.write("print('game')\n")
+    assert first.sync('Demo') == 1
+    assert first.sync('Demo') == 0
+    
+    assert second.list_projects() == ['Demo', 'Other', 'Third']
+    assert second.exists('Demo') and not second.exists('Missing')
+    fetched = second.fetch('Demo')
+    with open(os.path.join(fetched, PLAN_FILENAME), 'r', encoding='utf-8') as f:
+        assert json.load(f) == PLAN
+    with open(os.path.join(fetched, 'core', 'game.py'), 'r', encoding='utf-8') as f:
+        assert f.read() == "print('game')\n"
+    assert second.fetch('Missing') is None
+    
+    # Deletions travel both ways
+    os.remove(os.path.join(project_dir, 'core', 'game.py'))
+    assert first.sync('Demo') == 1
+    second.fetch('Demo')
+    assert not os.path.exists(os.path.join(fetched, 'core', 'game.py'))
+    second.delete('Other')
+    assert first.list_projects() == ['Demo', 'Third']
+
+
+def test_fetch_ignores_keys_escaping_the_project(s3_endpoint, tmp_path):
+    first = node(s3_endpoint, tmp_path, 'first')
+    first.write_plan('Demo', PLAN)
+    prefix = f"workspace/{shard_of('Demo')}/Demo/"
+    for key in ('../../../escaped.txt', '../Sibling/file.py', 'core/../../escaped.txt', '/etc/escaped.txt',
+                'core//file.py', 'core\\..\\..\\escaped.txt', 'core/'):
+        s3_endpoint.objects[prefix + key] = b'remote'
+    s3_endpoint.objects[prefix + 'core/safe.py'] = b'safe'
+    
+    second = node(s3_endpoint, tmp_path, 'second')
+    project_dir = second.fetch('Demo')
+    
+    with open(os.path.join(project_dir, 'core', 'safe.py'), 'rb') as f:
+        assert f.read() == b'safe'
+    written = sorted(os.path.relpath(os.path.join(root, name), tmp_path)
+                     for root, _, names in os.walk(tmp_path) for name in names)
+    assert all(path.startswith('second') or path.startswith('first') for path in written)
+    assert not any('escaped' in path for path in written)
+    assert not os.path.exists(os.path.join(os.path.dirname(project_dir), 'Sibling'))
+
+
+def test_fetch_does_not_follow_symlinks_out_of_the_project(s3_endpoint, tmp_path):
+    first = node(s3_endpoint, tmp_path, 'first')
+    first.write_plan('Demo', PLAN)
+    second = node(s3_endpoint, tmp_path, 'second')
+    project_dir = second.fetch('Demo')
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    os.symlink(outside, os.path.join(project_dir, 'link'))
+    
+    s3_endpoint.objects[f"workspace/{shard_of('Demo')}/Demo/link/file.py"] = b'remote'
+    second.fetch('Demo')
+    assert not os.listdir(outside)
+
+
+def test_local_storage_shards_projects(tmp_path):
+    storage = LocalStorage(str(tmp_path), shard_chars=1)
+    project_dir = storage.write_plan('Demo', PLAN)
+    assert project_dir == os.path.join(str(tmp_path), shard_of('Demo', 1), 'Demo')
+    assert storage.list_projects() == ['Demo']
+    with pytest.raises(ValueError):
+        storage.project_dir('../Demo')
+
+
+def test_fetch_keeps_local_writes_that_are_not_synced_yet(s3_endpoint, tmp_path):
+    first = node(s3_endpoint, tmp_path, 'first')
+    project_dir = first.write_plan('Demo', PLAN)
+    
+    # A generation is writing files that sync() only uploads once it ends
+    with open(os.path.join(project_dir, 'main.py'), 'w', encoding='utf-8') as f:
+        f.write("print('new')\n")
+    with open(os.path.join(project_dir, '.aisa_manifest.json'), 'w', encoding='utf-8') as f:
+        f.write('{}')
+    refined = dict(PLAN, project_overview={'name': 'Demo', 'description': 'refined'})
+    with open(os.path.join(project_dir, PLAN_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(refined, f)
+    
+    assert first.fetch('Demo') == project_dir
+    assert sorted(os.listdir(project_dir)) == ['.aisa_manifest.json', '.aisa_synced.json', 'main.py', PLAN_FILENAME]
+    with open(os.path.join(project_dir, PLAN_FILENAME), 'r', encoding='utf-8') as f:
+        assert json.load(f) == refined
+    
+    assert first.sync('Demo') == 3
+    assert not any(key.endswith('.aisa_synced.json') for key in s3_endpoint.objects)
+    second = node(s3_endpoint, tmp_path, 'second')
+    with open(os.path.join(second.fetch('Demo'), 'main.py'), 'r', encoding='utf-8') as f:
+        assert f.read() == "print('new')\n"
+
+
+def test_fetch_picks_up_remote_changes_to_synced_files(s3_endpoint, tmp_path):
+    first = node(s3_endpoint, tmp_path, 'first')
+    second = node(s3_endpoint, tmp_path, 'second')
+    project_dir = first.write_plan('Demo', PLAN)
+    refined = dict(PLAN, project_overview={'name': 'Demo', 'description': 'refined'})
+    second.fetch('Demo')
+    second.write_plan('Demo', refined)
+    
+    first.fetch('Demo')
+    with open(os.path.join(project_dir, PLAN_FILENAME), 'r', encoding='utf-8') as f:
+        assert json.load(f) == refined
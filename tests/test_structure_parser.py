@@ -0,0 +1,60 @@
+import pytest
+
+from agents.structure_parser import parse_folder_tree
+
+
+BOX_4 = """game/
+├── .gitignore
+├── .env
+├── .flake8
+├── .github/
+│   └── workflows/
+│       └── ci.yml
+├── src/
+│   ├── __init__.py
+│   └── main.py
+├── Dockerfile
+└── README.md
+"""
+
+BOX_2 = """game/
+├ .gitignore
+├ .env
+├ .flake8
+├ .github/
+│ └ workflows/
+│   └ ci.yml
+├ src/
+│ ├ __init__.py
+│ └ main.py
+├ Dockerfile
+└ README.md
+"""
+
+EXPECTED_FILES = ['.env', '.flake8', '.github/workflows/ci.yml', '.gitignore', 'Dockerfile', 'README.md',
+                  'src/__init__.py', 'src/main.py']
+
+
+@pytest.mark.parametrize('tree', [BOX_4, BOX_2], ids=['4 columns', '2 columns'])
+def test_dotfiles_are_files(tree):
+    parsed = parse_folder_tree(tree, 'game')
+    assert parsed['dirs'] == ['.github', '.github/workflows', 'src']
+    assert parsed['files'] == EXPECTED_FILES
+
+
+def test_explicit_directories():
+    parsed = parse_folder_tree("project/\n  .venv/\n  docs/\n  data/raw/\n  setup.py\n  .env\n", 'project')
+    assert parsed['dirs'] == ['.venv', 'data', 'data/raw', 'docs']
+    assert parsed['files'] == ['.env', 'setup.py']
+
+
+def test_ascii_tree_and_path_entries():
+    parsed = parse_folder_tree("app\n|-- core\n|   `-- engine.py\n|-- .env.example\n`-- tests/unit/test_engine.py\n", 'app')
+    assert parsed['dirs'] == ['core', 'tests', 'tests/unit']
+    assert parsed['files'] == ['.env.example', 'core/engine.py', 'tests/unit/test_engine.py']
+
+
+def test_childless_names_without_extension_are_directories():
+    parsed = parse_folder_tree("app/\n├── assets\n├── Makefile\n└── main.py\n", 'app')
+    assert parsed['dirs'] == ['assets']
+    assert parsed['files'] == ['Makefile', 'main.py']